@@ -1,10 +1,21 @@
+import json
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 
 from ez_mmdetection import RTMDet
-from ez_mmdetection.schemas.model import ModelName  # New import
+from ez_mmdetection.schemas.dataset import DatasetConfig
+from ez_mmdetection.schemas.model import MODEL_URLS, RTM_DET_CONFIGS, ModelName
+from ez_mmdetection.schemas.sweep import SweepConfig
+from ez_mmdetection.utils.checkpoint import slim_checkpoint
+from ez_mmdetection.utils.compile import print_compile_report
+from ez_mmdetection.utils.converters import convert_yolo_dataset, read_yolo_classes
+from ez_mmdetection.utils.data_check import check_dataset, print_check_report
+from ez_mmdetection.utils.download import pull_checkpoints
+from ez_mmdetection.utils.image_cache import cache_dataset
+from ez_mmdetection.utils.pipeline_bench import print_report, save_report
+from ez_mmdetection.utils.sweep import LEADERBOARD_FILE, print_leaderboard, run_sweep
 
 app = typer.Typer(help="ez_mmdet: A user-friendly CLI for MMDetection")
 
@@ -16,7 +27,9 @@ def train(
         ..., help="Path to the dataset.toml file"
     ),
     epochs: int = typer.Option(100, help="Number of training epochs"),
-    batch_size: int = typer.Option(8, help="Batch size per GPU"),
+    batch_size: str = typer.Option(
+        "8", help="Batch size per GPU, or 'auto' for the largest that fits"
+    ),
     num_workers: int = typer.Option(2, help="Number of dataloader workers"),
     work_dir: str = typer.Option(
         "./runs/train", help="Directory to save logs and checkpoints"
@@ -25,22 +38,166 @@ def train(
     learning_rate: float = typer.Option(0.001, help="Initial learning rate"),
     amp: bool = typer.Option(True, help="Enable Automatic Mixed Precision training"),
     tensorboard: bool = typer.Option(False, help="Enable TensorBoard logging"),
+    reduced_decode: bool = typer.Option(
+        False, help="Decode JPEGs at a DCT-reduced resolution"
+    ),
+    image_cache: bool = typer.Option(
+        True, help="Read images from a 'cache-dataset' store if one exists"
+    ),
+    auto_tune_loader: bool = typer.Option(
+        False, help="Probe the pipeline to choose dataloader workers/prefetch"
+    ),
+    batch_augment: bool = typer.Option(
+        False,
+        help="Run HSV jitter and flips on the batch on the training device "
+        "(after mixup and padding, which changes the augmentation)",
+    ),
+    shared_mix_cache_mb: int = typer.Option(
+        0, help="Shared-memory MB for mosaic/mixup caches shared by all workers"
+    ),
+    launcher: str = typer.Option(
+        "none", help="'ddp' to spawn data-parallel processes (gloo on CPU)"
+    ),
+    nproc_per_node: int = typer.Option(
+        1, help="Processes per node with --launcher ddp"
+    ),
+    nnodes: int = typer.Option(1, help="Number of nodes with --launcher ddp"),
+    node_rank: int = typer.Option(0, help="Rank of this node"),
+    master_addr: str = typer.Option("127.0.0.1", help="Address of node 0"),
+    master_port: int = typer.Option(29500, help="Rendezvous port on node 0"),
+    scale_lr: bool = typer.Option(
+        True, help="Scale the learning rate with the number of processes"
+    ),
+    memory_budget_mb: Optional[int] = typer.Option(
+        None, help="Memory per process for --batch-size auto (default: 85% of free)"
+    ),
+    effective_batch_size: Optional[int] = typer.Option(
+        None, help="Batch per optimizer step for --batch-size auto"
+    ),
+    accumulative_counts: int = typer.Option(
+        1, help="Batches whose gradients are accumulated per optimizer step"
+    ),
+    resume: Optional[str] = typer.Option(
+        None, help="'auto' for the latest checkpoint in work_dir, or a checkpoint path"
+    ),
+    async_checkpoint: bool = typer.Option(
+        False, help="Write checkpoints in a background thread"
+    ),
+    in_memory_eval: bool = typer.Option(
+        True, help="Compute COCO metrics without the JSON dump and reload"
+    ),
+    coco_eval_backend: str = typer.Option(
+        "pycocotools", help="'vectorized' for NumPy-based COCO matching (same results)"
+    ),
+    val_subset_size: Optional[int] = typer.Option(
+        None, help="Validate on a class-stratified subset of this many images"
+    ),
+    full_val_epochs: Optional[List[int]] = typer.Option(
+        None, help="Epoch validated on the full split (repeatable; the last always is)"
+    ),
+    early_stopping_patience: Optional[int] = typer.Option(
+        None, help="Stop after this many validations without improvement"
+    ),
+    early_stopping_metric: str = typer.Option(
+        "coco/bbox_mAP", help="Metric early stopping and the best checkpoint follow"
+    ),
+    early_stopping_min_delta: float = typer.Option(
+        0.001, help="Smallest metric change counted as an improvement"
+    ),
+    early_stopping_min_epochs: int = typer.Option(
+        0, help="Epochs to train before early stopping may stop"
+    ),
+    telemetry: bool = typer.Option(
+        False, help="Record per-iteration phase timings to telemetry.jsonl"
+    ),
+    telemetry_interval: int = typer.Option(50, help="Iterations per telemetry summary"),
+    telemetry_format: str = typer.Option("jsonl", help="'jsonl' or 'csv'"),
+    telemetry_port: Optional[int] = typer.Option(
+        None, help="Serve telemetry for Prometheus on this localhost port"
+    ),
+    compile: bool = typer.Option(
+        False, help="torch.compile the backbone, neck and head forward"
+    ),
+    compile_mode: str = typer.Option(
+        "default", help="'default', 'reduce-overhead' or 'max-autotune'"
+    ),
+    progressive_sizes: Optional[List[int]] = typer.Option(
+        None,
+        "--progressive-size",
+        help="Smaller image size to train the first epochs on (repeatable)",
+    ),
+    progressive_fraction: float = typer.Option(
+        0.5, help="Share of the mosaic-stage epochs trained at the smaller sizes"
+    ),
 ):
     """Starts model training using a dataset configuration."""
+    if batch_size != "auto" and not batch_size.isdigit():
+        raise typer.BadParameter(
+            "must be a positive integer or 'auto'", param_hint="--batch-size"
+        )
     detector = RTMDet(model_name=model_name)
     detector.train(
         dataset_config_path=dataset_config_path,
         epochs=epochs,
-        batch_size=batch_size,
+        batch_size=batch_size if batch_size == "auto" else int(batch_size),
         num_workers=num_workers,
         work_dir=work_dir,
         device=device,
         learning_rate=learning_rate,
         amp=amp,
         enable_tensorboard=tensorboard,
+        reduced_decode=reduced_decode,
+        use_image_cache=image_cache,
+        auto_tune_loader=auto_tune_loader,
+        batch_augment=batch_augment,
+        shared_mix_cache_mb=shared_mix_cache_mb,
+        launcher=launcher,
+        nproc_per_node=nproc_per_node,
+        nnodes=nnodes,
+        node_rank=node_rank,
+        master_addr=master_addr,
+        master_port=master_port,
+        scale_lr=scale_lr,
+        memory_budget_mb=memory_budget_mb,
+        effective_batch_size=effective_batch_size,
+        accumulative_counts=accumulative_counts,
+        resume=resume,
+        async_checkpoint=async_checkpoint,
+        in_memory_eval=in_memory_eval,
+        coco_eval_backend=coco_eval_backend,
+        val_subset_size=val_subset_size,
+        full_val_epochs=full_val_epochs,
+        early_stopping_patience=early_stopping_patience,
+        early_stopping_metric=early_stopping_metric,
+        early_stopping_min_delta=early_stopping_min_delta,
+        early_stopping_min_epochs=early_stopping_min_epochs,
+        telemetry=telemetry,
+        telemetry_interval=telemetry_interval,
+        telemetry_format=telemetry_format,
+        telemetry_port=telemetry_port,
+        compile=compile,
+        compile_mode=compile_mode,
+        progressive_sizes=progressive_sizes,
+        progressive_fraction=progressive_fraction,
     )
 
 
+@app.command()
+def sweep(
+    sweep_config_path: Path = typer.Argument(..., help="Path to the sweep.toml file"),
+    max_parallel: Optional[int] = typer.Option(
+        None, help="Trials run concurrently (overrides sweep.toml)"
+    ),
+):
+    """Runs concurrent training trials over a grid or random search."""
+    config = SweepConfig.from_toml(sweep_config_path)
+    if max_parallel is not None:
+        config.max_parallel = max_parallel
+    leaderboard = run_sweep(config, RTMDet)
+    print_leaderboard(leaderboard, config.metric)
+    typer.echo(f"Leaderboard saved to {Path(config.work_dir) / LEADERBOARD_FILE}")
+
+
 @app.command()
 def predict(
     model_name: ModelName = typer.Argument(..., help="Name of the model architecture"),
@@ -50,6 +207,15 @@ def predict(
         "runs/preds", help="Directory to save visualization results"
     ),
     device: str = typer.Option("cpu", help="Computing device"),
+    reduced_decode: bool = typer.Option(
+        False, help="Decode JPEGs at a DCT-reduced resolution"
+    ),
+    compile: bool = typer.Option(
+        False, help="torch.compile the backbone, neck and head forward"
+    ),
+    compile_mode: str = typer.Option(
+        "default", help="'default', 'reduce-overhead' or 'max-autotune'"
+    ),
 ):
     """Performs object detection on an image."""
     detector = RTMDet(model_name=model_name)
@@ -58,6 +224,210 @@ def predict(
         checkpoint_path=checkpoint_path,
         out_dir=out_dir,
         device=device,
+        reduced_decode=reduced_decode,
+        compile=compile,
+        compile_mode=compile_mode,
+    )
+
+
+@app.command()
+def pull(
+    model_names: Optional[List[ModelName]] = typer.Argument(
+        None, help="Names of the models whose checkpoints to download"
+    ),
+    all_models: bool = typer.Option(
+        False, "--all", help="Download checkpoints for every supported model"
+    ),
+    checkpoint_dir: Path = typer.Option(
+        Path("checkpoints"), help="Directory to link the checkpoints into"
+    ),
+    max_workers: int = typer.Option(4, help="Maximum concurrent downloads"),
+):
+    """Prefetches official model checkpoints concurrently."""
+    names = list(MODEL_URLS) if all_models else [m.value for m in model_names or []]
+    if not names:
+        typer.echo("Specify at least one model name or use --all.", err=True)
+        raise typer.Exit(code=2)
+
+    try:
+        pull_checkpoints(names, checkpoint_dir=checkpoint_dir, max_workers=max_workers)
+    except RuntimeError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def slim(
+    checkpoint_path: Path = typer.Argument(
+        ..., help="Path to the training checkpoint"
+    ),
+    out: Optional[Path] = typer.Option(
+        None, help="Output path (default: <name>_inference.pth)"
+    ),
+    fp16: bool = typer.Option(False, help="Store weights as float16"),
+):
+    """Strips a training checkpoint down to its inference weights."""
+    slim_checkpoint(checkpoint_path, out_path=out, fp16=fp16)
+
+
+
+@app.command("cache-dataset")
+def cache_dataset_cmd(
+    dataset_config_path: Path = typer.Argument(
+        ..., help="Path to the dataset.toml file"
+    ),
+    max_side: int = typer.Option(
+        1280, help="Downscale images so their long side is at most this"
+    ),
+    splits: List[str] = typer.Option(
+        ["train", "val"], "--split", help="Splits to cache (repeatable)"
+    ),
+    num_workers: int = typer.Option(8, help="Number of decoding threads"),
+):
+    """Pre-decodes dataset images into a memory-mapped cache for training."""
+    dataset_cfg = DatasetConfig.from_toml(dataset_config_path)
+    cache_dataset(
+        dataset_cfg, max_side=max_side, splits=splits, num_workers=num_workers
+    )
+
+
+
+@app.command("bench-data")
+def bench_data(
+    model_name: ModelName = typer.Argument(..., help="Name of the model architecture"),
+    dataset_config_path: Path = typer.Argument(
+        ..., help="Path to the dataset.toml file"
+    ),
+    num_samples: int = typer.Option(200, help="Samples per run"),
+    workers: List[int] = typer.Option(
+        [0, 2, 4], "--workers", help="Dataloader worker counts to run (repeatable)"
+    ),
+    stage2: bool = typer.Option(
+        False, help="Profile the stage-2 pipeline instead of the main one"
+    ),
+    allocations: bool = typer.Option(
+        True, help="Add a tracemalloc pass for per-transform peak allocations"
+    ),
+    reduced_decode: bool = typer.Option(
+        False, help="Decode JPEGs at a DCT-reduced resolution"
+    ),
+    image_cache: bool = typer.Option(
+        True, help="Read images from a 'cache-dataset' store if one exists"
+    ),
+    json_out: Optional[Path] = typer.Option(
+        None, help="Also write the report as JSON (for regression tracking)"
+    ),
+):
+    """Profiles the training data pipeline transform by transform."""
+    detector = RTMDet(model_name=model_name)
+    report = detector.bench_data(
+        dataset_config_path,
+        num_samples=num_samples,
+        worker_counts=workers,
+        stage2=stage2,
+        track_allocations=allocations,
+        reduced_decode=reduced_decode,
+        use_image_cache=image_cache,
+    )
+    print_report(report)
+    if json_out:
+        save_report(report, json_out)
+        typer.echo(f"Report written to {json_out}")
+
+
+@app.command("bench-compile")
+def bench_compile(
+    model_names: Optional[List[ModelName]] = typer.Argument(
+        None, help="Models to benchmark (default: every RTMDet detector)"
+    ),
+    device: str = typer.Option("cpu", help="Computing device"),
+    image_size: int = typer.Option(640, help="Side of the square input images"),
+    batch_size: int = typer.Option(1, help="Images per forward"),
+    mode: str = typer.Option(
+        "default", help="'default', 'reduce-overhead' or 'max-autotune'"
+    ),
+    iters: int = typer.Option(10, help="Timed forwards per variant"),
+    json_out: Optional[Path] = typer.Option(
+        None, help="Also write the results as JSON"
+    ),
+):
+    """Times each model's forward eagerly and with torch.compile."""
+    names = [m.value for m in model_names or []] or list(RTM_DET_CONFIGS)
+    results = [
+        RTMDet(model_name=name).bench_compile(
+            device=device,
+            image_size=image_size,
+            batch_size=batch_size,
+            mode=mode,
+            iters=iters,
+        )
+        for name in names
+    ]
+    print_compile_report(results)
+    if json_out:
+        json_out.parent.mkdir(parents=True, exist_ok=True)
+        json_out.write_text(json.dumps(results, indent=2))
+        typer.echo(f"Results written to {json_out}")
+
+
+@app.command("check-data")
+def check_data(
+    dataset_config_path: Path = typer.Argument(
+        ..., help="Path to the dataset.toml file"
+    ),
+    splits: List[str] = typer.Option(
+        ["train", "val"], "--split", help="Splits to check (repeatable)"
+    ),
+    num_threads: int = typer.Option(16, help="Number of header-reading threads"),
+    verify_decode: bool = typer.Option(
+        False, help="Fully decode every image (slower; catches truncated files)"
+    ),
+    json_out: Optional[Path] = typer.Option(
+        None, help="Also write the full list of issues as JSON"
+    ),
+):
+    """Validates images and annotations and writes an image-size index."""
+    dataset_cfg = DatasetConfig.from_toml(dataset_config_path)
+    reports = check_dataset(
+        dataset_cfg,
+        splits=splits,
+        num_threads=num_threads,
+        verify_decode=verify_decode,
+    )
+    print_check_report(reports)
+    if json_out:
+        save_report(reports, json_out)
+        typer.echo(f"Report written to {json_out}")
+    if any(report["num_issues"] for report in reports.values()):
+        raise typer.Exit(code=1)
+
+
+@app.command("convert-yolo")
+def convert_yolo(
+    yolo_root: Path = typer.Argument(
+        ..., help="YOLO dataset root (with images/<split> and labels/<split>)"
+    ),
+    classes_file: Optional[Path] = typer.Option(
+        None, help="data.yaml or classes.txt (default: found in the root)"
+    ),
+    splits: List[str] = typer.Option(
+        ["train", "val", "test"], "--split", help="Splits to convert (repeatable)"
+    ),
+    out: Optional[Path] = typer.Option(
+        None, help="Output dataset.toml (default: <yolo_root>/dataset.toml)"
+    ),
+    num_workers: Optional[int] = typer.Option(
+        None, help="Worker processes (default: CPU count)"
+    ),
+):
+    """Converts a YOLO dataset to COCO annotations and writes dataset.toml."""
+    classes = read_yolo_classes(classes_file) if classes_file else None
+    convert_yolo_dataset(
+        yolo_root,
+        classes=classes,
+        splits=splits,
+        out_toml=out,
+        num_workers=num_workers,
     )
 
 
@@ -1,23 +1,49 @@
+import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional, Union
+from typing import List, Optional, Sequence, Union
 
+import torch
 from loguru import logger
 from mmdet.apis import DetInferencer
 from mmdet.utils import register_all_modules
 from mmengine.config import Config
-from mmengine.runner import Runner
+from mmengine.runner import Runner, find_latest_checkpoint, load_checkpoint
 
+import ez_mmdetection.engine  # noqa: F401  (registers custom hooks and loops)
+import ez_mmdetection.evaluation  # noqa: F401  (registers custom metrics)
 from ez_mmdetection.core.config_loader import get_config_file
-from ez_mmdetection.core.handlers import DataloaderHandler, RuntimeHandler
+from ez_mmdetection.core.handlers import (
+    DataloaderHandler,
+    DistributedHandler,
+    RuntimeHandler,
+)
+from ez_mmdetection.datasets.transforms import enable_reduced_decode
 from ez_mmdetection.schemas.dataset import DatasetConfig
 from ez_mmdetection.schemas.inference import InferenceResult
 from ez_mmdetection.schemas.model import ModelName
+from ez_mmdetection.utils.batch_tuning import (
+    DEFAULT_BUDGET_FRACTION,
+    available_memory_bytes,
+    find_batch_size,
+    split_effective_batch,
+)
+from ez_mmdetection.utils.cache import get_cache_dir
+from ez_mmdetection.utils.checkpoint import slim_checkpoint
+from ez_mmdetection.utils.compile import (
+    benchmark_compile,
+    compile_cache_dir,
+    compile_detector,
+)
+from ez_mmdetection.utils.distributed import launch_workers
 from ez_mmdetection.utils.download import ensure_model_checkpoint
+from ez_mmdetection.utils.loader_tuning import tune_dataloader, worker_candidates
+from ez_mmdetection.utils.pipeline_bench import benchmark_pipeline
 from ez_mmdetection.utils.toml_config import (
     DataSection,
     ModelSection,
     TrainingSection,
+    TrialSection,
     UserConfig,
     save_user_config,
 )
@@ -56,6 +82,9 @@ class EZMMDetector(ABC):
         self.log_level: str = log_level
         self._cfg: Optional[Config] = None
         self._inferencer: Optional[DetInferencer] = None
+        # Pipeline options the cached inferencer was built with
+        self._inferencer_options: Optional[dict] = None
+        self._work_dir: Optional[Path] = None
 
         # Resolve or download checkpoint
         self.checkpoint_path = ensure_model_checkpoint(
@@ -71,6 +100,12 @@ class EZMMDetector(ABC):
         except Exception as e:
             logger.warning(f"Failed to set log level: {e}")
 
+    def __getstate__(self) -> dict:
+        """Drops the inferencer; detectors are pickled into 'ddp' processes."""
+        state = self.__dict__.copy()
+        state["_inferencer"] = None
+        return state
+
     def predict(
         self,
         image_path: Union[str, Path],
@@ -78,6 +113,10 @@ class EZMMDetector(ABC):
         device: str = "cuda",
         out_dir: Optional[str] = None,
         show: bool = False,
+        reduced_decode: bool = False,
+        jpeg_backend: str = "cv2",
+        compile: bool = False,
+        compile_mode: str = "default",
     ) -> InferenceResult:
         """Performs object detection on an image.
 
@@ -87,6 +126,17 @@ class EZMMDetector(ABC):
             device: Computing device (default: 'cuda').
             out_dir: Directory to save visualization results.
             show: Whether to display the image.
+            reduced_decode: Whether to decode JPEGs at 1/2, 1/4 or 1/8 size
+                when that still covers the model input size. Boxes are
+                returned in original image coordinates. Changing it between
+                calls rebuilds the inferencer.
+            jpeg_backend: Reduced decode backend ('cv2' or 'turbojpeg').
+            compile: Whether to `torch.compile` the backbone, neck and head
+                forward; box decoding and NMS stay eager. Kernels are cached
+                under the ez_mmdet cache directory. The first images of each
+                input size are slower while compiling. Changing it between
+                calls rebuilds the inferencer.
+            compile_mode: 'default', 'reduce-overhead' or 'max-autotune'.
 
         Returns:
             A structured InferenceResult object.
@@ -98,7 +148,13 @@ class EZMMDetector(ABC):
                 self.model_name, checkpoint_path
             )
 
-        if self._inferencer is None:
+        options = dict(
+            reduced_decode=reduced_decode,
+            jpeg_backend=jpeg_backend,
+            compile=compile,
+            compile_mode=compile_mode,
+        )
+        if self._inferencer is None or options != self._inferencer_options:
             # Resolve model name to config file path
             config_path = get_config_file(self.model_name)
             logger.info(
@@ -109,6 +165,15 @@ class EZMMDetector(ABC):
                 weights=str(target_checkpoint),
                 device=device,
             )
+            if reduced_decode:
+                enable_reduced_decode(self._inferencer.pipeline, jpeg_backend)
+            if compile:
+                compile_detector(
+                    self._inferencer.model,
+                    mode=compile_mode,
+                    cache_dir=compile_cache_dir(get_cache_dir() / "compile"),
+                )
+            self._inferencer_options = options
 
         logger.info(f"Running inference on: {image_path}")
         # Ensure out_dir is not None, as DetInferencer expects a string or PathLike
@@ -121,7 +186,7 @@ class EZMMDetector(ABC):
         self,
         dataset_config_path: Union[str, Path],
         epochs: int = 100,
-        batch_size: int = 8,
+        batch_size: Union[int, str] = 8,
         device: str = "cuda",
         work_dir: str = "./runs/train",
         learning_rate: float = 0.001,
@@ -130,26 +195,340 @@ class EZMMDetector(ABC):
         enable_tensorboard: bool = False,
         load_from: Optional[str] = None,
         log_level: Optional[str] = None,
+        reduced_decode: bool = False,
+        jpeg_backend: str = "cv2",
+        use_image_cache: bool = True,
+        auto_tune_loader: bool = False,
+        batch_augment: bool = False,
+        shared_mix_cache_mb: int = 0,
+        launcher: str = "none",
+        nproc_per_node: int = 1,
+        nnodes: int = 1,
+        node_rank: int = 0,
+        master_addr: str = "127.0.0.1",
+        master_port: int = 29500,
+        scale_lr: bool = True,
+        memory_budget_mb: Optional[int] = None,
+        effective_batch_size: Optional[int] = None,
+        accumulative_counts: int = 1,
+        resume: Optional[str] = None,
+        async_checkpoint: bool = False,
+        in_memory_eval: bool = True,
+        coco_eval_backend: str = "pycocotools",
+        val_subset_size: Optional[int] = None,
+        full_val_epochs: Optional[List[int]] = None,
+        early_stopping_patience: Optional[int] = None,
+        early_stopping_metric: str = "coco/bbox_mAP",
+        early_stopping_min_delta: float = 0.001,
+        early_stopping_min_epochs: int = 0,
+        telemetry: bool = False,
+        telemetry_interval: int = 50,
+        telemetry_format: str = "jsonl",
+        telemetry_port: Optional[int] = None,
+        compile: bool = False,
+        compile_mode: str = "default",
+        progressive_sizes: Optional[List[int]] = None,
+        progressive_fraction: float = 0.5,
     ) -> None:
         """The Template Method defining the training workflow.
 
         Args:
             dataset_config_path: Path to the dataset.toml file.
             epochs: Number of training epochs.
-            batch_size: Batch size per GPU.
+            batch_size: Batch size per GPU (or process), or 'auto' to probe
+                synthetic training steps for the largest batch that fits in
+                `memory_budget_mb`.
             device: Training device ('cuda' or 'cpu').
             work_dir: Directory to save logs and checkpoints.
             learning_rate: Base learning rate.
-            load_from: Optional checkpoint to resume from. Defaults to instance checkpoint.
+            load_from: Optional checkpoint whose weights to start from.
+                Defaults to instance checkpoint.
             log_level: Logging level. Defaults to instance log_level.
             amp: Whether to enable Automatic Mixed Precision training. Defaults to True.
             num_workers: Number of dataloader workers. Defaults to 2.
             enable_tensorboard: Whether to enable TensorBoard logging. Defaults to True.
+            reduced_decode: Whether to decode JPEGs at a DCT-reduced size chosen
+                from each pipeline's resize target. Defaults to False.
+            jpeg_backend: Reduced decode backend ('cv2' or 'turbojpeg').
+            use_image_cache: Whether to read images from an
+                `ez-mmdet cache-dataset` store when a current one exists.
+                Defaults to True.
+            auto_tune_loader: Whether to probe the train pipeline and model
+                before training and choose `num_workers`/`prefetch_factor`
+                so data loading is not the bottleneck. With `launcher='ddp'`
+                the probe runs once, before the processes are spawned, and
+                splits the node's cores between them. Defaults to False.
+            batch_augment: Whether to move HSV jitter and flips out of the
+                dataloader workers into batched ops on the training device.
+                They then run after mixup and padding, so both images of a
+                mixup pair share one HSV gain and flip, and pad borders are
+                jittered and flipped. Defaults to False.
+            shared_mix_cache_mb: Shared-memory budget (MB) for mosaic and
+                mixup caches read by all dataloader workers. 0 keeps a
+                private cache per worker. Defaults to 0.
+            launcher: 'ddp' spawns `nproc_per_node` data-parallel processes
+                (gloo on the CPU, NCCL on CUDA); 'none' trains in this
+                process. Defaults to 'none'.
+            nproc_per_node: Processes on this node. Defaults to 1.
+            nnodes: Number of nodes, each calling `train()` with its own
+                `node_rank`. Defaults to 1.
+            node_rank: Rank of this node. Defaults to 0.
+            master_addr: Address of node 0. Defaults to '127.0.0.1'.
+            master_port: Rendezvous port on node 0. Defaults to 29500.
+            scale_lr: Whether to multiply `learning_rate` (meant for one
+                process's batch) by the number of processes. Defaults to True.
+            memory_budget_mb: Memory a training process may use with
+                `batch_size='auto'` (RSS on the CPU). Defaults to 85% of the
+                free memory, shared by the processes of a CPU node.
+            effective_batch_size: With `batch_size='auto'`, the batch per
+                optimizer step. Batches that do not fit are split, with their
+                gradients accumulated. Defaults to the probed batch size.
+            accumulative_counts: Batches whose gradients are accumulated per
+                optimizer step. Iteration-based LR schedules are stretched to
+                match. Defaults to 1.
+            resume: 'auto' to resume from the latest checkpoint in
+                `work_dir` if there is one, or the path of a checkpoint to
+                resume. Restores the optimizer, LR schedulers, EMA weights
+                and epoch, unlike `load_from`. Defaults to None.
+            async_checkpoint: Whether to write checkpoints in a background
+                thread from a CPU snapshot instead of pausing training.
+                Defaults to False.
+            in_memory_eval: Whether to compute COCO metrics from the results
+                in memory rather than through JSON files written and read
+                back. The metrics are identical. Defaults to True.
+            coco_eval_backend: 'vectorized' matches detections and
+                accumulates COCO metrics with NumPy array operations instead
+                of pycocotools' Python loops, with identical results.
+                Requires `in_memory_eval`. Defaults to 'pycocotools'.
+            val_subset_size: Number of validation images, picked so each
+                class keeps its share, to validate on between full
+                validations. The selection is cached per split. Subset
+                metrics are logged as 'subset/...' and do not count for the
+                best checkpoint or early stopping. Defaults to None (always
+                the full split).
+            full_val_epochs: Epochs after which the full split is validated
+                with `val_subset_size`; the last epoch always is. Defaults to
+                None.
+            early_stopping_patience: Stops training once
+                `early_stopping_metric` has not improved over this many
+                validations, keeping the best checkpoint and writing the
+                reason to `early_stopping.json` in `work_dir`. Defaults to
+                None (no early stopping).
+            early_stopping_metric: Validation metric early stopping and the
+                best checkpoint follow. Defaults to 'coco/bbox_mAP'.
+            early_stopping_min_delta: Smallest change of the metric that
+                counts as an improvement. Defaults to 0.001, the precision
+                COCO metrics are rounded to.
+            early_stopping_min_epochs: Epochs to train before early stopping
+                may stop. Defaults to 0.
+            telemetry: Whether to time the phases of every training
+                iteration (data wait, preprocessing, forward, loss, backward,
+                optimizer step, EMA and hooks) into `telemetry.jsonl` in the
+                log dir, with periodic p50/p95 and images/s summaries.
+                Defaults to False.
+            telemetry_interval: Iterations per telemetry summary.
+                Defaults to 50.
+            telemetry_format: 'jsonl' or 'csv'. Defaults to 'jsonl'.
+            telemetry_port: Port on localhost serving the latest summary in
+                the Prometheus text format. Defaults to None (no endpoint).
+            compile: Whether to `torch.compile` the backbone, neck and head
+                forward; target assignment and losses stay eager. Kernels
+                are cached in `compile_cache` in `work_dir`. Defaults to
+                False.
+            compile_mode: 'default', 'reduce-overhead' or 'max-autotune'.
+                Defaults to 'default'.
+            progressive_sizes: Smaller image sizes, multiples of 32, to
+                train the first epochs on, e.g. [320, 480] for a 640
+                model. Mosaic canvases, crops and padding are scaled down,
+                and each size trains an equal share of
+                `progressive_fraction` of the mosaic-stage epochs before the
+                full size. Defaults to None (full size throughout).
+            progressive_fraction: Share of the mosaic-stage epochs trained
+                at `progressive_sizes`. Defaults to 0.5.
         """
         target_log_level = log_level or self.log_level
         # Use provided load_from or the one from initialization
         final_load_from = load_from or str(self.checkpoint_path)
 
+        training = TrainingSection(
+            epochs=epochs,
+            batch_size=batch_size,
+            learning_rate=learning_rate,
+            device=device,
+            work_dir=work_dir,
+            log_level=target_log_level,
+            amp=amp,
+            num_workers=num_workers,
+            enable_tensorboard=enable_tensorboard,
+            reduced_decode=reduced_decode,
+            jpeg_backend=jpeg_backend,
+            use_image_cache=use_image_cache,
+            auto_tune_loader=auto_tune_loader,
+            batch_augment=batch_augment,
+            shared_mix_cache_mb=shared_mix_cache_mb,
+            launcher=launcher,
+            nproc_per_node=nproc_per_node,
+            nnodes=nnodes,
+            node_rank=node_rank,
+            master_addr=master_addr,
+            master_port=master_port,
+            scale_lr=scale_lr,
+            memory_budget_mb=memory_budget_mb,
+            effective_batch_size=effective_batch_size,
+            accumulative_counts=accumulative_counts,
+            resume=resume,
+            async_checkpoint=async_checkpoint,
+            in_memory_eval=in_memory_eval,
+            coco_eval_backend=coco_eval_backend,
+            val_subset_size=val_subset_size,
+            full_val_epochs=full_val_epochs or [],
+            early_stopping_patience=early_stopping_patience,
+            early_stopping_metric=early_stopping_metric,
+            early_stopping_min_delta=early_stopping_min_delta,
+            early_stopping_min_epochs=early_stopping_min_epochs,
+            telemetry=telemetry,
+            telemetry_interval=telemetry_interval,
+            telemetry_format=telemetry_format,
+            telemetry_port=telemetry_port,
+            compile=compile,
+            compile_mode=compile_mode,
+            progressive_sizes=progressive_sizes or [],
+            progressive_fraction=progressive_fraction,
+        )
+        user_config = self._build_user_config(
+            dataset_config_path, training, load_from=final_load_from
+        )
+
+        self._run_training_workflow(user_config)
+
+    def train_trial(
+        self,
+        dataset_config_path: Union[str, Path],
+        training: TrainingSection,
+        trial: TrialSection,
+    ) -> None:
+        """Trains one trial of a sweep (see `ez_mmdetection.utils.sweep`).
+
+        Args:
+            dataset_config_path: Path to the dataset.toml file.
+            training: The trial's training options.
+            trial: How the trial reports its validation metric and is pruned.
+        """
+        user_config = self._build_user_config(
+            dataset_config_path, training, load_from=str(self.checkpoint_path)
+        )
+        user_config.trial = trial
+        self._run_training_workflow(user_config)
+
+    def build_train_config(
+        self, dataset_config_path: Union[str, Path], **training_options
+    ) -> Config:
+        """Builds the MMDetection config `train()` would run, without training.
+
+        Args:
+            dataset_config_path: Path to the dataset.toml file.
+            **training_options: `TrainingSection` fields such as `batch_size`
+                or `reduced_decode`.
+
+        Returns:
+            The fully configured MMDetection config.
+        """
+        training_options.setdefault("log_level", self.log_level)
+        user_config = self._build_user_config(
+            dataset_config_path,
+            TrainingSection(**training_options),
+            load_from=str(self.checkpoint_path),
+        )
+        self._build_mmdet_config(user_config)
+        return self._cfg
+
+    def bench_data(
+        self,
+        dataset_config_path: Union[str, Path],
+        num_samples: int = 200,
+        worker_counts: Sequence[int] = (0, 2, 4),
+        stage2: bool = False,
+        track_allocations: bool = True,
+        **training_options,
+    ) -> dict:
+        """Profiles the train pipeline `train()` would use, per transform.
+
+        Args:
+            dataset_config_path: Path to the dataset.toml file.
+            num_samples: Samples per run.
+            worker_counts: Dataloader worker counts to run with.
+            stage2: Profile the pipeline `PipelineSwitchHook` switches to.
+            track_allocations: Whether to add a `tracemalloc` pass.
+            **training_options: `TrainingSection` fields such as
+                `reduced_decode`.
+
+        Returns:
+            The report from `benchmark_pipeline`.
+        """
+        from mmdet.registry import DATASETS
+
+        cfg = self.build_train_config(dataset_config_path, **training_options)
+        dataset_cfg = cfg.train_dataloader.dataset.copy()
+        if stage2:
+            switch = [
+                h for h in cfg.get("custom_hooks", [])
+                if h.get("type") == "PipelineSwitchHook"
+            ]
+            if not switch:
+                raise ValueError(f"{self.model_name} has no stage-2 pipeline.")
+            dataset_cfg.pipeline = switch[0].switch_pipeline
+
+        dataset = DATASETS.build(dataset_cfg)
+        return benchmark_pipeline(
+            dataset,
+            num_samples=num_samples,
+            worker_counts=worker_counts,
+            track_allocations=track_allocations,
+        )
+
+    def bench_compile(
+        self,
+        device: str = "cpu",
+        image_size: int = 640,
+        batch_size: int = 1,
+        mode: str = "default",
+        iters: int = 10,
+    ) -> dict:
+        """Times the backbone, neck and head forward eagerly, then compiled.
+
+        Args:
+            device: Device to run on.
+            image_size: Side of the square random input images.
+            batch_size: Images per forward.
+            mode: `torch.compile` mode.
+            iters: Timed forwards of each variant.
+
+        Returns:
+            The result of `benchmark_compile`, with the model name.
+        """
+        from mmdet.registry import MODELS
+
+        cfg = self._load_base_config(self.model_name)
+        model = MODELS.build(cfg.model)
+        load_checkpoint(model, str(self.checkpoint_path), map_location="cpu")
+        model.to(device)
+        inputs = torch.rand(batch_size, 3, image_size, image_size, device=device)
+        result = benchmark_compile(
+            model,
+            inputs,
+            mode=mode,
+            iters=iters,
+            cache_dir=compile_cache_dir(get_cache_dir() / "compile"),
+        )
+        return dict(model=self.model_name, device=device, **result)
+
+    def _build_user_config(
+        self,
+        dataset_config_path: Union[str, Path],
+        training: TrainingSection,
+        load_from: Optional[str] = None,
+    ) -> UserConfig:
+        """Combines a dataset.toml with training options into a UserConfig."""
         logger.info(
             f"Loading dataset configuration from: {dataset_config_path}"
         )
@@ -160,11 +539,11 @@ class EZMMDetector(ABC):
             len(dataset_cfg.classes) if dataset_cfg.classes else 80
         )
 
-        user_config = UserConfig(
+        return UserConfig(
             model=ModelSection(
                 name=self.model_name,
                 num_classes=self.num_classes,
-                load_from=final_load_from,
+                load_from=load_from,
             ),
             data=DataSection(
                 root=str(dataset_cfg.data_root),
@@ -178,48 +557,175 @@ class EZMMDetector(ABC):
                 test_img=dataset_cfg.test.img_dir
                 if dataset_cfg.test
                 else None,
+                train_format=dataset_cfg.train.format,
+                val_format=dataset_cfg.val.format,
                 classes=self.classes,
             ),
-            training=TrainingSection(
-                epochs=epochs,
-                batch_size=batch_size,
-                learning_rate=learning_rate,
-                device=device,
-                work_dir=work_dir,
-                log_level=target_log_level,
-                amp=amp,
-                num_workers=num_workers,
-                enable_tensorboard=enable_tensorboard,
-            ),
+            training=training,
         )
 
-        self._run_training_workflow(user_config)
+    def _build_mmdet_config(self, config: UserConfig) -> None:
+        """Loads the base config and applies all overrides to `self._cfg`.
+
+        `batch_size='auto'` is resolved first (see `_find_batch_size`).
+        """
+        if config.training.batch_size == "auto":
+            self._find_batch_size(config)
+        self._configure(config)
+
+    def _configure(self, config: UserConfig) -> None:
+        """Loads the base config into `self._cfg` and applies the overrides."""
+        self._cfg = self._load_base_config(config.model.name)
+        self._apply_common_overrides(config)
+
+        logger.info(
+            f"Configuring architecture specifics for {self.__class__.__name__}..."
+        )
+        self._configure_model_specifics(config)
 
     def _run_training_workflow(self, config: UserConfig) -> None:
         """Orchestrates the internal MMDetection setup and execution."""
         # 1. Reproducibility: Save the effective config
         work_dir = Path(config.training.work_dir)
         work_dir.mkdir(parents=True, exist_ok=True)
+        self._work_dir = work_dir
         save_user_config(config, work_dir / "user_config.toml")
         logger.info(
             f"User configuration saved to: {work_dir / 'user_config.toml'}"
         )
 
-        # 2. Load and Apply Overrides
-        self._cfg = self._load_base_config(config.model.name)
-        self._apply_common_overrides(config)
+        training = config.training
+        # Resolved once here rather than in every spawned process: concurrent
+        # probes compete for the same cores and can disagree between ranks
+        auto_batch_size = training.batch_size == "auto"
+        if auto_batch_size:
+            self._find_batch_size(config)
+        if training.auto_tune_loader:
+            self._configure(config)
+            self._tune_dataloader(config)
+        if auto_batch_size or training.auto_tune_loader:
+            save_user_config(config, work_dir / "user_config.toml")
+
+        if training.launcher == "ddp":
+            logger.info(
+                f"Spawning {training.nproc_per_node} training processes on node "
+                f"{training.node_rank} of {training.nnodes} "
+                f"(master {training.master_addr}:{training.master_port})"
+            )
+            launch_workers(
+                self._train_process,
+                args=(config,),
+                nproc_per_node=training.nproc_per_node,
+                nnodes=training.nnodes,
+                node_rank=training.node_rank,
+                master_addr=training.master_addr,
+                master_port=training.master_port,
+                device=training.device,
+            )
+        else:
+            self._train_process(config)
 
-        # 3. Architecture Specifics (Template Method Gap)
-        logger.info(
-            f"Configuring architecture specifics for {self.__class__.__name__}..."
-        )
-        self._configure_model_specifics(config)
+    def _train_process(self, config: UserConfig) -> None:
+        """Builds the config and runs the Runner in this process."""
+        # 2. Load the base config and apply overrides, incl. architecture
+        # specifics (Template Method Gap)
+        self._build_mmdet_config(config)
 
         # 4. Execute Runner
         logger.info("Starting MMEngine Runner...")
         runner = Runner.from_cfg(self._cfg)
         runner.train()
 
+    def _find_batch_size(self, config: UserConfig) -> None:
+        """Resolves `batch_size='auto'` in `config` by probing training steps.
+
+        The probes run the model, optimizer and train pipeline of a config
+        built with a batch of 1, which do not depend on the batch size.
+        """
+        training = config.training
+        probe_config = config.model_copy(deep=True)
+        probe_config.training.batch_size = 1
+        self._configure(probe_config)
+        budget = (
+            training.memory_budget_mb * 2**20 if training.memory_budget_mb else None
+        )
+        if budget is None and training.launcher == "ddp" and training.device == "cpu":
+            # The processes of a node share its memory
+            budget = int(
+                available_memory_bytes("cpu")
+                * DEFAULT_BUDGET_FRACTION
+                / training.nproc_per_node
+            )
+        batch_size = find_batch_size(
+            self._cfg,
+            num_classes=self.num_classes,
+            device=training.device,
+            amp=training.amp,
+            budget=budget,
+            max_batch_size=training.effective_batch_size or 256,
+        )
+        if training.effective_batch_size:
+            batch_size, training.accumulative_counts = split_effective_batch(
+                training.effective_batch_size, batch_size
+            )
+            logger.info(
+                f"Effective batch {training.effective_batch_size}: batch_size="
+                f"{batch_size} x accumulative_counts={training.accumulative_counts}"
+            )
+        training.batch_size = batch_size
+
+    def _tune_dataloader(self, config: UserConfig) -> None:
+        """Chooses loader workers/prefetch from a probe of the final config."""
+        training = config.training
+        logger.info("Probing data pipeline and model to tune the dataloader...")
+        candidates = None
+        if training.launcher == "ddp":
+            # The processes of a node share its cores
+            cpus = (os.cpu_count() or 1) // training.nproc_per_node
+            candidates = worker_candidates(max(1, cpus))
+        num_workers, prefetch_factor = tune_dataloader(
+            self._cfg,
+            batch_size=training.batch_size,
+            device=training.device,
+            amp=training.amp,
+            candidates=candidates,
+        )
+        training.num_workers = num_workers
+        training.prefetch_factor = prefetch_factor
+        for key in ["train_dataloader", "val_dataloader", "test_dataloader"]:
+            if hasattr(self._cfg, key):
+                DataloaderHandler.apply_worker_settings(
+                    getattr(self._cfg, key), training
+                )
+
+    def save_inference_checkpoint(
+        self,
+        out_path: Optional[Union[str, Path]] = None,
+        checkpoint_path: Optional[Union[str, Path]] = None,
+        fp16: bool = False,
+    ) -> Path:
+        """Saves an inference-only checkpoint (EMA weights + dataset_meta).
+
+        Args:
+            out_path: Destination path. Defaults to '<name>_inference.pth'
+                next to the source checkpoint.
+            checkpoint_path: Source checkpoint. Defaults to the latest
+                checkpoint of the last `train()` run, then to the instance
+                checkpoint.
+            fp16: Whether to store floating point weights as float16.
+
+        Returns:
+            The path of the slim checkpoint.
+        """
+        source = checkpoint_path
+        if source is None and self._work_dir is not None:
+            source = find_latest_checkpoint(str(self._work_dir))
+        if source is None:
+            source = self.checkpoint_path
+
+        logger.info(f"Creating inference checkpoint from: {source}")
+        return slim_checkpoint(source, out_path=out_path, fp16=fp16)
+
     def _load_base_config(self, model_name: str) -> Config:
         config_path = get_config_file(model_name)
         return Config.fromfile(config_path)
@@ -232,6 +738,7 @@ class EZMMDetector(ABC):
         # Delegate configuration to modular handlers
         DataloaderHandler().apply(self._cfg, config)
         RuntimeHandler().apply(self._cfg, config)
+        DistributedHandler().apply(self._cfg, config)
 
     @abstractmethod
     def _configure_model_specifics(self, config: UserConfig) -> None:
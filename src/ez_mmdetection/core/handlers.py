@@ -1,9 +1,30 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import List, Optional, Tuple
 
-from mmengine.config import Config
+from loguru import logger
+from mmengine.config import Config, ConfigDict
 
-from ez_mmdetection.utils.toml_config import UserConfig
+from ez_mmdetection.utils.checkpoint import find_resume_checkpoint
+from ez_mmdetection.utils.data_check import find_size_index
+from ez_mmdetection.utils.distributed import dist_backend, replace_sync_bn
+from ez_mmdetection.utils.image_cache import find_image_cache
+from ez_mmdetection.utils.pipeline_config import config_type, train_input_size
+from ez_mmdetection.utils.toml_config import TrainingSection, UserConfig
+from ez_mmdetection.utils.val_subset import val_subset_path
+
+# Default `meta_keys` of mmdet's `PackDetInputs`
+_PACK_META_KEYS = (
+    "img_id",
+    "img_path",
+    "ori_shape",
+    "img_shape",
+    "scale_factor",
+    "flip",
+    "flip_direction",
+)
+# Transforms whose output changes if HSV jitter and flips run after them
+_MIXING_OR_PADDING = ("CachedMixUp", "SharedCachedMixUp", "MixUp", "Pad")
 
 
 class BaseConfigHandler(ABC):
@@ -22,6 +43,262 @@ class BaseConfigHandler(ABC):
         pass
 
 
+def _find_transform(pipeline: List[dict], *names: str) -> int:
+    """Returns the index of the first transform of one of `names`, or -1."""
+    for i, transform in enumerate(pipeline):
+        if config_type(transform) in names:
+            return i
+    return -1
+
+
+def _decode_target_scale(pipeline: List[dict]) -> Optional[Tuple[int, int]]:
+    """Infers the largest (w, h) an image is resized to right after loading.
+
+    Mosaic resizes each source image into `img_scale`; a `RandomResize` may
+    enlarge its `scale` by up to the top of `ratio_range`; a `Resize` uses
+    `scale` directly.
+    """
+    for transform in pipeline:
+        name = config_type(transform)
+        if name in ("Mosaic", "CachedMosaic"):
+            return tuple(transform.get("img_scale", (640, 640)))
+        if name == "RandomResize":
+            scale = transform["scale"]
+            ratio = max(transform.get("ratio_range") or (1.0,))
+            if isinstance(scale[0], (list, tuple)):
+                scale = max(scale, key=max)
+            return (int(scale[0] * ratio), int(scale[1] * ratio))
+        if name == "Resize" and transform.get("scale"):
+            return tuple(transform["scale"])
+    return None
+
+
+def _insert_decode_scale(pipeline: List[dict], load_idx: int) -> None:
+    """Inserts `ApplyDecodeScale` where decode-space coordinates are known.
+
+    That is after the first resize (testing), or right after the loader when
+    the pipeline never resizes. Annotations loaded before the resize
+    (training) are rescaled right after `LoadAnnotations`, and the resize's
+    `scale_factor` is then composed with the decode scale after it.
+    """
+    ann_idx = _find_transform(pipeline, "LoadAnnotations")
+    resize_idx = _find_transform(
+        pipeline, "Resize", "RandomResize", "Mosaic", "CachedMosaic"
+    )
+    if resize_idx == -1:
+        insert_after = max(ann_idx, load_idx)
+        pipeline.insert(insert_after + 1, ConfigDict(type="ApplyDecodeScale"))
+        return
+    if -1 < ann_idx < resize_idx:
+        after_resize = ConfigDict(type="ApplyDecodeScale", annotations=False)
+        after_ann = ConfigDict(type="ApplyDecodeScale", scale_factor=False)
+        pipeline.insert(resize_idx + 1, after_resize)
+        pipeline.insert(ann_idx + 1, after_ann)
+        return
+    pipeline.insert(resize_idx + 1, ConfigDict(type="ApplyDecodeScale"))
+
+
+def apply_reduced_decode(pipeline: List[dict], jpeg_backend: str = "cv2") -> bool:
+    """Rewrites a pipeline config in place to decode JPEGs at reduced size.
+
+    Swaps `LoadImageFromFile` for `LoadImageFromFileReduced` and inserts
+    `ApplyDecodeScale` after the first `Resize`, and after `LoadAnnotations`
+    when annotations are loaded before it (training).
+
+    Args:
+        pipeline: A list of transform config dicts.
+        jpeg_backend: 'cv2' or 'turbojpeg'.
+
+    Returns:
+        True if the pipeline was rewritten.
+    """
+    load_idx = _find_transform(pipeline, "LoadImageFromFile")
+    if load_idx == -1:
+        return False
+    target_scale = _decode_target_scale(pipeline[load_idx + 1 :])
+    if target_scale is None:
+        return False
+
+    loader = ConfigDict(pipeline[load_idx])
+    loader.update(
+        type="LoadImageFromFileReduced",
+        target_scale=target_scale,
+        jpeg_backend=jpeg_backend,
+    )
+    pipeline[load_idx] = loader
+    _insert_decode_scale(pipeline, load_idx)
+    return True
+
+
+def apply_image_cache(pipeline: List[dict], cache_dir: Path) -> bool:
+    """Rewrites a pipeline config in place to read from an image cache.
+
+    Swaps `LoadImageFromFile` for `LoadImageFromCache` and inserts
+    `ApplyDecodeScale` (cached images may be downscaled).
+
+    Args:
+        pipeline: A list of transform config dicts.
+        cache_dir: A directory created by `ez-mmdet cache-dataset`.
+
+    Returns:
+        True if the pipeline was rewritten.
+    """
+    load_idx = _find_transform(pipeline, "LoadImageFromFile")
+    if load_idx == -1:
+        return False
+
+    loader = ConfigDict(pipeline[load_idx])
+    loader.update(type="LoadImageFromCache", cache_dir=str(cache_dir))
+    pipeline[load_idx] = loader
+    _insert_decode_scale(pipeline, load_idx)
+    return True
+
+
+def mixed_or_padded_after_augments(pipeline: List[dict]) -> List[str]:
+    """Returns the mixing and padding transforms after the HSV jitter/flip.
+
+    Moving the HSV jitter and flip to the collated batch runs them after
+    these transforms, which changes the augmentation itself.
+    """
+    indices = [
+        i
+        for i in (
+            _find_transform(pipeline, "YOLOXHSVRandomAug"),
+            _find_transform(pipeline, "RandomFlip"),
+        )
+        if i != -1
+    ]
+    if not indices:
+        return []
+    return [
+        config_type(t)
+        for t in pipeline[min(indices) + 1 :]
+        if config_type(t) in _MIXING_OR_PADDING
+    ]
+
+
+def move_augments_to_batch(pipeline: List[dict]) -> Optional[dict]:
+    """Removes the per-sample HSV jitter and flip from a pipeline config.
+
+    The batched op runs after every other transform of the pipeline, so
+    this is only a relocation if no transform after them mixes or pads
+    (see `mixed_or_padded_after_augments`).
+
+    Args:
+        pipeline: A list of transform config dicts, modified in place.
+
+    Returns:
+        A `BatchYOLOXHSVFlip` config with the removed transforms' parameters,
+        or None if the pipeline had neither.
+    """
+    hsv_idx = _find_transform(pipeline, "YOLOXHSVRandomAug")
+    flip_idx = _find_transform(pipeline, "RandomFlip")
+    if hsv_idx == -1 and flip_idx == -1:
+        return None
+
+    batch_aug = ConfigDict(type="BatchYOLOXHSVFlip", flip_prob=0.0)
+    if hsv_idx != -1:
+        hsv = pipeline[hsv_idx]
+        batch_aug.update(
+            hue_delta=hsv.get("hue_delta", 5),
+            saturation_delta=hsv.get("saturation_delta", 30),
+            value_delta=hsv.get("value_delta", 30),
+        )
+    else:
+        batch_aug.update(hue_delta=0, saturation_delta=0, value_delta=0)
+    if flip_idx != -1:
+        batch_aug.flip_prob = pipeline[flip_idx].get("prob", 0.5)
+
+    for idx in sorted({hsv_idx, flip_idx} - {-1}, reverse=True):
+        del pipeline[idx]
+    return batch_aug
+
+
+def apply_shared_mix_cache(
+    pipeline: List[dict], cache_bytes: int, num_workers: int
+) -> bool:
+    """Rewrites a pipeline config in place to share the mosaic/mixup caches.
+
+    Swaps `CachedMosaic` and `CachedMixUp` for their `SharedCached*`
+    variants. Each keeps `max_cached_images` samples per worker, and the
+    byte budget is split between them in proportion to those counts.
+
+    Args:
+        pipeline: A list of transform config dicts.
+        cache_bytes: Shared-memory budget for all caches of the pipeline.
+        num_workers: Dataloader workers feeding the caches.
+
+    Returns:
+        True if the pipeline was rewritten.
+    """
+    defaults = {"CachedMosaic": 40, "CachedMixUp": 20}
+    indices = [i for i, t in enumerate(pipeline) if config_type(t) in defaults]
+    if not indices:
+        return False
+
+    counts = {
+        i: pipeline[i].get("max_cached_images", defaults[config_type(pipeline[i])])
+        for i in indices
+    }
+    total = sum(counts.values())
+    for i in indices:
+        transform = ConfigDict(pipeline[i])
+        transform.update(
+            type=f"Shared{config_type(transform)}",
+            max_cached_images=counts[i] * max(1, num_workers),
+            cache_bytes=cache_bytes * counts[i] // total,
+        )
+        pipeline[i] = transform
+    return True
+
+
+# Size parameter of each train transform a progressive resize scales
+_SIZE_PARAMS = {
+    "Mosaic": "img_scale",
+    "CachedMosaic": "img_scale",
+    "SharedCachedMosaic": "img_scale",
+    "MixUp": "img_scale",
+    "CachedMixUp": "img_scale",
+    "SharedCachedMixUp": "img_scale",
+    "Resize": "scale",
+    "RandomResize": "scale",
+    "RandomCrop": "crop_size",
+    "Pad": "size",
+}
+
+
+def _scale_size(value, factor: float):
+    if isinstance(value[0], (list, tuple)):
+        return [_scale_size(v, factor) for v in value]
+    return tuple(int(round(v * factor)) for v in value)
+
+
+def scale_train_pipeline(pipeline: List[dict], size: int) -> List[dict]:
+    """Returns a copy of a train pipeline config producing `size` images.
+
+    The mosaic and mixup canvases, resize scales, crop and padding sizes
+    are scaled by `size` over the pipeline's output size, so a 640 RTMDet
+    pipeline with `size=320` builds 320x320 mosaics from a 640 resize.
+    Relative crops are left as they are.
+
+    Args:
+        pipeline: A list of transform config dicts.
+        size: Side of the square images the copy produces.
+    """
+    factor = size / max(train_input_size(pipeline))
+    scaled = []
+    for transform in pipeline:
+        transform = ConfigDict(transform)
+        key = _SIZE_PARAMS.get(config_type(transform))
+        relative_crop = key == "crop_size" and transform.get(
+            "crop_type", "absolute"
+        ) not in ("absolute", "absolute_range")
+        if key and transform.get(key) and not relative_crop:
+            transform[key] = _scale_size(transform[key], factor)
+        scaled.append(transform)
+    return scaled
+
+
 class DataloaderHandler(BaseConfigHandler):
     """Configures dataset paths, batch sizes, and workers for train/val/test loaders."""
 
@@ -35,9 +312,7 @@ class DataloaderHandler(BaseConfigHandler):
                 # Setting data_root to empty string to prevent double-joining
                 dl.dataset.data_root = ""
                 dl.batch_size = user_config.training.batch_size
-                dl.num_workers = user_config.training.num_workers
-                # persistent_workers must be False if num_workers is 0
-                dl.persistent_workers = user_config.training.num_workers > 0
+                self.apply_worker_settings(dl, user_config.training)
 
                 # Use absolute paths for annotations and images
                 if key == "train_dataloader":
@@ -57,10 +332,222 @@ class DataloaderHandler(BaseConfigHandler):
                 if user_config.data.classes:
                     dl.dataset.metainfo = {"classes": user_config.data.classes}
 
+                data = user_config.data
+                split_format = (
+                    data.train_format if key == "train_dataloader" else data.val_format
+                )
+                if split_format == "yolo":
+                    self._use_yolo_dataset(dl.dataset, key != "train_dataloader")
+                elif user_config.training.cache_annotations:
+                    self._use_annotation_cache(dl.dataset)
+                    self._use_size_index(dl.dataset, key, user_config)
+
         # Also set metainfo at the top level of the config if possible
         if user_config.data.classes:
             cfg.metainfo = {"classes": user_config.data.classes}
 
+        self._configure_image_loading(cfg, user_config)
+
+        if user_config.training.batch_augment:
+            self._apply_batch_augment(cfg)
+
+        if user_config.training.shared_mix_cache_mb:
+            self._share_mix_caches(cfg, user_config.training)
+
+        if user_config.training.progressive_sizes:
+            self._progressive_resize(cfg, user_config.training)
+
+    @staticmethod
+    def _progressive_resize(cfg: Config, training: TrainingSection) -> None:
+        """Adds a hook training the first mosaic-stage epochs on smaller images.
+
+        Each size of `progressive_sizes` gets an equal share of the
+        `progressive_fraction` of the mosaic stage.
+        """
+        pipeline = cfg.train_dataloader.dataset.get("pipeline", [])
+        full_size = max(train_input_size(pipeline))
+        sizes = sorted(s for s in set(training.progressive_sizes) if s < full_size)
+        if len(sizes) < len(set(training.progressive_sizes)):
+            logger.warning(
+                f"Ignoring progressive sizes not below the training size {full_size}"
+            )
+        mosaic_epochs = training.epochs
+        for hook in cfg.get("custom_hooks", []):
+            if hook.get("type") == "PipelineSwitchHook":
+                mosaic_epochs = min(mosaic_epochs, hook.switch_epoch)
+        curriculum_epochs = int(training.progressive_fraction * mosaic_epochs)
+        if not sizes or curriculum_epochs < 1:
+            logger.warning("Too few epochs for a progressive resize; skipping.")
+            return
+
+        stages = []
+        for i, size in enumerate(sizes):
+            epoch = i * curriculum_epochs // len(sizes)
+            if stages and stages[-1]["epoch"] == epoch:
+                stages.pop()  # too few epochs for every size
+            scaled = scale_train_pipeline(pipeline, size)
+            stages.append(dict(epoch=epoch, size=size, pipeline=scaled))
+        stages.append(dict(epoch=curriculum_epochs, size=full_size, pipeline=pipeline))
+        cfg.custom_hooks = list(cfg.get("custom_hooks", [])) + [
+            dict(type="ProgressiveResizeHook", stages=stages)
+        ]
+        logger.info(
+            "Progressive resize: "
+            + " -> ".join(f"{s['size']}px from epoch {s['epoch'] + 1}" for s in stages)
+        )
+
+    @staticmethod
+    def _share_mix_caches(cfg: Config, training: TrainingSection) -> None:
+        """Shares the mosaic/mixup caches of the train pipelines across workers."""
+        pipelines = []
+        if hasattr(cfg, "train_dataloader"):
+            train_pipeline = cfg.train_dataloader.dataset.get("pipeline", [])
+            pipelines.append(("train", train_pipeline))
+        for hook in cfg.get("custom_hooks", []):
+            if hook.get("type") == "PipelineSwitchHook":
+                pipelines.append(("PipelineSwitchHook", hook.switch_pipeline))
+
+        cache_bytes = training.shared_mix_cache_mb * 2**20
+        for name, pipeline in pipelines:
+            if apply_shared_mix_cache(pipeline, cache_bytes, training.num_workers):
+                logger.info(
+                    f"Sharing {name} mosaic/mixup caches across workers "
+                    f"({training.shared_mix_cache_mb} MB)"
+                )
+
+    def _apply_batch_augment(self, cfg: Config) -> None:
+        """Moves HSV jitter and flips from the train pipelines to the device.
+
+        The model's data preprocessor then applies them to the whole batch,
+        after every transform of the pipeline. In RTMDet they come before
+        `Pad` and `CachedMixUp`, so this changes the augmentation: both
+        images of a mixup pair share one HSV gain and flip, and the pad
+        border is jittered and flipped along with the image. A warning
+        names the transforms concerned.
+        """
+        pipelines = []
+        if hasattr(cfg, "train_dataloader"):
+            pipelines.append(cfg.train_dataloader.dataset.get("pipeline", []))
+        for hook in cfg.get("custom_hooks", []):
+            if hook.get("type") == "PipelineSwitchHook":
+                pipelines.append(hook.switch_pipeline)
+
+        reordered = sorted(
+            {name for p in pipelines for name in mixed_or_padded_after_augments(p)}
+        )
+        batch_augs = [move_augments_to_batch(p) for p in pipelines]
+        batch_aug = next((a for a in batch_augs if a is not None), None)
+        if batch_aug is None or "data_preprocessor" not in cfg.get("model", {}):
+            logger.warning("No HSV/flip transforms to move to the batch; skipping.")
+            return
+
+        preprocessor = cfg.model.data_preprocessor
+        preprocessor.type = "EZDetDataPreprocessor"
+        preprocessor.pixel_augments = [batch_aug]
+        logger.info(f"Applying {batch_aug.type} on the batch in the data preprocessor")
+        if reordered:
+            logger.warning(
+                f"batch_augment runs HSV jitter and flips after "
+                f"{', '.join(reordered)}: mixed images share one HSV gain and "
+                "flip, and pad borders are jittered and flipped."
+            )
+
+    @staticmethod
+    def apply_worker_settings(dl: ConfigDict, training: TrainingSection) -> None:
+        """Sets worker count, persistence and prefetching on a dataloader."""
+        dl.num_workers = training.num_workers
+        # persistent_workers must be False if num_workers is 0
+        dl.persistent_workers = training.num_workers > 0
+        # torch rejects prefetch_factor without worker processes
+        if training.prefetch_factor is not None and training.num_workers > 0:
+            dl.prefetch_factor = training.prefetch_factor
+        else:
+            dl.pop("prefetch_factor", None)
+
+    @staticmethod
+    def _use_yolo_dataset(dataset: ConfigDict, evaluated: bool) -> None:
+        """Switches a dataset to read YOLO labels (`ann_file` is the labels dir).
+
+        Without a COCO file, `CocoMetric` builds its ground truth from the
+        samples, so evaluated pipelines must pass `instances` through.
+        """
+        dataset.type = "YoloDataset"
+        if not evaluated:
+            return
+        for transform in dataset.get("pipeline", []):
+            if config_type(transform) == "PackDetInputs":
+                meta_keys = tuple(transform.get("meta_keys", _PACK_META_KEYS))
+                if "instances" not in meta_keys:
+                    transform.meta_keys = meta_keys + ("instances",)
+
+    @staticmethod
+    def _use_annotation_cache(dataset: ConfigDict) -> None:
+        """Switches a COCO dataset to the memory-mapped annotation cache.
+
+        Instance segmentation keeps `CocoDataset` since masks are not cached.
+        """
+        if config_type(dataset) != "CocoDataset":
+            return
+        loads_masks = any(
+            config_type(t) == "LoadAnnotations" and t.get("with_mask", False)
+            for t in dataset.get("pipeline", [])
+        )
+        if not loads_masks:
+            dataset.type = "CachedCocoDataset"
+
+    @staticmethod
+    def _use_size_index(dataset: ConfigDict, key: str, user_config: UserConfig) -> None:
+        """Points a cached COCO dataset at the split's `check-data` size index."""
+        if config_type(dataset) != "CachedCocoDataset":
+            return
+        data = user_config.data
+        if key == "train_dataloader":
+            split, ann_file = "train", data.train_ann
+        else:
+            split, ann_file = "val", data.val_ann
+        index = find_size_index(Path(data.root), split, ann_file)
+        if index is not None:
+            dataset.size_index = str(index)
+
+    def _configure_image_loading(self, cfg: Config, user_config: UserConfig) -> None:
+        """Switches loaders (incl. stage-2) to the image cache or reduced decode.
+
+        A current cache from `ez-mmdet cache-dataset` takes precedence; reduced
+        decode is applied to the pipelines without one.
+        """
+        training = user_config.training
+        data = user_config.data
+        data_root = Path(data.root)
+
+        pipelines = []
+        for key in ["train_dataloader", "val_dataloader", "test_dataloader"]:
+            if hasattr(cfg, key) and "pipeline" in getattr(cfg, key).dataset:
+                split = "train" if key == "train_dataloader" else "val"
+                pipelines.append((key, split, getattr(cfg, key).dataset.pipeline))
+        for hook in cfg.get("custom_hooks", []):
+            if hook.get("type") == "PipelineSwitchHook":
+                pipelines.append(("PipelineSwitchHook", "train", hook.switch_pipeline))
+
+        caches = {}
+        if training.use_image_cache:
+            caches = {
+                "train": find_image_cache(data_root, "train", data.train_ann),
+                "val": find_image_cache(data_root, "val", data.val_ann),
+            }
+
+        for name, split, pipeline in pipelines:
+            cache_dir = caches.get(split)
+            if cache_dir is not None and apply_image_cache(pipeline, cache_dir):
+                logger.info(f"Reading {name} images from cache at {cache_dir}")
+            elif training.reduced_decode:
+                if apply_reduced_decode(pipeline, training.jpeg_backend):
+                    logger.info(f"Enabled reduced-resolution JPEG decode for {name}")
+                else:
+                    logger.warning(
+                        f"Could not enable reduced decode for {name}: "
+                        "no LoadImageFromFile followed by a resize was found."
+                    )
+
 
 class RuntimeHandler(BaseConfigHandler):
     """Configures general runtime settings including optimizer, AMP, and visualization."""
@@ -74,6 +561,49 @@ class RuntimeHandler(BaseConfigHandler):
         cfg.train_cfg.max_epochs = training.epochs
         cfg.load_from = model_cfg.load_from
         cfg.log_level = training.log_level
+        if training.resume:
+            self._resume(cfg, training)
+        if training.async_checkpoint and "checkpoint" in cfg.get("default_hooks", {}):
+            cfg.default_hooks.checkpoint.type = "AsyncCheckpointHook"
+        if training.val_subset_size and cfg.get("val_cfg"):
+            cfg.val_cfg.update(
+                type="SubsetValLoop",
+                subset_size=training.val_subset_size,
+                full_val_epochs=list(training.full_val_epochs),
+                cache_file=str(
+                    val_subset_path(
+                        Path(user_config.data.root) / user_config.data.val_ann
+                    )
+                ),
+            )
+        if training.early_stopping_patience:
+            self._stop_early(cfg, training)
+        if training.telemetry:
+            cfg.custom_hooks = list(cfg.get("custom_hooks", [])) + [
+                dict(
+                    type="TelemetryHook",
+                    interval=training.telemetry_interval,
+                    file_format=training.telemetry_format,
+                    port=training.telemetry_port,
+                )
+            ]
+        if training.compile:
+            cfg.custom_hooks = list(cfg.get("custom_hooks", [])) + [
+                dict(type="CompileHook", mode=training.compile_mode)
+            ]
+        if user_config.trial is not None:
+            trial = user_config.trial
+            cfg.custom_hooks = list(cfg.get("custom_hooks", [])) + [
+                dict(
+                    type="TrialPruningHook",
+                    monitor=trial.monitor,
+                    sweep_dir=trial.sweep_dir,
+                    rule=trial.rule,
+                    prune=trial.prune,
+                    warmup_epochs=trial.warmup_epochs,
+                    min_peers=trial.min_peers,
+                )
+            ]
 
         # --- Optimizer & AMP ---
         if hasattr(cfg, "optim_wrapper"):
@@ -88,6 +618,9 @@ class RuntimeHandler(BaseConfigHandler):
             if hasattr(cfg.optim_wrapper, "optimizer"):
                 cfg.optim_wrapper.optimizer.lr = training.learning_rate
 
+            if training.accumulative_counts > 1:
+                self._accumulate_gradients(cfg, training.accumulative_counts)
+
         # --- Visualization (TensorBoard) ---
         if training.enable_tensorboard:
             # Ensure visualizer exists and has vis_backends list
@@ -107,9 +640,124 @@ class RuntimeHandler(BaseConfigHandler):
 
         # --- Evaluator Path Overrides ---
         data_root = Path(user_config.data.root)
+        # YOLO splits have no COCO file: the metric converts the samples' labels
+        val_ann = (
+            None
+            if user_config.data.val_format == "yolo"
+            else str(data_root / user_config.data.val_ann)
+        )
         if hasattr(cfg, "val_evaluator"):
-            cfg.val_evaluator.ann_file = str(data_root / user_config.data.val_ann)
+            cfg.val_evaluator.ann_file = val_ann
         if hasattr(cfg, "test_evaluator"):
             # Fallback to val_ann if test_ann isn't explicitly defined in DataSection yet
             # (Note: DataSection in toml_config.py currently doesn't have test_ann)
-            cfg.test_evaluator.ann_file = str(data_root / user_config.data.val_ann)
+            cfg.test_evaluator.ann_file = val_ann
+        if training.in_memory_eval:
+            for key in ("val_evaluator", "test_evaluator"):
+                if hasattr(cfg, key):
+                    self._evaluate_in_memory(cfg[key], training.coco_eval_backend)
+
+    @staticmethod
+    def _evaluate_in_memory(evaluator: dict, backend: str = "pycocotools") -> None:
+        """Swaps `CocoMetric` for `InMemoryCocoMetric` with `backend`.
+
+        The results are identical; the ground truth and predictions are not
+        written to JSON files and read back.
+        """
+        if config_type(evaluator) == "CocoMetric":
+            evaluator.type = "InMemoryCocoMetric"
+            evaluator.eval_backend = backend
+
+    @staticmethod
+    def _stop_early(cfg: Config, training: TrainingSection) -> None:
+        """Adds a `PlateauStoppingHook` and keeps the best checkpoint of its metric."""
+        metric = training.early_stopping_metric
+        cfg.setdefault("default_hooks", ConfigDict())
+        if "checkpoint" not in cfg.default_hooks:
+            cfg.default_hooks.checkpoint = ConfigDict(type="CheckpointHook", interval=1)
+        cfg.default_hooks.checkpoint.save_best = metric
+        hooks = [
+            hook
+            for hook in cfg.get("custom_hooks", [])
+            if config_type(hook) not in ("EarlyStoppingHook", "PlateauStoppingHook")
+        ]
+        hooks.append(
+            dict(
+                type="PlateauStoppingHook",
+                monitor=metric,
+                patience=training.early_stopping_patience,
+                min_delta=training.early_stopping_min_delta,
+                min_epochs=training.early_stopping_min_epochs,
+            )
+        )
+        cfg.custom_hooks = hooks
+
+    @staticmethod
+    def _resume(cfg: Config, training: TrainingSection) -> None:
+        """Resumes the optimizer, schedulers, EMA and epoch from a checkpoint.
+
+        With 'auto' and no checkpoint in the work dir yet, training starts
+        from `load_from` as usual.
+        """
+        if training.resume == "auto":
+            checkpoint = find_resume_checkpoint(training.work_dir)
+            if checkpoint is None:
+                logger.info(
+                    f"No checkpoint to resume in {training.work_dir}; starting anew"
+                )
+                return
+        else:
+            checkpoint = training.resume
+        logger.info(f"Resuming training from {checkpoint}")
+        cfg.resume = True
+        cfg.load_from = str(checkpoint)
+
+    @staticmethod
+    def _accumulate_gradients(cfg: Config, counts: int) -> None:
+        """Steps the optimizer every `counts` batches.
+
+        Iteration-based schedules (e.g. the LR warmup) count batches, so
+        they are stretched to span the same number of optimizer steps.
+        """
+        cfg.optim_wrapper.accumulative_counts = counts
+        for scheduler in cfg.get("param_scheduler") or []:
+            if scheduler.get("by_epoch", True):
+                continue
+            for key in ("begin", "end"):
+                if key in scheduler:
+                    scheduler[key] *= counts
+
+
+class DistributedHandler(BaseConfigHandler):
+    """Configures data-parallel training for the 'ddp' launcher.
+
+    The runner's default sampler shards each dataset across processes.
+    """
+
+    def apply(self, cfg: Config, user_config: UserConfig) -> None:
+        """Configures the launcher, sync BN and learning rate scaling.
+
+        Args:
+            cfg: The mutable MMDetection Config object.
+            user_config: The validated user configuration.
+        """
+        training = user_config.training
+        if training.launcher == "none":
+            return
+
+        cfg.launcher = "pytorch"
+        backend = dist_backend(training.device)
+        cfg.setdefault("env_cfg", ConfigDict())
+        cfg.env_cfg.dist_cfg = dict(backend=backend)
+        if backend == "gloo":
+            cfg.model_wrapper_cfg = dict(type="CPUDistributedDataParallel")
+            replaced = replace_sync_bn(cfg.model)
+            if replaced:
+                logger.info(
+                    f"Replaced {replaced} SyncBN layers with BN for CPU training"
+                )
+
+        if training.scale_lr:
+            # `learning_rate` applies to one process's batch; the runner
+            # scales it by the number of processes
+            cfg.auto_scale_lr = dict(enable=True, base_batch_size=training.batch_size)
@@ -0,0 +1,19 @@
+# Importing this package registers the custom datasets, transforms and
+# batch augmentations with MMDetection
+from .batch_augments import BatchYOLOXHSVFlip, EZDetDataPreprocessor
+from .coco import CachedCocoDataset
+from .mix_cache import SharedCachedMixUp, SharedCachedMosaic
+from .transforms import ApplyDecodeScale, LoadImageFromCache, LoadImageFromFileReduced
+from .yolo import YoloDataset
+
+__all__ = [
+    "ApplyDecodeScale",
+    "BatchYOLOXHSVFlip",
+    "CachedCocoDataset",
+    "EZDetDataPreprocessor",
+    "LoadImageFromCache",
+    "LoadImageFromFileReduced",
+    "SharedCachedMixUp",
+    "SharedCachedMosaic",
+    "YoloDataset",
+]
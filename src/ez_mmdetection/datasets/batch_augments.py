@@ -0,0 +1,192 @@
+"""Batched augmentation of the collated uint8 batch on the training device."""
+
+from typing import List, Optional, Sequence, Tuple
+
+import torch
+from mmdet.models.data_preprocessors import DetDataPreprocessor
+from mmdet.registry import MODELS
+from torch import Tensor, nn
+
+
+def bgr_to_hsv(img: Tensor) -> Tensor:
+    """Converts a float BGR batch (N, 3, H, W) in [0, 255] to HSV.
+
+    Uses OpenCV's 8-bit convention: H in [0, 180), S and V in [0, 255].
+    """
+    b, g, r = img.unbind(1)
+    v = img.amax(1)
+    delta = v - img.amin(1)
+    safe_delta = delta.clamp(min=1e-6)
+    s = delta / v.clamp(min=1e-6) * 255
+    h = torch.where(
+        v == r,
+        (g - b) / safe_delta,
+        torch.where(v == g, 2 + (b - r) / safe_delta, 4 + (r - g) / safe_delta),
+    )
+    # 60 degrees per sector, halved to fit a byte
+    h = torch.where(delta > 0, torch.remainder(h * 30, 180), torch.zeros_like(h))
+    return torch.stack([h, s, v], 1)
+
+
+def hsv_to_bgr(hsv: Tensor) -> Tensor:
+    """Inverse of `bgr_to_hsv`."""
+    h, s, v = hsv.unbind(1)
+    sector = h / 30
+    chroma = v * (s / 255)
+
+    def channel(n: int) -> Tensor:
+        k = torch.remainder(n + sector, 6)
+        return v - chroma * torch.minimum(k, 4 - k).clamp(0, 1)
+
+    return torch.stack([channel(1), channel(3), channel(5)], 1)
+
+
+@MODELS.register_module()
+class BatchYOLOXHSVFlip(nn.Module):
+    """`YOLOXHSVRandomAug` + horizontal `RandomFlip` for a whole batch.
+
+    Expects the stacked uint8 BGR batch (N, 3, H, W) and modifies it in
+    place. Per-image random gains and flips follow the per-sample
+    transforms; the colour space round trip runs once for the batch instead
+    of allocating full-size HSV copies per image in the dataloader workers.
+
+    Args:
+        hue_delta: Maximum hue shift (OpenCV units, 0-180 scale).
+        saturation_delta: Maximum saturation shift.
+        value_delta: Maximum value shift.
+        flip_prob: Probability of a horizontal flip per image.
+    """
+
+    def __init__(
+        self,
+        hue_delta: int = 5,
+        saturation_delta: int = 30,
+        value_delta: int = 30,
+        flip_prob: float = 0.5,
+    ) -> None:
+        """Builds the module; see the class docstring for the arguments."""
+        super().__init__()
+        self.deltas = (hue_delta, saturation_delta, value_delta)
+        self.flip_prob = flip_prob
+
+    def forward(
+        self, inputs: Tensor, data_samples: Optional[list]
+    ) -> Tuple[Tensor, Optional[list]]:
+        """Applies HSV jitter and flips.
+
+        Args:
+            inputs: uint8 BGR batch of shape (N, 3, H, W).
+            data_samples: The batch's `DetDataSample`s.
+
+        Returns:
+            The augmented (inputs, data_samples).
+        """
+        self._hsv_(inputs)
+        if self.flip_prob > 0:
+            self._flip_(inputs, data_samples)
+        return inputs, data_samples
+
+    def _hsv_(self, inputs: Tensor) -> None:
+        n = inputs.shape[0]
+        device = inputs.device
+        deltas = torch.tensor(self.deltas, dtype=torch.float32, device=device)
+        # Each of H, S, V is jittered with probability 0.5, by an integer gain
+        gains = (torch.rand(n, 3, device=device) * 2 - 1) * deltas
+        gains = (gains * torch.randint(0, 2, (n, 3), device=device)).trunc()
+        rows = (gains != 0).any(1).nonzero().squeeze(1)
+        if rows.numel() == 0:
+            return
+
+        hsv = bgr_to_hsv(inputs[rows].float())
+        gains = gains[rows][:, :, None, None]
+        hsv[:, 0] = torch.remainder(hsv[:, 0] + gains[:, 0], 180)
+        hsv[:, 1:] = (hsv[:, 1:] + gains[:, 1:]).clamp_(0, 255)
+        inputs[rows] = hsv_to_bgr(hsv).round_().clamp_(0, 255).to(torch.uint8)
+
+    def _flip_(self, inputs: Tensor, data_samples: Optional[list]) -> None:
+        n, width = inputs.shape[0], inputs.shape[-1]
+        flips = (torch.rand(n) < self.flip_prob).tolist()
+        if data_samples:
+            widths = [sample.img_shape[1] for sample in data_samples]
+        else:
+            widths = [width] * n
+
+        # Images spanning the whole batch width flip in one indexed op
+        full = [i for i in range(n) if flips[i] and widths[i] == width]
+        if full:
+            inputs[full] = inputs[full].flip(-1)
+        for i in range(n):
+            if flips[i] and widths[i] != width:
+                inputs[i, ..., : widths[i]] = inputs[i, ..., : widths[i]].flip(-1)
+
+        for i, sample in enumerate(data_samples or []):
+            if not flips[i]:
+                continue
+            for key in ("gt_instances", "ignored_instances"):
+                instances = sample.get(key)
+                if instances is None:
+                    continue
+                if "bboxes" in instances:
+                    instances.bboxes.flip_(sample.img_shape, "horizontal")
+                if "masks" in instances:
+                    instances.masks = instances.masks.flip("horizontal")
+            sample.set_metainfo({"flip": True, "flip_direction": "horizontal"})
+
+
+@MODELS.register_module()
+class EZDetDataPreprocessor(DetDataPreprocessor):
+    """`DetDataPreprocessor` with augmentations on the raw uint8 batch.
+
+    MMDetection's `batch_augments` see the normalized float batch. The
+    `pixel_augments` here run during training on the stacked uint8 batch,
+    already on the training device, right before the usual normalization
+    and padding. Same-sized images are augmented as one tensor; others one
+    by one.
+
+    Args:
+        pixel_augments: Configs of modules called as
+            `inputs, data_samples = aug(inputs, data_samples)`.
+        **kwargs: Arguments forwarded to `DetDataPreprocessor`.
+    """
+
+    def __init__(
+        self, pixel_augments: Optional[Sequence[dict]] = None, **kwargs
+    ) -> None:
+        """Builds the module; see the class docstring for the arguments."""
+        super().__init__(**kwargs)
+        self.pixel_augments = (
+            nn.ModuleList([MODELS.build(aug) for aug in pixel_augments])
+            if pixel_augments
+            else None
+        )
+
+    def forward(self, data: dict, training: bool = False) -> dict:
+        """Applies `pixel_augments` (training only), then preprocesses.
+
+        Args:
+            data: Data sampled from the dataloader.
+            training: Whether to enable training time augmentation.
+
+        Returns:
+            Data in the same format as the model input.
+        """
+        if training and self.pixel_augments is not None:
+            data = self.cast_data(data)
+            data["inputs"] = self._augment(data["inputs"], data.get("data_samples"))
+        return super().forward(data, training)
+
+    def _augment(self, inputs, data_samples: Optional[list]):
+        if isinstance(inputs, Tensor) or len({x.shape for x in inputs}) == 1:
+            batch = inputs if isinstance(inputs, Tensor) else torch.stack(inputs)
+            for aug in self.pixel_augments:
+                batch, data_samples = aug(batch, data_samples)
+            return batch
+
+        augmented: List[Tensor] = []
+        for i, img in enumerate(inputs):
+            samples = [data_samples[i]] if data_samples else None
+            img = img[None]
+            for aug in self.pixel_augments:
+                img, samples = aug(img, samples)
+            augmented.append(img[0])
+        return augmented
@@ -0,0 +1,84 @@
+"""COCO dataset backed by the binary annotation cache."""
+
+from typing import Optional
+
+import numpy as np
+from mmdet.datasets import CocoDataset
+from mmdet.registry import DATASETS
+
+from ez_mmdetection.utils.ann_cache import AnnotationTable, ensure_annotation_cache
+from ez_mmdetection.utils.data_check import load_size_index
+
+
+@DATASETS.register_module()
+class CachedCocoDataset(CocoDataset):
+    """`CocoDataset` that reads parsed annotations from a memory-mapped cache.
+
+    The first run parses the annotation JSON once into numpy arrays keyed by
+    the file's hash; later runs (and every dataloader worker) map those
+    arrays read-only instead of re-parsing the JSON and pickling a Python
+    `data_list`. Segmentation masks are not cached, so use `CocoDataset` for
+    instance segmentation.
+
+    Args:
+        *args: Arguments forwarded to `CocoDataset`.
+        size_index: Optional image-size index from `ez-mmdet check-data`.
+            Its sizes replace the annotation file's `width`/`height` (as
+            used by filtering and `AspectRatioBatchSampler`).
+        **kwargs: Arguments forwarded to `CocoDataset`. `serialize_data` is
+            ignored because the table is already compact.
+    """
+
+    def __init__(self, *args, size_index: Optional[str] = None, **kwargs) -> None:
+        """Builds the dataset; see the class docstring for the arguments."""
+        kwargs["serialize_data"] = False
+        self.size_index = size_index
+        super().__init__(*args, **kwargs)
+
+    def load_data_list(self) -> AnnotationTable:
+        """Loads (or builds) the annotation cache for `self.ann_file`.
+
+        Returns:
+            An `AnnotationTable` over every image of the annotation file.
+        """
+        cache_dir = ensure_annotation_cache(self.ann_file, self.metainfo["classes"])
+        table = AnnotationTable(cache_dir, img_prefix=self.data_prefix["img"])
+        if self.size_index:
+            table.sizes = self._indexed_sizes(table)
+        self.cat_ids = table.meta["cat_ids"]
+        self.cat2label = {cat_id: i for i, cat_id in enumerate(self.cat_ids)}
+        return table
+
+    def _indexed_sizes(self, table: AnnotationTable) -> np.ndarray:
+        """Returns (width, height) per row, preferring the size index."""
+        indexed = load_size_index(self.size_index)
+        a = table.arrays
+        sizes = np.stack([a["widths"], a["heights"]], axis=1)
+        for row, name in enumerate(a["file_names"]):
+            size = indexed.get(str(name))
+            if size is not None:
+                sizes[row] = size
+        return sizes
+
+    def filter_data(self) -> AnnotationTable:
+        """Filters images according to `filter_cfg` without building dicts.
+
+        Returns:
+            The filtered `AnnotationTable`.
+        """
+        if self.test_mode or self.filter_cfg is None:
+            return self.data_list
+
+        keep = self.data_list.valid_mask(
+            self.filter_cfg.get("filter_empty_gt", False),
+            self.filter_cfg.get("min_size", 0),
+        )
+        return self.data_list.subset(self.data_list.indices[keep])
+
+    def _get_unserialized_subset(self, indices) -> AnnotationTable:
+        rows = self.data_list.indices
+        if isinstance(indices, int):
+            rows = rows[:indices] if indices >= 0 else rows[indices:]
+        else:
+            rows = rows[np.asarray(indices, dtype=np.int64)]
+        return self.data_list.subset(rows)
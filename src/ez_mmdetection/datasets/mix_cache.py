@@ -0,0 +1,70 @@
+"""CachedMosaic / CachedMixUp variants sharing their cache across workers."""
+
+from loguru import logger
+from mmdet.datasets.transforms import CachedMixUp, CachedMosaic
+from mmdet.registry import TRANSFORMS
+
+from ez_mmdetection.utils.shared_ring import SharedRingBuffer, shm_available_bytes
+
+
+def _shared_cache(owner, cache_bytes: int):
+    """Returns a `SharedRingBuffer` for `owner.results_cache`.
+
+    Falls back to a private list if shared memory cannot hold `cache_bytes`.
+    """
+    available = shm_available_bytes()
+    if available is not None and cache_bytes > available:
+        logger.warning(
+            f"{type(owner).__name__}: {cache_bytes / 2**20:.0f} MB shared cache "
+            f"exceeds the {available / 2**20:.0f} MB free in /dev/shm; "
+            "falling back to a per-worker cache."
+        )
+        return []
+    return SharedRingBuffer(cache_bytes, owner.max_cached_images)
+
+
+@TRANSFORMS.register_module()
+class SharedCachedMosaic(CachedMosaic):
+    """`CachedMosaic` whose cache is shared by all dataloader workers.
+
+    The cache is a shared-memory ring holding the most recent
+    `max_cached_images` samples within `cache_bytes`, so every worker picks
+    mosaic partners from the samples decoded by all workers. When the ring
+    is full, the oldest samples are evicted (`random_pop` has no effect).
+
+    Args:
+        cache_bytes: Byte budget of the shared cache.
+        **kwargs: Arguments forwarded to `CachedMosaic`.
+    """
+
+    def __init__(self, cache_bytes: int = 256 * 2**20, **kwargs) -> None:
+        """Builds the transform; see the class docstring for the arguments."""
+        super().__init__(**kwargs)
+        self.cache_bytes = cache_bytes
+        self.results_cache = _shared_cache(self, cache_bytes)
+
+    def __repr__(self) -> str:
+        """Returns the parent representation with `cache_bytes` appended."""
+        return f"{super().__repr__()[:-1]}, cache_bytes={self.cache_bytes})"
+
+
+@TRANSFORMS.register_module()
+class SharedCachedMixUp(CachedMixUp):
+    """`CachedMixUp` whose cache is shared by all dataloader workers.
+
+    See `SharedCachedMosaic`.
+
+    Args:
+        cache_bytes: Byte budget of the shared cache.
+        **kwargs: Arguments forwarded to `CachedMixUp`.
+    """
+
+    def __init__(self, cache_bytes: int = 128 * 2**20, **kwargs) -> None:
+        """Builds the transform; see the class docstring for the arguments."""
+        super().__init__(**kwargs)
+        self.cache_bytes = cache_bytes
+        self.results_cache = _shared_cache(self, cache_bytes)
+
+    def __repr__(self) -> str:
+        """Returns the parent representation with `cache_bytes` appended."""
+        return f"{super().__repr__()[:-1]}, cache_bytes={self.cache_bytes})"
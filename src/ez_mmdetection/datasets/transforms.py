@@ -0,0 +1,380 @@
+"""Custom MMDetection data transforms registered by ez_mmdet."""
+
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import mmcv
+import mmengine.fileio as fileio
+import numpy as np
+from loguru import logger
+from mmcv.transforms import BaseTransform, LoadImageFromFile
+from mmdet.registry import TRANSFORMS
+
+from ez_mmdetection.utils.image_cache import ImageCacheReader
+from ez_mmdetection.utils.image_io import image_size_from_bytes, is_jpeg
+
+# DCT scaling factors supported by libjpeg (and cv2 IMREAD_REDUCED_*)
+JPEG_REDUCTIONS = (8, 4, 2)
+
+_CV2_REDUCED_FLAGS = {
+    "color": {
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    },
+    "grayscale": {
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+        4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+        8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    },
+}
+
+
+def choose_jpeg_reduction(
+    img_size: Tuple[int, int],
+    target_scale: Sequence[int],
+    max_reduction: int = 8,
+) -> int:
+    """Picks the largest DCT reduction that does not undershoot the target.
+
+    The target follows `mmcv.imrescale` semantics: the image is scaled to fit
+    the long edge within `max(target_scale)` and the short edge within
+    `min(target_scale)`.
+
+    Args:
+        img_size: Original (width, height).
+        target_scale: The (width, height) the image is resized to downstream.
+        max_reduction: Upper bound on the reduction (1, 2, 4 or 8).
+
+    Returns:
+        The reduction denominator (1, 2, 4 or 8).
+    """
+    width, height = img_size
+    scale = min(
+        max(target_scale) / max(width, height),
+        min(target_scale) / min(width, height),
+    )
+    for reduction in JPEG_REDUCTIONS:
+        if reduction <= max_reduction and scale * reduction <= 1.0:
+            return reduction
+    return 1
+
+
+@TRANSFORMS.register_module()
+class LoadImageFromFileReduced(LoadImageFromFile):
+    """Loads JPEGs at a DCT-scaled resolution (1/2, 1/4 or 1/8).
+
+    libjpeg can skip most of the IDCT work when decoding at a power-of-two
+    fraction of the original size. The reduction is chosen per image from its
+    header so that the decoded image stays at least as large as
+    `target_scale`. Non-JPEG files are decoded at full resolution.
+
+    `ori_shape` is the full-resolution shape, so an `ApplyDecodeScale`
+    transform must follow to map annotations and `scale_factor` between the
+    original and the decoded image.
+
+    Added Keys:
+        decode_scale (tuple[float, float]): (w_scale, h_scale) from the
+            original image to the decoded image.
+
+    Args:
+        target_scale: The (width, height) the image is resized to downstream.
+        max_reduction: Upper bound on the reduction (1, 2, 4 or 8).
+        jpeg_backend: 'cv2' (IMREAD_REDUCED_*) or 'turbojpeg' (requires
+            PyTurboJPEG; EXIF orientation is not applied).
+        **kwargs: Arguments forwarded to `LoadImageFromFile`.
+    """
+
+    def __init__(
+        self,
+        target_scale: Sequence[int] = (640, 640),
+        max_reduction: int = 8,
+        jpeg_backend: str = "cv2",
+        **kwargs,
+    ) -> None:
+        """Validates the backend and sets the decode target."""
+        super().__init__(**kwargs)
+        if jpeg_backend not in ("cv2", "turbojpeg"):
+            raise ValueError(
+                f"jpeg_backend must be 'cv2' or 'turbojpeg', got '{jpeg_backend}'"
+            )
+        self.target_scale = tuple(target_scale)
+        self.max_reduction = max_reduction
+        self.jpeg_backend = jpeg_backend
+        self._turbojpeg = None
+        if jpeg_backend == "turbojpeg":
+            try:
+                from turbojpeg import TurboJPEG
+            except ImportError:
+                raise ImportError(
+                    "jpeg_backend='turbojpeg' requires PyTurboJPEG. "
+                    "Install it with: pip install PyTurboJPEG"
+                )
+            self._turbojpeg = TurboJPEG()
+
+    def _decode_reduced(self, img_bytes: bytes, reduction: int) -> np.ndarray:
+        if self._turbojpeg is not None:
+            from turbojpeg import TJPF_BGR, TJPF_GRAY
+
+            pixel_format = TJPF_GRAY if self.color_type == "grayscale" else TJPF_BGR
+            img = self._turbojpeg.decode(
+                img_bytes, pixel_format=pixel_format, scaling_factor=(1, reduction)
+            )
+            return img[..., 0] if self.color_type == "grayscale" else img
+
+        buf = np.frombuffer(img_bytes, dtype=np.uint8)
+        return cv2.imdecode(buf, _CV2_REDUCED_FLAGS[self.color_type][reduction])
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Loads the image, reducing JPEG resolution where possible.
+
+        Args:
+            results: Result dict from :class:`mmengine.dataset.BaseDataset`.
+
+        Returns:
+            The dict containing the decoded image and meta information.
+        """
+        filename = results["img_path"]
+        try:
+            img_bytes = fileio.get(filename, backend_args=self.backend_args)
+        except Exception:
+            if self.ignore_empty:
+                return None
+            raise
+
+        size = image_size_from_bytes(img_bytes) if is_jpeg(img_bytes) else None
+        reduction = 1
+        if size is not None and self.color_type in _CV2_REDUCED_FLAGS:
+            reduction = choose_jpeg_reduction(
+                size, self.target_scale, self.max_reduction
+            )
+
+        if reduction == 1:
+            img = mmcv.imfrombytes(
+                img_bytes, flag=self.color_type, backend=self.imdecode_backend
+            )
+        else:
+            img = self._decode_reduced(img_bytes, reduction)
+        if img is None:
+            if self.ignore_empty:
+                return None
+            raise AssertionError(f"failed to load image: {filename}")
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        height, width = img.shape[:2]
+        ori_shape = (height, width)
+        if reduction > 1:
+            full_w, full_h = size
+            # cv2 applies EXIF orientation, which may swap the header dims
+            if (height, width) != (-(-full_h // reduction), -(-full_w // reduction)):
+                full_w, full_h = full_h, full_w
+            ori_shape = (full_h, full_w)
+            logger.debug(f"Decoded {filename} at 1/{reduction} resolution.")
+
+        results["img"] = img
+        results["img_shape"] = (height, width)
+        results["ori_shape"] = ori_shape
+        results["decode_scale"] = (width / ori_shape[1], height / ori_shape[0])
+        return results
+
+    def __repr__(self) -> str:
+        """Returns the transform with its arguments."""
+        return (
+            f"{self.__class__.__name__}(target_scale={self.target_scale}, "
+            f"max_reduction={self.max_reduction}, "
+            f"jpeg_backend='{self.jpeg_backend}', "
+            f"color_type='{self.color_type}', to_float32={self.to_float32})"
+        )
+
+
+@TRANSFORMS.register_module()
+class LoadImageFromCache(LoadImageFromFile):
+    """Loads pre-decoded images from an `ez-mmdet cache-dataset` store.
+
+    Images are zero-copy views into a memory-mapped file, so no JPEG is
+    decoded during training. Images missing from the cache are decoded from
+    file. Cached images may be downscaled, so an `ApplyDecodeScale` transform
+    must follow (as with `LoadImageFromFileReduced`).
+
+    Added Keys:
+        decode_scale (tuple[float, float]): (w_scale, h_scale) from the
+            original image to the cached image.
+
+    Args:
+        cache_dir: A directory created by `build_image_cache`.
+        **kwargs: Arguments forwarded to `LoadImageFromFile`.
+    """
+
+    def __init__(self, cache_dir: str, **kwargs) -> None:
+        """Sets the cache; its reader is opened lazily in each worker."""
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self._reader: Optional[ImageCacheReader] = None
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Reads the image from the cache, or from file if it is not cached.
+
+        Args:
+            results: Result dict from :class:`mmengine.dataset.BaseDataset`.
+
+        Returns:
+            The dict containing the image and meta information.
+        """
+        if self._reader is None:
+            self._reader = ImageCacheReader(self.cache_dir)
+
+        filename = results["img_path"]
+        if self.color_type != "color" or filename not in self._reader:
+            results = super().transform(results)
+            if results is not None:
+                results["decode_scale"] = (1.0, 1.0)
+            return results
+
+        img, ori_shape = self._reader.read(filename)
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        height, width = img.shape[:2]
+        results["img"] = img
+        results["img_shape"] = (height, width)
+        results["ori_shape"] = ori_shape
+        results["decode_scale"] = (width / ori_shape[1], height / ori_shape[0])
+        return results
+
+    def __repr__(self) -> str:
+        """Returns the transform with its arguments."""
+        return (
+            f"{self.__class__.__name__}(cache_dir='{self.cache_dir}', "
+            f"color_type='{self.color_type}', to_float32={self.to_float32})"
+        )
+
+
+@TRANSFORMS.register_module()
+class ApplyDecodeScale(BaseTransform):
+    """Maps between original and reduced-decode coordinates.
+
+    Place it right after `LoadAnnotations` in training pipelines, where it
+    rescales ground-truth boxes, masks and seg maps (loaded in original
+    coordinates) onto the decoded image. Place it right after `Resize` in
+    test pipelines, where it folds the decode scale into `scale_factor` so
+    predictions are rescaled back to `ori_shape`.
+
+    When annotations are loaded before a `Resize`, which overwrites
+    `scale_factor`, use one instance with `scale_factor=False` after
+    `LoadAnnotations` and one with `annotations=False` after the `Resize`.
+
+    Required Keys:
+        decode_scale (optional; the transform is a no-op without it)
+
+    Modified Keys:
+        gt_bboxes, gt_masks, gt_seg_map, scale_factor
+
+    Removed Keys:
+        decode_scale (unless `scale_factor` is False)
+
+    Args:
+        annotations: Whether to rescale the annotations.
+        scale_factor: Whether to fold the decode scale into `scale_factor`.
+            Otherwise `decode_scale` is kept for a later instance.
+    """
+
+    def __init__(self, annotations: bool = True, scale_factor: bool = True) -> None:
+        """Sets which of the annotations and `scale_factor` are updated."""
+        self.annotations = annotations
+        self.scale_factor = scale_factor
+
+    def transform(self, results: dict) -> dict:
+        """Applies the decode scale to annotations and `scale_factor`.
+
+        Args:
+            results: Result dict from `LoadImageFromFileReduced`.
+
+        Returns:
+            The updated result dict.
+        """
+        if self.scale_factor:
+            decode_scale = results.pop("decode_scale", None)
+        else:
+            decode_scale = results.get("decode_scale")
+        if decode_scale is None or tuple(decode_scale) == (1.0, 1.0):
+            return results
+        w_scale, h_scale = decode_scale
+
+        if self.annotations:
+            self._rescale_annotations(results, w_scale, h_scale)
+        if not self.scale_factor:
+            return results
+        if "scale_factor" in results:
+            sf_w, sf_h = results["scale_factor"]
+            results["scale_factor"] = (sf_w * w_scale, sf_h * h_scale)
+        else:
+            results["scale_factor"] = (w_scale, h_scale)
+        return results
+
+    @staticmethod
+    def _rescale_annotations(results: dict, w_scale: float, h_scale: float) -> None:
+        if results.get("gt_bboxes") is not None:
+            results["gt_bboxes"].rescale_((w_scale, h_scale))
+            results["gt_bboxes"].clip_(results["img_shape"])
+        if results.get("gt_masks") is not None:
+            results["gt_masks"] = results["gt_masks"].resize(results["img_shape"])
+        if results.get("gt_seg_map") is not None:
+            height, width = results["img_shape"]
+            results["gt_seg_map"] = mmcv.imresize(
+                results["gt_seg_map"], (width, height), interpolation="nearest"
+            )
+
+    def __repr__(self) -> str:
+        """Returns the transform with its arguments."""
+        return (
+            f"{self.__class__.__name__}(annotations={self.annotations}, "
+            f"scale_factor={self.scale_factor})"
+        )
+
+
+def enable_reduced_decode(pipeline, jpeg_backend: str = "cv2") -> bool:
+    """Switches a built inference pipeline to reduced-resolution decoding.
+
+    Replaces the file loader inside `InferencerLoader` with
+    `LoadImageFromFileReduced` targeting the pipeline's `Resize` scale and
+    inserts `ApplyDecodeScale` right after that `Resize`.
+
+    Args:
+        pipeline: The `Compose` pipeline of a `DetInferencer`.
+        jpeg_backend: 'cv2' or 'turbojpeg'.
+
+    Returns:
+        True if the pipeline uses reduced decoding afterwards.
+    """
+    transforms = pipeline.transforms
+    if any(isinstance(t, ApplyDecodeScale) for t in transforms):
+        return True
+
+    loader = next((t for t in transforms if hasattr(t, "from_file")), None)
+    resize_idx = next(
+        (
+            i
+            for i, t in enumerate(transforms)
+            if type(t).__name__ == "Resize" and getattr(t, "scale", None)
+        ),
+        None,
+    )
+    if loader is None or resize_idx is None:
+        logger.warning(
+            "Inference pipeline has no file loader or fixed-scale Resize; "
+            "decoding at full resolution."
+        )
+        return False
+
+    base = loader.from_file
+    loader.from_file = LoadImageFromFileReduced(
+        target_scale=transforms[resize_idx].scale,
+        jpeg_backend=jpeg_backend,
+        to_float32=base.to_float32,
+        color_type=base.color_type,
+        imdecode_backend=base.imdecode_backend,
+        backend_args=base.backend_args,
+    )
+    transforms.insert(resize_idx + 1, ApplyDecodeScale())
+    return True
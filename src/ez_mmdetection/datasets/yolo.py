@@ -0,0 +1,130 @@
+"""Dataset reading YOLO txt labels directly, without a COCO conversion."""
+
+import os
+from typing import List
+
+from mmdet.datasets import BaseDetDataset
+from mmdet.registry import DATASETS
+
+from ez_mmdetection.utils.converters import (
+    list_images,
+    parse_yolo_line,
+    yolo_image_sizes,
+)
+
+
+@DATASETS.register_module()
+class YoloDataset(BaseDetDataset):
+    """Detection dataset in the YOLO format: one `.txt` label file per image.
+
+    Only image paths and sizes are indexed up front; each label file is
+    parsed when its sample is requested, so no annotation JSON is loaded
+    into the main process or the dataloader workers. Image sizes (needed to
+    scale the normalized coordinates) are read from the file headers once
+    and persisted under `<cache>/yolo_sizes/`, keyed by the labels directory.
+
+    `ann_file` is the labels directory, mirroring the image directory given
+    in `data_prefix["img"]`. Polygon labels become instance masks.
+    `metainfo["classes"]` must list the class names in label order.
+    """
+
+    METAINFO = {"classes": ()}
+
+    def load_data_list(self) -> List[dict]:
+        """Indexes the images of the split with their sizes.
+
+        Returns:
+            One raw data info per readable image, with the path of its
+            label file; instances are added by `parse_data_info`.
+        """
+        if not self.metainfo.get("classes"):
+            raise ValueError("YoloDataset requires metainfo['classes'].")
+        img_root = self.data_prefix["img"]
+        rel_paths = list_images(img_root)
+        sizes = yolo_image_sizes(img_root, self.ann_file, rel_paths)
+
+        data_list = []
+        for img_id, rel_path in enumerate(rel_paths):
+            if rel_path not in sizes:
+                continue
+            label_path = os.path.join(
+                self.ann_file, os.path.splitext(rel_path)[0] + ".txt"
+            )
+            width, height = sizes[rel_path]
+            data_list.append(
+                {
+                    "img_id": img_id,
+                    "img_path": os.path.join(img_root, rel_path),
+                    "label_path": label_path,
+                    "width": width,
+                    "height": height,
+                }
+            )
+        return data_list
+
+    def get_data_info(self, idx: int) -> dict:
+        """Returns the data info of a sample, parsing its label file."""
+        return self.parse_data_info(super().get_data_info(idx))
+
+    def parse_data_info(self, raw_data_info: dict) -> dict:
+        """Adds the instances of a sample's label file to its data info.
+
+        Args:
+            raw_data_info: A data info from `load_data_list`.
+
+        Returns:
+            The data info with `instances` in absolute xyxy coordinates.
+        """
+        data_info = dict(raw_data_info)
+        data_info["seg_map_path"] = None
+        width, height = data_info["width"], data_info["height"]
+        num_classes = len(self.metainfo["classes"])
+
+        instances = []
+        if os.path.isfile(data_info["label_path"]):
+            with open(data_info["label_path"], "r") as f:
+                lines = f.read().splitlines()
+            for line in lines:
+                ann = parse_yolo_line(line, width, height, num_classes)
+                if ann is None:
+                    continue
+                label, (x, y, w, h), _, polygon = ann
+                instance = {
+                    "ignore_flag": 0,
+                    "bbox": [x, y, x + w, y + h],
+                    "bbox_label": label,
+                }
+                if polygon is not None:
+                    instance["mask"] = [polygon]
+                instances.append(instance)
+        data_info["instances"] = instances
+        return data_info
+
+    def filter_data(self) -> List[dict]:
+        """Filters images by `filter_cfg` without parsing their labels.
+
+        An image counts as annotated if its label file is non-empty.
+
+        Returns:
+            The filtered data list.
+        """
+        if self.test_mode or self.filter_cfg is None:
+            return self.data_list
+
+        filter_empty_gt = self.filter_cfg.get("filter_empty_gt", False)
+        min_size = self.filter_cfg.get("min_size", 0)
+        valid = []
+        for data_info in self.data_list:
+            if min(data_info["width"], data_info["height"]) < min_size:
+                continue
+            if filter_empty_gt and not _has_labels(data_info["label_path"]):
+                continue
+            valid.append(data_info)
+        return valid
+
+
+def _has_labels(label_path: str) -> bool:
+    try:
+        return os.path.getsize(label_path) > 0
+    except OSError:
+        return False
@@ -0,0 +1,20 @@
+# Importing this package registers the custom hooks and loops with MMDetection
+from .hooks import (
+    AsyncCheckpointHook,
+    CompileHook,
+    PlateauStoppingHook,
+    ProgressiveResizeHook,
+    TelemetryHook,
+    TrialPruningHook,
+)
+from .loops import SubsetValLoop
+
+__all__ = [
+    "AsyncCheckpointHook",
+    "CompileHook",
+    "PlateauStoppingHook",
+    "ProgressiveResizeHook",
+    "SubsetValLoop",
+    "TelemetryHook",
+    "TrialPruningHook",
+]
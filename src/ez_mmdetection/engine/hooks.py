@@ -0,0 +1,593 @@
+"""Training hooks."""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from math import isfinite
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import mmengine.runner.runner as runner_module
+import torch
+from mmcv.transforms import Compose
+from mmdet.registry import HOOKS
+from mmengine.dist import is_main_process
+from mmengine.fileio.backends import LocalBackend
+from mmengine.hooks import CheckpointHook, EarlyStoppingHook, EMAHook, Hook
+from mmengine.model import is_model_wrapper
+from mmengine.runner import BaseLoop
+
+from ez_mmdetection.utils.checkpoint import snapshot_checkpoint
+from ez_mmdetection.utils.compile import (
+    COMPILE_MODES,
+    compile_cache_dir,
+    compile_detector,
+)
+from ez_mmdetection.utils.sweep import (
+    TRIAL_REPORT,
+    append_trial_report,
+    best_score,
+    read_trial_report,
+    should_prune,
+)
+from ez_mmdetection.utils.telemetry import (
+    PHASES,
+    MetricsServer,
+    prometheus_text,
+    summarize_iterations,
+)
+
+
+@HOOKS.register_module()
+class AsyncCheckpointHook(CheckpointHook):
+    """`CheckpointHook` that writes checkpoints in a background thread.
+
+    The training thread only snapshots the checkpoint into CPU memory; a
+    writer thread serializes it to a temporary file and renames it into
+    place, so a checkpoint file is always complete. At most one write is
+    in flight: the next save waits for the previous one, which bounds the
+    extra memory to one checkpoint. Writes are flushed when training ends.
+
+    Takes the same arguments as `CheckpointHook`. Checkpoints to remote
+    storage are written synchronously.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Builds the hook and its single writer thread."""
+        super().__init__(*args, **kwargs)
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="checkpoint-writer")
+        self._pending: Optional[Future] = None
+
+    def wait(self) -> None:
+        """Blocks until the pending write is done, re-raising its error."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    @staticmethod
+    def _write(checkpoint: dict, filename: str) -> None:
+        tmp = f"{filename}.tmp"
+        torch.save(checkpoint, tmp)
+        os.replace(tmp, filename)
+
+    @contextmanager
+    def _deferred_writes(self):
+        # `Runner.save_checkpoint` builds the checkpoint and ends with the
+        # module-level `save_checkpoint`; only that last step is deferred
+        save_sync = runner_module.save_checkpoint
+
+        def save_async(checkpoint, filename, **kwargs):
+            snapshot = snapshot_checkpoint(checkpoint)
+            self._pending = self._writer.submit(self._write, snapshot, filename)
+
+        runner_module.save_checkpoint = save_async
+        try:
+            yield
+        finally:
+            runner_module.save_checkpoint = save_sync
+
+    def _save_deferred(self, save, *args) -> None:
+        # Waiting first also keeps the parent's removal of old checkpoints
+        # from missing a file that is still being written
+        self.wait()
+        if not isinstance(self.file_backend, LocalBackend):
+            save(*args)
+            return
+        with self._deferred_writes():
+            save(*args)
+
+    def _save_checkpoint_with_step(self, runner, step, meta):
+        self._save_deferred(super()._save_checkpoint_with_step, runner, step, meta)
+
+    def _save_best_checkpoint(self, runner, metrics) -> None:
+        self._save_deferred(super()._save_best_checkpoint, runner, metrics)
+
+    def after_train(self, runner) -> None:
+        """Saves the last checkpoint and waits until it is written.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        super().after_train(runner)
+        self.wait()
+
+    def after_run(self, runner) -> None:
+        """Waits for the pending write and stops the writer thread.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        self.wait()
+        self._writer.shutdown()
+
+
+@HOOKS.register_module()
+class PlateauStoppingHook(EarlyStoppingHook):
+    """`EarlyStoppingHook` with a minimum number of epochs and a stop record.
+
+    Training stops once `monitor` has not improved by at least `min_delta`
+    over `patience` validations, but not before epoch `min_epochs` (a
+    non-finite metric still stops it at once). When it stops, the reason,
+    epoch and best score are written to `early_stopping.json` in the work
+    dir.
+
+    Args:
+        min_epochs: Epochs to train before stopping is allowed.
+        **kwargs: Arguments of `EarlyStoppingHook`.
+    """
+
+    RECORD_FILE = "early_stopping.json"
+
+    def __init__(self, *args, min_epochs: int = 0, **kwargs):
+        """Builds the hook; see the class docstring for the arguments."""
+        super().__init__(*args, **kwargs)
+        self.min_epochs = min_epochs
+        self.best_epoch: Optional[int] = None
+
+    def after_val_epoch(self, runner, metrics) -> None:
+        """Stops training once the monitored metric has plateaued.
+
+        Args:
+            runner: The runner of the training process.
+            metrics: Evaluation results of all metrics.
+        """
+        if self.monitor not in metrics:
+            super().after_val_epoch(runner, metrics)
+            return
+
+        score = metrics[self.monitor]
+        best_score = self.best_score
+        stop, reason = self._check_stop_condition(score)
+        if self.best_score != best_score:
+            self.best_epoch = runner.epoch
+        if not stop:
+            return
+        if runner.epoch < self.min_epochs and isfinite(score):
+            return
+
+        runner.train_loop.stop_training = True
+        runner.logger.info(f"Stopping early at epoch {runner.epoch}: {reason}")
+        if is_main_process():
+            record = dict(
+                epoch=runner.epoch,
+                monitor=self.monitor,
+                score=score,
+                best_score=self.best_score,
+                best_epoch=self.best_epoch,
+                patience=self.patience,
+                reason=reason.strip(),
+            )
+            path = Path(runner.work_dir) / self.RECORD_FILE
+            path.write_text(json.dumps(record, indent=2))
+
+
+@HOOKS.register_module()
+class TrialPruningHook(Hook):
+    """Reports a sweep trial's validation metric and prunes lagging trials.
+
+    After each validation, the score of `monitor` is appended to the trial's
+    report in its work dir. With `prune`, training stops once the trial's
+    best score is worse than the median of the other trials' best scores at
+    the same epoch, read from their reports under `sweep_dir`.
+
+    Args:
+        monitor: The metric to report.
+        sweep_dir: Directory holding the work dir of every trial.
+        rule: 'greater' if higher scores are better, else 'less'.
+        prune: Whether to stop lagging trials.
+        warmup_epochs: Epochs before the trial may be pruned.
+        min_peers: Other trials validated at an epoch before pruning at it.
+    """
+
+    priority = "LOWEST"
+
+    def __init__(
+        self,
+        monitor: str,
+        sweep_dir: str,
+        rule: str = "greater",
+        prune: bool = True,
+        warmup_epochs: int = 0,
+        min_peers: int = 2,
+    ):
+        """Builds the hook; see the class docstring for the arguments."""
+        self.monitor = monitor
+        self.sweep_dir = Path(sweep_dir)
+        self.rule = rule
+        self.prune = prune
+        self.warmup_epochs = warmup_epochs
+        self.min_peers = min_peers
+
+    def after_val_epoch(self, runner, metrics) -> None:
+        """Reports the monitored metric and stops training if the trial lags.
+
+        Args:
+            runner: The runner of the training process.
+            metrics: Evaluation results of all metrics.
+        """
+        if self.monitor not in metrics or not is_main_process():
+            return
+        report = Path(runner.work_dir) / TRIAL_REPORT
+        epoch = runner.epoch
+        score = float(metrics[self.monitor])
+        append_trial_report(report, dict(epoch=epoch, score=score))
+        if not self.prune or epoch < self.warmup_epochs:
+            return
+
+        score = best_score(read_trial_report(report), epoch, self.rule)
+        peers = [
+            best_score(read_trial_report(path), epoch, self.rule)
+            for path in self.sweep_dir.glob(f"*/{TRIAL_REPORT}")
+            if path.resolve() != report.resolve()
+        ]
+        peers = [peer for peer in peers if peer is not None]
+        if should_prune(score, peers, self.rule, self.min_peers):
+            runner.train_loop.stop_training = True
+            append_trial_report(report, dict(epoch=epoch, pruned=True))
+            runner.logger.info(
+                f"Pruning trial at epoch {epoch}: best {self.monitor} {score:.4f} "
+                f"is below the median of {len(peers)} other trials"
+            )
+
+
+@HOOKS.register_module()
+class TelemetryHook(Hook):
+    """Records where the time of each training iteration goes.
+
+    Each iteration is split into the dataloader wait, `data_preprocessor`,
+    forward, head loss, backward, optimizer step, EMA update and other hook
+    time (`PHASES`), by timing the model, optimizer wrapper and hook methods
+    of the runner. Timings in milliseconds are appended to
+    `telemetry.jsonl` (or `.csv`) in the log dir, and every `interval`
+    iterations a summary with p50/p95 per phase, images per second and the
+    share of time spent waiting for data is logged and, with `port`,
+    served in the Prometheus text format on localhost.
+
+    Only the main process records. On CUDA, timed calls synchronize the
+    device so kernels are attributed to the phase that launched them; this
+    slows training slightly. The timed methods are restored when training
+    ends, also when it raises.
+
+    Args:
+        interval: Iterations per summary.
+        file_format: 'jsonl' or 'csv'.
+        port: Port of the Prometheus endpoint; None serves none.
+        sync_cuda: Whether to synchronize CUDA around timed calls.
+    """
+
+    priority = "LOWEST"
+
+    def __init__(
+        self,
+        interval: int = 50,
+        file_format: str = "jsonl",
+        port: Optional[int] = None,
+        sync_cuda: bool = True,
+    ):
+        """Builds the hook; see the class docstring for the arguments."""
+        if file_format not in ("jsonl", "csv"):
+            raise ValueError(
+                f"file_format must be 'jsonl' or 'csv', got {file_format!r}"
+            )
+        self.interval = interval
+        self.file_format = file_format
+        self.port = port
+        self.sync_cuda = sync_cuda
+        self.server: Optional[MetricsServer] = None
+        self._file = None
+        self._csv = None
+        self._patched: List[tuple] = []
+        self._window: List[dict] = []
+        self._times: Dict[str, float] = {}
+        self._sync = lambda: None
+        self._iter_end = 0.0
+        self._batch_size = 0
+
+    def _timed(self, phase: str, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            self._sync()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._sync()
+                self._times[phase] += (time.perf_counter() - start) * 1000
+
+        return timed
+
+    def _patch(self, obj, name: str, phase: str) -> None:
+        if obj is None or not hasattr(obj, name):
+            return
+        if isinstance(obj, Hook) and getattr(type(obj), name) is getattr(Hook, name):
+            return
+        setattr(obj, name, self._timed(phase, getattr(obj, name)))
+        self._patched.append((obj, name))
+
+    def before_run(self, runner) -> None:
+        """Makes the train loop restore the timed methods, even on errors.
+
+        MMEngine calls no hook when training raises, so the loop's `run` is
+        wrapped instead.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        train_loop = runner._train_loop
+        if not isinstance(train_loop, BaseLoop):
+            return  # not training
+        run = train_loop.run
+
+        @wraps(run)
+        def run_and_restore(*args, **kwargs):
+            try:
+                return run(*args, **kwargs)
+            finally:
+                del train_loop.run
+                self._restore()
+
+        train_loop.run = run_and_restore
+
+    def before_train(self, runner) -> None:
+        """Wraps the timed methods and opens the telemetry file.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        if not is_main_process():
+            return
+        model = runner.model
+        if is_model_wrapper(model):
+            model = model.module
+        if self.sync_cuda and torch.cuda.is_available():
+            if any(p.is_cuda for p in model.parameters()):
+                self._sync = torch.cuda.synchronize
+
+        self._patch(model.data_preprocessor, "forward", "preprocess")
+        # Wrappers run the forward themselves
+        self._patch(runner.model, "_run_forward", "forward")
+        self._patch(getattr(model, "bbox_head", None), "loss", "loss")
+        self._patch(runner.optim_wrapper, "backward", "backward")
+        self._patch(runner.optim_wrapper, "step", "step")
+        self._patch(runner.optim_wrapper, "zero_grad", "step")
+        for hook in runner.hooks:
+            if hook is self:
+                continue
+            phase = "ema" if isinstance(hook, EMAHook) else "hooks"
+            self._patch(hook, "before_train_iter", phase)
+            self._patch(hook, "after_train_iter", phase)
+
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._iter_end = time.perf_counter()
+        path = Path(runner.log_dir) / f"telemetry.{self.file_format}"
+        self._file = open(path, "w", newline="")
+        if self.file_format == "csv":
+            fields = ["iter", "epoch", "batch_size", *PHASES, "total"]
+            self._csv = csv.DictWriter(self._file, fieldnames=fields)
+            self._csv.writeheader()
+        if self.port is not None:
+            self.server = MetricsServer(self.port)
+            url = f"http://127.0.0.1:{self.server.port}/metrics"
+            runner.logger.info(f"Serving training telemetry at {url}")
+
+    def before_train_epoch(self, runner) -> None:
+        """Starts timing the epoch's first dataloader wait.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        # Excludes validation and checkpointing from the first wait
+        self._iter_end = time.perf_counter()
+        self._times = dict.fromkeys(PHASES, 0.0)
+
+    def before_train_iter(self, runner, batch_idx: int, data_batch=None) -> None:
+        """Records the dataloader wait and the batch size.
+
+        Args:
+            runner: The runner of the training process.
+            batch_idx: The index of the current batch in the train loop.
+            data_batch: Data from dataloader.
+        """
+        if self._file is None:
+            return
+        # The other hooks' `before_train_iter` ran after the wait
+        waited = (time.perf_counter() - self._iter_end) * 1000
+        self._times["data"] = waited - self._times["hooks"] - self._times["ema"]
+        inputs = data_batch.get("inputs") if isinstance(data_batch, dict) else None
+        self._batch_size = len(inputs) if inputs is not None else 0
+
+    def after_train_iter(
+        self, runner, batch_idx: int, data_batch=None, outputs=None
+    ) -> None:
+        """Writes the iteration's phase timings and logs periodic summaries.
+
+        Args:
+            runner: The runner of the training process.
+            batch_idx: The index of the current batch in the train loop.
+            data_batch: Data from dataloader.
+            outputs: Outputs from model.
+        """
+        if self._file is None:
+            return
+        end = time.perf_counter()
+        total = (end - self._iter_end) * 1000
+        times = self._times
+        # The head loss runs inside the forward
+        times["forward"] -= times["loss"]
+        timed = sum(times[phase] for phase in PHASES if phase != "other")
+        times["other"] = total - timed
+        record = dict(
+            iter=runner.iter + 1, epoch=runner.epoch, batch_size=self._batch_size
+        )
+        record.update({phase: round(times[phase], 3) for phase in PHASES})
+        record["total"] = round(total, 3)
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+        self._window.append(record)
+        if len(self._window) >= self.interval:
+            self._summarize(runner)
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._iter_end = time.perf_counter()
+
+    def _summarize(self, runner) -> None:
+        summary = summarize_iterations(self._window)
+        self._window = []
+        self._file.flush()
+        phases = summary["phases"]
+        runner.logger.info(
+            f"Telemetry over {summary['iters']} iters: "
+            f"{summary['images_per_s']:.1f} img/s, "
+            f"{summary['data_fraction']:.0%} of the time waiting for data; p50/p95 ms "
+            + ", ".join(
+                f"{phase} {phases[phase]['p50']:.1f}/{phases[phase]['p95']:.1f}"
+                for phase in PHASES + ("total",)
+            )
+        )
+        if self.server is not None:
+            self.server.text = prometheus_text(summary)
+
+    def after_train(self, runner) -> None:
+        """Logs the summary of the last iterations.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        if self._file is not None and self._window:
+            self._summarize(runner)
+
+    def _restore(self) -> None:
+        """Restores the timed methods and closes the file and endpoint."""
+        for obj, name in reversed(self._patched):
+            delattr(obj, name)
+        self._patched = []
+        self._window = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._csv = None
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+
+@HOOKS.register_module()
+class CompileHook(Hook):
+    """Compiles the model's backbone, neck and head forward before training.
+
+    Compiling happens after `before_run`, once EMA copies of the model have
+    been made and checkpoints loaded. Target assignment, the losses and
+    post-processing stay eager. Compiled kernels are cached in `cache_dir`,
+    so later runs in the same work_dir skip most of the compile time.
+
+    Args:
+        mode: 'default', 'reduce-overhead' or 'max-autotune'.
+        cache_dir: TorchInductor cache. Defaults to `$TORCHINDUCTOR_CACHE_DIR`
+            if set, else `compile_cache` in the work_dir.
+    """
+
+    def __init__(self, mode: str = "default", cache_dir: Optional[str] = None):
+        """Builds the hook; see the class docstring for the arguments."""
+        if mode not in COMPILE_MODES:
+            raise ValueError(f"mode must be one of {COMPILE_MODES}, got {mode!r}")
+        self.mode = mode
+        self.cache_dir = cache_dir
+
+    def before_train(self, runner) -> None:
+        """Compiles the model, caching kernels in `cache_dir`.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        cache_dir = compile_cache_dir(
+            Path(runner.work_dir) / "compile_cache", self.cache_dir
+        )
+        runner.logger.info(f"Caching compiled kernels in {cache_dir}")
+        model = runner.model
+        if is_model_wrapper(model):
+            model = model.module
+        compile_detector(model, mode=self.mode, cache_dir=cache_dir)
+
+
+@HOOKS.register_module()
+class ProgressiveResizeHook(Hook):
+    """Trains the first epochs on smaller images, growing them in stages.
+
+    At the start of each stage's epoch, the train dataset's pipeline is
+    replaced, like mmdet's `PipelineSwitchHook` does, and persistent
+    dataloader workers are restarted to pick it up. The last stage restores
+    the full-size pipeline; a run resumed past its epoch is left alone, so
+    a later `PipelineSwitchHook` stage is not undone.
+
+    Args:
+        stages: Dicts with the `epoch` a stage starts at, its image `size`
+            and its `pipeline`, in increasing epoch order.
+    """
+
+    def __init__(self, stages: List[dict]):
+        """Builds the hook; see the class docstring for the arguments."""
+        if not stages:
+            raise ValueError("ProgressiveResizeHook needs at least one stage")
+        epochs = [stage["epoch"] for stage in stages]
+        if epochs != sorted(set(epochs)):
+            raise ValueError(f"Stage epochs must increase, got {epochs}")
+        self.stages = stages
+        self._current: Optional[int] = None
+        self._restart_dataloader = False
+
+    def before_train_epoch(self, runner) -> None:
+        """Switches to the pipeline of the stage starting at this epoch.
+
+        Args:
+            runner: The runner of the training process.
+        """
+        train_loader = runner.train_dataloader
+        if self._restart_dataloader:
+            # The workers were restarted in the previous epoch
+            train_loader._DataLoader__initialized = True
+            self._restart_dataloader = False
+        started = [
+            i for i, stage in enumerate(self.stages) if stage["epoch"] <= runner.epoch
+        ]
+        if not started or started[-1] == self._current:
+            return
+        index = started[-1]
+        if index == len(self.stages) - 1 and self._current is None:
+            return  # resumed after the last stage; the configured pipeline applies
+        stage = self.stages[index]
+        runner.logger.info(
+            f"Progressive resize: training on {stage['size']}px images from epoch "
+            f"{runner.epoch + 1}"
+        )
+        train_loader.dataset.pipeline = Compose(stage["pipeline"])
+        if getattr(train_loader, "persistent_workers", False) is True:
+            train_loader._DataLoader__initialized = False
+            train_loader._iterator = None
+            self._restart_dataloader = True
+        self._current = index
@@ -0,0 +1,186 @@
+"""Training loops."""
+
+import copy
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from mmdet.registry import LOOPS
+from mmengine.dist import is_main_process
+from mmengine.evaluator import Evaluator
+from mmengine.hooks import CheckpointHook, EarlyStoppingHook
+from mmengine.runner import BaseLoop, ValLoop
+from mmengine.runner.loops import _parse_losses
+from torch.utils.data import DataLoader
+
+from ez_mmdetection.engine.hooks import TrialPruningHook
+from ez_mmdetection.utils.val_subset import (
+    labels_fingerprint,
+    load_val_subset,
+    stratified_subset,
+    write_val_subset,
+)
+
+SUBSET_PREFIX = "subset"
+# Hooks comparing scores across validations, which only see full-split runs
+_BEST_SCORE_HOOKS = (CheckpointHook, EarlyStoppingHook, TrialPruningHook)
+
+
+@LOOPS.register_module()
+class SubsetValLoop(ValLoop):
+    """`ValLoop` that validates on a class-stratified subset between full runs.
+
+    Intermediate validations use a fixed subset of `subset_size` images,
+    picked by `stratified_subset` so rare classes are kept. The full split
+    is validated at the epochs in `full_val_epochs` and at the last epoch,
+    and whenever validation runs outside of epoch-based training.
+
+    Subset metrics are reported under `subset/`, e.g. 'subset/coco/bbox_mAP',
+    and are not passed to checkpoint, early stopping or trial pruning hooks,
+    so best checkpoints and stopping decisions only follow full validations.
+
+    Args:
+        subset_size: Number of images of the subset. None validates the
+            full split every time.
+        full_val_epochs: Epochs after which the full split is validated.
+        cache_file: JSON file caching the split's subset image ids, so the
+            same subset is reused across runs until its labels change. If
+            it cannot be written, the subset is only kept for this run.
+        seed: Seed of the subset selection.
+        **kwargs: Arguments of `ValLoop`.
+    """
+
+    def __init__(
+        self,
+        runner,
+        dataloader,
+        evaluator,
+        subset_size: Optional[int] = None,
+        full_val_epochs: Sequence[int] = (),
+        cache_file: Optional[str] = None,
+        seed: int = 0,
+        **kwargs,
+    ) -> None:
+        """Builds the full split's loop and the subset's dataloader and evaluator."""
+        # Kept to build the subset's dataloader and evaluator alike
+        dataloader_cfg = (
+            None if isinstance(dataloader, DataLoader) else copy.deepcopy(dataloader)
+        )
+        evaluator_cfg = (
+            None if isinstance(evaluator, Evaluator) else copy.deepcopy(evaluator)
+        )
+        super().__init__(runner, dataloader, evaluator, **kwargs)
+        self.full_val_epochs = set(full_val_epochs)
+        self.subset_dataloader: Optional[DataLoader] = None
+        self.subset_evaluator: Optional[Evaluator] = None
+        if subset_size is None:
+            return
+        if dataloader_cfg is None or evaluator_cfg is None:
+            runner.logger.warning(
+                "SubsetValLoop needs dataloader and evaluator configs; "
+                "validating on the full split"
+            )
+            return
+
+        dataset = self.dataloader.dataset
+        if subset_size >= len(dataset):
+            return
+        img_ids = self._select(dataset, subset_size, cache_file, seed)
+        index_of = {dataset.get_data_info(i)["img_id"]: i for i in range(len(dataset))}
+        indices = sorted(index_of[img_id] for img_id in img_ids)
+
+        dataloader_cfg["dataset"] = dataset.get_subset(indices)
+        self.subset_dataloader = runner.build_dataloader(
+            dataloader_cfg, seed=runner.seed
+        )
+        self.subset_evaluator = runner.build_evaluator(evaluator_cfg)
+        self.subset_evaluator.dataset_meta = self.evaluator.dataset_meta
+        for metric in self.subset_evaluator.metrics:
+            # COCO metrics with an `ann_file` would otherwise evaluate all of
+            # its images, counting every unvalidated one as missed
+            if hasattr(metric, "img_ids"):
+                metric.img_ids = list(img_ids)
+            metric.prefix = "/".join(filter(None, (SUBSET_PREFIX, metric.prefix)))
+        runner.logger.info(
+            f"Validating on {len(indices)} of {len(dataset)} images between "
+            "full validations"
+        )
+
+    def _select(
+        self, dataset, size: int, cache_file: Optional[str], seed: int
+    ) -> List[int]:
+        """Returns the subset's image ids, from the cache if it is current."""
+        image_labels = []
+        for i in range(len(dataset)):
+            info = dataset.get_data_info(i)
+            labels = [
+                inst["bbox_label"]
+                for inst in info.get("instances", [])
+                if not inst.get("ignore_flag", 0)
+            ]
+            image_labels.append((info["img_id"], labels))
+        if cache_file is None:
+            return stratified_subset(image_labels, size, seed)
+
+        fingerprint = labels_fingerprint(image_labels)
+        img_ids = load_val_subset(Path(cache_file), fingerprint, size, seed)
+        if img_ids is None:
+            img_ids = stratified_subset(image_labels, size, seed)
+            if is_main_process():
+                try:
+                    write_val_subset(
+                        Path(cache_file), fingerprint, size, seed, img_ids
+                    )
+                except OSError as e:
+                    self.runner.logger.warning(
+                        f"Could not cache the validation subset in {cache_file}, "
+                        f"keeping it in memory: {e}"
+                    )
+        return img_ids
+
+    def _validates_full_split(self) -> bool:
+        if self.subset_dataloader is None:
+            return True
+        train_loop = self.runner._train_loop
+        if not isinstance(train_loop, BaseLoop):
+            return True
+        if not hasattr(train_loop, "max_epochs"):
+            return True
+        # The train loop counts the epoch as done before validating
+        epoch = train_loop.epoch
+        return epoch in self.full_val_epochs or epoch >= train_loop.max_epochs
+
+    def run(self) -> dict:
+        """Launch validation, on the subset unless the full split is due."""
+        if self._validates_full_split():
+            return super().run()
+
+        # Hooks and `run_iter` read the loop's dataloader and evaluator
+        dataloader, evaluator = self.dataloader, self.evaluator
+        self.dataloader, self.evaluator = self.subset_dataloader, self.subset_evaluator
+        try:
+            self.runner.logger.info(
+                f"Validating on a subset of {len(self.dataloader.dataset)} images"
+            )
+            return self._run_subset()
+        finally:
+            self.dataloader, self.evaluator = dataloader, evaluator
+
+    def _run_subset(self) -> dict:
+        """`ValLoop.run`, keeping the metrics from the best score hooks."""
+        self.runner.call_hook("before_val")
+        self.runner.call_hook("before_val_epoch")
+        self.runner.model.eval()
+
+        self.val_loss.clear()
+        for idx, data_batch in enumerate(self.dataloader):
+            self.run_iter(idx, data_batch)
+
+        metrics = self.evaluator.evaluate(len(self.dataloader.dataset))
+        if self.val_loss:
+            metrics.update(_parse_losses(self.val_loss, f"{SUBSET_PREFIX}/val"))
+
+        for hook in self.runner.hooks:
+            if not isinstance(hook, _BEST_SCORE_HOOKS):
+                hook.after_val_epoch(self.runner, metrics=metrics)
+        self.runner.call_hook("after_val")
+        return metrics
@@ -0,0 +1,5 @@
+# Importing this package registers the custom metrics with MMDetection
+from .coco_eval import VectorizedCOCOeval
+from .coco_metric import InMemoryCocoMetric
+
+__all__ = ["InMemoryCocoMetric", "VectorizedCOCOeval"]
@@ -0,0 +1,405 @@
+"""COCO evaluation with array-based matching, identical to pycocotools."""
+
+import copy
+import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+from mmdet.datasets.api_wrappers import COCOeval
+from pycocotools import mask as mask_utils
+
+# Most (detection, ground truth) pairs matched at once
+_PAIRS_PER_CHUNK = 1 << 22
+
+
+def paired_box_ious(
+    dt_boxes: np.ndarray, gt_boxes: np.ndarray, iscrowd: np.ndarray
+) -> np.ndarray:
+    """Returns the IoU of each (dt_boxes[i], gt_boxes[i]) pair of xywh boxes.
+
+    Same arithmetic as `pycocotools.mask.iou`: for crowd ground truth, the
+    union is the detection's area.
+    """
+    dx, dy, dw, dh = dt_boxes.T
+    gx, gy, gw, gh = gt_boxes.T
+    w = np.minimum(dw + dx, gw + gx) - np.maximum(dx, gx)
+    h = np.minimum(dh + dy, gh + gy) - np.maximum(dy, gy)
+    inter = w * h
+    dt_area = dw * dh
+    union = np.where(iscrowd, dt_area, dt_area + gw * gh - inter)
+    ious = np.zeros(len(dt_boxes))
+    overlap = (w > 0) & (h > 0)
+    ious[overlap] = inter[overlap] / union[overlap]
+    return ious
+
+
+def _run_starts(keys: np.ndarray) -> np.ndarray:
+    """Returns where each run of equal values starts, plus the end."""
+    if not len(keys):
+        return np.zeros(1, dtype=int)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+
+
+def _gather(
+    anns: Dict[tuple, List[dict]], img_index: dict, cat_index: dict
+) -> Tuple[np.ndarray, np.ndarray, List[dict]]:
+    """Flattens `COCOeval._gts` or `_dts` with image and category indexes."""
+    imgs, cats, flat = [], [], []
+    for (img_id, cat_id), group in anns.items():
+        k = cat_index.get(cat_id)
+        if k is None or not group:
+            continue
+        imgs += [img_index[img_id]] * len(group)
+        cats += [k] * len(group)
+        flat += group
+    return np.array(imgs, dtype=np.int64), np.array(cats, dtype=np.int64), flat
+
+
+def _geometry(anns: List[dict], iou_type: str) -> np.ndarray:
+    if iou_type == "bbox":
+        return np.array([a["bbox"] for a in anns], dtype=np.float64).reshape(-1, 4)
+    segms = np.empty(len(anns), dtype=object)
+    segms[:] = [a["segmentation"] for a in anns]
+    return segms
+
+
+class VectorizedCOCOeval(COCOeval):
+    """`COCOeval` that matches and accumulates with array operations.
+
+    pycocotools matches detections in Python loops over every image,
+    category, area range, IoU threshold, detection and ground truth. Here
+    the IoUs of all candidate pairs are computed at once, and the greedy
+    matching runs for every (image, category) group, area range and IoU
+    threshold together: step r matches the r-th best detection of each
+    group. Accumulation sums each category's sorted detections for all area
+    ranges and thresholds at once.
+
+    The arithmetic, ordering and tie-breaking follow pycocotools, so `eval`
+    and `stats` are identical. `evalImgs` and `ious` are not filled in.
+    Keypoints are evaluated by the pycocotools code.
+    """
+
+    def __init__(self, cocoGt=None, cocoDt=None, iouType="segm"):  # noqa: N803
+        """Builds the evaluator; arguments are those of `COCOeval`."""
+        super().__init__(cocoGt, cocoDt, iouType)
+        self._matches = None
+
+    def evaluate(self):
+        """Matches detections to the ground truth of each image."""
+        p = self.params
+        if p.useSegm is not None:
+            p.iouType = "segm" if p.useSegm == 1 else "bbox"
+        if p.iouType not in ("bbox", "segm"):
+            self._matches = None
+            return super().evaluate()
+        p.imgIds = list(np.unique(p.imgIds))
+        if p.useCats:
+            p.catIds = list(np.unique(p.catIds))
+        p.maxDets = sorted(p.maxDets)
+        self.params = p
+        self._prepare()
+
+        img_index = {img_id: i for i, img_id in enumerate(p.imgIds)}
+        cat_index = {cat_id: k for k, cat_id in enumerate(p.catIds)}
+        gt_img, gt_cat, gts = _gather(self._gts, img_index, cat_index)
+        dt_img, dt_cat, dts = _gather(self._dts, img_index, cat_index)
+        # Without categories, all of an image's objects are one group
+        num_cats = len(p.catIds) if p.useCats else 1
+        gt_group = gt_img * num_cats + gt_cat if p.useCats else gt_img
+        dt_group = dt_img * num_cats + dt_cat if p.useCats else dt_img
+
+        # Ground truth in `evaluateImg` order (by category without useCats)
+        order = np.lexsort((gt_cat, gt_group))
+        gt = dict(
+            group=gt_group[order],
+            img=gt_img[order],
+            cat=gt_cat[order] if p.useCats else np.zeros(len(order), np.int64),
+            id=np.array([g["id"] for g in gts], dtype=np.int64)[order],
+            crowd=np.array([int(g["iscrowd"]) for g in gts], dtype=bool)[order],
+            ignore=np.array([bool(g["ignore"]) for g in gts], dtype=bool)[order],
+            area=np.array([g["area"] for g in gts], dtype=np.float64)[order],
+            geom=_geometry(gts, p.iouType)[order],
+        )
+        # Detections by group, then descending score (stable, as mergesort)
+        scores = np.array([d["score"] for d in dts], dtype=np.float64)
+        order = np.lexsort((dt_cat, -scores, dt_group))
+        dt = dict(
+            group=dt_group[order],
+            img=dt_img[order],
+            cat=dt_cat[order] if p.useCats else np.zeros(len(order), np.int64),
+            score=scores[order],
+            id=np.array([d["id"] for d in dts], dtype=np.int64)[order],
+            area=np.array([d["area"] for d in dts], dtype=np.float64)[order],
+            geom=_geometry(dts, p.iouType)[order],
+        )
+        bounds = _run_starts(dt["group"])
+        dt["rank"] = np.arange(len(order)) - np.repeat(bounds[:-1], np.diff(bounds))
+        kept = dt["rank"] < p.maxDets[-1]
+        dt = {key: value[kept] for key, value in dt.items()}
+
+        area_rng = np.asarray(p.areaRng, dtype=np.float64)
+        lo, hi = area_rng[:, :1], area_rng[:, 1:]
+        gt_ignored = gt["ignore"] | (gt["area"] < lo) | (gt["area"] > hi)
+        dt_outside = (dt["area"] < lo) | (dt["area"] > hi)
+
+        num_iou = len(p.iouThrs)
+        shape = (len(area_rng), num_iou, len(dt["group"]))
+        matched = np.zeros(shape, dtype=bool)
+        matched_ignored = np.zeros(shape, dtype=bool)
+        for start, end in self._chunks(dt["group"], gt["group"]):
+            g_start = np.searchsorted(gt["group"], dt["group"][start], "left")
+            g_end = np.searchsorted(gt["group"], dt["group"][end - 1], "right")
+            matched[:, :, start:end], matched_ignored[:, :, start:end] = self._match(
+                {key: value[start:end] for key, value in dt.items()},
+                {key: value[g_start:g_end] for key, value in gt.items()},
+                gt_ignored[:, g_start:g_end],
+            )
+
+        # As `evaluateImg`: unmatched detections outside the area range
+        # are ignored. Matched means matched to a ground truth id other than 0
+        dt_ignored = matched_ignored | (~matched & dt_outside[:, None, :])
+        self._matches = dict(
+            dt_img=dt["img"],
+            dt_cat=dt["cat"],
+            dt_rank=dt["rank"],
+            dt_score=dt["score"],
+            tp=matched & ~dt_ignored,
+            fp=~matched & ~dt_ignored,
+            gt_img=gt["img"],
+            gt_cat=gt["cat"],
+            gt_regular=~gt_ignored,
+        )
+        self.evalImgs = []
+        self.ious = {}
+        self._paramsEval = copy.deepcopy(self.params)
+
+    @staticmethod
+    def _chunks(dt_group: np.ndarray, gt_group: np.ndarray):
+        """Splits detections into (start, end) ranges of whole groups.
+
+        Each range holds about `_PAIRS_PER_CHUNK` candidate pairs.
+        """
+        pairs = np.searchsorted(gt_group, dt_group, "right") - np.searchsorted(
+            gt_group, dt_group, "left"
+        )
+        bounds = _run_starts(dt_group)
+        before = np.r_[0, np.cumsum(pairs)][bounds[:-1]]
+        chunk = before // _PAIRS_PER_CHUNK
+        cuts = bounds[:-1][np.r_[True, chunk[1:] != chunk[:-1]]] if len(chunk) else []
+        edges = list(cuts) + [len(dt_group)]
+        return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+    def _pair_ious(self, dt: dict, gt: dict, pair_dt: np.ndarray, pair_gt: np.ndarray):
+        if self.params.iouType == "bbox":
+            return paired_box_ious(
+                dt["geom"][pair_dt], gt["geom"][pair_gt], gt["crowd"][pair_gt]
+            )
+        # Masks: pycocotools' RLE IoU of each group, spread over its pairs
+        ious = np.empty(len(pair_dt))
+        first_pair = np.full(len(dt["group"]), -1)
+        starts = _run_starts(pair_dt)[:-1]
+        first_pair[pair_dt[starts]] = starts
+        bounds = _run_starts(dt["group"])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if first_pair[start] < 0:
+                continue
+            g_start = np.searchsorted(gt["group"], dt["group"][start], "left")
+            g_end = np.searchsorted(gt["group"], dt["group"][start], "right")
+            group_ious = mask_utils.iou(
+                list(dt["geom"][start:end]),
+                list(gt["geom"][g_start:g_end]),
+                gt["crowd"][g_start:g_end].astype(np.uint8).tolist(),
+            )
+            index = first_pair[start:end, None] + np.arange(g_end - g_start)
+            ious[index] = group_ious
+        return ious
+
+    def _match(
+        self, dt: dict, gt: dict, gt_ignored: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Greedily matches detections to ground truth like `evaluateImg`.
+
+        For each IoU threshold, a detection takes the unmatched (or crowd)
+        ground truth with the highest IoU above it, preferring ground truth
+        that is not ignored; ties go to the last in order.
+
+        Returns:
+            Arrays of shape (area ranges, IoU thresholds, detections): whether
+            each detection matched a ground truth with a non-zero id, and
+            whether the ground truth it matched is ignored.
+        """
+        num_dt, num_gt = len(dt["group"]), len(gt["group"])
+        thrs = np.minimum(np.asarray(self.params.iouThrs, dtype=np.float64), 1 - 1e-10)
+        shape = (len(gt_ignored), len(thrs), num_dt)
+        matched = np.zeros(shape, dtype=bool)
+        matched_ignored = np.zeros(shape, dtype=bool)
+
+        g_start = np.searchsorted(gt["group"], dt["group"], "left")
+        counts = np.searchsorted(gt["group"], dt["group"], "right") - g_start
+        # Pairs ordered by detection rank, so that each step is a slice
+        steps = np.argsort(dt["rank"], kind="stable")
+        steps = steps[counts[steps] > 0]
+        if not len(steps):
+            return matched, matched_ignored
+        pair_counts = counts[steps]
+        pair_start = np.cumsum(pair_counts) - pair_counts
+        pair_dt = np.repeat(steps, pair_counts)
+        pair_gt = np.repeat(g_start[steps] - pair_start, pair_counts) + np.arange(
+            len(pair_dt)
+        )
+        ious = self._pair_ious(dt, gt, pair_dt, pair_gt)
+
+        taken = np.zeros((len(gt_ignored), len(thrs), num_gt), dtype=bool)
+        thrs = thrs[:, None]
+        bounds = _run_starts(dt["rank"][steps])
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            begin = pair_start[first]
+            end = pair_start[last - 1] + pair_counts[last - 1]
+            starts = pair_start[first:last] - begin
+            segment = np.repeat(np.arange(last - first), pair_counts[first:last])
+            g, iou = pair_gt[begin:end], ious[begin:end]
+
+            ok = (iou >= thrs) & (~taken[:, :, g] | gt["crowd"][g])
+            regular = ~gt_ignored[:, None, g]
+            # A match to ground truth that is not ignored stops the search
+            has_regular = np.logical_or.reduceat(ok & regular, starts, axis=2)
+            ok &= regular == has_regular[:, :, segment]
+            best = np.maximum.reduceat(np.where(ok, iou, -np.inf), starts, axis=2)
+            ok &= iou == best[:, :, segment]
+            choice = np.maximum.reduceat(
+                np.where(ok, np.arange(end - begin), -1), starts, axis=2
+            )
+
+            a, t, s = np.nonzero(choice >= 0)
+            match_gt = g[choice[a, t, s]]
+            match_dt = steps[first + s]
+            taken[a, t, match_gt] = dt["id"][match_dt] > 0
+            matched[a, t, match_dt] = gt["id"][match_gt] != 0
+            matched_ignored[a, t, match_dt] = gt_ignored[a, match_gt]
+        return matched, matched_ignored
+
+    def accumulate(self, p=None):
+        """Computes precision and recall from the matches of `evaluate`.
+
+        Args:
+            p: Parameters to accumulate with. Defaults to `self.params`.
+        """
+        if self._matches is None:
+            return super().accumulate(p)
+        if p is None:
+            p = self.params
+        p.catIds = p.catIds if p.useCats == 1 else [-1]
+        counts = [
+            len(p.iouThrs),
+            len(p.recThrs),
+            len(p.catIds) if p.useCats else 1,
+            len(p.areaRng),
+            len(p.maxDets),
+        ]
+        precision = -np.ones(counts)
+        recall = -np.ones(counts[:1] + counts[2:])
+        scores = -np.ones(counts)
+
+        # Evaluated settings, looked up as `COCOeval.accumulate` does
+        pe = self._paramsEval
+        set_k = set(pe.catIds if pe.useCats else [-1])
+        set_a = set(map(tuple, pe.areaRng))
+        set_m = set(pe.maxDets)
+        set_i = set(pe.imgIds)
+        k_list = [n for n, k in enumerate(p.catIds) if k in set_k]
+        m_list = [m for m in p.maxDets if m in set_m]
+        a_list = np.array(
+            [n for n, a in enumerate(map(tuple, p.areaRng)) if a in set_a], dtype=int
+        )
+        i_list = [n for n, i in enumerate(p.imgIds) if i in set_i]
+
+        mt = self._matches
+        num_cats = len(pe.catIds) if pe.useCats else 1
+        img_ok = np.zeros(len(pe.imgIds), dtype=bool)
+        img_ok[i_list] = True
+        # Each category's detections by descending score; ties keep the
+        # (image, rank) order like the stable sort of `COCOeval.accumulate`
+        order = np.lexsort((-mt["dt_score"], mt["dt_cat"]))
+        order = order[img_ok[mt["dt_img"][order]]]
+        cat_bounds = np.searchsorted(mt["dt_cat"][order], np.arange(num_cats + 1))
+        gt_ok = img_ok[mt["gt_img"]]
+        num_pos = np.stack(
+            [
+                np.bincount(mt["gt_cat"][gt_ok & regular], minlength=num_cats)
+                for regular in mt["gt_regular"]
+            ]
+        )
+        rec_thrs = np.asarray(p.recThrs, dtype=np.float64)
+
+        for k, k0 in enumerate(k_list):
+            cat_dts = order[cat_bounds[k0] : cat_bounds[k0 + 1]]
+            npig = num_pos[a_list, k0]
+            areas = np.flatnonzero(npig > 0)
+            if not len(areas):
+                continue
+            a_out, a_in, npig = areas, a_list[areas], npig[areas]
+            for m, max_det in enumerate(m_list):
+                dts = cat_dts[mt["dt_rank"][cat_dts] < max_det]
+                self._accumulate_cell(
+                    dts, a_in, npig, rec_thrs, precision, recall, scores,
+                    (k, a_out, m),
+                )
+
+        self.eval = {
+            "params": p,
+            "counts": counts,
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "precision": precision,
+            "recall": recall,
+            "scores": scores,
+        }
+
+    def _accumulate_cell(
+        self, dts, a_in, npig, rec_thrs, precision, recall, scores, index
+    ) -> None:
+        """Fills precision, recall and scores of one category and maxDets.
+
+        Every area range with ground truth and every IoU threshold is filled.
+        """
+        k, a_out, m = index
+        n = len(dts)
+        if n == 0:
+            recall[:, k, a_out, m] = 0
+            precision[:, :, k, a_out, m] = 0
+            scores[:, :, k, a_out, m] = 0
+            return
+
+        tp_sum = np.cumsum(self._matches["tp"][:, :, dts][a_in], axis=2)
+        fp_sum = np.cumsum(self._matches["fp"][:, :, dts][a_in], axis=2)
+        tp = tp_sum.astype(float)
+        fp = fp_sum.astype(float)
+        rc = tp / npig[:, None, None]
+        pr = tp / (fp + tp + np.spacing(1))
+        # Precision made monotonically decreasing
+        pr = np.maximum.accumulate(pr[:, :, ::-1], axis=2)[:, :, ::-1]
+
+        # `searchsorted(rc, recThrs)` of every row at once: rc = j / npig
+        # grows with the true positive count j, so the index of a threshold
+        # is that of the first count whose recall reaches it
+        first_count = np.stack(
+            [
+                np.searchsorted(np.arange(num + 1) / num, rec_thrs, side="left")
+                for num in npig
+            ]
+        )
+        rows = np.arange(tp_sum.shape[0] * tp_sum.shape[1]).reshape(tp_sum.shape[:2])
+        offsets = rows[:, :, None] * (n + 1)
+        found = np.searchsorted(
+            (tp_sum + offsets).ravel(),
+            (np.minimum(first_count, n + 1)[:, None, :] + offsets).ravel(),
+            side="left",
+        ).reshape(*tp_sum.shape[:2], -1)
+        inds = found - rows[:, :, None] * n
+        valid = inds < n
+        inds = np.minimum(inds, n - 1)
+        q = np.where(valid, np.take_along_axis(pr, inds, axis=2), 0)
+        ss = np.where(valid, self._matches["dt_score"][dts][inds], 0)
+
+        recall[:, k, a_out, m] = rc[:, :, -1].T
+        precision[:, :, k, a_out, m] = q.transpose(1, 2, 0)
+        scores[:, :, k, a_out, m] = ss.transpose(1, 2, 0)
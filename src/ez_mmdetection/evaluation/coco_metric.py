@@ -0,0 +1,305 @@
+"""COCO evaluation from in-memory results, without the JSON round trip."""
+
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import numpy as np
+from mmdet.datasets.api_wrappers import COCO, COCOeval, COCOevalMP
+from mmdet.evaluation.metrics import CocoMetric
+from mmdet.registry import METRICS
+from mmengine.logging import MMLogger
+from terminaltables import AsciiTable
+
+from ez_mmdetection.evaluation.coco_eval import VectorizedCOCOeval
+
+# Indexes of `COCOeval.stats`
+_STAT_INDEX = {
+    "mAP": 0,
+    "mAP_50": 1,
+    "mAP_75": 2,
+    "mAP_s": 3,
+    "mAP_m": 4,
+    "mAP_l": 5,
+    "AR@100": 6,
+    "AR@300": 7,
+    "AR@1000": 8,
+    "AR_s@1000": 9,
+    "AR_m@1000": 10,
+    "AR_l@1000": 11,
+}
+
+
+def coco_from_dict(dataset: dict) -> COCO:
+    """Builds a COCO index from an annotation dict, as if loaded from JSON."""
+    coco = COCO()
+    coco.dataset = dataset
+    coco.createIndex()
+    return coco
+
+
+def _plain(value):
+    """Returns the Python scalar JSON would store for a NumPy scalar."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def xyxy_to_xywh(bboxes: np.ndarray) -> List[List[float]]:
+    """Converts (N, 4) xyxy boxes to COCO xywh lists.
+
+    Computed in float64 like `CocoMetric.xyxy2xywh`, which subtracts Python
+    floats, so the values are identical.
+    """
+    xywh = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4).copy()
+    xywh[:, 2:] -= xywh[:, :2]
+    return xywh.tolist()
+
+
+@METRICS.register_module()
+class InMemoryCocoMetric(CocoMetric):
+    """`CocoMetric` that evaluates without writing and re-reading JSON.
+
+    `CocoMetric` dumps the ground truth (when there is no `ann_file`) and
+    the predictions to JSON files, then loads them back for `COCOeval`.
+    This metric builds the COCO index and the detections directly from the
+    collected results. JSON stores Python floats exactly, so the metrics are
+    identical.
+
+    Takes the same arguments as `CocoMetric`. With `format_only` or an
+    `outfile_prefix`, the files are wanted and `CocoMetric` runs instead.
+
+    Args:
+        eval_backend: 'pycocotools' for `COCOeval` (or `COCOevalMP` with
+            `use_mp_eval`), or 'vectorized' for `VectorizedCOCOeval`, which
+            gives identical metrics. Defaults to 'pycocotools'.
+    """
+
+    def __init__(self, *args, eval_backend: str = "pycocotools", **kwargs):
+        """Builds the metric; see the class docstring for the arguments."""
+        super().__init__(*args, **kwargs)
+        if eval_backend not in ("pycocotools", "vectorized"):
+            raise ValueError(
+                "eval_backend must be 'pycocotools' or 'vectorized', "
+                f"got {eval_backend!r}"
+            )
+        self.eval_backend = eval_backend
+
+    def gt_to_coco_dict(self, gt_dicts: Sequence[dict]) -> dict:
+        """Converts the ground truth to a COCO annotation dict.
+
+        Same content as the file written by `gt_to_coco_json`.
+        """
+        categories = [
+            dict(id=id, name=name)
+            for id, name in enumerate(self.dataset_meta["classes"])
+        ]
+        images, annotations = [], []
+        for idx, gt_dict in enumerate(gt_dicts):
+            img_id = gt_dict.get("img_id", idx)
+            images.append(
+                dict(
+                    id=_plain(img_id),
+                    width=_plain(gt_dict["width"]),
+                    height=_plain(gt_dict["height"]),
+                    file_name="",
+                )
+            )
+            for ann in gt_dict["anns"]:
+                # Same arithmetic as `gt_to_coco_json` (the boxes may hold
+                # float32 scalars); JSON would then store them as floats
+                bbox = ann["bbox"]
+                w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+                annotation = dict(
+                    id=len(annotations) + 1,
+                    image_id=_plain(img_id),
+                    bbox=[_plain(v) for v in (bbox[0], bbox[1], w, h)],
+                    iscrowd=_plain(ann.get("ignore_flag", 0)),
+                    category_id=int(ann["bbox_label"]),
+                    area=_plain(w * h),
+                )
+                if ann.get("mask", None):
+                    mask = ann["mask"]
+                    if isinstance(mask, dict) and isinstance(mask["counts"], bytes):
+                        mask["counts"] = mask["counts"].decode()
+                    annotation["segmentation"] = mask
+                annotations.append(annotation)
+
+        dataset = dict(images=images, categories=categories, licenses=None)
+        if annotations:
+            dataset["annotations"] = annotations
+        return dataset
+
+    def results2coco(self, results: Sequence[dict]) -> Dict[str, list]:
+        """Converts predictions to COCO result lists.
+
+        Same content as the files written by `results2json`, keyed by
+        'bbox', 'proposal' and (for masks) 'segm'.
+        """
+        bbox_results = []
+        segm_results = [] if "masks" in results[0] else None
+        cat_ids = np.asarray(self.cat_ids)
+        for idx, result in enumerate(results):
+            image_id = result.get("img_id", idx)
+            labels = np.asarray(result["labels"], dtype=np.int64)
+            boxes = xyxy_to_xywh(result["bboxes"])
+            scores = np.asarray(result["scores"], dtype=np.float64).tolist()
+            categories = cat_ids[labels].tolist()
+            bbox_results.extend(
+                dict(image_id=image_id, bbox=box, score=score, category_id=cat)
+                for box, score, cat in zip(boxes, scores, categories)
+            )
+            if segm_results is None:
+                continue
+
+            masks = result["masks"]
+            mask_scores = np.asarray(
+                result.get("mask_scores", result["scores"]), dtype=np.float64
+            ).tolist()
+            for i, (box, cat) in enumerate(zip(boxes, categories)):
+                if isinstance(masks[i]["counts"], bytes):
+                    masks[i]["counts"] = masks[i]["counts"].decode()
+                segm_results.append(
+                    dict(
+                        image_id=image_id,
+                        bbox=box,
+                        score=mask_scores[i],
+                        category_id=cat,
+                        segmentation=masks[i],
+                    )
+                )
+
+        coco_results = dict(bbox=bbox_results, proposal=bbox_results)
+        if segm_results is not None:
+            coco_results["segm"] = segm_results
+        return coco_results
+
+    def _build_coco_eval(self, coco_dt: COCO, iou_type: str):
+        """Returns the `COCOeval` to evaluate detections with."""
+        if self.eval_backend == "vectorized":
+            return VectorizedCOCOeval(self._coco_api, coco_dt, iou_type)
+        if self.use_mp_eval:
+            return COCOevalMP(self._coco_api, coco_dt, iou_type)
+        return COCOeval(self._coco_api, coco_dt, iou_type)
+
+    def compute_metrics(self, results: list) -> Dict[str, float]:
+        """Computes the metrics from processed results.
+
+        Args:
+            results: The processed results of each batch.
+
+        Returns:
+            The computed metrics, named as by `CocoMetric`.
+        """
+        if self.format_only or self.outfile_prefix is not None:
+            return super().compute_metrics(results)
+
+        logger: MMLogger = MMLogger.get_current_instance()
+        gts, preds = zip(*results)
+        if self._coco_api is None:
+            logger.info("Converting ground truth to coco format...")
+            self._coco_api = coco_from_dict(self.gt_to_coco_dict(gts))
+        if self.cat_ids is None:
+            self.cat_ids = self._coco_api.get_cat_ids(
+                cat_names=self.dataset_meta["classes"]
+            )
+        if self.img_ids is None:
+            self.img_ids = self._coco_api.get_img_ids()
+
+        coco_results = self.results2coco(preds)
+        eval_results = OrderedDict()
+        for metric in self.metrics:
+            logger.info(f"Evaluating {metric}...")
+            if metric == "proposal_fast":
+                ar = self.fast_eval_recall(
+                    preds, self.proposal_nums, self.iou_thrs, logger=logger
+                )
+                for i, num in enumerate(self.proposal_nums):
+                    eval_results[f"AR@{num}"] = ar[i]
+                logger.info(
+                    "".join(
+                        f"\nAR@{num}\t{ar[i]:.4f}"
+                        for i, num in enumerate(self.proposal_nums)
+                    )
+                )
+                continue
+
+            iou_type = "bbox" if metric == "proposal" else metric
+            if metric not in coco_results:
+                raise KeyError(f"{metric} is not in results")
+            predictions = coco_results[metric]
+            if iou_type == "segm":
+                # Like CocoMetric, drop the boxes so mask areas are used
+                predictions = [
+                    {k: v for k, v in p.items() if k != "bbox"} for p in predictions
+                ]
+            else:
+                # `loadRes` adds keys to the dicts it is given
+                predictions = [dict(p) for p in predictions]
+            try:
+                coco_dt = self._coco_api.loadRes(predictions)
+            except IndexError:
+                logger.error("The testing results of the whole dataset is empty.")
+                break
+
+            coco_eval = self._build_coco_eval(coco_dt, iou_type)
+            coco_eval.params.catIds = self.cat_ids
+            coco_eval.params.imgIds = self.img_ids
+            coco_eval.params.maxDets = list(self.proposal_nums)
+            coco_eval.params.iouThrs = self.iou_thrs
+
+            metric_items = self.metric_items
+            for metric_item in metric_items or []:
+                if metric_item not in _STAT_INDEX:
+                    raise KeyError(f'metric item "{metric_item}" is not supported')
+
+            if metric == "proposal":
+                coco_eval.params.useCats = 0
+            coco_eval.evaluate()
+            coco_eval.accumulate()
+            coco_eval.summarize()
+
+            if metric == "proposal":
+                for item in metric_items or [
+                    "AR@100", "AR@300", "AR@1000", "AR_s@1000", "AR_m@1000", "AR_l@1000"
+                ]:
+                    eval_results[item] = float(
+                        f"{coco_eval.stats[_STAT_INDEX[item]]:.3f}"
+                    )
+                continue
+
+            if self.classwise:
+                self._log_classwise(coco_eval, eval_results, logger)
+            for item in metric_items or [
+                "mAP", "mAP_50", "mAP_75", "mAP_s", "mAP_m", "mAP_l"
+            ]:
+                val = coco_eval.stats[_STAT_INDEX[item]]
+                eval_results[f"{metric}_{item}"] = float(f"{round(val, 3)}")
+            ap = coco_eval.stats[:6]
+            logger.info(
+                f"{metric}_mAP_copypaste: {ap[0]:.3f} {ap[1]:.3f} {ap[2]:.3f} "
+                f"{ap[3]:.3f} {ap[4]:.3f} {ap[5]:.3f}"
+            )
+        return eval_results
+
+    def _log_classwise(self, coco_eval, eval_results: dict, logger: MMLogger) -> None:
+        """Adds per-category AP to `eval_results` and logs a table of it."""
+
+        def mean_ap(precision: np.ndarray) -> float:
+            precision = precision[precision > -1]
+            return np.mean(precision) if precision.size else float("nan")
+
+        # precision: (iou, recall, cls, area range, max dets)
+        precisions = coco_eval.eval["precision"]
+        assert len(self.cat_ids) == precisions.shape[2]
+        rows = []
+        for idx, cat_id in enumerate(self.cat_ids):
+            name = self._coco_api.loadCats(cat_id)[0]["name"]
+            ap = mean_ap(precisions[:, :, idx, 0, -1])
+            eval_results[f"{name}_precision"] = round(ap, 3)
+            row = [name, f"{round(ap, 3)}"]
+            # IoU 0.5 and 0.75, then small, medium and large areas
+            aps = [precisions[i, :, idx, 0, -1] for i in (0, 5)]
+            aps += [precisions[:, :, idx, a, -1] for a in (1, 2, 3)]
+            row += [f"{round(mean_ap(p), 3)}" for p in aps]
+            rows.append(row)
+
+        headers = ["category", "mAP", "mAP_50", "mAP_75", "mAP_s", "mAP_m", "mAP_l"]
+        logger.info("\n" + AsciiTable([headers] + rows).table)
@@ -1,8 +1,9 @@
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 import tomli
-from pydantic import BaseModel, Field
+import tomli_w
+from pydantic import BaseModel, Field, model_validator
 
 
 class SplitConfig(BaseModel):
@@ -10,6 +11,8 @@ class SplitConfig(BaseModel):
 
     ann_file: str  # Path relative to data_root (e.g., 'annotations/train.json')
     img_dir: str  # Path relative to data_root (e.g., 'train2017/')
+    # 'yolo': ann_file is the labels directory (e.g., 'labels/train')
+    format: Literal["coco", "yolo"] = "coco"
 
 
 class DatasetConfig(BaseModel):
@@ -23,6 +26,13 @@ class DatasetConfig(BaseModel):
         None, description="Explicit class names for safety"
     )
 
+    @model_validator(mode="after")
+    def _check_yolo_classes(self) -> "DatasetConfig":
+        splits = [self.train, self.val, self.test]
+        if not self.classes and any(s and s.format == "yolo" for s in splits):
+            raise ValueError("YOLO-format splits require 'classes'")
+        return self
+
     @classmethod
     def from_toml(cls, path: Path) -> "DatasetConfig":
         """Parses a TOML file into a strict DatasetConfig object."""
@@ -33,3 +43,9 @@ class DatasetConfig(BaseModel):
             data = tomli.load(f)
 
         return cls(**data)
+
+    def to_toml(self, path: Path) -> None:
+        """Writes the configuration as a dataset.toml file."""
+        data = self.model_dump(mode="json", exclude_none=True)
+        with open(path, "wb") as f:
+            tomli_w.dump(data, f)
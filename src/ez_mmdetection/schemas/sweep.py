@@ -0,0 +1,117 @@
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Union
+
+import tomli
+from pydantic import BaseModel, Field, model_validator
+
+from ez_mmdetection.schemas.model import ModelName
+from ez_mmdetection.utils.toml_config import TrainingSection
+
+
+class SearchRange(BaseModel):
+    """A range sampled by random search: integers if both bounds are."""
+
+    low: Union[int, float]
+    high: Union[int, float]
+    log: bool = Field(False, description="Sample uniformly in log space")
+
+    @model_validator(mode="after")
+    def _check_bounds(self) -> "SearchRange":
+        if self.low > self.high:
+            raise ValueError("low must be <= high")
+        if self.log and self.low <= 0:
+            raise ValueError("log ranges need low > 0")
+        return self
+
+
+class SweepConfig(BaseModel):
+    """Configuration of a hyperparameter sweep (sweep.toml)."""
+
+    dataset: Path = Field(
+        ...,
+        description="Path to the dataset.toml file, relative to the sweep.toml's",
+    )
+    model: ModelName = Field(
+        ModelName.RTM_DET_TINY, description="Model of every trial"
+    )
+    method: Literal["grid", "random"] = "grid"
+    num_trials: Optional[int] = Field(
+        None, gt=0, description="Number of trials sampled by random search"
+    )
+    seed: int = 0
+    max_parallel: int = Field(2, gt=0, description="Trials run concurrently")
+    work_dir: str = Field("./runs/sweep", description="Directory of the trials")
+    metric: str = Field(
+        "coco/bbox_mAP", description="Validation metric trials are ranked by"
+    )
+    rule: Literal["greater", "less"] = "greater"
+    prune: bool = Field(
+        True, description="Stop trials whose metric is below the median of the others"
+    )
+    prune_warmup_epochs: int = Field(
+        0, ge=0, description="Epochs before a trial may be pruned"
+    )
+    prune_min_trials: int = Field(
+        2, gt=0, description="Other trials validated at an epoch before pruning at it"
+    )
+    training: Dict[str, Any] = Field(
+        default_factory=dict, description="TrainingSection fields shared by every trial"
+    )
+    search: Dict[str, Union[List[Any], SearchRange]] = Field(
+        ..., description="'model.name' or 'training.<field>' to values or a range"
+    )
+
+    @model_validator(mode="after")
+    def _check_search(self) -> "SweepConfig":
+        if not self.search:
+            raise ValueError("search must name at least one field")
+        for key, values in self.search.items():
+            section, _, field = key.partition(".")
+            if key != "model.name" and (
+                section != "training" or field not in TrainingSection.model_fields
+            ):
+                raise ValueError(
+                    f"Cannot search {key!r}: use 'model.name' or 'training.<field>'"
+                )
+            if isinstance(values, list) and not values:
+                raise ValueError(f"search.{key!r} has no values")
+            if self.method == "grid" and not isinstance(values, list):
+                raise ValueError(f"Grid search needs a list of values for {key!r}")
+        models = self.search.get("model.name", [])
+        if not isinstance(models, list):
+            raise ValueError("'model.name' needs a list of model names")
+        for name in models:
+            ModelName(name)
+        unknown = set(self.training) - set(TrainingSection.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown training fields: {sorted(unknown)}")
+        return self
+
+    @model_validator(mode="after")
+    def _check_method(self) -> "SweepConfig":
+        if self.method == "random" and self.num_trials is None:
+            raise ValueError("Random search needs num_trials")
+        launchers = [self.training.get("launcher", "none")]
+        searched = self.search.get("training.launcher", [])
+        launchers += searched if isinstance(searched, list) else [searched]
+        if any(launcher != "none" for launcher in launchers):
+            raise ValueError(
+                "Sweep trials run in a single process; launcher must be 'none'"
+            )
+        return self
+
+    @classmethod
+    def from_toml(cls, path: Path) -> "SweepConfig":
+        """Parses a sweep.toml file into a SweepConfig.
+
+        A relative `dataset` is resolved against the sweep.toml's directory.
+        """
+        if not path.exists():
+            raise FileNotFoundError(f"Sweep config not found at {path}")
+
+        with open(path, "rb") as f:
+            data = tomli.load(f)
+
+        if "dataset" in data:
+            data["dataset"] = Path(path).parent / data["dataset"]
+        return cls(**data)
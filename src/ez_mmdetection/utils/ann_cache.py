@@ -0,0 +1,265 @@
+"""Binary, memory-mapped cache of parsed COCO annotations."""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from ez_mmdetection.utils.cache import FileLock, get_cache_dir
+from ez_mmdetection.utils.download import file_sha256
+
+ANN_CACHE_VERSION = 1
+META_FILE = "meta.json"
+
+# Per-image arrays (indexed by row) and per-instance arrays (sliced by
+# offsets[row]:offsets[row + 1])
+_IMAGE_ARRAYS = ("img_ids", "widths", "heights", "file_names", "has_cat_ann", "offsets")
+_INSTANCE_ARRAYS = ("bboxes", "labels", "ignore_flags")
+
+
+def ann_cache_key(ann_file: Path, classes: Optional[Sequence[str]] = None) -> str:
+    """Returns the cache key for an annotation file parsed for `classes`."""
+    digest = hashlib.sha256(file_sha256(ann_file).encode())
+    digest.update(json.dumps([ANN_CACHE_VERSION, list(classes or [])]).encode())
+    return digest.hexdigest()[:32]
+
+
+def parse_coco_annotations(
+    ann_file: Path, classes: Optional[Sequence[str]] = None
+) -> Tuple[Dict[str, np.ndarray], List[int]]:
+    """Parses a COCO JSON file into flat numpy arrays.
+
+    Applies the same instance filtering as `mmdet.datasets.CocoDataset`
+    (ignored, degenerate and out-of-class boxes are dropped; crowd boxes get
+    `ignore_flag=1`). Segmentation masks are not kept.
+
+    Args:
+        ann_file: Path to the COCO JSON file.
+        classes: Class names to keep, in label order. All categories if None.
+
+    Returns:
+        A tuple of (arrays, cat_ids).
+    """
+    with open(ann_file, "r") as f:
+        coco = json.load(f)
+
+    categories = coco.get("categories", [])
+    if classes:
+        cat_ids = [c["id"] for c in categories if c["name"] in classes]
+    else:
+        cat_ids = [c["id"] for c in categories]
+    cat2label = {cat_id: i for i, cat_id in enumerate(cat_ids)}
+
+    images = coco["images"]
+    rows = {img["id"]: i for i, img in enumerate(images)}
+    anns_per_image: List[list] = [[] for _ in images]
+    has_cat_ann = np.zeros(len(images), dtype=bool)
+    ann_ids = []
+    for ann in coco.get("annotations", []):
+        row = rows.get(ann["image_id"])
+        if row is None:
+            continue
+        ann_ids.append(ann["id"])
+        anns_per_image[row].append(ann)
+        if ann["category_id"] in cat2label:
+            has_cat_ann[row] = True
+    if len(set(ann_ids)) != len(ann_ids):
+        raise ValueError(f"Annotation ids in '{ann_file}' are not unique!")
+
+    offsets = np.zeros(len(images) + 1, dtype=np.int64)
+    bboxes, labels, ignore_flags = [], [], []
+    for row, (img, anns) in enumerate(zip(images, anns_per_image)):
+        for ann in anns:
+            if ann.get("ignore", False):
+                continue
+            x1, y1, w, h = ann["bbox"]
+            inter_w = max(0, min(x1 + w, img["width"]) - max(x1, 0))
+            inter_h = max(0, min(y1 + h, img["height"]) - max(y1, 0))
+            if inter_w * inter_h == 0:
+                continue
+            if ann["area"] <= 0 or w < 1 or h < 1:
+                continue
+            if ann["category_id"] not in cat2label:
+                continue
+            bboxes.append((x1, y1, x1 + w, y1 + h))
+            labels.append(cat2label[ann["category_id"]])
+            ignore_flags.append(1 if ann.get("iscrowd", False) else 0)
+        offsets[row + 1] = len(bboxes)
+
+    arrays = {
+        "img_ids": np.array([img["id"] for img in images], dtype=np.int64),
+        "widths": np.array([img["width"] for img in images], dtype=np.int32),
+        "heights": np.array([img["height"] for img in images], dtype=np.int32),
+        "file_names": np.array([img["file_name"] for img in images], dtype=np.str_),
+        "has_cat_ann": has_cat_ann,
+        "offsets": offsets,
+        "bboxes": np.array(bboxes, dtype=np.float32).reshape(-1, 4),
+        "labels": np.array(labels, dtype=np.int64),
+        "ignore_flags": np.array(ignore_flags, dtype=np.int8),
+    }
+    return arrays, cat_ids
+
+
+def _build(ann_file: Path, classes: Optional[Sequence[str]], cache_dir: Path) -> None:
+    logger.info(f"Building annotation cache for {ann_file}...")
+    arrays, cat_ids = parse_coco_annotations(ann_file, classes)
+
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(tmp_dir / f"{name}.npy", array)
+    meta = {
+        "version": ANN_CACHE_VERSION,
+        "ann_file": str(Path(ann_file).resolve()),
+        "classes": list(classes or []),
+        "cat_ids": cat_ids,
+        "num_images": len(arrays["img_ids"]),
+        "num_instances": len(arrays["labels"]),
+    }
+    (tmp_dir / META_FILE).write_text(json.dumps(meta, indent=2))
+    # Remove leftovers of an interrupted build before swapping in the new one
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def ensure_annotation_cache(
+    ann_file: Path,
+    classes: Optional[Sequence[str]] = None,
+    cache_root: Optional[Path] = None,
+) -> Path:
+    """Returns the annotation cache for a COCO file, building it if needed.
+
+    The cache is keyed by the file's sha256 and the class list, so an edited
+    annotation file is re-parsed automatically. Concurrent builders (e.g. DDP
+    ranks) are serialized with a file lock.
+
+    Args:
+        ann_file: Path to the COCO JSON file.
+        classes: Class names to keep, in label order.
+        cache_root: Root cache directory. Defaults to `get_cache_dir()`.
+
+    Returns:
+        The directory holding the cached arrays (see `AnnotationTable`).
+    """
+    root = Path(cache_root) if cache_root else get_cache_dir()
+    key = ann_cache_key(Path(ann_file), classes)
+    cache_dir = root / "annotations" / key
+    if not (cache_dir / META_FILE).exists():
+        with FileLock(root / "locks" / f"annotations-{key}.lock"):
+            if not (cache_dir / META_FILE).exists():
+                _build(Path(ann_file), classes, cache_dir)
+    return cache_dir
+
+
+class AnnotationTable:
+    """Read-only sequence of COCO data infos backed by memory-mapped arrays.
+
+    Data info dicts are built on access, so the parsed annotations live in
+    the OS page cache once and are shared by every dataloader worker instead
+    of being duplicated as Python objects (and pickled) per worker.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        img_prefix: str = "",
+        indices: Optional[np.ndarray] = None,
+        sizes: Optional[np.ndarray] = None,
+    ):
+        """Initializes the table.
+
+        Args:
+            cache_dir: A directory returned by `ensure_annotation_cache`.
+            img_prefix: Directory joined with each file name for `img_path`.
+            indices: Rows of the cache in this table. All rows if None.
+            sizes: (width, height) per cache row replacing the sizes from
+                the annotation file, e.g. from an image-size index.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.img_prefix = img_prefix
+        self.sizes = sizes
+        self.meta = json.loads((self.cache_dir / META_FILE).read_text())
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        if indices is None:
+            indices = np.arange(self.meta["num_images"], dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Memory-mapped cache arrays, opened on first access."""
+        if self._arrays is None:
+            self._arrays = {
+                name: np.load(self.cache_dir / f"{name}.npy", mmap_mode="r")
+                for name in _IMAGE_ARRAYS + _INSTANCE_ARRAYS
+            }
+        return self._arrays
+
+    def __getstate__(self) -> dict:
+        """Drops the memory maps; worker processes reopen them on access."""
+        state = self.__dict__.copy()
+        state["_arrays"] = None
+        return state
+
+    def __len__(self) -> int:
+        """Returns the number of images in the table."""
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        """Returns an image's data info, or a sub-table for a slice."""
+        if isinstance(idx, slice):
+            return self.subset(self.indices[idx])
+        return self._data_info(int(self.indices[idx]))
+
+    def subset(self, indices: Sequence[int]) -> "AnnotationTable":
+        """Returns a table of the given cache rows (not positions)."""
+        return AnnotationTable(
+            self.cache_dir, self.img_prefix, np.asarray(indices), self.sizes
+        )
+
+    def _sizes(self) -> np.ndarray:
+        if self.sizes is not None:
+            return self.sizes
+        return np.stack([self.arrays["widths"], self.arrays["heights"]], axis=1)
+
+    def valid_mask(self, filter_empty_gt: bool, min_size: int) -> np.ndarray:
+        """Vectorized `CocoDataset.filter_data` over the rows of this table."""
+        a = self.arrays
+        rows = self.indices
+        keep = self._sizes()[rows].min(axis=1) >= min_size
+        if filter_empty_gt:
+            keep &= a["has_cat_ann"][rows]
+        return keep
+
+    def _data_info(self, row: int) -> dict:
+        a = self.arrays
+        start, end = int(a["offsets"][row]), int(a["offsets"][row + 1])
+        instances = [
+            {
+                "ignore_flag": int(flag),
+                "bbox": bbox.tolist(),
+                "bbox_label": int(label),
+            }
+            for bbox, label, flag in zip(
+                a["bboxes"][start:end],
+                a["labels"][start:end],
+                a["ignore_flags"][start:end],
+            )
+        ]
+        if self.sizes is not None:
+            width, height = self.sizes[row]
+        else:
+            width, height = a["widths"][row], a["heights"][row]
+        return {
+            "img_path": os.path.join(self.img_prefix, str(a["file_names"][row])),
+            "img_id": int(a["img_ids"][row]),
+            "seg_map_path": None,
+            "height": int(height),
+            "width": int(width),
+            "instances": instances,
+        }
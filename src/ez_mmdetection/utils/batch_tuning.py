@@ -0,0 +1,316 @@
+"""Probe-based search for the largest batch size within a memory budget."""
+
+import math
+import multiprocessing as mp
+import os
+import resource
+import signal
+import threading
+import traceback
+from typing import Callable, Dict, Optional, Tuple
+
+import torch
+from loguru import logger
+from mmengine.config import Config
+
+from ez_mmdetection.utils.pipeline_config import train_input_size
+
+# Fraction of the free memory used when no budget is given
+DEFAULT_BUDGET_FRACTION = 0.85
+# Boxes per synthetic image (RTMDet's assigner cost grows with them)
+_SYNTHETIC_BOXES = 32
+# Exit code of a probe process stopped for exceeding the budget
+_OVER_BUDGET = 75
+# The search stops once the bracket is this fraction of the safe size
+_BRACKET = 8
+
+
+def available_memory_bytes(device: str = "cuda") -> int:
+    """Returns the memory free for training on a device.
+
+    For CUDA this is the device's free memory; for the CPU, `MemAvailable`
+    from `/proc/meminfo` (free physical pages elsewhere).
+    """
+    if device.startswith("cuda"):
+        free, _ = torch.cuda.mem_get_info(torch.device(device))
+        return free
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def synthetic_batch(
+    batch_size: int,
+    input_size: Tuple[int, int],
+    num_classes: int,
+    num_boxes: int = _SYNTHETIC_BOXES,
+) -> dict:
+    """Returns a collated batch of random images and boxes.
+
+    The format matches `pseudo_collate` of `PackDetInputs` outputs, ready for
+    the model's data preprocessor.
+    """
+    from mmdet.structures import DetDataSample
+    from mmengine.structures import InstanceData
+
+    width, height = input_size
+    inputs, data_samples = [], []
+    for _ in range(batch_size):
+        inputs.append(torch.randint(0, 256, (3, height, width), dtype=torch.uint8))
+        xy = torch.rand(num_boxes, 2) * torch.tensor([width * 0.8, height * 0.8])
+        wh = (torch.rand(num_boxes, 2) * 0.2 + 0.02) * torch.tensor([width, height])
+        sample = DetDataSample(
+            metainfo=dict(
+                img_shape=(height, width),
+                ori_shape=(height, width),
+                pad_shape=(height, width),
+                scale_factor=(1.0, 1.0),
+            )
+        )
+        sample.gt_instances = InstanceData(
+            bboxes=torch.cat([xy, xy + wh], 1),
+            labels=torch.randint(0, num_classes, (num_boxes,)),
+        )
+        data_samples.append(sample)
+    return dict(inputs=inputs, data_samples=data_samples)
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _watch_rss(limit: int, stop: threading.Event) -> None:
+    # Exiting early beats the kernel's OOM killer picking a process
+    while not stop.wait(0.005):
+        if _rss_bytes() > limit:
+            os._exit(_OVER_BUDGET)
+
+
+def _probe_process(
+    conn,
+    model_cfg: dict,
+    optimizer_cfg: dict,
+    batch_size: int,
+    input_size: Tuple[int, int],
+    num_classes: int,
+    device: str,
+    amp: bool,
+    budget: int,
+) -> None:
+    from mmdet.registry import MODELS
+    from mmdet.utils import register_all_modules
+    from mmengine.registry import OPTIMIZERS
+
+    import ez_mmdetection.datasets  # noqa: F401  (registers custom components)
+
+    register_all_modules()
+    use_cuda = device.startswith("cuda")
+    stop = threading.Event()
+    if use_cuda:
+        torch.cuda.set_per_process_memory_fraction(
+            min(1.0, budget / torch.cuda.get_device_properties(device).total_memory),
+            torch.device(device),
+        )
+    elif os.path.exists("/proc/self/statm"):
+        threading.Thread(target=_watch_rss, args=(budget, stop), daemon=True).start()
+
+    try:
+        model = MODELS.build(model_cfg).to(device)
+        model.train()
+        optimizer = OPTIMIZERS.build(dict(optimizer_cfg, params=model.parameters()))
+        batch = synthetic_batch(batch_size, input_size, num_classes)
+        # Two steps: the optimizer state is allocated by the first
+        for _ in range(2):
+            data = model.data_preprocessor(batch, True)
+            with torch.autocast("cuda", enabled=amp and use_cuda):
+                losses = model(**data, mode="loss")
+            loss, _ = model.parse_losses(losses)
+            loss.backward()
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+        if use_cuda:
+            peak = torch.cuda.max_memory_reserved(device)
+        else:
+            # ru_maxrss is in KiB on Linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        conn.send(dict(peak=peak))
+    except (torch.cuda.OutOfMemoryError, MemoryError):
+        conn.send(dict(peak=None))
+    except Exception:
+        conn.send(dict(error=traceback.format_exc()))
+    finally:
+        stop.set()
+
+
+def _probe_result(message: Optional[dict], exitcode: Optional[int]) -> Optional[int]:
+    """Returns a probe's peak bytes, or None if it exceeded the budget.
+
+    A probe that died without reporting exceeded the budget only if it
+    stopped itself (`_OVER_BUDGET`) or was killed by the kernel's OOM
+    killer (SIGKILL).
+
+    Raises:
+        RuntimeError: If the probe failed for any other reason.
+    """
+    if message is None:
+        if exitcode in (_OVER_BUDGET, -signal.SIGKILL):
+            return None
+        raise RuntimeError(f"The batch size probe died with exit code {exitcode}")
+    if "error" in message:
+        raise RuntimeError(f"The batch size probe failed:\n{message['error']}")
+    return message["peak"]
+
+
+def measure_peak_memory(
+    cfg: Config,
+    batch_size: int,
+    num_classes: int,
+    device: str = "cuda",
+    amp: bool = True,
+    budget: Optional[int] = None,
+) -> Optional[int]:
+    """Measures the peak memory of training steps at a batch size.
+
+    A fresh process builds the model and optimizer and runs two
+    forward/backward/optimizer steps on synthetic images of the train
+    pipeline's output size. Measuring in a fresh process keeps earlier
+    probes' allocations out of the peak and survives out-of-memory errors.
+
+    Args:
+        cfg: The fully configured MMDetection config.
+        batch_size: Batch size to probe.
+        num_classes: Number of classes of the synthetic boxes.
+        device: Training device.
+        amp: Whether training uses mixed precision.
+        budget: Bytes the probe may use; it is stopped once it exceeds them.
+
+    Returns:
+        Peak bytes (resident memory on the CPU, reserved memory on CUDA), or
+        None if the probe ran out of memory or exceeded `budget`.
+
+    Raises:
+        RuntimeError: If the probe failed for another reason, e.g. an
+            invalid model config; the message has the probe's traceback.
+    """
+    budget = budget or available_memory_bytes(device)
+    input_size = train_input_size(cfg.train_dataloader.dataset.get("pipeline", []))
+    ctx = mp.get_context("spawn")
+    recv, send = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_probe_process,
+        args=(
+            send,
+            cfg.model.to_dict(),
+            cfg.optim_wrapper.optimizer.to_dict(),
+            batch_size,
+            input_size,
+            num_classes,
+            device,
+            amp,
+            budget,
+        ),
+    )
+    process.start()
+    send.close()
+    try:
+        message = recv.recv()
+    except EOFError:
+        message = None
+    process.join()
+    return _probe_result(message, process.exitcode)
+
+
+def search_batch_size(
+    fits: Callable[[int], bool], max_batch_size: int = 256
+) -> int:
+    """Finds the largest batch size for which `fits` holds.
+
+    Doubles from 1 until a size does not fit, then bisects the bracket until
+    it is within 1/8 of the largest size that fit.
+
+    Raises:
+        RuntimeError: If a batch of 1 does not fit.
+    """
+    good, bad = 0, None
+    size = 1
+    while size <= max_batch_size:
+        if not fits(size):
+            bad = size
+            break
+        good = size
+        size *= 2
+    if good == 0:
+        raise RuntimeError("A batch of 1 does not fit in the memory budget.")
+    if bad is None:
+        # Sizes between the last doubling and the cap were never probed
+        if good == max_batch_size or fits(max_batch_size):
+            return max_batch_size
+        bad = max_batch_size
+    while bad - good > max(1, good // _BRACKET):
+        mid = (good + bad) // 2
+        if fits(mid):
+            good = mid
+        else:
+            bad = mid
+    return good
+
+
+def split_effective_batch(effective: int, max_batch_size: int) -> Tuple[int, int]:
+    """Splits an effective batch into (batch_size, accumulative_counts).
+
+    Uses the fewest accumulation steps whose batch fits `max_batch_size` and
+    divides `effective` exactly, so the effective batch is unchanged.
+    """
+    for counts in range(math.ceil(effective / max_batch_size), effective + 1):
+        if effective % counts == 0:
+            return effective // counts, counts
+    return 1, effective
+
+
+def find_batch_size(
+    cfg: Config,
+    num_classes: int,
+    device: str = "cuda",
+    amp: bool = True,
+    budget: Optional[int] = None,
+    max_batch_size: int = 256,
+) -> int:
+    """Finds the largest batch size whose training steps fit in `budget`.
+
+    Args:
+        cfg: The fully configured MMDetection config.
+        num_classes: Number of dataset classes.
+        device: Training device.
+        amp: Whether training uses mixed precision.
+        budget: Bytes a training process may use. Defaults to
+            `DEFAULT_BUDGET_FRACTION` of the device's free memory.
+        max_batch_size: Largest batch size considered.
+
+    Returns:
+        The batch size.
+    """
+    if budget is None:
+        budget = int(available_memory_bytes(device) * DEFAULT_BUDGET_FRACTION)
+    peaks: Dict[int, Optional[int]] = {}
+
+    def fits(batch_size: int) -> bool:
+        peak = measure_peak_memory(
+            cfg, batch_size, num_classes, device=device, amp=amp, budget=budget
+        )
+        peaks[batch_size] = peak
+        used = f"{peak / 2**20:.0f} MB" if peak is not None else "over budget"
+        logger.info(f"Batch size {batch_size}: {used}")
+        return peak is not None and peak <= budget
+
+    logger.info(
+        f"Searching the largest batch size within {budget / 2**20:.0f} MB on {device}"
+    )
+    batch_size = search_batch_size(fits, max_batch_size)
+    logger.info(f"Chose batch_size={batch_size}")
+    return batch_size
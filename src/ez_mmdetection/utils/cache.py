@@ -0,0 +1,137 @@
+"""Shared on-disk cache helpers (cache location, inter-process locks, links)."""
+
+import os
+import shutil
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Optional, Type
+
+from loguru import logger
+
+# Environment variable that overrides the shared cache location
+CACHE_ENV_VAR = "EZ_MMDET_CACHE_DIR"
+
+
+def get_cache_dir() -> Path:
+    """Returns the root of the shared ez_mmdet cache.
+
+    Resolution order: `$EZ_MMDET_CACHE_DIR`, `$XDG_CACHE_HOME/ez_mmdet`,
+    then `~/.cache/ez_mmdet`.
+    """
+    override = os.environ.get(CACHE_ENV_VAR)
+    if override:
+        return Path(override).expanduser()
+
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache).expanduser() if xdg_cache else Path.home() / ".cache"
+    return base / "ez_mmdet"
+
+
+class FileLock:
+    """Exclusive inter-process lock backed by an OS-level file lock.
+
+    The lock is released automatically by the OS if the holding process
+    dies, so stale lock files never block other workers.
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 0.5):
+        """Initializes the lock.
+
+        Args:
+            path: Path of the lock file. Parent directories are created.
+            poll_interval: Seconds between attempts on platforms without
+                blocking locks (Windows).
+        """
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self) -> None:
+        """Blocks until the lock is held by this process."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not self._try_lock(fd):
+            logger.info(f"Waiting for lock held by another process: {self.path}")
+            if os.name == "nt":
+                while not self._try_lock(fd):
+                    time.sleep(self.poll_interval)
+            else:
+                import fcntl
+
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        self._fd = fd
+
+    def release(self) -> None:
+        """Releases the lock if held."""
+        if self._fd is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        """Acquires the lock."""
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        """Releases the lock."""
+        self.release()
+
+
+def link_or_copy(src: Path, dest: Path) -> None:
+    """Places `src` at `dest` without duplicating data where possible.
+
+    Tries a hardlink first, then a symlink, and only copies as a last resort
+    (e.g. across filesystems on Windows without symlink privileges). The
+    entry is created under a temporary name and atomically renamed so that
+    `dest` never points to a half-written file.
+
+    Args:
+        src: The cached file.
+        dest: Where the file should appear.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    if tmp.exists() or tmp.is_symlink():
+        tmp.unlink()
+
+    try:
+        os.link(src, tmp)
+    except OSError:
+        try:
+            os.symlink(src.resolve(), tmp)
+        except OSError:
+            logger.debug(f"Linking {src} failed; copying instead.")
+            shutil.copy2(src, tmp)
+
+    os.replace(tmp, dest)
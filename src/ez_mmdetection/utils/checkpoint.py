@@ -0,0 +1,140 @@
+"""Checkpoint post-processing (inference-only slimming) and resume helpers."""
+
+import copy
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import torch
+from loguru import logger
+
+# Training-only metadata that is still useful to keep for provenance
+_KEPT_META_KEYS = ("dataset_meta", "epoch", "iter", "mmengine_version")
+# Checkpoints written by MMEngine's CheckpointHook
+_TRAINING_CHECKPOINT = re.compile(r"(epoch|iter)_(\d+)\.pth")
+
+
+def extract_inference_state_dict(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the weights that should be used for inference.
+
+    When training with `EMAHook`, MMEngine swaps the averaged weights into
+    `state_dict` before saving and moves the raw weights to
+    `ema_state_dict` (prefixed with 'module.'). `state_dict` therefore holds
+    the EMA weights when they exist and the raw weights otherwise. A bare
+    state dict (no 'state_dict' key) is returned unchanged.
+
+    Args:
+        checkpoint: A loaded MMEngine checkpoint.
+
+    Returns:
+        The model state dict.
+    """
+    if "state_dict" not in checkpoint:
+        return checkpoint
+    if "ema_state_dict" in checkpoint:
+        logger.info("Using EMA weights from checkpoint.")
+    else:
+        logger.info("No EMA weights found; using raw model weights.")
+    return checkpoint["state_dict"]
+
+
+def slim_checkpoint(
+    checkpoint_path: Union[str, Path],
+    out_path: Optional[Union[str, Path]] = None,
+    fp16: bool = False,
+) -> Path:
+    """Writes an inference-only copy of a training checkpoint.
+
+    Keeps the (EMA) model weights and `meta.dataset_meta` and drops the
+    optimizer state, parameter schedulers, message hub and raw EMA copy.
+
+    Args:
+        checkpoint_path: Path to the checkpoint produced by training.
+        out_path: Destination path. Defaults to '<name>_inference.pth' next
+            to the source checkpoint.
+        fp16: Whether to store floating point weights as float16. They are
+            cast back to the model's dtype when loaded.
+
+    Returns:
+        The path of the slim checkpoint.
+    """
+    src = Path(checkpoint_path)
+    if not src.exists():
+        raise FileNotFoundError(f"Checkpoint not found at {src}")
+    dest = Path(out_path) if out_path else src.with_name(f"{src.stem}_inference.pth")
+
+    # Training checkpoints carry non-tensor objects (e.g. the message hub)
+    checkpoint = torch.load(src, map_location="cpu", weights_only=False)
+    state_dict = extract_inference_state_dict(checkpoint)
+    if fp16:
+        state_dict = {
+            k: v.half() if torch.is_tensor(v) and v.is_floating_point() else v
+            for k, v in state_dict.items()
+        }
+
+    meta = checkpoint.get("meta", {}) if "state_dict" in checkpoint else {}
+    slim: Dict[str, Any] = {
+        "meta": {k: meta[k] for k in _KEPT_META_KEYS if k in meta},
+        "state_dict": state_dict,
+    }
+    slim["meta"]["inference_only"] = True
+    slim["meta"]["fp16"] = fp16
+
+    # Write atomically so a crash never leaves a truncated checkpoint
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    torch.save(slim, tmp)
+    os.replace(tmp, dest)
+
+    src_mb = src.stat().st_size / 2**20
+    dest_mb = dest.stat().st_size / 2**20
+    logger.info(
+        f"Saved inference checkpoint to {dest} ({src_mb:.1f} MB -> {dest_mb:.1f} MB)"
+    )
+    return dest
+
+
+def find_resume_checkpoint(work_dir: Union[str, Path]) -> Optional[Path]:
+    """Returns the latest complete training checkpoint in a work directory.
+
+    Follows MMEngine's `last_checkpoint` pointer when the file it names
+    exists. A pointer can be ahead of its file (e.g. a crash during an
+    asynchronous write), in which case the newest `epoch_*.pth` or
+    `iter_*.pth` is used instead.
+
+    Returns:
+        The checkpoint path, or None if the directory has none.
+    """
+    work_dir = Path(work_dir)
+    pointer = work_dir / "last_checkpoint"
+    if pointer.is_file():
+        last = Path(pointer.read_text().strip())
+        for path in (last, work_dir / last.name):
+            if path.is_file():
+                return path
+
+    candidates = [
+        p for p in work_dir.glob("*.pth") if _TRAINING_CHECKPOINT.fullmatch(p.name)
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: (p.stat().st_mtime, p.name))
+
+
+def snapshot_checkpoint(checkpoint: Any) -> Any:
+    """Returns a copy of a checkpoint that training can no longer modify.
+
+    Tensors are copied to new CPU memory (`.cpu()` would share the storage
+    of CPU tensors); other objects are deep-copied.
+    """
+    if torch.is_tensor(checkpoint):
+        return checkpoint.detach().to("cpu", copy=True)
+    if type(checkpoint) in (dict, OrderedDict):
+        return type(checkpoint)(
+            (k, snapshot_checkpoint(v)) for k, v in checkpoint.items()
+        )
+    if type(checkpoint) in (list, tuple):
+        return type(checkpoint)(snapshot_checkpoint(v) for v in checkpoint)
+    return copy.deepcopy(checkpoint)
@@ -0,0 +1,208 @@
+"""torch.compile for the tensor-only parts of a detector, with a persistent cache."""
+
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import torch
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+# Submodules whose forward is compiled. Their outputs are fixed-shape tensors;
+# box decoding, NMS and target assignment run in other head methods, eagerly.
+COMPILED_PARTS = ("backbone", "neck", "bbox_head")
+COMPILE_MODES = ("default", "reduce-overhead", "max-autotune")
+# Read by TorchInductor whenever it compiles
+INDUCTOR_CACHE_ENV_VAR = "TORCHINDUCTOR_CACHE_DIR"
+
+
+def compile_cache_dir(default: Path, cache_dir: Optional[Path] = None) -> Path:
+    """Returns the TorchInductor kernel cache to compile into.
+
+    An explicit `cache_dir` wins, then an inductor cache directory set in
+    the environment, then `default`.
+    """
+    if cache_dir is not None:
+        return Path(cache_dir)
+    return Path(os.environ.get(INDUCTOR_CACHE_ENV_VAR) or default)
+
+
+@contextmanager
+def inductor_cache(cache_dir: Optional[Path]) -> Iterator[None]:
+    """Points the TorchInductor kernel cache at `cache_dir` within the block.
+
+    Inductor reads the environment variable whenever it compiles, and
+    `torch.compile` writes its default there, so the previous value is
+    restored on exit and other compiles in the process keep their own
+    cache. None leaves the environment alone.
+    """
+    if cache_dir is None:
+        yield
+        return
+    previous = os.environ.get(INDUCTOR_CACHE_ENV_VAR)
+    os.environ[INDUCTOR_CACHE_ENV_VAR] = str(cache_dir)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop(INDUCTOR_CACHE_ENV_VAR, None)
+        else:
+            os.environ[INDUCTOR_CACHE_ENV_VAR] = previous
+
+
+def compile_detector(
+    model: torch.nn.Module,
+    mode: str = "default",
+    backend: str = "inductor",
+    cache_dir: Optional[Path] = None,
+) -> List[str]:
+    """Compiles the forward of a detector's backbone, neck and head in place.
+
+    The compiled functions replace `forward` on the submodule instances, so
+    parameter names, checkpoints and EMA copies are unaffected. Operations
+    TorchDynamo cannot trace, and backend failures such as a missing C++
+    compiler, fall back to eager execution with a warning instead of
+    raising; only calls of the compiled forwards suppress these errors.
+
+    Args:
+        model: The detector, e.g. an RTMDet `SingleStageDetector`.
+        mode: 'default', 'reduce-overhead' or 'max-autotune'.
+        backend: TorchDynamo backend.
+        cache_dir: TorchInductor kernel cache of the compiled forwards, set
+            around compiling and each of their calls only. Defaults to
+            inductor's own.
+
+    Returns:
+        Names of the compiled submodules; empty if this PyTorch cannot compile.
+    """
+    if mode not in COMPILE_MODES:
+        raise ValueError(f"mode must be one of {COMPILE_MODES}, got {mode!r}")
+    if not hasattr(torch, "compile"):
+        logger.warning(
+            f"torch.compile needs PyTorch >= 2.0 (found {torch.__version__})"
+        )
+        return []
+
+    if cache_dir is not None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    options = dict(mode=mode) if backend == "inductor" else {}
+    compiled = []
+    for name in COMPILED_PARTS:
+        module = getattr(model, name, None)
+        if module is None:
+            continue
+        try:
+            with inductor_cache(cache_dir):
+                forward = torch.compile(module.forward, backend=backend, **options)
+        except RuntimeError as e:  # e.g. platforms torch.compile does not support
+            logger.warning(f"Could not compile {name}, running it eagerly: {e}")
+            continue
+        module.forward = _suppress_compile_errors(forward, cache_dir)
+        compiled.append(name)
+    logger.info(f"Compiled {', '.join(compiled) or 'nothing'} (mode={mode})")
+    return compiled
+
+
+def _suppress_compile_errors(
+    fn: Callable, cache_dir: Optional[Path] = None
+) -> Callable:
+    """Wraps a compiled function to fall back to eager on compile errors.
+
+    TorchDynamo compiles lazily, on the first calls, so its process-global
+    `suppress_errors` setting, and the kernel cache if `cache_dir` is given,
+    are patched around each call only.
+    """
+    import torch._dynamo as dynamo
+
+    @wraps(fn)
+    def call(*args, **kwargs):
+        with dynamo.config.patch(suppress_errors=True), inductor_cache(cache_dir):
+            return fn(*args, **kwargs)
+
+    return call
+
+
+def time_forward(
+    fn: Callable, inputs: torch.Tensor, iters: int = 10, warmup: int = 2
+) -> List[float]:
+    """Returns the milliseconds of `iters` calls of `fn(inputs)` after warmup."""
+    times = []
+    with torch.no_grad():
+        for i in range(warmup + iters):
+            start = time.perf_counter()
+            fn(inputs)
+            if inputs.is_cuda:
+                torch.cuda.synchronize()
+            if i >= warmup:
+                times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def benchmark_compile(
+    model: torch.nn.Module,
+    inputs: torch.Tensor,
+    mode: str = "default",
+    iters: int = 10,
+    warmup: int = 2,
+    cache_dir: Optional[Path] = None,
+) -> dict:
+    """Times a detector's tensor forward eagerly, then compiled.
+
+    The forward runs the backbone, neck and head (`model._forward`), without
+    post-processing. `model` is compiled in place, with kernels cached in
+    `cache_dir` (see `compile_detector`).
+
+    Returns:
+        Median eager and compiled milliseconds, their ratio (`speedup`), and
+        the seconds of the first compiled call (`compile_s`).
+    """
+    model.eval()
+    eager = time_forward(model._forward, inputs, iters=iters, warmup=warmup)
+    compile_detector(model, mode=mode, cache_dir=cache_dir)
+    start = time.perf_counter()
+    with torch.no_grad():
+        model._forward(inputs)
+    compile_s = time.perf_counter() - start
+    compiled = time_forward(model._forward, inputs, iters=iters, warmup=warmup)
+    eager_ms, compiled_ms = float(np.median(eager)), float(np.median(compiled))
+    return dict(
+        mode=mode,
+        input_shape=list(inputs.shape),
+        eager_ms=eager_ms,
+        compiled_ms=compiled_ms,
+        speedup=eager_ms / compiled_ms,
+        compile_s=compile_s,
+    )
+
+
+def print_compile_report(
+    results: Sequence[dict], console: Optional[Console] = None
+) -> None:
+    """Prints compile benchmark results, one row per model."""
+    console = console or Console()
+    table = Table(title="torch.compile forward (backbone + neck + head)")
+    for column in (
+        "Model",
+        "Mode",
+        "Eager (ms)",
+        "Compiled (ms)",
+        "Speed-up",
+        "Compile (s)",
+    ):
+        justify = "left" if column in ("Model", "Mode") else "right"
+        table.add_column(column, justify=justify)
+    for result in results:
+        table.add_row(
+            result["model"],
+            result["mode"],
+            f"{result['eager_ms']:.1f}",
+            f"{result['compiled_ms']:.1f}",
+            f"{result['speedup']:.2f}x",
+            f"{result['compile_s']:.1f}",
+        )
+    console.print(table)
@@ -1,3 +1,393 @@
-"""
-Format converters (YOLO -> COCO)
-"""
+"""Format converters (YOLO -> COCO)."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import yaml
+from loguru import logger
+from rich.progress import Progress
+
+from ez_mmdetection.schemas.dataset import DatasetConfig, SplitConfig
+from ez_mmdetection.utils.cache import FileLock, get_cache_dir
+from ez_mmdetection.utils.image_io import read_decoded_size
+
+# Image sizes of YOLO splits, persisted under the ez_mmdet cache directory
+SIZE_INDEX_DIR = "yolo_sizes"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+# Images per task sent to a worker process; amortizes inter-process overhead
+CHUNK_SIZE = 256
+
+# Size indexes that could not be written, kept for the process' lifetime
+_memory_size_indexes: Dict[Path, Dict[str, Tuple[int, int]]] = {}
+
+# (category index, [x, y, w, h], area, polygon or None)
+Annotation = Tuple[int, List[float], float, Optional[List[float]]]
+# (relative image path, (width, height) or None if unreadable, annotations,
+#  number of malformed label lines)
+ImageRecord = Tuple[str, Optional[Tuple[int, int]], List[Annotation], int]
+
+
+def read_yolo_classes(path: Path) -> List[str]:
+    """Reads class names from a YOLO `data.yaml` or a `classes.txt` file."""
+    path = Path(path)
+    if path.suffix in (".yaml", ".yml"):
+        names = yaml.safe_load(path.read_text())["names"]
+        if isinstance(names, dict):
+            names = [names[i] for i in sorted(names)]
+        return [str(name) for name in names]
+    return [line.strip() for line in path.read_text().splitlines() if line.strip()]
+
+
+def list_images(images_dir: Path) -> List[str]:
+    """Returns the image paths under a directory, relative to it and sorted."""
+    images_dir = Path(images_dir)
+    found = []
+    for dirpath, _, filenames in os.walk(images_dir):
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                path = os.path.join(dirpath, name)
+                found.append(os.path.relpath(path, images_dir))
+    return sorted(found)
+
+
+def _polygon_area(xs: List[float], ys: List[float]) -> float:
+    return 0.5 * abs(
+        sum(xs[i] * ys[i - 1] - xs[i - 1] * ys[i] for i in range(len(xs)))
+    )
+
+
+def parse_yolo_line(
+    line: str, width: int, height: int, num_classes: int
+) -> Optional[Annotation]:
+    """Parses one YOLO label line into absolute COCO coordinates.
+
+    Accepts boxes (`class cx cy w h`) and polygons (`class x1 y1 x2 y2 ...`),
+    all normalized to [0, 1]. Boxes are clipped to the image.
+
+    Returns:
+        The annotation, or None if the line is malformed or its class is
+        out of range.
+    """
+    parts = line.split()
+    if len(parts) < 5 or len(parts) % 2 == 0:
+        return None
+    try:
+        label = int(float(parts[0]))
+        values = [float(v) for v in parts[1:]]
+    except ValueError:
+        return None
+    if not 0 <= label < num_classes:
+        return None
+
+    if len(values) == 4:
+        cx, cy, w, h = values
+        x1, y1 = (cx - w / 2) * width, (cy - h / 2) * height
+        x2, y2 = (cx + w / 2) * width, (cy + h / 2) * height
+        polygon = None
+    else:
+        xs = [x * width for x in values[0::2]]
+        ys = [y * height for y in values[1::2]]
+        x1, y1, x2, y2 = min(xs), min(ys), max(xs), max(ys)
+        polygon = [round(v, 2) for xy in zip(xs, ys) for v in xy]
+
+    x1, x2 = min(max(x1, 0.0), width), min(max(x2, 0.0), width)
+    y1, y2 = min(max(y1, 0.0), height), min(max(y2, 0.0), height)
+    bbox = [round(x1, 2), round(y1, 2), round(x2 - x1, 2), round(y2 - y1, 2)]
+    if bbox[2] <= 0 or bbox[3] <= 0:
+        return None
+    area = bbox[2] * bbox[3] if polygon is None else _polygon_area(xs, ys)
+    return label, bbox, round(area, 2), polygon
+
+
+def yolo_size_index_path(labels_dir: Path) -> Path:
+    """Returns the file indexing the image sizes of a YOLO labels directory."""
+    key = hashlib.sha256(str(Path(labels_dir).resolve()).encode()).hexdigest()
+    return get_cache_dir() / SIZE_INDEX_DIR / f"{key[:32]}.json"
+
+
+def _load_size_index(index_path: Path) -> Dict[str, Tuple[int, int]]:
+    if not index_path.exists():
+        return {}
+    return {k: tuple(v) for k, v in json.loads(index_path.read_text()).items()}
+
+
+def _read_sizes(
+    images_dir: Path,
+    rel_paths: Sequence[str],
+    sizes: Dict[str, Tuple[int, int]],
+    num_threads: int,
+) -> None:
+    """Adds the sizes of the images in `rel_paths` missing from `sizes`."""
+    missing = [p for p in rel_paths if p not in sizes]
+    if not missing:
+        return
+    logger.info(f"Reading sizes of {len(missing)} images in {images_dir}...")
+    with ThreadPoolExecutor(num_threads) as pool:
+        probed = pool.map(lambda p: read_decoded_size(Path(images_dir) / p), missing)
+        for rel_path, size in zip(missing, probed):
+            if size is not None:
+                sizes[rel_path] = size
+
+
+def yolo_image_sizes(
+    images_dir: Path,
+    labels_dir: Path,
+    rel_paths: Sequence[str],
+    num_threads: int = 16,
+) -> Dict[str, Tuple[int, int]]:
+    """Returns the decoded (width, height) of a YOLO split's images.
+
+    Sizes are read from the image headers once and persisted in the ez_mmdet
+    cache directory, keyed by `labels_dir` (see `yolo_size_index_path`), so the
+    dataset directory is never written to. Later calls only read the
+    headers of images missing from the index. If the index cannot be
+    written, it is kept in memory for the rest of the process. Unreadable
+    images are left out.
+
+    Args:
+        images_dir: Directory of the split's images.
+        labels_dir: The split's labels directory.
+        rel_paths: Image paths relative to `images_dir` (see `list_images`).
+        num_threads: Threads reading headers of images not yet indexed.
+    """
+    index_path = yolo_size_index_path(labels_dir)
+    sizes = dict(_memory_size_indexes.get(index_path, {}))
+    sizes.update(_load_size_index(index_path))
+    if all(p in sizes for p in rel_paths):
+        return sizes
+
+    try:
+        with FileLock(index_path.with_suffix(".lock")):
+            sizes.update(_load_size_index(index_path))
+            _read_sizes(images_dir, rel_paths, sizes, num_threads)
+            tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(sizes))
+            os.replace(tmp_path, index_path)
+    except OSError as e:
+        logger.warning(
+            f"Could not write the image size index {index_path}, keeping it in "
+            f"memory: {e}"
+        )
+        _read_sizes(images_dir, rel_paths, sizes, num_threads)
+        _memory_size_indexes[index_path] = sizes
+    return sizes
+
+
+def _convert_chunk(task: Tuple[str, str, List[str], int]) -> List[ImageRecord]:
+    """Reads the sizes and labels of a chunk of images (in a worker)."""
+    images_dir, labels_dir, rel_paths, num_classes = task
+    records = []
+    for rel_path in rel_paths:
+        size = read_decoded_size(Path(images_dir) / rel_path)
+        anns, bad_lines = [], 0
+        label_path = Path(labels_dir) / Path(rel_path).with_suffix(".txt")
+        if size is not None and label_path.is_file():
+            for line in label_path.read_text().splitlines():
+                if not line.strip():
+                    continue
+                ann = parse_yolo_line(line, size[0], size[1], num_classes)
+                if ann is None:
+                    bad_lines += 1
+                else:
+                    anns.append(ann)
+        records.append((rel_path, size, anns, bad_lines))
+    return records
+
+
+def bounded_map(
+    pool: ProcessPoolExecutor,
+    fn: Callable,
+    tasks: Iterable,
+    max_in_flight: int,
+) -> Iterator:
+    """Like `pool.map`, but submits at most `max_in_flight` tasks ahead.
+
+    `Executor.map` submits every task upfront, so results pile up in memory
+    whenever the consumer is slower than the workers.
+    """
+    pending = deque()
+    for task in tasks:
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, task))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_record(record: ImageRecord, out, spill, stats: dict) -> None:
+    """Appends an image to the output and its annotations to the spill file."""
+    rel_path, size, anns, bad_lines = record
+    stats["bad_lines"] += bad_lines
+    if size is None:
+        stats["skipped_images"] += 1
+        return
+    stats["images"] += 1
+    image_id = stats["images"]
+    image = {
+        "id": image_id,
+        "file_name": Path(rel_path).as_posix(),
+        "width": size[0],
+        "height": size[1],
+    }
+    out.write(("," if image_id > 1 else "") + json.dumps(image))
+    for label, bbox, area, polygon in anns:
+        stats["annotations"] += 1
+        ann = {
+            "id": stats["annotations"],
+            "image_id": image_id,
+            "category_id": label + 1,
+            "bbox": bbox,
+            "area": area,
+            "iscrowd": 0,
+        }
+        if polygon is not None:
+            ann["segmentation"] = [polygon]
+        spill.write(("," if stats["annotations"] > 1 else "") + json.dumps(ann))
+
+
+def convert_yolo_split(
+    images_dir: Path,
+    labels_dir: Path,
+    out_file: Path,
+    classes: Sequence[str],
+    num_workers: Optional[int] = None,
+) -> dict:
+    """Converts one YOLO split into a COCO annotation file.
+
+    Label files are parsed and image sizes read from headers in a process
+    pool. Images and annotations are streamed to disk as they arrive
+    (annotations via a spill file), so memory stays bounded regardless of
+    the dataset size.
+
+    Args:
+        images_dir: Directory of the split's images (searched recursively).
+        labels_dir: Directory mirroring `images_dir` with one `.txt` per image.
+        out_file: Output COCO JSON path.
+        classes: Class names in YOLO label order.
+        num_workers: Worker processes. Defaults to the CPU count.
+
+    Returns:
+        Statistics: numbers of images, annotations, skipped (unreadable)
+        images and malformed label lines.
+    """
+    rel_paths = list_images(images_dir)
+    num_workers = num_workers or os.cpu_count() or 1
+    tasks = (
+        (str(images_dir), str(labels_dir), rel_paths[i : i + CHUNK_SIZE], len(classes))
+        for i in range(0, len(rel_paths), CHUNK_SIZE)
+    )
+    stats = {"images": 0, "annotations": 0, "skipped_images": 0, "bad_lines": 0}
+
+    out_file = Path(out_file)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = out_file.with_name(f"{out_file.name}.tmp")
+    with ProcessPoolExecutor(num_workers) as pool, Progress() as progress:
+        task = progress.add_task(f"Converting {images_dir}", total=len(rel_paths))
+        with open(tmp_file, "w") as out, tempfile.TemporaryFile(
+            "w+", dir=out_file.parent
+        ) as spill:
+            out.write('{"images": [')
+            for records in bounded_map(pool, _convert_chunk, tasks, 2 * num_workers):
+                for record in records:
+                    _write_record(record, out, spill, stats)
+                progress.advance(task, len(records))
+
+            out.write('], "annotations": [')
+            spill.seek(0)
+            shutil.copyfileobj(spill, out)
+            categories = [{"id": i + 1, "name": name} for i, name in enumerate(classes)]
+            out.write('], "categories": ' + json.dumps(categories) + "}")
+    os.replace(tmp_file, out_file)
+
+    if stats["skipped_images"]:
+        logger.warning(
+            f"Skipped {stats['skipped_images']} unreadable images in {images_dir}"
+        )
+    if stats["bad_lines"]:
+        logger.warning(
+            f"Ignored {stats['bad_lines']} malformed or out-of-range label lines "
+            f"in {labels_dir}"
+        )
+    logger.info(
+        f"Wrote {stats['images']} images and {stats['annotations']} annotations "
+        f"to {out_file}"
+    )
+    return stats
+
+
+def convert_yolo_dataset(
+    root: Path,
+    classes: Optional[Sequence[str]] = None,
+    splits: Sequence[str] = ("train", "val", "test"),
+    out_toml: Optional[Path] = None,
+    num_workers: Optional[int] = None,
+) -> DatasetConfig:
+    """Converts a YOLO dataset and writes a dataset.toml for it.
+
+    Expects the Ultralytics layout: `root/images/<split>` and
+    `root/labels/<split>`. COCO files are written to
+    `root/annotations/<split>.json`. Splits without images are skipped;
+    `train` and `val` are required.
+
+    Args:
+        root: The YOLO dataset root.
+        classes: Class names in label order. Defaults to the names in
+            `root/data.yaml` or `root/classes.txt`.
+        splits: Splits to convert.
+        out_toml: Where to write dataset.toml. Defaults to `root/dataset.toml`.
+        num_workers: Worker processes. Defaults to the CPU count.
+
+    Returns:
+        The written dataset configuration.
+    """
+    root = Path(root).resolve()
+    if classes is None:
+        for candidate in ("data.yaml", "data.yml", "classes.txt"):
+            if (root / candidate).exists():
+                classes = read_yolo_classes(root / candidate)
+                break
+        else:
+            raise FileNotFoundError(
+                f"No data.yaml or classes.txt in {root}; pass the class names."
+            )
+
+    split_cfgs = {}
+    for split in splits:
+        images_dir = root / "images" / split
+        if not images_dir.is_dir():
+            continue
+        ann_file = Path("annotations") / f"{split}.json"
+        convert_yolo_split(
+            images_dir, root / "labels" / split, root / ann_file, classes, num_workers
+        )
+        split_cfgs[split] = SplitConfig(
+            ann_file=ann_file.as_posix(), img_dir=f"images/{split}"
+        )
+
+    missing = {"train", "val"} - split_cfgs.keys()
+    if missing:
+        raise FileNotFoundError(
+            f"Required splits {sorted(missing)} not found under {root / 'images'}"
+        )
+
+    dataset_cfg = DatasetConfig(data_root=root, classes=list(classes), **split_cfgs)
+    out_toml = Path(out_toml) if out_toml else root / "dataset.toml"
+    dataset_cfg.to_toml(out_toml)
+    logger.info(f"Wrote dataset config to {out_toml}")
+    return dataset_cfg
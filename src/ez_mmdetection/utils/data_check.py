@@ -0,0 +1,265 @@
+"""Parallel dataset validation and the image-size index it produces."""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
+
+from ez_mmdetection.schemas.dataset import DatasetConfig, SplitConfig
+from ez_mmdetection.utils.image_cache import ann_signature
+from ez_mmdetection.utils.image_io import read_image_size
+
+SIZE_INDEX_VERSION = 1
+# Boxes may overhang the image by this many pixels (float rounding in exports)
+BOX_TOLERANCE = 1.0
+# Issues of each kind shown by `print_check_report`
+_SHOWN_ISSUES = 5
+_ISSUE_KINDS = (
+    "missing_images",
+    "unreadable_images",
+    "size_mismatches",
+    "invalid_boxes",
+    "orphan_annotations",
+    "unknown_categories",
+)
+
+
+def size_index_path(data_root: Path, split: str) -> Path:
+    """Returns the path of a split's image-size index."""
+    return Path(data_root) / ".ez_mmdet_cache" / "sizes" / f"{split}.json"
+
+
+def _probe(path: Path, verify_decode: bool) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """Returns (status, (width, height)) of an image file.
+
+    The size comes from the header, with EXIF rotation applied as OpenCV
+    does. Formats without a header parser are decoded instead.
+    """
+    if not path.is_file():
+        return "missing", None
+    size = read_image_size(path, apply_exif=True)
+    if size is None or verify_decode:
+        img = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if img is None:
+            return "unreadable", None
+        size = (img.shape[1], img.shape[0])
+    return "ok", size
+
+
+def _check_boxes(
+    anns: List[dict], sizes: Dict[int, Tuple[float, float]], cat_ids: set
+) -> Dict[str, list]:
+    """Finds annotations with invalid boxes, images or categories."""
+    issues = {"invalid_boxes": [], "orphan_annotations": [], "unknown_categories": []}
+    for ann in anns:
+        if ann["image_id"] not in sizes:
+            issues["orphan_annotations"].append({"ann_id": ann["id"]})
+            continue
+        if ann["category_id"] not in cat_ids:
+            issues["unknown_categories"].append(
+                {"ann_id": ann["id"], "category_id": ann["category_id"]}
+            )
+        width, height = sizes[ann["image_id"]]
+        x, y, w, h = ann["bbox"]
+        if w <= 0 or h <= 0:
+            reason = "empty"
+        elif (
+            x < -BOX_TOLERANCE
+            or y < -BOX_TOLERANCE
+            or x + w > width + BOX_TOLERANCE
+            or y + h > height + BOX_TOLERANCE
+        ):
+            reason = "out of bounds"
+        else:
+            continue
+        issues["invalid_boxes"].append(
+            {"ann_id": ann["id"], "bbox": ann["bbox"], "reason": reason}
+        )
+    return issues
+
+
+def check_split(
+    split: SplitConfig,
+    data_root: Path,
+    num_threads: int = 16,
+    verify_decode: bool = False,
+) -> Tuple[dict, Dict[str, Tuple[int, int]]]:
+    """Validates the images and annotations of a split.
+
+    Image headers are read by a thread pool; images are not decoded unless
+    `verify_decode` is set (which also catches truncated files).
+
+    Checks that every image exists and is readable, that its size matches
+    the COCO JSON, and that every box lies within its image and refers to a
+    known image and category.
+
+    Args:
+        split: The split to check.
+        data_root: The dataset root from dataset.toml.
+        num_threads: Threads reading image headers.
+        verify_decode: Whether to fully decode every image.
+
+    Returns:
+        A tuple of (report, sizes), where `report` lists the issues found and
+        `sizes` maps each readable image's file name to its (width, height).
+    """
+    data_root = Path(data_root)
+    img_root = data_root / split.img_dir
+    with open(data_root / split.ann_file, "r") as f:
+        coco = json.load(f)
+    images = coco["images"]
+
+    with ThreadPoolExecutor(num_threads) as pool, Progress() as progress:
+        task = progress.add_task(f"Checking {split.img_dir}", total=len(images))
+
+        def probe(img: dict):
+            result = _probe(img_root / img["file_name"], verify_decode)
+            progress.advance(task)
+            return result
+
+        probes = list(pool.map(probe, images))
+
+    report = {kind: [] for kind in _ISSUE_KINDS}
+    report.update(
+        ann_file=split.ann_file,
+        num_images=len(images),
+        num_annotations=len(coco.get("annotations", [])),
+    )
+    sizes: Dict[str, Tuple[int, int]] = {}
+    # Bounds are checked against the actual size, else the JSON's if any
+    img_sizes: Dict[int, Tuple[float, float]] = {}
+    for img, (status, size) in zip(images, probes):
+        name = img["file_name"]
+        expected = (img.get("width"), img.get("height"))
+        if status != "ok":
+            report[f"{status}_images"].append(name)
+            img_sizes[img["id"]] = (
+                expected if None not in expected else (np.inf, np.inf)
+            )
+            continue
+        sizes[name] = size
+        img_sizes[img["id"]] = size
+        if expected != size:
+            report["size_mismatches"].append(
+                {"file_name": name, "json": list(expected), "actual": list(size)}
+            )
+
+    cat_ids = {c["id"] for c in coco.get("categories", [])}
+    report.update(_check_boxes(coco.get("annotations", []), img_sizes, cat_ids))
+    report["num_issues"] = sum(len(report[kind]) for kind in _ISSUE_KINDS)
+    return report, sizes
+
+
+def write_size_index(
+    sizes: Dict[str, Tuple[int, int]], ann_path: Path, path: Path
+) -> None:
+    """Writes an image-size index for the images of an annotation file."""
+    index = {
+        "version": SIZE_INDEX_VERSION,
+        "ann_file": str(Path(ann_path).resolve()),
+        "ann_signature": ann_signature(Path(ann_path)),
+        "sizes": {name: list(size) for name, size in sizes.items()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(index))
+    os.replace(tmp_path, path)
+
+
+def find_size_index(data_root: Path, split: str, ann_file: str) -> Optional[Path]:
+    """Returns the size index of a split if it exists and is current."""
+    path = size_index_path(data_root, split)
+    if not path.exists():
+        return None
+    index = json.loads(path.read_text())
+    ann_path = Path(data_root) / ann_file
+    if index.get("version") != SIZE_INDEX_VERSION:
+        return None
+    if not ann_path.exists() or index.get("ann_signature") != ann_signature(ann_path):
+        logger.warning(
+            f"Ignoring stale image-size index at {path}: {ann_file} changed. "
+            "Rebuild it with 'ez-mmdet check-data'."
+        )
+        return None
+    return path
+
+
+def load_size_index(path: Path) -> Dict[str, Tuple[int, int]]:
+    """Reads an index written by `write_size_index`.
+
+    Returns:
+        A dict mapping file names (relative to the split's image directory)
+        to (width, height).
+    """
+    sizes = json.loads(Path(path).read_text())["sizes"]
+    return {name: (int(w), int(h)) for name, (w, h) in sizes.items()}
+
+
+def check_dataset(
+    dataset_cfg: DatasetConfig,
+    splits: Sequence[str] = ("train", "val"),
+    num_threads: int = 16,
+    verify_decode: bool = False,
+) -> Dict[str, dict]:
+    """Checks dataset splits and writes an image-size index for each.
+
+    Training reads image sizes from these indexes instead of trusting the
+    `width`/`height` of the COCO JSON.
+
+    Args:
+        dataset_cfg: The parsed dataset.toml.
+        splits: Names of the splits to check.
+        num_threads: Threads reading image headers.
+        verify_decode: Whether to fully decode every image.
+
+    Returns:
+        The report of each checked split.
+    """
+    reports = {}
+    for name in splits:
+        split = getattr(dataset_cfg, name, None)
+        if split is None:
+            logger.warning(f"Split '{name}' not defined in dataset config; skipping.")
+            continue
+        if split.format != "coco":
+            logger.warning(f"Split '{name}' is not in COCO format; skipping.")
+            continue
+        report, sizes = check_split(
+            split, dataset_cfg.data_root, num_threads, verify_decode
+        )
+        index_path = size_index_path(dataset_cfg.data_root, name)
+        ann_file = Path(dataset_cfg.data_root) / split.ann_file
+        write_size_index(sizes, ann_file, index_path)
+        logger.info(f"Wrote image-size index for '{name}' to {index_path}")
+        reports[name] = report
+    return reports
+
+
+def print_check_report(
+    reports: Dict[str, dict], console: Optional[Console] = None
+) -> None:
+    """Prints a summary table per split with a few examples of each issue."""
+    console = console or Console()
+    for name, report in reports.items():
+        table = Table(
+            title=(
+                f"{name}: {report['num_images']} images, "
+                f"{report['num_annotations']} annotations"
+            )
+        )
+        table.add_column("Check")
+        table.add_column("Issues", justify="right")
+        table.add_column("Examples")
+        for kind in _ISSUE_KINDS:
+            issues = report[kind]
+            examples = "\n".join(str(i) for i in issues[:_SHOWN_ISSUES])
+            table.add_row(kind.replace("_", " "), str(len(issues)), examples)
+        console.print(table)
@@ -0,0 +1,142 @@
+"""Multi-process data-parallel launch with torch.distributed."""
+
+import os
+import socket
+from typing import Any, Callable, Sequence
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from mmengine.model import MMDistributedDataParallel
+from mmengine.registry import MODEL_WRAPPERS
+
+
+@MODEL_WRAPPERS.register_module()
+class CPUDistributedDataParallel(MMDistributedDataParallel):
+    """`MMDistributedDataParallel` for models on the CPU.
+
+    MMEngine's runner always passes `device_ids=[LOCAL_RANK]`, which
+    `DistributedDataParallel` rejects for CPU modules.
+    """
+
+    def __init__(self, module, device_ids=None, **kwargs):
+        """Wraps `module`, ignoring `device_ids`."""
+        super().__init__(module=module, device_ids=None, **kwargs)
+
+
+def dist_backend(device: str) -> str:
+    """Returns the torch.distributed backend for a training device."""
+    return "nccl" if device.startswith("cuda") else "gloo"
+
+
+def find_free_port() -> int:
+    """Returns a TCP port that is free on this machine right now."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def replace_sync_bn(cfg: Any) -> int:
+    """Replaces `SyncBN` norm configs with `BN` in place.
+
+    `SyncBatchNorm` only runs on accelerators; on the CPU each process
+    normalizes with its own batch statistics instead.
+
+    Returns:
+        The number of configs replaced.
+    """
+    count = 0
+    if isinstance(cfg, dict):
+        if cfg.get("type") == "SyncBN":
+            cfg["type"] = "BN"
+            count += 1
+        for value in cfg.values():
+            count += replace_sync_bn(value)
+    elif isinstance(cfg, (list, tuple)):
+        for value in cfg:
+            count += replace_sync_bn(value)
+    return count
+
+
+def _worker(
+    local_rank: int,
+    fn: Callable,
+    args: Sequence,
+    nproc_per_node: int,
+    nnodes: int,
+    node_rank: int,
+    master_addr: str,
+    master_port: int,
+    device: str,
+) -> None:
+    rank = node_rank * nproc_per_node + local_rank
+    world_size = nnodes * nproc_per_node
+    os.environ.update(
+        RANK=str(rank),
+        LOCAL_RANK=str(local_rank),
+        LOCAL_WORLD_SIZE=str(nproc_per_node),
+        WORLD_SIZE=str(world_size),
+        MASTER_ADDR=master_addr,
+        MASTER_PORT=str(master_port),
+    )
+    backend = dist_backend(device)
+    if backend == "gloo":
+        # MMEngine places the model on CUDA whenever it is visible
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+        # Split the cores instead of every process using all of them
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // nproc_per_node))
+    else:
+        torch.cuda.set_device(local_rank)
+
+    # Initialized here since MMEngine's `init_dist` assumes CUDA; the
+    # runner uses an existing process group as is
+    dist.init_process_group(backend, rank=rank, world_size=world_size)
+    try:
+        fn(*args)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch_workers(
+    fn: Callable,
+    args: Sequence = (),
+    nproc_per_node: int = 1,
+    nnodes: int = 1,
+    node_rank: int = 0,
+    master_addr: str = "127.0.0.1",
+    master_port: int = 29500,
+    device: str = "cpu",
+) -> None:
+    """Spawns this node's processes and calls `fn(*args)` in each.
+
+    Each process joins the default process group (gloo on the CPU, NCCL on
+    CUDA) before `fn` runs. Every node runs this with the same arguments
+    except `node_rank`; several nodes may run on one machine.
+
+    Args:
+        fn: A picklable callable run in every process.
+        args: Positional arguments of `fn`.
+        nproc_per_node: Processes started on this node.
+        nnodes: Number of nodes.
+        node_rank: Rank of this node, in [0, nnodes).
+        master_addr: Address of node 0.
+        master_port: Free port on node 0 for the rendezvous.
+        device: Training device ('cpu' or 'cuda').
+    """
+    if not 0 <= node_rank < nnodes:
+        raise ValueError(f"node_rank must be in [0, {nnodes}), got {node_rank}")
+    mp.spawn(
+        _worker,
+        args=(
+            fn,
+            tuple(args),
+            nproc_per_node,
+            nnodes,
+            node_rank,
+            master_addr,
+            master_port,
+            device,
+        ),
+        nprocs=nproc_per_node,
+        join=True,
+    )
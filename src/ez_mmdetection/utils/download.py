@@ -1,5 +1,11 @@
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import requests
 from loguru import logger
@@ -7,25 +13,60 @@ from rich.progress import (
     BarColumn,
     DownloadColumn,
     Progress,
+    TaskID,
     TextColumn,
     TimeRemainingColumn,
     TransferSpeedColumn,
 )
 
 from ez_mmdetection.schemas.model import ModelName
+from ez_mmdetection.utils.cache import FileLock, get_cache_dir, link_or_copy
 
-def download_checkpoint(url: str, dest_path: Path) -> None:
-    """Downloads a file from a URL to a destination path with a progress bar."""
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+# Buffered write/read size for checkpoint transfers (1 MiB)
+CHUNK_SIZE = 1 << 20
 
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-    total_size = int(response.headers.get("content-length", 0))
+# OpenMMLab checkpoints embed a sha256 prefix in their filename,
+# e.g. 'rtmdet_tiny_8xb32-300e_coco_20220902_112414-78e30dcc.pth'
+_HASH_REGEX = re.compile(r"-([a-f0-9]{8,})\.[A-Za-z0-9]+$")
+
+
+def expected_hash_prefix(url: str) -> Optional[str]:
+    """Extracts the sha256 prefix embedded in an OpenMMLab checkpoint URL.
+
+    Args:
+        url: The checkpoint download URL.
+
+    Returns:
+        The hex digest prefix, or None if the filename carries no hash.
+    """
+    filename = url.split("?", 1)[0].rsplit("/", 1)[-1]
+    match = _HASH_REGEX.search(filename)
+    return match.group(1) if match else None
+
+
+def file_sha256(path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Computes the sha256 hex digest of a file by streaming it."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    filename = dest_path.name
-    logger.info(f"Downloading checkpoint to {dest_path}...")
 
-    progress = Progress(
+def verify_checkpoint(path: Path, url: str) -> bool:
+    """Checks a downloaded file against the hash prefix embedded in its URL.
+
+    Files whose URL carries no hash are considered valid.
+    """
+    prefix = expected_hash_prefix(url)
+    if prefix is None:
+        return True
+    return file_sha256(path).startswith(prefix)
+
+
+def _make_progress() -> Progress:
+    """Builds the progress display used for checkpoint transfers."""
+    return Progress(
         TextColumn("[bold blue]{task.description}"),
         BarColumn(),
         "[progress.percentage]{task.percentage:>3.0f}%",
@@ -34,18 +75,308 @@ def download_checkpoint(url: str, dest_path: Path) -> None:
         TimeRemainingColumn(),
     )
 
-    with progress:
-        task_id = progress.add_task(
-            f"Downloading {filename}", total=total_size
-        )
-        with open(dest_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
+
+def _probe(url: str, timeout: float) -> Tuple[int, bool]:
+    """Returns the remote size and whether the server accepts byte ranges."""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.debug(f"HEAD request failed for {url}: {e}")
+        return 0, False
+
+    total_size = int(response.headers.get("content-length", 0))
+    accepts_ranges = response.headers.get("accept-ranges", "").lower() == "bytes"
+    return total_size, accepts_ranges
+
+
+def _segment_bounds(total_size: int, num_segments: int) -> List[Tuple[int, int]]:
+    """Splits [0, total_size) into inclusive byte ranges of near-equal size."""
+    step = -(-total_size // num_segments)
+    return [
+        (start, min(start + step, total_size) - 1)
+        for start in range(0, total_size, step)
+    ]
+
+
+def _fetch_range(
+    url: str,
+    part_path: Path,
+    start: int,
+    end: Optional[int],
+    progress: Progress,
+    task_id: TaskID,
+    chunk_size: int,
+    timeout: float,
+) -> None:
+    """Downloads bytes [start, end] of `url` into `part_path`, resuming it.
+
+    Any bytes already present in `part_path` are kept and only the remainder
+    is requested through an HTTP Range header. For a stream of unknown size,
+    a 416 answer to that request means `part_path` is already complete.
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    expected = None if end is None else end - start + 1
+    if expected is not None and offset > expected:
+        # Leftover from a different split; start this piece over
+        progress.update(task_id, advance=-offset)
+        part_path.unlink()
+        offset = 0
+    if expected is not None and offset == expected:
+        return
+
+    headers = {}
+    if start + offset > 0 or end is not None:
+        headers["Range"] = f"bytes={start + offset}-{'' if end is None else end}"
+
+    with requests.get(url, headers=headers, stream=True, timeout=timeout) as r:
+        if offset and end is None and r.status_code == 416:
+            # Killed after the last chunk; the hash check still runs after this
+            logger.info(f"{part_path.name} is already complete.")
+            return
+        r.raise_for_status()
+        mode = "ab" if offset else "wb"
+        if start + offset > 0 and r.status_code != 206:
+            if start != 0:
+                raise RuntimeError(
+                    f"Server ignored the Range header for {url}; "
+                    "ranged segments are not supported."
+                )
+            # Server sent the whole file; drop what we had and start over
+            logger.warning("Server does not support resume; restarting download.")
+            progress.update(task_id, advance=-offset)
+            mode = "wb"
+
+        with open(part_path, mode, buffering=chunk_size) as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
                 f.write(chunk)
                 progress.update(task_id, advance=len(chunk))
 
+
+def _fetch_with_retries(
+    url: str,
+    part_path: Path,
+    start: int,
+    end: Optional[int],
+    progress: Progress,
+    task_id: TaskID,
+    chunk_size: int,
+    timeout: float,
+    max_retries: int,
+    retry_backoff: float,
+) -> None:
+    """Runs `_fetch_range` until the piece is complete or retries run out."""
+    expected = None if end is None else end - start + 1
+    for attempt in range(max_retries + 1):
+        try:
+            _fetch_range(
+                url, part_path, start, end, progress, task_id, chunk_size, timeout
+            )
+            if expected is None or part_path.stat().st_size >= expected:
+                return
+            logger.warning(
+                f"Incomplete transfer of {part_path.name} "
+                f"({part_path.stat().st_size}/{expected} bytes)."
+            )
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 0
+            if status < 500 or attempt == max_retries:
+                raise
+            logger.warning(f"Server error while downloading {url}: {e}")
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                raise
+            logger.warning(f"Connection error while downloading {url}: {e}")
+
+        if attempt < max_retries:
+            delay = retry_backoff * 2**attempt
+            logger.info(f"Retrying in {delay:.1f}s ({attempt + 1}/{max_retries})...")
+            time.sleep(delay)
+
+    raise IOError(f"Failed to download {url} after {max_retries + 1} attempts")
+
+
+def download_checkpoint(
+    url: str,
+    dest_path: Path,
+    num_segments: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+    max_retries: int = 3,
+    retry_backoff: float = 1.0,
+    timeout: float = 30.0,
+    verify: bool = True,
+    progress: Optional[Progress] = None,
+) -> None:
+    """Downloads a file from a URL to a destination path with a progress bar.
+
+    The file is written to a `.part` sibling that is resumed through HTTP
+    Range requests after interruptions, verified against the hash prefix
+    embedded in the URL, and atomically renamed into place. A partially
+    downloaded checkpoint therefore never appears at `dest_path`.
+
+    Args:
+        url: The checkpoint download URL.
+        dest_path: The final location of the checkpoint.
+        num_segments: Number of parallel ranged requests. Falls back to a
+            single stream if the server does not advertise range support.
+        chunk_size: Size of buffered reads and writes in bytes.
+        max_retries: Retries per segment on connection or server errors.
+        retry_backoff: Base delay in seconds, doubled after each retry.
+        timeout: Socket timeout in seconds for each request.
+        verify: Whether to check the sha256 prefix embedded in the URL.
+        progress: An already running progress display to report to, used to
+            aggregate several concurrent downloads. Defaults to a new one.
+
+    Raises:
+        RuntimeError: If the downloaded file fails hash verification.
+        IOError: If the file could not be fully downloaded.
+    """
+    dest_path = Path(dest_path)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = dest_path.with_name(dest_path.name + ".part")
+
+    total_size, accepts_ranges = _probe(url, timeout)
+    if num_segments > 1 and not (accepts_ranges and total_size):
+        logger.info("Server does not support ranged requests; using one stream.")
+        num_segments = 1
+
+    filename = dest_path.name
+    logger.info(f"Downloading checkpoint to {dest_path}...")
+
+    # A caller-provided progress display is shared and managed by the caller
+    owns_progress = progress is None
+    if progress is None:
+        progress = _make_progress()
+
+    with progress if owns_progress else nullcontext():
+        if num_segments == 1:
+            resumed = part_path.stat().st_size if part_path.exists() else 0
+            task_id = progress.add_task(
+                f"Downloading {filename}",
+                total=total_size or None,
+                completed=resumed,
+            )
+            _fetch_with_retries(
+                url,
+                part_path,
+                0,
+                total_size - 1 if total_size else None,
+                progress,
+                task_id,
+                chunk_size,
+                timeout,
+                max_retries,
+                retry_backoff,
+            )
+        else:
+            bounds = _segment_bounds(total_size, num_segments)
+            segment_paths = [
+                part_path.with_name(f"{part_path.name}{i}") for i in range(len(bounds))
+            ]
+            resumed = sum(p.stat().st_size for p in segment_paths if p.exists())
+            task_id = progress.add_task(
+                f"Downloading {filename}", total=total_size, completed=resumed
+            )
+            with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+                futures = [
+                    pool.submit(
+                        _fetch_with_retries,
+                        url,
+                        seg_path,
+                        start,
+                        end,
+                        progress,
+                        task_id,
+                        chunk_size,
+                        timeout,
+                        max_retries,
+                        retry_backoff,
+                    )
+                    for seg_path, (start, end) in zip(segment_paths, bounds)
+                ]
+                for future in futures:
+                    future.result()
+
+            with open(part_path, "wb") as out:
+                for seg_path in segment_paths:
+                    with open(seg_path, "rb") as seg:
+                        for block in iter(lambda: seg.read(chunk_size), b""):
+                            out.write(block)
+            for seg_path in segment_paths:
+                seg_path.unlink()
+
+    size = part_path.stat().st_size
+    if total_size and size != total_size:
+        if size > total_size:
+            part_path.unlink()
+        raise IOError(
+            f"Downloaded size mismatch for {filename}: "
+            f"expected {total_size} bytes, got {size}"
+        )
+
+    if verify and not verify_checkpoint(part_path, url):
+        part_path.unlink()
+        raise RuntimeError(
+            f"Hash verification failed for {filename}: sha256 does not start "
+            f"with '{expected_hash_prefix(url)}'. The corrupt file was removed."
+        )
+
+    os.replace(part_path, dest_path)
     logger.info(f"Successfully downloaded {filename}")
 
 
+def fetch_to_cache(url: str, **download_kwargs: Any) -> Path:
+    """Returns the cached copy of `url`, downloading it at most once.
+
+    Files are stored content-addressed under `<cache>/blobs/sha256/<digest>`
+    with a small ref file mapping the URL's filename to its digest. A file
+    lock per artifact ensures that when many processes start at once only
+    one downloads while the others wait and then reuse the result.
+
+    Args:
+        url: The checkpoint download URL.
+        **download_kwargs: Extra options forwarded to `download_checkpoint`.
+
+    Returns:
+        Path to the cached blob.
+    """
+    cache_dir = get_cache_dir()
+    filename = url.split("?", 1)[0].rsplit("/", 1)[-1]
+    ref_path = cache_dir / "refs" / filename
+
+    def _cached_blob() -> Optional[Path]:
+        if not ref_path.exists():
+            return None
+        blob = cache_dir / "blobs" / "sha256" / ref_path.read_text().strip()
+        return blob if blob.exists() else None
+
+    blob = _cached_blob()
+    if blob is not None:
+        return blob
+
+    with FileLock(cache_dir / "locks" / f"{filename}.lock"):
+        # Another process may have finished the download while we waited
+        blob = _cached_blob()
+        if blob is not None:
+            logger.info(f"Using checkpoint cached by another process: {blob}")
+            return blob
+
+        tmp_path = cache_dir / "tmp" / filename
+        download_checkpoint(url, tmp_path, **download_kwargs)
+
+        digest = file_sha256(tmp_path)
+        blob = cache_dir / "blobs" / "sha256" / digest
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob)
+
+        ref_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_ref = ref_path.with_name(ref_path.name + ".tmp")
+        tmp_ref.write_text(digest)
+        os.replace(tmp_ref, ref_path)
+
+    return blob
+
+
 def ensure_model_checkpoint(
     model_name: str, checkpoint_path: Optional[Union[str, Path]] = None
 ) -> Path:
@@ -65,6 +396,8 @@ def ensure_model_checkpoint(
         # Default name for auto-download
         path = checkpoint_dir / f"{model_name}.pth"
 
+    # Downloads are renamed into place only once complete and verified,
+    # so an existing file is never a truncated transfer.
     if path.exists():
         return path
 
@@ -83,7 +416,71 @@ def ensure_model_checkpoint(
         return path
 
     logger.info(
-        f"Checkpoint not found. Attempting automatic download to {path}..."
+        f"Checkpoint not found. Fetching from the shared cache at {get_cache_dir()}..."
+    )
+    link_or_copy(fetch_to_cache(url), path)
+    return path
+
+
+def pull_checkpoints(
+    model_names: Iterable[Union[str, ModelName]],
+    checkpoint_dir: Optional[Union[str, Path]] = None,
+    max_workers: int = 4,
+) -> Dict[str, Path]:
+    """Prefetches official checkpoints concurrently into the shared cache.
+
+    Each checkpoint is fetched through `fetch_to_cache` on a bounded thread
+    pool, reporting to a single aggregated progress display, and linked into
+    `checkpoint_dir` under its simplified name (e.g. 'rtmdet_tiny.pth').
+    Checkpoints that already exist there and pass hash verification are
+    skipped.
+
+    Args:
+        model_names: Names of the models to pull.
+        checkpoint_dir: Where to link the checkpoints.
+            Defaults to './checkpoints'.
+        max_workers: Maximum number of concurrent downloads.
+
+    Returns:
+        A mapping from model name to the local checkpoint path.
+
+    Raises:
+        RuntimeError: If any checkpoint failed to download or verify. All
+            other downloads are still completed first.
+    """
+    target_dir = (
+        Path(checkpoint_dir) if checkpoint_dir else Path.cwd() / "checkpoints"
     )
-    download_checkpoint(url, path)
-    return path
\ No newline at end of file
+    names = [m.value if isinstance(m, ModelName) else m for m in model_names]
+    progress = _make_progress()
+
+    def _pull_one(name: str) -> Path:
+        model = ModelName(name)
+        dest = target_dir / f"{model.value}.pth"
+        if dest.exists():
+            if verify_checkpoint(dest, model.weights_url):
+                logger.info(f"{dest} already exists and verified; skipping.")
+                return dest
+            logger.warning(f"{dest} failed hash verification; re-fetching.")
+        link_or_copy(fetch_to_cache(model.weights_url, progress=progress), dest)
+        return dest
+
+    results: Dict[str, Path] = {}
+    failures: Dict[str, BaseException] = {}
+    with progress, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_pull_one, name): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to pull '{name}': {e}")
+                failures[name] = e
+
+    if failures:
+        raise RuntimeError(
+            f"Failed to pull {len(failures)} of {len(names)} checkpoint(s): "
+            f"{', '.join(sorted(failures))}"
+        )
+    logger.info(f"Pulled {len(results)} checkpoint(s) into {target_dir}")
+    return results
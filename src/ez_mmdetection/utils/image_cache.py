@@ -0,0 +1,245 @@
+"""Pre-decoded, memory-mapped image store for training datasets."""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+from rich.progress import Progress
+
+from ez_mmdetection.schemas.dataset import DatasetConfig, SplitConfig
+
+CACHE_VERSION = 1
+IMAGES_FILE = "images.u8"
+INDEX_FILE = "index.npz"
+META_FILE = "meta.json"
+
+# Images decoded per batch while building; bounds peak memory
+_BUILD_BATCH = 64
+
+
+def image_cache_dir(data_root: Path, split: str) -> Path:
+    """Returns the default cache directory for a dataset split."""
+    return Path(data_root) / ".ez_mmdet_cache" / "images" / split
+
+
+def ann_signature(ann_path: Path) -> Dict[str, int]:
+    """Returns the size and mtime caches record to detect edited annotations."""
+    stat = ann_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _decode(path: Path, max_side: int) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Decodes an image (BGR) and shrinks it so its long side <= max_side."""
+    img = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if img is None:
+        raise IOError(f"Failed to decode image: {path}")
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(img), (height, width)
+
+
+def build_image_cache(
+    split: SplitConfig,
+    data_root: Path,
+    cache_dir: Path,
+    max_side: int = 1280,
+    num_workers: int = 8,
+) -> Path:
+    """Decodes every image of a split into a single memory-mappable file.
+
+    The store is a flat uint8 file of HWC BGR images plus an index holding
+    each image's byte offset, stored shape and original shape. Reads at
+    training time are zero-copy views of the OS page cache, replacing the
+    per-epoch JPEG decode.
+
+    Args:
+        split: The split to cache (its COCO JSON lists the images).
+        data_root: The dataset root from dataset.toml.
+        cache_dir: Output directory (see `image_cache_dir`).
+        max_side: Images are downscaled so their long side is at most this.
+        num_workers: Threads used for decoding.
+
+    Returns:
+        The cache directory.
+    """
+    data_root = Path(data_root)
+    ann_path = data_root / split.ann_file
+    img_root = data_root / split.img_dir
+    with open(ann_path, "r") as f:
+        file_names: List[str] = [img["file_name"] for img in json.load(f)["images"]]
+
+    out_dir = Path(cache_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Invalidate any previous cache until the rebuild completes
+    (out_dir / META_FILE).unlink(missing_ok=True)
+    tmp_images = out_dir / f"{IMAGES_FILE}.tmp"
+
+    offsets = np.zeros(len(file_names), dtype=np.int64)
+    shapes = np.zeros((len(file_names), 3), dtype=np.int32)
+    ori_shapes = np.zeros((len(file_names), 2), dtype=np.int32)
+
+    offset = 0
+    with open(tmp_images, "wb") as out, ThreadPoolExecutor(num_workers) as pool:
+        with Progress() as progress:
+            task = progress.add_task("Caching images", total=len(file_names))
+            for start in range(0, len(file_names), _BUILD_BATCH):
+                batch = file_names[start : start + _BUILD_BATCH]
+                decoded = pool.map(
+                    lambda name: _decode(img_root / name, max_side), batch
+                )
+                for i, (img, ori_shape) in enumerate(decoded, start=start):
+                    offsets[i] = offset
+                    shapes[i] = img.shape
+                    ori_shapes[i] = ori_shape
+                    out.write(img.tobytes())
+                    offset += img.nbytes
+                progress.update(task, advance=len(batch))
+
+    np.savez(
+        out_dir / INDEX_FILE,
+        names=np.array(file_names),
+        offsets=offsets,
+        shapes=shapes,
+        ori_shapes=ori_shapes,
+    )
+    os.replace(tmp_images, out_dir / IMAGES_FILE)
+    meta = {
+        "version": CACHE_VERSION,
+        "max_side": max_side,
+        "img_root": str(img_root.resolve()),
+        "ann_file": str(ann_path.resolve()),
+        "ann_signature": ann_signature(ann_path),
+        "num_images": len(file_names),
+        "num_bytes": offset,
+    }
+    # Written last: a cache without meta.json is treated as incomplete
+    (out_dir / META_FILE).write_text(json.dumps(meta, indent=2))
+    logger.info(
+        f"Cached {len(file_names)} images ({offset / 2**30:.2f} GiB) to {out_dir}"
+    )
+    return out_dir
+
+
+def cache_dataset(
+    dataset_cfg: DatasetConfig,
+    max_side: int = 1280,
+    splits: Sequence[str] = ("train", "val"),
+    num_workers: int = 8,
+) -> Dict[str, Path]:
+    """Builds image caches for the given splits of a dataset.toml config.
+
+    Args:
+        dataset_cfg: The parsed dataset configuration.
+        max_side: Images are downscaled so their long side is at most this.
+        splits: Split names to cache; missing splits are skipped.
+        num_workers: Threads used for decoding.
+
+    Returns:
+        A mapping from split name to cache directory.
+    """
+    caches = {}
+    for name in splits:
+        split = getattr(dataset_cfg, name, None)
+        if split is None:
+            logger.warning(f"Split '{name}' not defined in dataset config; skipping.")
+            continue
+        if split.format != "coco":
+            logger.warning(f"Split '{name}' is not in COCO format; skipping.")
+            continue
+        logger.info(f"Building image cache for split '{name}'...")
+        caches[name] = build_image_cache(
+            split,
+            dataset_cfg.data_root,
+            image_cache_dir(dataset_cfg.data_root, name),
+            max_side=max_side,
+            num_workers=num_workers,
+        )
+    return caches
+
+
+def find_image_cache(data_root: Path, split: str, ann_file: str) -> Optional[Path]:
+    """Returns the cache directory for a split if it exists and is current.
+
+    A cache is ignored if it is incomplete, from another format version, or
+    was built from a different version of the annotation file.
+    """
+    cache_dir = image_cache_dir(data_root, split)
+    meta_path = cache_dir / META_FILE
+    if not meta_path.exists():
+        return None
+
+    meta = json.loads(meta_path.read_text())
+    ann_path = Path(data_root) / ann_file
+    if meta.get("version") != CACHE_VERSION:
+        logger.warning(f"Ignoring image cache at {cache_dir}: format changed.")
+        return None
+    if not ann_path.exists() or meta.get("ann_signature") != ann_signature(ann_path):
+        logger.warning(
+            f"Ignoring stale image cache at {cache_dir}: {ann_file} changed. "
+            "Rebuild it with 'ez-mmdet cache-dataset'."
+        )
+        return None
+    return cache_dir
+
+
+class ImageCacheReader:
+    """Read-only access to an image cache through a memory map.
+
+    The memory map is opened lazily so that each dataloader worker maps the
+    file itself after fork instead of inheriting a pickled copy.
+    """
+
+    def __init__(self, cache_dir: Path):
+        """Initializes the reader.
+
+        Args:
+            cache_dir: A directory created by `build_image_cache`.
+        """
+        self.cache_dir = Path(cache_dir)
+        meta = json.loads((self.cache_dir / META_FILE).read_text())
+        self.img_root = meta["img_root"]
+        with np.load(self.cache_dir / INDEX_FILE) as index:
+            self._rows = {str(n): i for i, n in enumerate(index["names"])}
+            self._offsets = index["offsets"]
+            self._shapes = index["shapes"]
+            self._ori_shapes = index["ori_shapes"]
+        self._data: Optional[np.memmap] = None
+
+    def __getstate__(self) -> dict:
+        """Drops the memory map; worker processes reopen it on first read."""
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def key_for(self, img_path: str) -> str:
+        """Returns the cache key (path relative to the image root)."""
+        return os.path.relpath(os.path.realpath(img_path), self.img_root)
+
+    def __contains__(self, img_path: str) -> bool:
+        """Returns whether `img_path` is in the cache."""
+        return self.key_for(img_path) in self._rows
+
+    def read(self, img_path: str) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Returns the cached image and its original (height, width).
+
+        The image is a copy-on-write view of the page cache: no bytes are
+        copied unless a later transform writes into it.
+        """
+        if self._data is None:
+            self._data = np.memmap(
+                self.cache_dir / IMAGES_FILE, dtype=np.uint8, mode="c"
+            )
+        row = self._rows[self.key_for(img_path)]
+        shape = tuple(self._shapes[row])
+        start = int(self._offsets[row])
+        img = self._data[start : start + int(np.prod(shape))].reshape(shape)
+        ori_h, ori_w = self._ori_shapes[row]
+        return img, (int(ori_h), int(ori_w))
@@ -0,0 +1,137 @@
+"""Lightweight image header parsing (size without decoding)."""
+
+import io
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+import cv2
+
+# JPEG start-of-frame markers that carry the image dimensions
+# (baseline, progressive, lossless, ... excluding DHT/JPG/DAC)
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_EXIF_ORIENTATION_TAG = 0x0112
+# EXIF orientations that rotate the image by 90 degrees when applied
+_TRANSPOSING_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def is_jpeg(data: bytes) -> bool:
+    """Returns True if `data` starts with a JPEG SOI marker."""
+    return data[:3] == b"\xff\xd8\xff"
+
+
+def _exif_orientation(segment: bytes) -> int:
+    """Returns the orientation tag of an APP1 Exif segment (1 if absent)."""
+    if segment[:6] != b"Exif\x00\x00":
+        return 1
+    tiff = segment[6:]
+    endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if endian is None:
+        return 1
+    (ifd,) = struct.unpack(endian + "I", tiff[4:8])
+    (count,) = struct.unpack(endian + "H", tiff[ifd : ifd + 2])
+    for i in range(count):
+        entry = tiff[ifd + 2 + 12 * i : ifd + 14 + 12 * i]
+        tag, _, _, value = struct.unpack(endian + "HHI4s", entry)
+        if tag == _EXIF_ORIENTATION_TAG:
+            return struct.unpack(endian + "H", value[:2])[0]
+    return 1
+
+
+def _jpeg_size(f: BinaryIO, apply_exif: bool = False) -> Optional[Tuple[int, int]]:
+    """Walks JPEG segments until the SOF marker and returns (width, height)."""
+    orientation = 1
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        # Skip fill bytes between segments
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # Standalone markers without a length field
+        if marker == 0xD9:
+            return None
+
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        (length,) = struct.unpack(">H", header)
+        if marker in _JPEG_SOF_MARKERS:
+            sof = f.read(5)
+            if len(sof) < 5:
+                return None
+            _, height, width = struct.unpack(">BHH", sof)
+            if orientation in _TRANSPOSING_ORIENTATIONS:
+                return height, width
+            return width, height
+        if marker == 0xE1 and apply_exif:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, io.SEEK_CUR)
+
+
+def _read_size(f: BinaryIO, apply_exif: bool = False) -> Optional[Tuple[int, int]]:
+    head = f.read(26)
+    if is_jpeg(head):
+        return _jpeg_size(f, apply_exif)
+    if head[:8] == _PNG_SIGNATURE and head[12:16] == b"IHDR":
+        f.seek(16)
+        return struct.unpack(">II", f.read(8))
+    if head[:2] == b"BM" and len(head) >= 26:
+        width, height = struct.unpack("<ii", head[18:26])
+        return width, abs(height)
+    return None
+
+
+def image_size_from_bytes(data: bytes) -> Optional[Tuple[int, int]]:
+    """Returns (width, height) from an encoded image's header.
+
+    Supports JPEG, PNG and BMP. Returns None for other or corrupt formats.
+    EXIF orientation is not applied.
+    """
+    try:
+        return _read_size(io.BytesIO(data))
+    except struct.error:
+        return None
+
+
+def read_image_size(
+    path: Union[str, Path], apply_exif: bool = False
+) -> Optional[Tuple[int, int]]:
+    """Returns (width, height) of an image file by reading only its header.
+
+    Supports JPEG, PNG and BMP. Returns None for other or corrupt formats.
+
+    Args:
+        path: The image file.
+        apply_exif: Whether to swap width and height for JPEGs whose EXIF
+            orientation rotates them, as OpenCV does when decoding.
+    """
+    with open(path, "rb") as f:
+        try:
+            return _read_size(f, apply_exif)
+        except struct.error:
+            return None
+
+
+def read_decoded_size(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """Returns the (width, height) an image has once decoded by OpenCV.
+
+    Reads the header (applying EXIF rotation) and only decodes formats
+    without a header parser. Returns None for unreadable files.
+    """
+    size = read_image_size(path, apply_exif=True)
+    if size is None:
+        img = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if img is not None:
+            size = (img.shape[1], img.shape[0])
+    return size
@@ -0,0 +1,228 @@
+"""Probe-based tuning of dataloader workers and prefetching."""
+
+import os
+import time
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+from loguru import logger
+from mmengine.config import Config
+from mmengine.registry import FUNCTIONS
+from torch.utils.data import DataLoader, Dataset, RandomSampler
+
+# Loader throughput must exceed the model's consumption by this factor
+DEFAULT_HEADROOM = 1.2
+# A candidate is only worth its extra processes if it is this much faster
+_MIN_GAIN = 1.05
+
+
+def worker_candidates(max_workers: Optional[int] = None) -> List[int]:
+    """Returns the worker counts to probe: powers of two up to the CPU count.
+
+    Zero is not probed: without workers, loading never overlaps the model.
+    """
+    limit = max_workers or os.cpu_count() or 1
+    candidates = []
+    n = 1
+    while n <= limit:
+        candidates.append(n)
+        n *= 2
+    if candidates[-1] != limit:
+        candidates.append(limit)
+    return candidates
+
+
+def choose_loader_settings(
+    throughputs: Dict[int, float],
+    required: float,
+    headroom: float = DEFAULT_HEADROOM,
+) -> Tuple[int, int]:
+    """Picks the smallest worker count that keeps the model fed.
+
+    Args:
+        throughputs: Measured images/s of the loader per worker count.
+        required: Images/s the model consumes.
+        headroom: Safety factor applied to `required`.
+
+    Returns:
+        A tuple of (num_workers, prefetch_factor). When no candidate keeps up,
+        the fastest one is returned. Prefetching deeper only smooths jitter,
+        so it is raised when the margin over the model is thin.
+    """
+    for num_workers in sorted(throughputs):
+        if throughputs[num_workers] >= required * headroom:
+            margin = throughputs[num_workers] / required
+            return num_workers, (2 if margin >= 1.5 else 4)
+
+    num_workers = max(throughputs, key=lambda n: (throughputs[n], -n))
+    return num_workers, 4
+
+
+def _collate_fn(dataloader_cfg: Config):
+    collate_cfg = dict(dataloader_cfg.get("collate_fn", dict(type="pseudo_collate")))
+    collate_type = collate_cfg.pop("type")
+    if isinstance(collate_type, str):
+        collate_type = FUNCTIONS.get(collate_type)
+    return partial(collate_type, **collate_cfg)
+
+
+def measure_loader_throughput(
+    dataset: Dataset,
+    batch_size: int,
+    num_workers: int,
+    collate_fn,
+    prefetch_factor: int = 2,
+    num_batches: int = 20,
+) -> float:
+    """Measures the steady-state images/s of a dataloader configuration.
+
+    Batches produced while the workers start up are not timed. Images are
+    sampled with replacement so small datasets can be probed too.
+
+    Returns:
+        Images per second.
+    """
+    warmup = max(1, num_workers)
+    sampler = RandomSampler(
+        dataset, replacement=True, num_samples=batch_size * (warmup + num_batches)
+    )
+    loader = DataLoader(
+        dataset,
+        batch_size=batch_size,
+        sampler=sampler,
+        num_workers=num_workers,
+        prefetch_factor=prefetch_factor if num_workers > 0 else None,
+        collate_fn=collate_fn,
+    )
+    iterator = iter(loader)
+    for _ in range(warmup):
+        next(iterator)
+
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        next(iterator)
+    elapsed = time.perf_counter() - start
+    del iterator
+    return num_batches * batch_size / elapsed
+
+
+def measure_step_time(
+    model_cfg: Config,
+    batch: dict,
+    device: str = "cuda",
+    amp: bool = True,
+    steps: int = 5,
+) -> float:
+    """Measures the seconds per forward/backward pass of a freshly built model.
+
+    Args:
+        model_cfg: The `model` section of the MMDetection config.
+        batch: A collated batch from the train dataloader.
+        device: Device to run the probe on.
+        amp: Whether to use autocast (CUDA only).
+        steps: Number of timed steps (after two warmup steps).
+
+    Returns:
+        Seconds per training step.
+    """
+    from mmdet.registry import MODELS
+
+    model = MODELS.build(model_cfg).to(device)
+    model.train()
+    use_cuda = device.startswith("cuda")
+    autocast = partial(torch.autocast, device_type="cuda", enabled=amp and use_cuda)
+
+    def step(model: torch.nn.Module) -> None:
+        data = model.data_preprocessor(batch, True)
+        with autocast():
+            losses = model(**data, mode="loss")
+        loss, _ = model.parse_losses(losses)
+        loss.backward()
+        model.zero_grad(set_to_none=True)
+
+    try:
+        for _ in range(2):
+            step(model)
+        if use_cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        for _ in range(steps):
+            step(model)
+        if use_cuda:
+            torch.cuda.synchronize()
+        return (time.perf_counter() - start) / steps
+    finally:
+        del model
+        if use_cuda:
+            torch.cuda.empty_cache()
+
+
+def tune_dataloader(
+    cfg: Config,
+    batch_size: int,
+    device: str = "cuda",
+    amp: bool = True,
+    candidates: Optional[Sequence[int]] = None,
+    headroom: float = DEFAULT_HEADROOM,
+    num_batches: int = 20,
+) -> Tuple[int, int]:
+    """Probes the train pipeline and model to choose loader settings.
+
+    The model's step time gives the images/s the loader has to sustain.
+    Worker counts are then probed in increasing order until one sustains it
+    with `headroom`, or until more workers stop helping.
+
+    Args:
+        cfg: The fully configured MMDetection config.
+        batch_size: Training batch size.
+        device: Training device.
+        amp: Whether training uses mixed precision.
+        candidates: Worker counts to probe. Defaults to `worker_candidates()`.
+        headroom: Safety factor on the model's consumption rate.
+        num_batches: Batches timed per candidate.
+
+    Returns:
+        A tuple of (num_workers, prefetch_factor).
+    """
+    from mmdet.registry import DATASETS
+
+    dataloader_cfg = cfg.train_dataloader
+    dataset = DATASETS.build(dataloader_cfg.dataset)
+    collate_fn = _collate_fn(dataloader_cfg)
+
+    batch = next(
+        iter(DataLoader(dataset, batch_size=batch_size, collate_fn=collate_fn))
+    )
+    step_time = measure_step_time(cfg.model, batch, device=device, amp=amp)
+    required = batch_size / step_time
+    logger.info(
+        f"Model step: {step_time * 1000:.0f} ms/iter, consumes {required:.1f} img/s"
+    )
+
+    throughputs: Dict[int, float] = {}
+    best = 0.0
+    for num_workers in candidates or worker_candidates():
+        throughput = measure_loader_throughput(
+            dataset, batch_size, num_workers, collate_fn, num_batches=num_batches
+        )
+        throughputs[num_workers] = throughput
+        logger.info(f"Loader with {num_workers} workers: {throughput:.1f} img/s")
+        if throughput >= required * headroom:
+            break
+        if best and throughput < best * _MIN_GAIN:
+            break
+        best = max(best, throughput)
+
+    num_workers, prefetch_factor = choose_loader_settings(
+        throughputs, required, headroom
+    )
+    if throughputs[num_workers] < required:
+        logger.warning(
+            f"Data loading limits training: {throughputs[num_workers]:.1f} img/s "
+            f"vs {required:.1f} img/s needed. Consider 'ez-mmdet cache-dataset'."
+        )
+    logger.info(
+        f"Chose num_workers={num_workers}, prefetch_factor={prefetch_factor}"
+    )
+    return num_workers, prefetch_factor
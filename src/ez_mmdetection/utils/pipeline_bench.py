@@ -0,0 +1,213 @@
+"""Per-transform profiling of data pipelines."""
+
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from torch.utils.data import DataLoader, Dataset
+
+# One record per transform call: (transform index, seconds, output bytes)
+Record = Tuple[int, float, int]
+
+
+def transform_name(transform) -> str:
+    """Returns the display name of a built transform."""
+    return type(transform).__name__
+
+
+def output_nbytes(results) -> int:
+    """Returns the size of the image payload carried by a pipeline result."""
+    if not isinstance(results, dict):
+        return 0
+    for key in ("img", "inputs"):
+        value = results.get(key)
+        if value is None:
+            continue
+        if hasattr(value, "nbytes"):
+            return int(value.nbytes)
+        if hasattr(value, "element_size"):
+            return int(value.numel() * value.element_size())
+    return 0
+
+
+def run_profiled(
+    transforms: Sequence, results: dict
+) -> Tuple[List[Record], bool]:
+    """Runs a pipeline on one sample, timing each transform.
+
+    Stops early (like `Compose`) if a transform returns None.
+
+    Returns:
+        A tuple of (records, completed), where `completed` is False if the
+        sample was dropped by a transform.
+    """
+    records = []
+    for i, transform in enumerate(transforms):
+        start = time.perf_counter()
+        results = transform(results)
+        records.append((i, time.perf_counter() - start, output_nbytes(results)))
+        if results is None:
+            return records, False
+    return records, True
+
+
+def run_allocation_profile(transforms: Sequence, results: dict) -> Dict[int, int]:
+    """Runs a pipeline on one sample, tracing peak allocations per transform.
+
+    Tracing slows every allocation down, so this runs separately from the
+    timing pass. Requires `tracemalloc` to be started.
+    """
+    peaks = {}
+    for i, transform in enumerate(transforms):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        results = transform(results)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = max(0, peak - before)
+        if results is None:
+            break
+    return peaks
+
+
+class ProfiledDataset(Dataset):
+    """Wraps an MMEngine dataset so items are per-transform timing records."""
+
+    def __init__(self, dataset, num_samples: int):
+        """Profiles `num_samples` items, cycling through `dataset`."""
+        self.dataset = dataset
+        self.num_samples = num_samples
+
+    def __len__(self) -> int:
+        """Returns the number of profiled samples."""
+        return self.num_samples
+
+    def __getitem__(self, idx: int) -> Tuple[List[Record], bool]:
+        """Runs the pipeline on a sample, timing each transform."""
+        results = self.dataset.get_data_info(idx % len(self.dataset))
+        return run_profiled(self.dataset.pipeline.transforms, results)
+
+
+def _first(batch):
+    return batch[0]
+
+
+def _summarize(
+    names: List[str], records: List[List[Record]]
+) -> List[Dict[str, float]]:
+    times, sizes = defaultdict(list), defaultdict(list)
+    for sample in records:
+        for i, seconds, nbytes in sample:
+            times[i].append(seconds)
+            sizes[i].append(nbytes)
+    return [
+        {
+            "name": name,
+            "calls": len(times[i]),
+            "mean_ms": float(np.mean(times[i]) * 1000) if times[i] else 0.0,
+            "p95_ms": float(np.percentile(times[i], 95) * 1000) if times[i] else 0.0,
+            "out_kb": float(np.mean(sizes[i]) / 1024) if sizes[i] else 0.0,
+        }
+        for i, name in enumerate(names)
+    ]
+
+
+def benchmark_pipeline(
+    dataset,
+    num_samples: int = 200,
+    worker_counts: Sequence[int] = (0, 2, 4),
+    track_allocations: bool = True,
+) -> dict:
+    """Profiles a dataset's pipeline transform by transform.
+
+    Args:
+        dataset: A built MMEngine dataset (its `pipeline` is profiled).
+        num_samples: Samples per run; indices wrap around small datasets.
+        worker_counts: Worker counts to run with; 0 is single-process.
+        track_allocations: Whether to add a single-process `tracemalloc`
+            pass reporting each transform's peak allocation.
+
+    Returns:
+        A JSON-serializable report with one entry per worker count.
+    """
+    transforms = dataset.pipeline.transforms
+    names = [transform_name(t) for t in transforms]
+    report = {"num_samples": num_samples, "transforms": names, "runs": []}
+
+    for num_workers in worker_counts:
+        loader = DataLoader(
+            ProfiledDataset(dataset, num_samples),
+            batch_size=1,
+            num_workers=num_workers,
+            collate_fn=_first,
+        )
+        iterator = iter(loader)
+        # Worker start-up is not part of the steady-state throughput
+        samples = [next(iterator)]
+        start = time.perf_counter()
+        samples.extend(iterator)
+        elapsed = time.perf_counter() - start
+        report["runs"].append(
+            {
+                "num_workers": num_workers,
+                "samples_per_s": (len(samples) - 1) / elapsed if elapsed else 0.0,
+                "dropped": sum(not completed for _, completed in samples),
+                "transforms": _summarize(names, [r for r, _ in samples]),
+            }
+        )
+
+    if track_allocations:
+        peaks = defaultdict(list)
+        tracemalloc.start()
+        try:
+            for idx in range(num_samples):
+                results = dataset.get_data_info(idx % len(dataset))
+                for i, peak in run_allocation_profile(transforms, results).items():
+                    peaks[i].append(peak)
+        finally:
+            tracemalloc.stop()
+        report["alloc_kb"] = [
+            float(np.mean(peaks[i]) / 1024) if peaks[i] else 0.0
+            for i in range(len(names))
+        ]
+    return report
+
+
+def print_report(report: dict, console: Optional[Console] = None) -> None:
+    """Prints a benchmark report as one table per worker count."""
+    console = console or Console()
+    alloc = report.get("alloc_kb")
+    for run in report["runs"]:
+        table = Table(
+            title=(
+                f"{run['num_workers']} workers: "
+                f"{run['samples_per_s']:.1f} samples/s"
+            )
+        )
+        for column in ("Transform", "Mean (ms)", "p95 (ms)", "Output (KB)"):
+            justify = "left" if column == "Transform" else "right"
+            table.add_column(column, justify=justify)
+        if alloc:
+            table.add_column("Peak alloc (KB)", justify="right")
+        for i, stats in enumerate(run["transforms"]):
+            row = [
+                stats["name"],
+                f"{stats['mean_ms']:.2f}",
+                f"{stats['p95_ms']:.2f}",
+                f"{stats['out_kb']:.0f}",
+            ]
+            if alloc:
+                row.append(f"{alloc[i]:.0f}")
+            table.add_row(*row)
+        console.print(table)
+
+
+def save_report(report: dict, path: Path) -> None:
+    """Writes a benchmark report as JSON."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(report, indent=2))
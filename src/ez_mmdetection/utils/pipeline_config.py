@@ -0,0 +1,38 @@
+"""Helpers reading MMDetection config dicts and data pipelines."""
+
+from typing import List, Tuple
+
+
+def config_type(cfg: dict) -> str:
+    """Returns the `type` of a transform, dataset, hook or metric config.
+
+    The registry scope is dropped, e.g. 'mmdet.Resize' gives 'Resize'; a
+    class given as the type gives its name.
+    """
+    t = cfg.get("type", "")
+    return t.split(".")[-1] if isinstance(t, str) else getattr(t, "__name__", "")
+
+
+def train_input_size(pipeline: List[dict]) -> Tuple[int, int]:
+    """Returns the (w, h) of the images a train pipeline produces.
+
+    Taken from the final `Pad` or `RandomCrop` size, else from the resize
+    scale; 640x640 (all RTMDet configs) if none is found.
+    """
+    for transform in reversed(pipeline):
+        name = config_type(transform)
+        if name == "Pad" and transform.get("size"):
+            return tuple(transform["size"])
+        if name == "RandomCrop":
+            # crop_size is (h, w)
+            return tuple(transform["crop_size"][::-1])
+    for transform in pipeline:
+        name = config_type(transform)
+        if name in ("Mosaic", "CachedMosaic"):
+            return tuple(transform.get("img_scale", (640, 640)))
+        if name in ("Resize", "RandomResize") and transform.get("scale"):
+            scale = transform["scale"]
+            if isinstance(scale[0], (list, tuple)):
+                scale = max(scale, key=max)
+            return tuple(scale)
+    return (640, 640)
@@ -0,0 +1,177 @@
+"""Shared-memory ring buffer of pickled objects for dataloader workers."""
+
+import multiprocessing as mp
+import os
+import pickle
+import weakref
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional
+
+import numpy as np
+
+# Slot table columns
+_OFFSET, _LENGTH, _VALID = 0, 1, 2
+# Header fields: next slot to write, next byte offset to write
+_NEXT_SLOT, _WRITE_POS = 0, 1
+
+
+def shm_available_bytes() -> Optional[int]:
+    """Returns the free bytes of `/dev/shm`, or None where it does not exist.
+
+    Containers often mount a small `/dev/shm` (64 MB by default in Docker);
+    writing past it kills the process with SIGBUS instead of raising.
+    """
+    try:
+        stats = os.statvfs("/dev/shm")
+    except (AttributeError, OSError):
+        return None
+    return stats.f_bavail * stats.f_frsize
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attaches to an existing shared memory segment.
+
+    The resource tracker of this process does not unlink it on exit.
+    """
+    try:
+        return SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = SharedMemory(name=name)
+        # Only POSIX segments are registered with the tracker; Windows frees
+        # a segment when its last handle closes
+        if os.name == "posix":
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedRingBuffer:
+    """A byte-budgeted ring of recent objects shared across processes.
+
+    Objects are pickled into one shared-memory segment. Writers append at
+    the ring's head and evict whatever entries the new bytes overlap, plus
+    the oldest entry once all slots are used. Every process reads every
+    entry, so dataloader workers see each other's samples.
+
+    Create it in the main process before the dataloader starts its workers;
+    workers inherit it on fork or re-attach by name when pickled (spawn).
+    The list-like interface (`append`, `len`, indexing, `pop`) lets it stand
+    in for the `results_cache` list of `CachedMosaic` and `CachedMixUp`.
+    """
+
+    def __init__(self, capacity_bytes: int, max_entries: int):
+        """Initializes the buffer.
+
+        Args:
+            capacity_bytes: Bytes available for pickled entries. Entries
+                larger than this are not stored.
+            max_entries: Maximum number of live entries.
+        """
+        self.capacity_bytes = int(capacity_bytes)
+        self.max_entries = int(max_entries)
+        self._header_bytes = 8 * (2 + 3 * self.max_entries)
+        self._shm = SharedMemory(
+            create=True, size=self._header_bytes + self.capacity_bytes
+        )
+        self._shm.buf[: self._header_bytes] = bytes(self._header_bytes)
+        self._lock = mp.Lock()
+        self._owner_pid = os.getpid()
+        self._map_views()
+
+    @staticmethod
+    def _release(shm: SharedMemory, views: dict, owner_pid: int) -> None:
+        # Views export the segment's buffer and must go before it closes
+        views.clear()
+        shm.close()
+        if os.getpid() == owner_pid:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _map_views(self) -> None:
+        buf = self._shm.buf
+        self._views = {
+            "header": np.ndarray((2,), dtype=np.int64, buffer=buf),
+            "slots": np.ndarray(
+                (self.max_entries, 3), dtype=np.int64, buffer=buf, offset=16
+            ),
+            "data": buf[self._header_bytes :],
+        }
+        weakref.finalize(
+            self, SharedRingBuffer._release, self._shm, self._views, self._owner_pid
+        )
+
+    @property
+    def _header(self) -> np.ndarray:
+        return self._views["header"]
+
+    @property
+    def _slots(self) -> np.ndarray:
+        return self._views["slots"]
+
+    @property
+    def _data(self) -> memoryview:
+        return self._views["data"]
+
+    def __getstate__(self) -> dict:
+        """Pickles the segment by name so other processes can attach to it."""
+        state = self.__dict__.copy()
+        state["_shm"] = self._shm.name
+        state.pop("_views")
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Attaches to the segment named in a pickled buffer."""
+        self.__dict__.update(state)
+        self._shm = _attach(state["_shm"])
+        self._map_views()
+
+    def append(self, obj: Any) -> bool:
+        """Stores an object, evicting older entries as needed.
+
+        Returns:
+            False if the object is larger than the whole buffer.
+        """
+        payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        size = len(payload)
+        if size > self.capacity_bytes:
+            return False
+
+        with self._lock:
+            pos = int(self._header[_WRITE_POS])
+            if pos + size > self.capacity_bytes:
+                pos = 0
+            slots = self._slots
+            start, end = slots[:, _OFFSET], slots[:, _OFFSET] + slots[:, _LENGTH]
+            overlapping = (slots[:, _VALID] == 1) & (start < pos + size) & (end > pos)
+            slots[overlapping, _VALID] = 0
+
+            slot = int(self._header[_NEXT_SLOT])
+            self._data[pos : pos + size] = payload
+            slots[slot] = (pos, size, 1)
+            self._header[_NEXT_SLOT] = (slot + 1) % self.max_entries
+            self._header[_WRITE_POS] = pos + size
+        return True
+
+    def __len__(self) -> int:
+        """Returns the number of live entries."""
+        return int((self._slots[:, _VALID] == 1).sum())
+
+    def __getitem__(self, index: int) -> Any:
+        """Returns a fresh copy of the `index`-th live entry.
+
+        Entries may be evicted by other processes at any time, so the index
+        wraps around the number of entries live at the time of the call.
+        """
+        with self._lock:
+            live = np.flatnonzero(self._slots[:, _VALID] == 1)
+            if len(live) == 0:
+                raise IndexError("SharedRingBuffer is empty")
+            offset, length, _ = self._slots[live[index % len(live)]]
+            payload = bytes(self._data[offset : offset + length])
+        return pickle.loads(payload)
+
+    def pop(self, index: Optional[int] = None) -> None:
+        """No-op: entries are evicted by the ring, not by callers."""
+        return None
@@ -0,0 +1,326 @@
+"""Hyperparameter sweeps: concurrent training trials on disjoint CPU cores."""
+
+import itertools
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from ez_mmdetection.schemas.model import ModelName
+from ez_mmdetection.schemas.sweep import SweepConfig
+from ez_mmdetection.utils.toml_config import TrainingSection, TrialSection
+
+# Validation scores a trial reports, one JSON object per line
+TRIAL_REPORT = "trial_report.jsonl"
+LEADERBOARD_FILE = "leaderboard.json"
+
+
+def _sample(spec: Any, rng: np.random.Generator) -> Any:
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    if spec.log:
+        value = float(np.exp(rng.uniform(np.log(spec.low), np.log(spec.high))))
+    else:
+        value = float(rng.uniform(spec.low, spec.high))
+    if isinstance(spec.low, int) and isinstance(spec.high, int):
+        return int(round(value))
+    return value
+
+
+def expand_trials(config: SweepConfig) -> List[Dict[str, Any]]:
+    """Returns the searched values of each trial, keyed like `config.search`.
+
+    Grid search takes every combination of the listed values; random search
+    samples `num_trials` of them, picking list values uniformly and range
+    values uniformly (in log space for `log` ranges).
+    """
+    keys = list(config.search)
+    if config.method == "grid":
+        grid = itertools.product(*(config.search[key] for key in keys))
+        return [dict(zip(keys, values)) for values in grid]
+
+    rng = np.random.default_rng(config.seed)
+    return [
+        {key: _sample(config.search[key], rng) for key in keys}
+        for _ in range(config.num_trials)
+    ]
+
+
+def available_cpus() -> List[int]:
+    """Returns the CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpus(cpus: Sequence[int], parts: int) -> List[List[int]]:
+    """Splits CPUs into `parts` disjoint contiguous sets of near-equal size."""
+    if not 0 < parts <= len(cpus):
+        raise ValueError(f"Cannot split {len(cpus)} CPUs into {parts} sets")
+    bounds = np.linspace(0, len(cpus), parts + 1).round().astype(int)
+    return [list(cpus[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def append_trial_report(path: Path, record: dict) -> None:
+    """Appends a record to a trial report in a single write."""
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def read_trial_report(path: Path) -> List[dict]:
+    """Returns a trial report's records, skipping a line still being written."""
+    records = []
+    if not Path(path).exists():
+        return records
+    for line in Path(path).read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def best_score(
+    records: Sequence[dict], epoch: int, rule: str = "greater"
+) -> Optional[float]:
+    """Returns the best score reported up to `epoch`.
+
+    None if the trial has not validated at `epoch` or later yet, as its
+    score at that epoch is not known.
+    """
+    scores = [r for r in records if "score" in r]
+    if not scores or max(r["epoch"] for r in scores) < epoch:
+        return None
+    reached = [r["score"] for r in scores if r["epoch"] <= epoch]
+    if not reached:
+        return None
+    return max(reached) if rule == "greater" else min(reached)
+
+
+def should_prune(
+    score: float,
+    peer_scores: Sequence[float],
+    rule: str = "greater",
+    min_peers: int = 2,
+) -> bool:
+    """Returns whether a score is worse than the median of its peers'.
+
+    Args:
+        score: The trial's best score so far.
+        peer_scores: Best scores of the other trials at the same epoch.
+        rule: 'greater' if higher scores are better, else 'less'.
+        min_peers: Peers needed before any trial is pruned.
+    """
+    if len(peer_scores) < min_peers:
+        return False
+    median = float(np.median(peer_scores))
+    return score < median if rule == "greater" else score > median
+
+
+def _run_trial(
+    detector_cls,
+    model_name: str,
+    dataset_config_path: Path,
+    training: TrainingSection,
+    trial: TrialSection,
+    cpus: Sequence[int],
+) -> None:
+    # Inherited by the dataloader workers, which stay on the trial's cores
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(len(cpus))
+
+    log_file = Path(training.work_dir) / "trial.log"
+    fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    detector = detector_cls(model_name=model_name)
+    detector.train_trial(dataset_config_path, training, trial)
+
+
+@contextmanager
+def _environ(**values: str):
+    """Sets environment variables, e.g. for a process to be spawned."""
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = value
+
+
+def _summarize(
+    trial_id: str, params: dict, work_dir: Path, exitcode: Optional[int], rule: str
+) -> dict:
+    records = read_trial_report(work_dir / TRIAL_REPORT)
+    scores = [r for r in records if "score" in r]
+    best = None
+    if scores:
+        pick = max if rule == "greater" else min
+        best = pick(scores, key=lambda r: r["score"])
+    if any(r.get("pruned") for r in records):
+        status = "pruned"
+    else:
+        status = "finished" if exitcode == 0 else "failed"
+    return dict(
+        trial=trial_id,
+        status=status,
+        score=best["score"] if best else None,
+        best_epoch=best["epoch"] if best else None,
+        last_epoch=scores[-1]["epoch"] if scores else None,
+        params=params,
+        work_dir=str(work_dir),
+    )
+
+
+def rank_trials(results: Sequence[dict], rule: str = "greater") -> List[dict]:
+    """Orders trial summaries best first; trials without a score go last."""
+    sign = -1 if rule == "greater" else 1
+    return sorted(
+        results,
+        key=lambda r: (r["score"] is None, sign * (r["score"] or 0), r["trial"]),
+    )
+
+
+def run_sweep(
+    config: SweepConfig, detector_cls, poll_interval: float = 2.0
+) -> List[dict]:
+    """Runs a sweep's trials concurrently and returns its leaderboard.
+
+    Up to `max_parallel` trials train at once, each in its own process
+    pinned to a disjoint set of CPU cores with as many torch and OpenMP
+    threads. A
+    finished trial's cores go to the next one. Trials share the dataset
+    caches under the data root and the ez_mmdet cache directory. Each
+    trial trains in `<work_dir>/trial_<n>` and, with `prune`, stops once
+    its best score falls below the median of the other trials' at the same
+    epoch. The leaderboard is also written to `leaderboard.json`.
+
+    Args:
+        config: The sweep.
+        detector_cls: Detector class trials train with (e.g. `RTMDet`).
+        poll_interval: Seconds between checks for finished trials.
+
+    Returns:
+        A summary of each trial, best first.
+    """
+    sweep_dir = Path(config.work_dir)
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+    # Reports of an earlier sweep here would count as peers when pruning
+    for report in sweep_dir.glob(f"*/{TRIAL_REPORT}"):
+        report.unlink()
+    trials = []
+    for i, params in enumerate(expand_trials(config)):
+        trial_id = f"trial_{i:03d}"
+        overrides = {
+            key.partition(".")[2]: value
+            for key, value in params.items()
+            if key.startswith("training.")
+        }
+        training = TrainingSection(
+            **{
+                **config.training,
+                **overrides,
+                "work_dir": str(sweep_dir / trial_id),
+                "launcher": "none",
+            }
+        )
+        model_name = ModelName(params.get("model.name", config.model))
+        trials.append((trial_id, params, model_name, training))
+    trial_cfg = TrialSection(
+        sweep_dir=str(sweep_dir),
+        monitor=config.metric,
+        rule=config.rule,
+        prune=config.prune,
+        warmup_epochs=config.prune_warmup_epochs,
+        min_peers=config.prune_min_trials,
+    )
+    trial_params = {trial_id: params for trial_id, params, *_ in trials}
+    (sweep_dir / "trials.json").write_text(json.dumps(trial_params, indent=2))
+
+    cpus = available_cpus()
+    slots = split_cpus(cpus, min(config.max_parallel, len(trials), len(cpus)))
+    logger.info(
+        f"Running {len(trials)} trials, {len(slots)} at a time on "
+        f"{[len(s) for s in slots]} cores each"
+    )
+    ctx = mp.get_context("spawn")
+    pending, free = deque(trials), list(range(len(slots)))
+    running: Dict[int, tuple] = {}
+    results = []
+    while pending or running:
+        while pending and free:
+            slot = free.pop(0)
+            trial_id, params, model_name, training = pending.popleft()
+            Path(training.work_dir).mkdir(parents=True, exist_ok=True)
+            process = ctx.Process(
+                target=_run_trial,
+                args=(
+                    detector_cls,
+                    model_name,
+                    config.dataset,
+                    training,
+                    trial_cfg,
+                    slots[slot],
+                ),
+            )
+            # The OpenMP runtime reads it when the trial first imports torch
+            with _environ(OMP_NUM_THREADS=str(len(slots[slot]))):
+                process.start()
+            running[slot] = (trial_id, params, training, process)
+            logger.info(f"Started {trial_id} on CPUs {slots[slot]}: {params}")
+        time.sleep(poll_interval)
+        for slot, (trial_id, params, training, process) in list(running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            result = _summarize(
+                trial_id, params, Path(training.work_dir), process.exitcode, config.rule
+            )
+            logger.info(
+                f"{trial_id} {result['status']}, {config.metric}: {result['score']}"
+            )
+            results.append(result)
+            del running[slot]
+            free.append(slot)
+
+    leaderboard = rank_trials(results, config.rule)
+    (sweep_dir / LEADERBOARD_FILE).write_text(json.dumps(leaderboard, indent=2))
+    return leaderboard
+
+
+def print_leaderboard(
+    leaderboard: Sequence[dict], metric: str, console: Optional[Console] = None
+) -> None:
+    """Prints a sweep's leaderboard as a table."""
+    console = console or Console()
+    table = Table(title="Sweep leaderboard")
+    for column in ("Rank", "Trial", "Status", metric, "Best epoch", "Params"):
+        justify = "right" if column in ("Rank", metric) else "left"
+        table.add_column(column, justify=justify)
+    for rank, result in enumerate(leaderboard, 1):
+        score = "-" if result["score"] is None else f"{result['score']:.4f}"
+        params = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+        table.add_row(
+            str(rank),
+            result["trial"],
+            result["status"],
+            score,
+            str(result["best_epoch"] or "-"),
+            params,
+        )
+    console.print(table)
@@ -0,0 +1,102 @@
+"""Training-iteration timings: summaries and a Prometheus text endpoint."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Phases of a training iteration, in order
+PHASES = (
+    "data", "preprocess", "forward", "loss", "backward", "step", "ema", "hooks", "other"
+)
+
+
+def summarize_iterations(records: Sequence[Dict[str, float]]) -> dict:
+    """Summarizes per-iteration timings.
+
+    Args:
+        records: Iterations with the milliseconds of each phase in `PHASES`,
+            their `total` and their `batch_size`.
+
+    Returns:
+        p50/p95 milliseconds per phase and of the total, images per second,
+        and `data_fraction`: the share of the time spent waiting for the
+        dataloader (near 1 when input-bound, near 0 when compute-bound).
+    """
+    totals = np.array([r["total"] for r in records], dtype=np.float64)
+    summary = dict(iters=len(records), phases={})
+    for phase in PHASES + ("total",):
+        times = np.array([r[phase] for r in records], dtype=np.float64)
+        summary["phases"][phase] = dict(
+            p50=float(np.percentile(times, 50)), p95=float(np.percentile(times, 95))
+        )
+    seconds = totals.sum() / 1000
+    images = sum(r["batch_size"] for r in records)
+    summary["images_per_s"] = images / seconds if seconds > 0 else 0.0
+    waited = sum(r["data"] for r in records)
+    summary["data_fraction"] = (
+        float(waited / totals.sum()) if totals.sum() > 0 else 0.0
+    )
+    return summary
+
+
+def prometheus_text(summary: dict, prefix: str = "ez_mmdet_train") -> str:
+    """Renders a summary in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {prefix}_phase_seconds Iteration phase time over the last window.",
+        f"# TYPE {prefix}_phase_seconds gauge",
+    ]
+    for phase, quantiles in summary["phases"].items():
+        for name, quantile in (("p50", "0.5"), ("p95", "0.95")):
+            value = quantiles[name] / 1000
+            labels = f'phase="{phase}",quantile="{quantile}"'
+            lines.append(f"{prefix}_phase_seconds{{{labels}}} {value:.6g}")
+    for name, help_text in (
+        ("images_per_s", "Training images per second over the last window."),
+        ("data_fraction", "Share of the iteration time spent waiting for data."),
+    ):
+        lines += [
+            f"# HELP {prefix}_{name} {help_text}",
+            f"# TYPE {prefix}_{name} gauge",
+            f"{prefix}_{name} {summary[name]:.6g}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves the latest metrics text over HTTP from a daemon thread.
+
+    Args:
+        port: Port to listen on; 0 picks a free one.
+        host: Address to bind. Defaults to localhost only.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        """Binds the server and starts serving."""
+        self.text = ""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.text.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="telemetry-server", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stops serving and releases the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
 import tomli
 import tomli_w
@@ -8,7 +8,7 @@ from pydantic import BaseModel, Field
 
 from ez_mmdetection.schemas.model import ModelName
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PositiveInt, model_validator
 
 # --- Pydantic Models for Validation ---
 class ModelSection(BaseModel):
@@ -29,6 +29,8 @@ class DataSection(BaseModel):
     val_img: str = "val2017/"
     test_ann: Optional[str] = None
     test_img: Optional[str] = None
+    train_format: Literal["coco", "yolo"] = "coco"
+    val_format: Literal["coco", "yolo"] = "coco"
     classes: Optional[List[str]] = None
 
 
@@ -36,14 +38,199 @@ class TrainingSection(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     
     epochs: int = Field(100, gt=0)
-    batch_size: int = Field(8, gt=0)
+    batch_size: Union[PositiveInt, Literal["auto"]] = Field(
+        8,
+        description="Per-process batch size, or 'auto' to probe the largest that fits",
+    )
+    memory_budget_mb: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Memory per process for batch_size='auto' (default: 85% of free)",
+    )
+    effective_batch_size: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Batch per optimizer step for batch_size='auto', "
+        "reached by gradient accumulation",
+    )
+    accumulative_counts: int = Field(
+        1,
+        gt=0,
+        description="Batches whose gradients are accumulated per optimizer step",
+    )
     num_workers: int = Field(2, ge=0, description="Number of dataloader workers")
+    prefetch_factor: Optional[int] = Field(
+        None, gt=0, description="Batches prefetched per worker (torch default if unset)"
+    )
+    auto_tune_loader: bool = Field(
+        False, description="Probe the pipeline and model to choose workers/prefetch"
+    )
     learning_rate: float = Field(0.001, gt=0.0)
     device: str = "cuda"
     work_dir: str = "./runs/train"
     log_level: str = "INFO"
     enable_tensorboard: bool = Field(True, description="Enable TensorBoard logging")
     amp: bool = True
+    reduced_decode: bool = Field(
+        False, description="Decode JPEGs at 1/2, 1/4 or 1/8 size when possible"
+    )
+    jpeg_backend: Literal["cv2", "turbojpeg"] = "cv2"
+    batch_augment: bool = Field(
+        False,
+        description=(
+            "Run HSV jitter and flips on the batch on the training device, after "
+            "mixup and padding: mixed images share one HSV gain and flip, and "
+            "pad borders are jittered and flipped"
+        ),
+    )
+    shared_mix_cache_mb: int = Field(
+        0,
+        ge=0,
+        description="Shared-memory MB for mosaic/mixup caches shared by all workers "
+        "(0: per-worker caches)",
+    )
+    progressive_sizes: List[PositiveInt] = Field(
+        default_factory=list,
+        description="Smaller image sizes trained on first, e.g. [320, 480] before 640",
+    )
+    progressive_fraction: float = Field(
+        0.5,
+        gt=0.0,
+        lt=1.0,
+        description="Share of the mosaic-stage epochs trained at progressive_sizes",
+    )
+    cache_annotations: bool = Field(
+        True, description="Parse COCO annotations once into a memory-mapped cache"
+    )
+    use_image_cache: bool = Field(
+        True,
+        description="Read images from an 'ez-mmdet cache-dataset' store if present",
+    )
+    resume: Optional[str] = Field(
+        None,
+        description="'auto' (latest checkpoint in work_dir) or a checkpoint to resume",
+    )
+    async_checkpoint: bool = Field(
+        False, description="Write checkpoints in a background thread"
+    )
+    in_memory_eval: bool = Field(
+        True, description="Compute COCO metrics without the JSON dump and reload"
+    )
+    coco_eval_backend: Literal["pycocotools", "vectorized"] = Field(
+        "pycocotools",
+        description="COCO matching and accumulation: 'vectorized' is NumPy-based, "
+        "same results",
+    )
+    val_subset_size: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Validate on a class-stratified subset of this many images",
+    )
+    full_val_epochs: List[PositiveInt] = Field(
+        default_factory=list,
+        description="Epochs validated on the full split with val_subset_size "
+        "(the last always is)",
+    )
+    early_stopping_patience: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Stop after this many validations without improvement",
+    )
+    early_stopping_metric: str = Field(
+        "coco/bbox_mAP",
+        description="Validation metric early stopping and the best checkpoint follow",
+    )
+    early_stopping_min_delta: float = Field(
+        0.001,
+        ge=0.0,
+        description="Smallest change of the metric counted as an improvement",
+    )
+    early_stopping_min_epochs: int = Field(
+        0, ge=0, description="Epochs to train before early stopping may stop"
+    )
+    telemetry: bool = Field(
+        False, description="Record the time of each training iteration's phases"
+    )
+    telemetry_interval: int = Field(
+        50, gt=0, description="Iterations per telemetry summary"
+    )
+    telemetry_format: Literal["jsonl", "csv"] = "jsonl"
+    telemetry_port: Optional[int] = Field(
+        None, ge=0, lt=65536, description="Serve telemetry for Prometheus on this port"
+    )
+    compile: bool = Field(
+        False, description="torch.compile the backbone, neck and head forward"
+    )
+    compile_mode: Literal["default", "reduce-overhead", "max-autotune"] = "default"
+    launcher: Literal["none", "ddp"] = Field(
+        "none", description="'ddp' spawns nproc_per_node data-parallel processes"
+    )
+    nproc_per_node: int = Field(1, gt=0, description="Processes per node ('ddp')")
+    nnodes: int = Field(1, gt=0, description="Number of nodes ('ddp')")
+    node_rank: int = Field(0, ge=0, description="Rank of this node ('ddp')")
+    master_addr: str = Field("127.0.0.1", description="Address of node 0 ('ddp')")
+    master_port: int = Field(
+        29500, gt=0, lt=65536, description="Rendezvous port on node 0"
+    )
+    scale_lr: bool = Field(
+        True,
+        description="Scale the learning rate linearly with the number of processes",
+    )
+
+    @model_validator(mode="after")
+    def _check_node_rank(self) -> "TrainingSection":
+        if self.node_rank >= self.nnodes:
+            raise ValueError(f"node_rank must be < nnodes ({self.nnodes})")
+        return self
+
+    @model_validator(mode="after")
+    def _check_coco_eval_backend(self) -> "TrainingSection":
+        if self.coco_eval_backend != "pycocotools" and not self.in_memory_eval:
+            raise ValueError(
+                "coco_eval_backend='vectorized' requires in_memory_eval"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def _check_full_val_epochs(self) -> "TrainingSection":
+        if self.full_val_epochs and self.val_subset_size is None:
+            raise ValueError("full_val_epochs requires val_subset_size")
+        return self
+
+    @model_validator(mode="after")
+    def _check_progressive_sizes(self) -> "TrainingSection":
+        odd = [size for size in self.progressive_sizes if size % 32]
+        if odd:
+            raise ValueError(f"progressive_sizes must be multiples of 32, got {odd}")
+        return self
+
+    @model_validator(mode="after")
+    def _check_telemetry_port(self) -> "TrainingSection":
+        if self.telemetry_port is not None and not self.telemetry:
+            raise ValueError("telemetry_port requires telemetry")
+        return self
+
+    @model_validator(mode="after")
+    def _check_effective_batch_size(self) -> "TrainingSection":
+        if self.effective_batch_size and self.batch_size != "auto":
+            raise ValueError(
+                "effective_batch_size requires batch_size='auto'; "
+                "set accumulative_counts for a fixed batch size"
+            )
+        return self
+
+
+class TrialSection(BaseModel):
+    """Settings of a sweep trial, set by `ez-mmdet sweep`."""
+
+    sweep_dir: str = Field(
+        ..., description="Directory holding every trial of the sweep"
+    )
+    monitor: str = "coco/bbox_mAP"
+    rule: Literal["greater", "less"] = "greater"
+    prune: bool = True
+    warmup_epochs: int = Field(0, ge=0)
+    min_peers: int = Field(2, gt=0)
 
 
 class UserConfig(BaseModel):
@@ -53,6 +240,7 @@ class UserConfig(BaseModel):
     model: ModelSection
     data: DataSection
     training: TrainingSection
+    trial: Optional[TrialSection] = None
 
 
 # --- Utilities ---
@@ -0,0 +1,135 @@
+"""Class-stratified validation subsets, cached by image id."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ez_mmdetection.utils.cache import get_cache_dir
+
+VAL_SUBSET_VERSION = 2
+# Subdirectory of the cache directory holding the subsets
+VAL_SUBSET_DIR = "val_subset"
+
+
+def val_subset_path(ann_path: Path) -> Path:
+    """Returns the file caching the validation subset of an annotation path.
+
+    It lives in the ez_mmdet cache directory, keyed by the resolved path of
+    the split's annotation file (or YOLO labels directory), so the dataset
+    directory is never written to.
+    """
+    key = hashlib.sha256(str(Path(ann_path).resolve()).encode()).hexdigest()
+    return get_cache_dir() / VAL_SUBSET_DIR / f"{key[:32]}.json"
+
+
+def stratified_subset(
+    image_labels: Sequence[Tuple[int, Iterable[int]]], size: int, seed: int = 0
+) -> List[int]:
+    """Picks `size` images so that each class keeps its share of images.
+
+    Classes are served from the rarest: each gets images containing it, in
+    a seeded random order, until it appears in its share of the subset (at
+    least one image). The remaining budget is filled at random, which also
+    samples images without objects.
+
+    Args:
+        image_labels: (image id, class labels of its objects) of each image.
+        size: Number of images to pick.
+        seed: Seed of the random order.
+
+    Returns:
+        The picked image ids, in the order of `image_labels`.
+    """
+    if size >= len(image_labels):
+        return [img_id for img_id, _ in image_labels]
+    labels = [set(lbls) for _, lbls in image_labels]
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(image_labels))
+
+    images_of: Dict[int, List[int]] = {}
+    for idx in order:
+        for label in labels[idx]:
+            images_of.setdefault(label, []).append(idx)
+    fraction = size / len(image_labels)
+    target = {c: max(1, round(fraction * len(imgs))) for c, imgs in images_of.items()}
+
+    picked = np.zeros(len(image_labels), dtype=bool)
+    count = {c: 0 for c in images_of}
+    num_picked = 0
+    for c in sorted(images_of, key=lambda c: (len(images_of[c]), c)):
+        for idx in images_of[c]:
+            if count[c] >= target[c] or num_picked >= size:
+                break
+            if picked[idx]:
+                continue
+            picked[idx] = True
+            num_picked += 1
+            for label in labels[idx]:
+                count[label] += 1
+    for idx in order:
+        if num_picked >= size:
+            break
+        if not picked[idx]:
+            picked[idx] = True
+            num_picked += 1
+    return [img_id for (img_id, _), keep in zip(image_labels, picked) if keep]
+
+
+def labels_fingerprint(image_labels: Sequence[Tuple[int, Iterable[int]]]) -> str:
+    """Returns a hash of a split's image ids and labels.
+
+    Unlike the annotation file's signature, it works for any dataset
+    format, e.g. YOLO label directories.
+    """
+    content = [
+        [str(img_id), sorted(int(c) for c in lbls)] for img_id, lbls in image_labels
+    ]
+    return hashlib.sha1(json.dumps(content).encode()).hexdigest()
+
+
+def load_val_subset(
+    path: Path, fingerprint: str, size: int, seed: int
+) -> Optional[List[int]]:
+    """Returns the cached subset's image ids, or None if it is stale.
+
+    Args:
+        path: The split's cache file, see `val_subset_path`.
+        fingerprint: `labels_fingerprint` of the split.
+        size: Number of images of the subset.
+        seed: Seed of the subset selection.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    cache = json.loads(path.read_text())
+    if (
+        cache.get("version") != VAL_SUBSET_VERSION
+        or cache.get("fingerprint") != fingerprint
+        or cache.get("size") != size
+        or cache.get("seed") != seed
+    ):
+        return None
+    return cache["img_ids"]
+
+
+def write_val_subset(
+    path: Path, fingerprint: str, size: int, seed: int, img_ids: Sequence[int]
+) -> None:
+    """Caches a subset's image ids for `load_val_subset`."""
+    cache = {
+        "version": VAL_SUBSET_VERSION,
+        "fingerprint": fingerprint,
+        "size": size,
+        "seed": seed,
+        "img_ids": [int(i) for i in img_ids],
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Per process, as concurrent sweep trials may write the same subset
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(cache))
+    os.replace(tmp_path, path)
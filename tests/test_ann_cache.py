@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ez_mmdetection.utils.ann_cache import (
+    AnnotationTable,
+    ensure_annotation_cache,
+    parse_coco_annotations,
+)
+
+COCO_MINI_ANN = Path("tests/data/coco_mini/annotations/train.json")
+
+
+def _ann(ann_id, image_id, category_id, bbox, **extra):
+    """Returns a COCO annotation whose area is that of its box."""
+    area = bbox[2] * bbox[3]
+    return dict(
+        id=ann_id, image_id=image_id, category_id=category_id, bbox=bbox, area=area
+    ) | extra
+
+
+@pytest.fixture
+def coco_file(tmp_path):
+    """Writes a COCO file exercising the instance filters."""
+    coco = {
+        "images": [
+            {"id": 10, "file_name": "a.jpg", "width": 100, "height": 80},
+            {"id": 11, "file_name": "b.jpg", "width": 20, "height": 20},
+            {"id": 12, "file_name": "c.jpg", "width": 100, "height": 100},
+        ],
+        "categories": [{"id": 1, "name": "cat"}, {"id": 2, "name": "dog"}],
+        "annotations": [
+            _ann(1, 10, 2, [10, 10, 20, 30]),
+            _ann(2, 10, 1, [0, 0, 5, 5], iscrowd=1),
+            # Degenerate and out-of-image boxes are dropped
+            _ann(3, 10, 1, [0, 0, 0.5, 5]),
+            _ann(4, 10, 1, [200, 0, 5, 5]),
+            _ann(5, 11, 1, [1, 1, 5, 5]),
+        ],
+    }
+    path = tmp_path / "train.json"
+    path.write_text(json.dumps(coco))
+    return path
+
+
+def test_parse_coco_annotations(coco_file):
+    """Test that instances are filtered and labelled like CocoDataset does."""
+    arrays, cat_ids = parse_coco_annotations(coco_file, classes=("cat", "dog"))
+
+    assert cat_ids == [1, 2]
+    np.testing.assert_array_equal(arrays["offsets"], [0, 2, 3, 3])
+    np.testing.assert_array_equal(arrays["bboxes"][0], [10, 10, 30, 40])
+    np.testing.assert_array_equal(arrays["labels"], [1, 0, 0])
+    np.testing.assert_array_equal(arrays["ignore_flags"], [0, 1, 0])
+    np.testing.assert_array_equal(arrays["has_cat_ann"], [True, True, False])
+
+
+def test_annotation_table_data_infos_and_filter(coco_file, tmp_path):
+    """Test that the table yields CocoDataset-style data infos from the cache."""
+    cache_dir = ensure_annotation_cache(coco_file, ("cat", "dog"), tmp_path / "cache")
+    table = AnnotationTable(cache_dir, img_prefix="imgs")
+
+    info = table[0]
+    assert info["img_path"] == "imgs/a.jpg"
+    assert (info["img_id"], info["height"], info["width"]) == (10, 80, 100)
+    assert info["instances"][0] == {
+        "ignore_flag": 0,
+        "bbox": [10, 10, 30, 40],
+        "bbox_label": 1,
+    }
+    assert table[2]["instances"] == []
+
+    keep = table.valid_mask(filter_empty_gt=True, min_size=32)
+    np.testing.assert_array_equal(keep, [True, False, False])
+    subset = table.subset(table.indices[keep])
+    assert len(subset) == 1 and subset[0]["img_id"] == 10
+
+
+def test_annotation_cache_is_reused_and_keyed_by_content(coco_file, tmp_path):
+    """Test that an unchanged file hits the cache and an edited one rebuilds it."""
+    cache_root = tmp_path / "cache"
+    first = ensure_annotation_cache(coco_file, ("cat", "dog"), cache_root)
+    assert ensure_annotation_cache(coco_file, ("cat", "dog"), cache_root) == first
+    assert ensure_annotation_cache(coco_file, ("cat",), cache_root) != first
+
+    coco = json.loads(coco_file.read_text())
+    coco["annotations"].pop()
+    coco_file.write_text(json.dumps(coco))
+    second = ensure_annotation_cache(coco_file, ("cat", "dog"), cache_root)
+    assert second != first
+    assert AnnotationTable(second).meta["num_instances"] == 2
+
+
+def test_cached_coco_dataset_matches_coco_dataset(tmp_path, monkeypatch):
+    """Test that CachedCocoDataset yields the same data infos as CocoDataset."""
+    from mmdet.datasets import CocoDataset
+
+    from ez_mmdetection.datasets import CachedCocoDataset
+
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(tmp_path))
+    kwargs = dict(
+        ann_file=str(COCO_MINI_ANN),
+        data_prefix=dict(img="tests/data/coco_mini/images"),
+        filter_cfg=dict(filter_empty_gt=True, min_size=32),
+        pipeline=[],
+    )
+    expected = CocoDataset(**kwargs)
+    cached = CachedCocoDataset(**kwargs)
+
+    assert len(cached) == len(expected)
+    for idx in range(len(expected)):
+        want, got = expected.get_data_info(idx), cached.get_data_info(idx)
+        # Boxes are cached as float32, the dtype LoadAnnotations converts to
+        want_boxes = [i.pop("bbox") for i in want["instances"]]
+        got_boxes = [i.pop("bbox") for i in got["instances"]]
+        np.testing.assert_allclose(got_boxes, want_boxes, rtol=1e-6)
+        for instance in want["instances"]:
+            instance.pop("mask", None)
+        assert got == want
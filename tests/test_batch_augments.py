@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+import torch
+from mmdet.structures import DetDataSample
+from mmdet.structures.bbox import HorizontalBoxes
+from mmengine.structures import InstanceData
+
+from ez_mmdetection.datasets.batch_augments import (
+    BatchYOLOXHSVFlip,
+    bgr_to_hsv,
+    hsv_to_bgr,
+)
+
+
+def _random_batch(n=2, h=16, w=24):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (n, h, w, 3), dtype=np.uint8)
+
+
+def test_hsv_conversion_matches_opencv():
+    """Test that the batched conversion follows OpenCV's 8-bit HSV."""
+    imgs = _random_batch()
+    batch = torch.from_numpy(imgs).permute(0, 3, 1, 2).float()
+
+    hsv = bgr_to_hsv(batch).permute(0, 2, 3, 1).numpy()
+    expected = np.stack([cv2.cvtColor(img, cv2.COLOR_BGR2HSV) for img in imgs])
+    hue_diff = np.abs(hsv[..., 0] - expected[..., 0])
+    assert np.minimum(hue_diff, 180 - hue_diff).max() <= 1
+    assert np.abs(hsv[..., 1:] - expected[..., 1:]).max() <= 1
+
+    roundtrip = hsv_to_bgr(bgr_to_hsv(batch))
+    assert torch.allclose(roundtrip, batch, atol=1e-3)
+
+
+def test_batch_flip_updates_boxes():
+    """Test that flipped images carry flipped boxes and flip metadata."""
+    imgs = torch.from_numpy(_random_batch(n=1)).permute(0, 3, 1, 2).contiguous()
+    original = imgs.clone()
+    sample = DetDataSample(metainfo=dict(img_shape=(16, 24)))
+    sample.gt_instances = InstanceData(
+        bboxes=HorizontalBoxes(torch.tensor([[2.0, 1.0, 6.0, 5.0]])),
+        labels=torch.tensor([0]),
+    )
+
+    aug = BatchYOLOXHSVFlip(
+        hue_delta=0, saturation_delta=0, value_delta=0, flip_prob=1.0
+    )
+    out, samples = aug(imgs, [sample])
+
+    assert torch.equal(out, original.flip(-1))
+    assert samples[0].gt_instances.bboxes.tensor.tolist() == [[18.0, 1.0, 22.0, 5.0]]
+    assert samples[0].flip is True
+
+
+def test_batch_hsv_is_in_place_uint8():
+    """Test that the jitter writes into the uint8 batch it was given."""
+    torch.manual_seed(0)
+    imgs = torch.from_numpy(_random_batch(n=8)).permute(0, 3, 1, 2).contiguous()
+    original = imgs.clone()
+
+    out, _ = BatchYOLOXHSVFlip(flip_prob=0.0)(imgs, None)
+
+    assert out.data_ptr() == imgs.data_ptr() and out.dtype == torch.uint8
+    assert not torch.equal(out, original)
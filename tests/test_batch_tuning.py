@@ -0,0 +1,72 @@
+import signal
+
+import pytest
+
+from ez_mmdetection.utils.batch_tuning import (
+    _OVER_BUDGET,
+    _probe_result,
+    available_memory_bytes,
+    search_batch_size,
+    split_effective_batch,
+)
+
+
+def _fits_below(limit, probed):
+    def fits(batch_size):
+        probed.append(batch_size)
+        return batch_size <= limit
+
+    return fits
+
+
+def test_search_batch_size_doubles_then_bisects():
+    """Test that the search brackets the limit and narrows it down."""
+    probed = []
+    assert search_batch_size(_fits_below(13, probed), max_batch_size=256) == 13
+    assert probed[:5] == [1, 2, 4, 8, 16]
+
+
+def test_search_batch_size_stops_within_bracket():
+    """Test that large sizes are not refined to the exact limit."""
+    probed = []
+    batch_size = search_batch_size(_fits_below(100, probed), max_batch_size=256)
+    assert 100 - 100 // 8 <= batch_size <= 100
+    assert len(probed) < 12
+
+
+def test_search_batch_size_respects_cap():
+    """Test that the cap is returned when everything fits."""
+    assert search_batch_size(lambda bs: True, max_batch_size=24) == 24
+    assert search_batch_size(lambda bs: True, max_batch_size=16) == 16
+
+
+def test_search_batch_size_raises_when_nothing_fits():
+    """Test that a budget too small for one image is reported."""
+    with pytest.raises(RuntimeError, match="batch of 1"):
+        search_batch_size(lambda bs: False)
+
+
+def test_split_effective_batch_keeps_effective_batch():
+    """Test that the split uses the fewest accumulation steps that divide it."""
+    assert split_effective_batch(32, 40) == (32, 1)
+    assert split_effective_batch(32, 12) == (8, 4)
+    assert split_effective_batch(30, 7) == (6, 5)
+    assert split_effective_batch(7, 3) == (1, 7)
+
+
+def test_available_memory_bytes_cpu():
+    """Test that the free CPU memory is positive."""
+    assert available_memory_bytes("cpu") > 0
+
+
+def test_probe_result_only_counts_memory_deaths_as_over_budget():
+    """Test that probes stopped for memory are over budget and others raise."""
+    assert _probe_result(dict(peak=2**20), 0) == 2**20
+    assert _probe_result(dict(peak=None), 0) is None
+    assert _probe_result(None, _OVER_BUDGET) is None
+    assert _probe_result(None, -signal.SIGKILL) is None
+    with pytest.raises(RuntimeError, match="exit code 1"):
+        _probe_result(None, 1)
+    error = "KeyError: 'Nope is not in the model registry'"
+    with pytest.raises(RuntimeError, match=error):
+        _probe_result(dict(error=error), 0)
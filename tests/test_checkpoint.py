@@ -0,0 +1,104 @@
+import os
+
+import pytest
+import torch
+
+from ez_mmdetection.utils.checkpoint import (
+    find_resume_checkpoint,
+    slim_checkpoint,
+    snapshot_checkpoint,
+)
+
+
+@pytest.fixture
+def training_checkpoint(tmp_path):
+    """Creates a checkpoint shaped like one saved by EMAHook + CheckpointHook."""
+    ema_weight = torch.full((64, 64), 2.0)
+    raw_weight = torch.full((64, 64), 1.0)
+    checkpoint = {
+        "meta": {
+            "epoch": 3,
+            "iter": 30,
+            "dataset_meta": {"classes": ("cat", "dog")},
+            "config": "model = dict(type='RTMDet')",
+        },
+        # MMEngine stores the EMA weights in `state_dict` and the raw ones
+        # (prefixed with 'module.') in `ema_state_dict`
+        "state_dict": {
+            "backbone.weight": ema_weight,
+            "backbone.bn.num_batches_tracked": torch.tensor(30),
+        },
+        "ema_state_dict": {
+            "steps": torch.tensor(30),
+            "module.backbone.weight": raw_weight,
+        },
+        "optimizer": {"state": {0: {"momentum_buffer": torch.zeros(64, 64)}}},
+        "param_schedulers": [{"last_epoch": 3}],
+        "message_hub": {"log_scalars": {}},
+    }
+    path = tmp_path / "epoch_3.pth"
+    torch.save(checkpoint, path)
+    return path
+
+
+def test_slim_checkpoint_keeps_ema_weights_and_meta(training_checkpoint):
+    """Test that only the EMA weights and dataset_meta survive slimming."""
+    out = slim_checkpoint(training_checkpoint)
+
+    assert out == training_checkpoint.with_name("epoch_3_inference.pth")
+    slim = torch.load(out, map_location="cpu")
+    assert set(slim) == {"meta", "state_dict"}
+    assert slim["meta"]["dataset_meta"] == {"classes": ("cat", "dog")}
+    assert "config" not in slim["meta"]
+    assert torch.equal(slim["state_dict"]["backbone.weight"], torch.full((64, 64), 2.0))
+    assert out.stat().st_size < training_checkpoint.stat().st_size
+
+
+def test_slim_checkpoint_fp16(training_checkpoint, tmp_path):
+    """Test that fp16 casts float weights but leaves integer buffers alone."""
+    out = slim_checkpoint(training_checkpoint, tmp_path / "slim.pth", fp16=True)
+
+    state_dict = torch.load(out, map_location="cpu")["state_dict"]
+    assert state_dict["backbone.weight"].dtype == torch.float16
+    assert state_dict["backbone.bn.num_batches_tracked"].dtype == torch.int64
+
+
+def test_slim_checkpoint_missing_file(tmp_path):
+    """Test that a missing source checkpoint raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        slim_checkpoint(tmp_path / "missing.pth")
+
+
+def test_find_resume_checkpoint_follows_pointer(tmp_path):
+    """Test that the last_checkpoint pointer wins when its file exists."""
+    for name in ("epoch_1.pth", "epoch_2.pth"):
+        (tmp_path / name).touch()
+    (tmp_path / "last_checkpoint").write_text(str(tmp_path / "epoch_1.pth"))
+
+    assert find_resume_checkpoint(tmp_path) == tmp_path / "epoch_1.pth"
+
+
+def test_find_resume_checkpoint_skips_missing_file(tmp_path):
+    """Test that a pointer ahead of its file falls back to the newest checkpoint."""
+    names = ("epoch_9.pth", "epoch_10.pth", "best_coco_bbox_mAP_epoch_10.pth")
+    for i, name in enumerate(names):
+        (tmp_path / name).touch()
+        os.utime(tmp_path / name, (i, i))
+    (tmp_path / "epoch_11.pth.tmp").touch()
+    (tmp_path / "last_checkpoint").write_text("runs/train/epoch_11.pth")
+
+    assert find_resume_checkpoint(tmp_path) == tmp_path / "epoch_10.pth"
+    assert find_resume_checkpoint(tmp_path / "missing") is None
+
+
+def test_snapshot_checkpoint_is_independent():
+    """Test that a snapshot does not change when training updates the state."""
+    weight = torch.zeros(4)
+    checkpoint = {"state_dict": {"w": weight}, "meta": {"history": [1]}}
+
+    snapshot = snapshot_checkpoint(checkpoint)
+    weight.add_(1)
+    checkpoint["meta"]["history"].append(2)
+
+    assert torch.equal(snapshot["state_dict"]["w"], torch.zeros(4))
+    assert snapshot["meta"]["history"] == [1]
@@ -1,6 +1,7 @@
 import pytest
 from typer.testing import CliRunner
 from ez_mmdetection.cli import app
+from ez_mmdetection.schemas.model import MODEL_URLS
 from unittest.mock import MagicMock, patch
 
 runner = CliRunner()
@@ -24,6 +25,48 @@ def test_train_command_requires_dataset_config():
     assert result.exit_code != 0
     assert "Missing argument 'DATASET_CONFIG_PATH'" in result.output
 
+def test_train_command_passes_ddp_options(tmp_path):
+    """Test that the launcher options reach RTMDet.train."""
+    dataset = tmp_path / "dataset.toml"
+    dataset.touch()
+
+    with patch("ez_mmdetection.cli.RTMDet") as mock_detector_cls:
+        result = runner.invoke(app, [
+            "train", "rtmdet_tiny", str(dataset), "--device", "cpu",
+            "--launcher", "ddp", "--nproc-per-node", "4", "--nnodes", "2",
+            "--node-rank", "1", "--master-addr", "10.0.0.1",
+        ])
+
+        assert result.exit_code == 0
+        _, kwargs = mock_detector_cls.return_value.train.call_args
+        assert kwargs["launcher"] == "ddp"
+        assert kwargs["nproc_per_node"] == 4
+        assert kwargs["nnodes"] == 2
+        assert kwargs["node_rank"] == 1
+        assert kwargs["master_addr"] == "10.0.0.1"
+        assert kwargs["scale_lr"] is True
+
+def test_train_command_accepts_auto_batch_size(tmp_path):
+    """Test that --batch-size accepts 'auto' or an integer only."""
+    dataset = tmp_path / "dataset.toml"
+    dataset.touch()
+
+    with patch("ez_mmdetection.cli.RTMDet") as mock_detector_cls:
+        result = runner.invoke(app, [
+            "train", "rtmdet_tiny", str(dataset), "--batch-size", "auto",
+            "--memory-budget-mb", "4096", "--effective-batch-size", "32",
+        ])
+        assert result.exit_code == 0
+        _, kwargs = mock_detector_cls.return_value.train.call_args
+        assert kwargs["batch_size"] == "auto"
+        assert kwargs["memory_budget_mb"] == 4096
+        assert kwargs["effective_batch_size"] == 32
+
+        result = runner.invoke(
+            app, ["train", "rtmdet_tiny", str(dataset), "--batch-size", "big"]
+        )
+        assert result.exit_code != 0
+
 def test_predict_command_calls_detector_predict(tmp_path):
     """Test that the predict command initializes RTMDet and calls its predict method."""
     checkpoint = tmp_path / "best.pth"
@@ -44,3 +87,138 @@ def test_predict_command_calls_detector_predict(tmp_path):
         assert kwargs["checkpoint_path"] == checkpoint
         assert kwargs["image_path"] == image
         assert kwargs["out_dir"] == "output"
+
+def test_pull_command_all_models(tmp_path):
+    """Test that pull --all requests every known checkpoint."""
+    with patch("ez_mmdetection.cli.pull_checkpoints") as mock_pull:
+        result = runner.invoke(
+            app, ["pull", "--all", "--checkpoint-dir", str(tmp_path)]
+        )
+
+        assert result.exit_code == 0
+        names = mock_pull.call_args[0][0]
+        assert set(names) == set(MODEL_URLS)
+
+def test_pull_command_fails_on_error():
+    """Test that pull exits non-zero when any download fails."""
+    with patch("ez_mmdetection.cli.pull_checkpoints") as mock_pull:
+        mock_pull.side_effect = RuntimeError("Failed to pull 1 of 1 checkpoint(s)")
+        result = runner.invoke(app, ["pull", "rtmdet_tiny"])
+
+        assert result.exit_code == 1
+        mock_pull.assert_called_once()
+        assert mock_pull.call_args[0][0] == ["rtmdet_tiny"]
+
+def test_pull_command_requires_models():
+    """Test that pull fails without model names or --all."""
+    result = runner.invoke(app, ["pull"])
+    assert result.exit_code != 0
+
+def test_slim_command_calls_slim_checkpoint(tmp_path):
+    """Test that slim forwards the checkpoint, output path and fp16 flag."""
+    checkpoint = tmp_path / "epoch_10.pth"
+    checkpoint.touch()
+
+    with patch("ez_mmdetection.cli.slim_checkpoint") as mock_slim:
+        result = runner.invoke(app, ["slim", str(checkpoint), "--fp16"])
+
+        assert result.exit_code == 0
+        mock_slim.assert_called_once_with(checkpoint, out_path=None, fp16=True)
+
+
+def test_cache_dataset_command(tmp_path):
+    """Test that cache-dataset builds caches for the requested splits."""
+    toml = tmp_path / "dataset.toml"
+    toml.write_text(
+        f'data_root = "{tmp_path}"\n'
+        '[train]\nann_file = "train.json"\nimg_dir = "images"\n'
+        '[val]\nann_file = "val.json"\nimg_dir = "images"\n'
+    )
+
+    with patch("ez_mmdetection.cli.cache_dataset") as mock_cache:
+        result = runner.invoke(
+            app, ["cache-dataset", str(toml), "--max-side", "960", "--split", "train"]
+        )
+
+    assert result.exit_code == 0, result.output
+    _, kwargs = mock_cache.call_args
+    assert kwargs["max_side"] == 960
+    assert kwargs["splits"] == ["train"]
+
+
+def test_bench_data_command_writes_json(tmp_path):
+    """Test that bench-data profiles via the detector and saves the report."""
+    report = {
+        "num_samples": 2,
+        "transforms": ["LoadImageFromFile"],
+        "runs": [{
+            "num_workers": 0,
+            "samples_per_s": 10.0,
+            "dropped": 0,
+            "transforms": [
+                {
+                    "name": "LoadImageFromFile",
+                    "calls": 2,
+                    "mean_ms": 1.0,
+                    "p95_ms": 2.0,
+                    "out_kb": 3.0,
+                }
+            ],
+        }],
+    }
+    out = tmp_path / "bench.json"
+
+    with patch("ez_mmdetection.cli.RTMDet") as mock_detector_cls:
+        mock_detector_cls.return_value.bench_data.return_value = report
+        result = runner.invoke(app, [
+            "bench-data", "rtmdet_tiny", "dataset.toml",
+            "--num-samples", "2", "--workers", "0", "--json-out", str(out),
+        ])
+
+    assert result.exit_code == 0, result.output
+    _, kwargs = mock_detector_cls.return_value.bench_data.call_args
+    assert kwargs["num_samples"] == 2 and kwargs["worker_counts"] == [0]
+    assert "LoadImageFromFile" in result.output
+    assert out.exists()
+
+
+def test_check_data_command_fails_on_issues(tmp_path):
+    """Test that check-data prints the report and exits non-zero on issues."""
+    toml = tmp_path / "dataset.toml"
+    toml.write_text(
+        f'data_root = "{tmp_path}"\n'
+        '[train]\nann_file = "train.json"\nimg_dir = "images"\n'
+        '[val]\nann_file = "val.json"\nimg_dir = "images"\n'
+    )
+    report = {
+        "ann_file": "train.json", "num_images": 1, "num_annotations": 0,
+        "missing_images": ["a.jpg"], "unreadable_images": [], "size_mismatches": [],
+        "invalid_boxes": [], "orphan_annotations": [], "unknown_categories": [],
+        "num_issues": 1,
+    }
+
+    with patch(
+        "ez_mmdetection.cli.check_dataset", return_value={"train": report}
+    ) as mock_check:
+        result = runner.invoke(app, ["check-data", str(toml), "--split", "train"])
+
+    assert result.exit_code == 1
+    assert "a.jpg" in result.output
+    assert mock_check.call_args.kwargs["splits"] == ["train"]
+
+
+def test_convert_yolo_command(tmp_path):
+    """Test that convert-yolo reads an explicit classes file."""
+    classes = tmp_path / "classes.txt"
+    classes.write_text("cat\ndog\n")
+
+    with patch("ez_mmdetection.cli.convert_yolo_dataset") as mock_convert:
+        result = runner.invoke(app, [
+            "convert-yolo", str(tmp_path), "--classes-file", str(classes),
+            "--split", "train", "--split", "val",
+        ])
+
+    assert result.exit_code == 0, result.output
+    _, kwargs = mock_convert.call_args
+    assert kwargs["classes"] == ["cat", "dog"]
+    assert kwargs["splits"] == ["train", "val"]
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+import torch
+from torch import nn
+
+from ez_mmdetection.utils.compile import (
+    INDUCTOR_CACHE_ENV_VAR,
+    benchmark_compile,
+    compile_cache_dir,
+    compile_detector,
+)
+
+
+class ToyDetector(nn.Module):
+    """Backbone, neck and head like an RTMDet, with data-dependent decoding."""
+
+    def __init__(self):
+        """Builds the backbone, neck and head."""
+        super().__init__()
+        self.backbone = nn.Sequential(nn.Conv2d(3, 8, 3, stride=2), nn.ReLU())
+        self.neck = nn.Conv2d(8, 8, 1)
+        self.bbox_head = nn.Conv2d(8, 4, 1)
+
+    def _forward(self, inputs):
+        """Returns the head's fixed-shape scores."""
+        return self.bbox_head(self.neck(self.backbone(inputs)))
+
+    def predict(self, inputs):
+        """Returns the positive scores, a data-dependent shape."""
+        scores = self._forward(inputs)
+        return scores[scores > 0]  # output size depends on the values
+
+
+def test_compile_detector_compiles_parts_and_keeps_state_dict():
+    """Test that the parts are compiled in place with unchanged outputs and keys."""
+    torch.manual_seed(0)
+    model = ToyDetector().eval()
+    inputs = torch.rand(2, 3, 16, 16)
+    keys = list(model.state_dict())
+    with torch.no_grad():
+        expected = model.predict(inputs)
+
+    compiled = compile_detector(model, backend="eager")
+    assert compiled == ["backbone", "neck", "bbox_head"]
+    with torch.no_grad():
+        torch.testing.assert_close(model.predict(inputs), expected)
+    assert list(model.state_dict()) == keys
+    assert "forward" in vars(model.backbone) and "predict" not in vars(model)
+
+
+def test_compile_detector_falls_back_to_eager_on_backend_errors():
+    """Test that backend errors fall back to eager only in compiled forwards."""
+    def failing_backend(gm, example_inputs):
+        raise NotImplementedError("unsupported op")
+
+    import torch._dynamo as dynamo
+
+    model = ToyDetector().eval()
+    inputs = torch.rand(1, 3, 16, 16)
+    with torch.no_grad():
+        expected = model._forward(inputs)
+        compile_detector(model, backend=failing_backend)
+        torch.testing.assert_close(model._forward(inputs), expected)
+    # Only the compiled forwards suppress errors, not the rest of the process
+    assert dynamo.config.suppress_errors is False
+
+
+def test_compile_detector_rejects_unknown_modes():
+    """Test that unknown compile modes are rejected."""
+    with pytest.raises(ValueError, match="mode"):
+        compile_detector(ToyDetector(), mode="fast")
+
+
+def test_compile_cache_dir_prefers_an_explicit_cache(tmp_path, monkeypatch):
+    """Test that an explicit cache wins over the environment, then the default."""
+    # Set first, so monkeypatch restores the variable even if it was unset
+    monkeypatch.setenv(INDUCTOR_CACHE_ENV_VAR, "x")
+    monkeypatch.delenv(INDUCTOR_CACHE_ENV_VAR)
+    assert compile_cache_dir(tmp_path / "a") == tmp_path / "a"
+
+    monkeypatch.setenv(INDUCTOR_CACHE_ENV_VAR, str(tmp_path / "env"))
+    assert compile_cache_dir(tmp_path / "a") == tmp_path / "env"
+    assert compile_cache_dir(tmp_path / "a", tmp_path / "b") == tmp_path / "b"
+
+
+def test_compiled_forwards_use_their_cache_only_while_called(tmp_path, monkeypatch):
+    """Test that each compiled model sees its own cache, restored after calls."""
+    monkeypatch.setenv(INDUCTOR_CACHE_ENV_VAR, "x")
+    monkeypatch.delenv(INDUCTOR_CACHE_ENV_VAR)
+    # Earlier tests compiled the same forwards with other backends
+    torch._dynamo.reset()
+    seen = []
+
+    def recording_backend(gm, example_inputs):
+        def run(*args):
+            seen.append(os.environ.get(INDUCTOR_CACHE_ENV_VAR))
+            return gm.forward(*args)
+
+        return run
+
+    inputs = torch.rand(1, 3, 16, 16)
+    for name in ("first", "second"):
+        model = ToyDetector()
+        compile_detector(model, backend=recording_backend, cache_dir=tmp_path / name)
+        model._forward(inputs)
+        assert INDUCTOR_CACHE_ENV_VAR not in os.environ
+
+    assert set(seen) == {str(tmp_path / "first"), str(tmp_path / "second")}
+    assert (tmp_path / "first").is_dir()
+
+
+def test_benchmark_compile_times_both_variants(monkeypatch):
+    """Test that the benchmark times eager and compiled forwards."""
+    monkeypatch.setattr(
+        "ez_mmdetection.utils.compile.compile_detector",
+        lambda model, mode, cache_dir: compile_detector(
+            model, mode, backend="eager", cache_dir=cache_dir
+        ),
+    )
+    inputs = torch.rand(1, 3, 16, 16)
+    result = benchmark_compile(ToyDetector(), inputs, iters=3, warmup=1)
+
+    assert result["input_shape"] == [1, 3, 16, 16]
+    assert result["eager_ms"] > 0 and result["compiled_ms"] > 0
+    speedup = result["eager_ms"] / result["compiled_ms"]
+    assert result["speedup"] == pytest.approx(speedup)
@@ -0,0 +1,108 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+from pycocotools.coco import COCO
+
+from ez_mmdetection.schemas.dataset import DatasetConfig
+from ez_mmdetection.utils.converters import (
+    convert_yolo_dataset,
+    convert_yolo_split,
+    parse_yolo_line,
+    read_yolo_classes,
+)
+
+
+@pytest.fixture
+def yolo_root(tmp_path):
+    """Creates a YOLO dataset with train/val splits and a data.yaml."""
+    for split in ("train", "val"):
+        (tmp_path / "images" / split / "sub").mkdir(parents=True)
+        (tmp_path / "labels" / split / "sub").mkdir(parents=True)
+    img = np.zeros((100, 200, 3), np.uint8)
+    cv2.imwrite(str(tmp_path / "images/train/a.jpg"), img)
+    cv2.imwrite(str(tmp_path / "images/train/sub/b.png"), img[:50])
+    cv2.imwrite(str(tmp_path / "images/train/no_labels.jpg"), img)
+    (tmp_path / "images/train/broken.jpg").write_bytes(b"garbage")
+    cv2.imwrite(str(tmp_path / "images/val/c.jpg"), img)
+
+    (tmp_path / "labels/train/a.txt").write_text(
+        "0 0.5 0.5 0.5 0.2\n1 0.1 0.1 0.4 0.4\n\n7 0.5 0.5 0.1 0.1\nbad line\n"
+    )
+    (tmp_path / "labels/train/sub/b.txt").write_text("1 0.0 0.0 1.0 0.0 1.0 1.0\n")
+    (tmp_path / "labels/val/c.txt").write_text("0 0.5 0.5 1 1\n")
+    (tmp_path / "data.yaml").write_text("names:\n  0: cat\n  1: dog\n")
+    return tmp_path
+
+
+def test_parse_yolo_line():
+    """Test that boxes and polygons are scaled to pixels and clipped."""
+    box = [50.0, 40.0, 100.0, 20.0]
+    assert parse_yolo_line("0 0.5 0.5 0.5 0.2", 200, 100, 1) == (0, box, 2000.0, None)
+    # Clipped at the top-left corner
+    _, box, _, _ = parse_yolo_line("0 0.1 0.1 0.4 0.4", 200, 100, 1)
+    assert box == [0.0, 0.0, 60.0, 30.0]
+
+    label, bbox, area, polygon = parse_yolo_line("0 0 0 1 0 1 1", 200, 100, 1)
+    assert (bbox, area) == ([0.0, 0.0, 200.0, 100.0], 10000.0)
+    assert polygon == [0.0, 0.0, 200.0, 0.0, 200.0, 100.0]
+
+    for line in ("1 0.5 0.5 0.1 0.1", "0 0.5 0.5 0.1", "0 a b c d", "0 0.5 0.5 0 0.1"):
+        assert parse_yolo_line(line, 200, 100, 1) is None
+
+
+def test_read_yolo_classes(yolo_root, tmp_path):
+    """Test that class names are read from data.yaml (list or dict) and txt."""
+    assert read_yolo_classes(yolo_root / "data.yaml") == ["cat", "dog"]
+    (tmp_path / "list.yaml").write_text("names: [a, b]\n")
+    assert read_yolo_classes(tmp_path / "list.yaml") == ["a", "b"]
+    (tmp_path / "classes.txt").write_text("a\n\nb\n")
+    assert read_yolo_classes(tmp_path / "classes.txt") == ["a", "b"]
+
+
+def test_convert_yolo_split_writes_valid_coco(yolo_root, tmp_path):
+    """Test that the streamed output is a valid COCO file."""
+    out = tmp_path / "out" / "train.json"
+    stats = convert_yolo_split(
+        yolo_root / "images/train",
+        yolo_root / "labels/train",
+        out,
+        ["cat", "dog"],
+        num_workers=2,
+    )
+
+    assert stats == {"images": 3, "annotations": 3, "skipped_images": 1, "bad_lines": 2}
+    coco = COCO(str(out))
+    images = {img["file_name"]: img for img in coco.dataset["images"]}
+    assert set(images) == {"a.jpg", "sub/b.png", "no_labels.jpg"}
+    assert (images["sub/b.png"]["width"], images["sub/b.png"]["height"]) == (200, 50)
+
+    anns = coco.loadAnns(coco.getAnnIds(imgIds=[images["a.jpg"]["id"]]))
+    assert [a["category_id"] for a in anns] == [1, 2]
+    assert anns[0]["bbox"] == [50.0, 40.0, 100.0, 20.0]
+    polygon = coco.loadAnns(coco.getAnnIds(imgIds=[images["sub/b.png"]["id"]]))[0]
+    assert polygon["segmentation"] == [[0.0, 0.0, 200.0, 0.0, 200.0, 50.0]]
+    assert coco.dataset["categories"] == [
+        {"id": 1, "name": "cat"},
+        {"id": 2, "name": "dog"},
+    ]
+
+
+def test_convert_yolo_dataset_writes_dataset_toml(yolo_root):
+    """Test that the written dataset.toml points at the converted splits."""
+    cfg = convert_yolo_dataset(yolo_root, num_workers=1)
+
+    loaded = DatasetConfig.from_toml(yolo_root / "dataset.toml")
+    assert loaded == cfg
+    assert loaded.classes == ["cat", "dog"]
+    assert loaded.test is None
+    assert loaded.val.img_dir == "images/val"
+    val = json.loads((loaded.data_root / loaded.val.ann_file).read_text())
+    assert [img["file_name"] for img in val["images"]] == ["c.jpg"]
+
+
+def test_convert_yolo_dataset_requires_train_and_val(yolo_root):
+    """Test that a missing required split is an error."""
+    with pytest.raises(FileNotFoundError, match="val"):
+        convert_yolo_dataset(yolo_root, splits=["train"], num_workers=1)
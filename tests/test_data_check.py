@@ -0,0 +1,140 @@
+import json
+import os
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from ez_mmdetection.schemas.dataset import DatasetConfig, SplitConfig
+from ez_mmdetection.utils.ann_cache import AnnotationTable, ensure_annotation_cache
+from ez_mmdetection.utils.data_check import (
+    check_dataset,
+    check_split,
+    find_size_index,
+    load_size_index,
+    size_index_path,
+)
+from ez_mmdetection.utils.image_io import read_image_size
+
+
+def _exif_rotated_jpeg(path, height, width):
+    """Writes a JPEG whose EXIF orientation (6) rotates it by 90 degrees."""
+    _, buf = cv2.imencode(".jpg", np.zeros((height, width, 3), np.uint8))
+    tiff = (
+        b"II*\x00" + struct.pack("<IH", 8, 1)
+        + struct.pack("<HHIH2x", 0x0112, 3, 1, 6) + bytes(4)
+    )
+    segment = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(segment) + 2) + segment
+    data = buf.tobytes()
+    path.write_bytes(data[:2] + app1 + data[2:])
+
+
+def _ann(ann_id, image_id, category_id, bbox):
+    """Returns a COCO annotation whose area is that of its box."""
+    area = bbox[2] * bbox[3]
+    return dict(
+        id=ann_id, image_id=image_id, category_id=category_id, bbox=bbox, area=area
+    )
+
+
+@pytest.fixture
+def dataset_root(tmp_path):
+    """Creates a split with a missing, a corrupt and a mis-sized image."""
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    cv2.imwrite(str(img_dir / "good.png"), np.zeros((50, 80, 3), np.uint8))
+    cv2.imwrite(str(img_dir / "wrong_size.png"), np.zeros((60, 60, 3), np.uint8))
+    (img_dir / "corrupt.jpg").write_bytes(b"not an image")
+    _exif_rotated_jpeg(img_dir / "rotated.jpg", height=40, width=100)
+
+    images = [
+        {"id": 1, "file_name": "good.png", "width": 80, "height": 50},
+        {"id": 2, "file_name": "wrong_size.png", "width": 100, "height": 100},
+        {"id": 3, "file_name": "corrupt.jpg", "width": 10, "height": 10},
+        {"id": 4, "file_name": "missing.png", "width": 10, "height": 10},
+        {"id": 5, "file_name": "rotated.jpg", "width": 40, "height": 100},
+    ]
+    annotations = [
+        _ann(1, 1, 1, [0, 0, 80, 50]),
+        _ann(2, 1, 1, [70, 0, 20, 10]),
+        _ann(3, 1, 1, [5, 5, 0, 10]),
+        _ann(4, 9, 1, [0, 0, 5, 5]),
+        _ann(5, 2, 7, [0, 0, 5, 5]),
+        _ann(6, 2, 1, [0, 0, 80, 80]),
+    ]
+    coco = {
+        "images": images,
+        "annotations": annotations,
+        "categories": [{"id": 1, "name": "cat"}],
+    }
+    (tmp_path / "train.json").write_text(json.dumps(coco))
+    return tmp_path
+
+
+def test_read_image_size_applies_exif_orientation(tmp_path):
+    """Test that EXIF-rotated JPEGs report the size OpenCV decodes to."""
+    path = tmp_path / "rotated.jpg"
+    _exif_rotated_jpeg(path, height=40, width=100)
+
+    assert read_image_size(path) == (100, 40)
+    assert read_image_size(path, apply_exif=True) == (40, 100)
+    assert cv2.imread(str(path)).shape[:2] == (100, 40)
+
+
+def test_check_split_reports_issues(dataset_root):
+    """Test that image and annotation problems are all reported."""
+    split = SplitConfig(ann_file="train.json", img_dir="images")
+    report, sizes = check_split(split, dataset_root, num_threads=2)
+
+    assert report["missing_images"] == ["missing.png"]
+    assert report["unreadable_images"] == ["corrupt.jpg"]
+    assert report["size_mismatches"] == [
+        {"file_name": "wrong_size.png", "json": [100, 100], "actual": [60, 60]}
+    ]
+    invalid = {i["ann_id"]: i["reason"] for i in report["invalid_boxes"]}
+    # Box 6 fits the JSON size but not the actual image
+    assert invalid == {2: "out of bounds", 3: "empty", 6: "out of bounds"}
+    assert report["orphan_annotations"] == [{"ann_id": 4}]
+    assert report["unknown_categories"] == [{"ann_id": 5, "category_id": 7}]
+    assert report["num_issues"] == 8
+    assert sizes == {
+        "good.png": (80, 50),
+        "wrong_size.png": (60, 60),
+        "rotated.jpg": (40, 100),
+    }
+
+
+def test_check_dataset_writes_current_index(dataset_root):
+    """Test that the size index is written and ignored once annotations change."""
+    cfg = DatasetConfig(
+        data_root=dataset_root,
+        train=SplitConfig(ann_file="train.json", img_dir="images"),
+        val=SplitConfig(ann_file="train.json", img_dir="images"),
+    )
+    reports = check_dataset(cfg, splits=["train"], num_threads=2)
+
+    assert list(reports) == ["train"]
+    index = find_size_index(dataset_root, "train", "train.json")
+    assert index == size_index_path(dataset_root, "train")
+    assert load_size_index(index)["wrong_size.png"] == (60, 60)
+
+    ann_path = dataset_root / "train.json"
+    stat = ann_path.stat()
+    os.utime(ann_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert find_size_index(dataset_root, "train", "train.json") is None
+
+
+def test_annotation_table_uses_indexed_sizes(dataset_root, tmp_path):
+    """Test that sizes from the index replace the annotation file's."""
+    cache_dir = ensure_annotation_cache(
+        dataset_root / "train.json", None, tmp_path / "cache"
+    )
+    sizes = np.array([[80, 50], [60, 60], [10, 10], [10, 10], [40, 100]])
+    table = AnnotationTable(cache_dir, sizes=sizes)
+
+    assert (table[1]["width"], table[1]["height"]) == (60, 60)
+    keep = table.valid_mask(filter_empty_gt=False, min_size=40)
+    np.testing.assert_array_equal(keep, [True, True, False, False, True])
+    assert table.subset([1])[0]["width"] == 60
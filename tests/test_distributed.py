@@ -0,0 +1,88 @@
+import json
+import multiprocessing as mp
+import os
+
+import pytest
+import torch
+import torch.distributed as dist
+
+from ez_mmdetection.utils.distributed import (
+    dist_backend,
+    find_free_port,
+    launch_workers,
+    replace_sync_bn,
+)
+
+
+def _all_reduce_rank(out_dir: str) -> None:
+    """Sums the ranks over the process group and records what each rank saw."""
+    total = torch.tensor([float(dist.get_rank())])
+    dist.all_reduce(total)
+    record = {
+        "rank": dist.get_rank(),
+        "world_size": dist.get_world_size(),
+        "local_rank": int(os.environ["LOCAL_RANK"]),
+        "backend": dist.get_backend(),
+        "total": total.item(),
+    }
+    with open(os.path.join(out_dir, f"rank{record['rank']}.json"), "w") as f:
+        json.dump(record, f)
+
+
+def _launch_node(node_rank: int, port: int, out_dir: str) -> None:
+    launch_workers(
+        _all_reduce_rank,
+        args=(out_dir,),
+        nproc_per_node=2,
+        nnodes=2,
+        node_rank=node_rank,
+        master_port=port,
+    )
+
+
+def test_dist_backend():
+    """Tests that CPU training uses gloo and CUDA training NCCL."""
+    assert dist_backend("cpu") == "gloo"
+    assert dist_backend("cuda:1") == "nccl"
+
+
+def test_replace_sync_bn_recurses():
+    """Tests that nested SyncBN configs become BN and others are kept."""
+    cfg = {
+        "backbone": {"norm_cfg": {"type": "SyncBN", "requires_grad": True}},
+        "neck": [{"norm_cfg": {"type": "SyncBN"}}, {"norm_cfg": {"type": "GN"}}],
+    }
+
+    assert replace_sync_bn(cfg) == 2
+    assert cfg["backbone"]["norm_cfg"] == {"type": "BN", "requires_grad": True}
+    assert cfg["neck"][1]["norm_cfg"]["type"] == "GN"
+
+
+def test_launch_workers_rejects_bad_node_rank():
+    """Tests that a node rank outside the node count is rejected."""
+    with pytest.raises(ValueError, match="node_rank"):
+        launch_workers(_all_reduce_rank, nnodes=2, node_rank=2)
+
+
+def test_two_nodes_on_localhost_all_reduce(tmp_path):
+    """Tests a 2-node x 2-process gloo group simulated on this machine."""
+    port = find_free_port()
+    ctx = mp.get_context("spawn")
+    nodes = [
+        ctx.Process(target=_launch_node, args=(rank, port, str(tmp_path)))
+        for rank in range(2)
+    ]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join(timeout=120)
+        assert node.exitcode == 0
+
+    records = sorted(
+        (json.loads(p.read_text()) for p in tmp_path.glob("rank*.json")),
+        key=lambda r: r["rank"],
+    )
+    assert [r["rank"] for r in records] == [0, 1, 2, 3]
+    assert [r["local_rank"] for r in records] == [0, 1, 0, 1]
+    assert all(r["world_size"] == 4 and r["backend"] == "gloo" for r in records)
+    assert all(r["total"] == 6.0 for r in records)
@@ -0,0 +1,254 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ez_mmdetection.schemas.model import MODEL_URLS
+from ez_mmdetection.utils.download import (
+    download_checkpoint,
+    ensure_model_checkpoint,
+    expected_hash_prefix,
+    fetch_to_cache,
+    pull_checkpoints,
+    verify_checkpoint,
+)
+
+
+class _CheckpointHandler(BaseHTTPRequestHandler):
+    """Serves `server.payload` with optional Range support and faults."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self.server.range_headers.append(self.headers.get("Range"))
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        payload = self.server.payload
+        start, end = 0, len(payload) - 1
+        range_header = self.headers.get("Range")
+        if self.server.accept_ranges and range_header:
+            first, _, last = range_header.split("=", 1)[1].partition("-")
+            start = int(first)
+            end = int(last) if last else end
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(payload)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(payload)}")
+        else:
+            self.send_response(200)
+        body = payload[start : end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if not send_body:
+            return
+
+        if self.server.truncate_next:
+            # Simulate a dropped connection halfway through the transfer
+            self.wfile.write(body[: self.server.truncate_next])
+            self.server.truncate_next = 0
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def checkpoint_server():
+    """Runs a local HTTP server that hosts a random 'checkpoint' payload."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CheckpointHandler)
+    server.payload = os.urandom(64 * 1024)
+    server.accept_ranges = True
+    server.truncate_next = 0
+    server.range_headers = []
+    digest = hashlib.sha256(server.payload).hexdigest()[:8]
+    server.url = (
+        f"http://127.0.0.1:{server.server_address[1]}/rtmdet_test_20260101-{digest}.pth"
+    )
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_expected_hash_prefix():
+    """Test that the sha256 prefix is parsed from OpenMMLab URLs."""
+    assert expected_hash_prefix(MODEL_URLS["rtmdet_tiny"]) == "78e30dcc"
+    assert expected_hash_prefix("https://example.com/weights.pth") is None
+
+
+def test_download_writes_verified_file(checkpoint_server, tmp_path):
+    """Test a plain download ends up at the destination with no temp file."""
+    dest = tmp_path / "checkpoints" / "rtmdet_tiny.pth"
+    download_checkpoint(checkpoint_server.url, dest, chunk_size=1024)
+
+    assert dest.read_bytes() == checkpoint_server.payload
+    assert not dest.with_name(dest.name + ".part").exists()
+    assert verify_checkpoint(dest, checkpoint_server.url)
+
+
+def test_download_resumes_partial_file(checkpoint_server, tmp_path):
+    """Test that an existing .part file is resumed with a Range request."""
+    dest = tmp_path / "rtmdet_tiny.pth"
+    half = len(checkpoint_server.payload) // 2
+    dest.with_name(dest.name + ".part").write_bytes(checkpoint_server.payload[:half])
+
+    download_checkpoint(checkpoint_server.url, dest, chunk_size=1024)
+
+    assert dest.read_bytes() == checkpoint_server.payload
+    assert checkpoint_server.range_headers == [
+        f"bytes={half}-{len(checkpoint_server.payload) - 1}"
+    ]
+
+
+def test_download_of_unknown_size_finishes_complete_part(
+    checkpoint_server, tmp_path, monkeypatch
+):
+    """Test that a complete .part of unknown size is verified, not refetched."""
+    monkeypatch.setattr(
+        "ez_mmdetection.utils.download._probe", lambda url, timeout: (0, False)
+    )
+    dest = tmp_path / "rtmdet_tiny.pth"
+    dest.with_name(dest.name + ".part").write_bytes(checkpoint_server.payload)
+
+    download_checkpoint(checkpoint_server.url, dest, chunk_size=1024)
+
+    assert dest.read_bytes() == checkpoint_server.payload
+    size = len(checkpoint_server.payload)
+    assert checkpoint_server.range_headers == [f"bytes={size}-"]
+
+
+def test_download_retries_after_interruption(checkpoint_server, tmp_path):
+    """Test that a dropped connection is retried from where it stopped."""
+    checkpoint_server.truncate_next = 10 * 1024
+    dest = tmp_path / "rtmdet_tiny.pth"
+
+    download_checkpoint(
+        checkpoint_server.url, dest, chunk_size=1024, retry_backoff=0.0
+    )
+
+    assert dest.read_bytes() == checkpoint_server.payload
+    assert len(checkpoint_server.range_headers) == 2
+    assert checkpoint_server.range_headers[1].startswith("bytes=10240-")
+
+
+def test_download_parallel_segments(checkpoint_server, tmp_path):
+    """Test that ranged segments are fetched in parallel and reassembled."""
+    dest = tmp_path / "rtmdet_tiny.pth"
+    download_checkpoint(checkpoint_server.url, dest, num_segments=4, chunk_size=1024)
+
+    assert dest.read_bytes() == checkpoint_server.payload
+    assert len(checkpoint_server.range_headers) == 4
+    assert list(tmp_path.iterdir()) == [dest]
+
+
+def test_download_without_range_support(checkpoint_server, tmp_path):
+    """Test fallback to a single stream when ranges are not advertised."""
+    checkpoint_server.accept_ranges = False
+    dest = tmp_path / "rtmdet_tiny.pth"
+    download_checkpoint(checkpoint_server.url, dest, num_segments=4, chunk_size=1024)
+
+    assert dest.read_bytes() == checkpoint_server.payload
+    assert len(checkpoint_server.range_headers) == 1
+
+
+def test_download_hash_mismatch_removes_file(checkpoint_server, tmp_path):
+    """Test that a corrupt download is rejected and never renamed into place."""
+    url = checkpoint_server.url.rsplit("-", 1)[0] + "-00000000.pth"
+    dest = tmp_path / "rtmdet_tiny.pth"
+
+    with pytest.raises(RuntimeError, match="Hash verification failed"):
+        download_checkpoint(url, dest, chunk_size=1024)
+
+    assert not dest.exists()
+    assert not dest.with_name(dest.name + ".part").exists()
+
+
+def test_fetch_to_cache_is_content_addressed(checkpoint_server, tmp_path, monkeypatch):
+    """Test that cached blobs are keyed by sha256 and reused without a refetch."""
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(tmp_path / "cache"))
+
+    blob = fetch_to_cache(checkpoint_server.url, chunk_size=1024)
+    assert blob.name == hashlib.sha256(checkpoint_server.payload).hexdigest()
+    assert blob.read_bytes() == checkpoint_server.payload
+
+    assert fetch_to_cache(checkpoint_server.url) == blob
+    assert len(checkpoint_server.range_headers) == 1
+
+
+def test_concurrent_ensure_downloads_once(tmp_path, monkeypatch):
+    """Test that concurrent callers share one download through the file lock."""
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(tmp_path / "cache"))
+    calls = []
+
+    def fake_download(url, dest):
+        calls.append(url)
+        time.sleep(0.2)
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        Path(dest).write_bytes(b"weights")
+
+    run_dirs = [tmp_path / f"run_{i}" for i in range(8)]
+    with patch("ez_mmdetection.utils.download.download_checkpoint", fake_download):
+        with ThreadPoolExecutor(max_workers=len(run_dirs)) as pool:
+            paths = list(
+                pool.map(
+                    lambda d: ensure_model_checkpoint(
+                        "rtmdet_tiny", d / "checkpoints" / "rtmdet_tiny.pth"
+                    ),
+                    run_dirs,
+                )
+            )
+
+    assert len(calls) == 1
+    for path in paths:
+        assert path.read_bytes() == b"weights"
+    # Every run links to the same cached blob instead of holding a copy
+    assert len({p.resolve().stat().st_ino for p in paths}) == 1
+
+
+def test_pull_checkpoints_skips_verified_and_reports_failures(tmp_path, monkeypatch):
+    """Test that pulling skips verified files and fails after finishing the rest."""
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(tmp_path / "cache"))
+    checkpoint_dir = tmp_path / "checkpoints"
+    checkpoint_dir.mkdir()
+    (checkpoint_dir / "rtmdet_tiny.pth").write_bytes(b"verified")
+    fetched = []
+
+    def fake_fetch(url, progress=None):
+        fetched.append(url)
+        if url == MODEL_URLS["rtmdet_m"]:
+            raise IOError("connection reset")
+        blob = tmp_path / "cache" / url.rsplit("/", 1)[-1]
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        blob.write_bytes(b"weights")
+        return blob
+
+    with patch("ez_mmdetection.utils.download.fetch_to_cache", fake_fetch), patch(
+        "ez_mmdetection.utils.download.verify_checkpoint", return_value=True
+    ):
+        with pytest.raises(RuntimeError, match="rtmdet_m"):
+            pull_checkpoints(
+                ["rtmdet_tiny", "rtmdet_s", "rtmdet_m"], checkpoint_dir=checkpoint_dir
+            )
+
+    assert sorted(fetched) == sorted([MODEL_URLS["rtmdet_s"], MODEL_URLS["rtmdet_m"]])
+    assert (checkpoint_dir / "rtmdet_tiny.pth").read_bytes() == b"verified"
+    assert (checkpoint_dir / "rtmdet_s.pth").read_bytes() == b"weights"
+    assert not (checkpoint_dir / "rtmdet_m.pth").exists()
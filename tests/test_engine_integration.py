@@ -73,3 +73,39 @@ def test_predict_result_conversion(mock_ensure, mock_inferencer_cls):
     assert result.predictions[0].label == 1
     assert result.predictions[0].score == 0.85
     assert result.predictions[0].bbox == [0, 0, 10, 10]
+
+
+@patch("ez_mmdetection.core.base.launch_workers")
+@patch("ez_mmdetection.core.base.tune_dataloader", return_value=(3, 4))
+@patch("ez_mmdetection.core.base.Runner")
+@patch("ez_mmdetection.core.base.ensure_model_checkpoint")
+def test_ddp_tunes_the_dataloader_once_before_spawning(
+    mock_ensure, mock_runner, mock_tune, mock_launch, dummy_dataset_config, tmp_path
+):
+    """Test that loader tuning runs once, before the ranks are spawned."""
+    mock_ensure.return_value = Path("dummy.pth")
+    work_dir = tmp_path / "runs" / "ddp"
+
+    def spawn(fn, args, nproc_per_node, **kwargs):
+        assert mock_tune.call_count == 1
+        for _ in range(nproc_per_node):
+            fn(*args)
+
+    mock_launch.side_effect = spawn
+    RTMDet(ModelName.RTM_DET_TINY).train(
+        dataset_config_path=dummy_dataset_config,
+        epochs=1,
+        device="cpu",
+        work_dir=str(work_dir),
+        auto_tune_loader=True,
+        launcher="ddp",
+        nproc_per_node=2,
+    )
+
+    mock_tune.assert_called_once()
+    assert mock_runner.from_cfg.call_count == 2
+    for call in mock_runner.from_cfg.call_args_list:
+        loader = call[0][0].train_dataloader
+        assert (loader.num_workers, loader.prefetch_factor) == (3, 4)
+    saved = (work_dir / "user_config.toml").read_text()
+    assert "num_workers = 3" in saved and "prefetch_factor = 4" in saved
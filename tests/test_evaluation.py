@@ -0,0 +1,235 @@
+import copy
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from mmdet.datasets.api_wrappers import COCOeval
+from mmdet.evaluation.metrics import CocoMetric
+from pycocotools import mask as mask_utils
+
+import ez_mmdetection.evaluation.coco_eval as coco_eval
+from ez_mmdetection.evaluation import InMemoryCocoMetric, VectorizedCOCOeval
+from ez_mmdetection.evaluation.coco_metric import coco_from_dict, xyxy_to_xywh
+
+COCO_MINI = Path(__file__).parent / "data" / "coco_mini" / "annotations" / "train.json"
+
+
+def _coco_mini_results(seed=0):
+    """Returns (classes, results) of jittered, missed and spurious detections."""
+    coco = json.loads(COCO_MINI.read_text())
+    classes = tuple(c["name"] for c in coco["categories"])
+    label_of = {c["id"]: i for i, c in enumerate(coco["categories"])}
+    rng = np.random.default_rng(seed)
+    results = []
+    for img in coco["images"]:
+        anns = [a for a in coco["annotations"] if a["image_id"] == img["id"]]
+        instances = []
+        for ann in anns:
+            x, y, w, h = ann["bbox"]
+            instances.append(
+                dict(
+                    bbox=[x, y, x + w, y + h],
+                    bbox_label=label_of[ann["category_id"]],
+                    ignore_flag=ann.get("iscrowd", 0),
+                )
+            )
+        gt = dict(
+            width=img["width"], height=img["height"], img_id=img["id"], anns=instances
+        )
+
+        boxes = np.array([inst["bbox"] for inst in instances]).reshape(-1, 4)
+        labels = np.array([inst["bbox_label"] for inst in instances], dtype=np.int64)
+        keep = rng.random(len(boxes)) > 0.2
+        boxes = boxes[keep] + rng.normal(0, 8, (keep.sum(), 4))
+        labels = labels[keep]
+        spurious = rng.uniform(0, 300, (10, 2))
+        boxes = np.concatenate([boxes, np.hstack([spurious, spurious + 50])])
+        labels = np.concatenate([labels, rng.integers(0, len(classes), 10)])
+        pred = dict(
+            img_id=img["id"],
+            bboxes=boxes.astype(np.float32),
+            scores=rng.random(len(boxes)).astype(np.float32),
+            labels=labels,
+        )
+        results.append((gt, pred))
+    return classes, results
+
+
+@pytest.mark.parametrize("classwise", [False, True])
+@pytest.mark.parametrize("eval_backend", ["pycocotools", "vectorized"])
+def test_in_memory_coco_metric_matches_coco_metric(classwise, eval_backend):
+    """Test that the in-memory metric gives exactly CocoMetric's results."""
+    classes, results = _coco_mini_results()
+    expected = CocoMetric(metric=["bbox", "proposal"], classwise=classwise)
+    expected.dataset_meta = dict(classes=classes)
+    expected = expected.compute_metrics(results)
+    metric = InMemoryCocoMetric(
+        metric=["bbox", "proposal"], classwise=classwise, eval_backend=eval_backend
+    )
+    metric.dataset_meta = dict(classes=classes)
+    metrics = metric.compute_metrics(results)
+
+    # Categories without ground truth have NaN AP in both
+    np.testing.assert_equal(dict(metrics), dict(expected))
+    assert list(metrics) == list(expected)
+    assert expected["bbox_mAP"] > 0
+
+
+def test_in_memory_coco_metric_writes_files_when_asked(tmp_path):
+    """Test that an outfile_prefix falls back to CocoMetric's JSON files."""
+    classes, results = _coco_mini_results()
+    metric = InMemoryCocoMetric(outfile_prefix=str(tmp_path / "results"))
+    metric.dataset_meta = dict(classes=classes)
+
+    metric.compute_metrics(results)
+
+    assert (tmp_path / "results.bbox.json").exists()
+
+
+def test_xyxy_to_xywh_matches_python_floats():
+    """Test that float32 boxes convert as CocoMetric's Python arithmetic does."""
+    boxes = np.random.default_rng(0).uniform(0, 640, (100, 4)).astype(np.float32)
+
+    expected = [
+        [x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in (b.tolist() for b in boxes)
+    ]
+    assert xyxy_to_xywh(boxes) == expected
+    assert xyxy_to_xywh(np.zeros((0, 4), dtype=np.float32)) == []
+
+
+def test_coco_from_dict_matches_file(tmp_path):
+    """Test that an index built from a dict equals one loaded from the file."""
+    from mmdet.datasets.api_wrappers import COCO
+
+    dataset = json.loads(COCO_MINI.read_text())
+    from_file = COCO(str(COCO_MINI))
+    from_dict = coco_from_dict(dataset)
+
+    assert from_dict.anns == from_file.anns
+    assert from_dict.imgToAnns == from_file.imgToAnns
+    assert from_dict.get_cat_ids() == from_file.get_cat_ids()
+
+
+def _synthetic_coco(num_imgs=120, num_cats=6, crowd=0.2, segm=False, seed=0):
+    """Returns (gt dict, detections) with crowds, duplicate boxes and tied scores."""
+    rng = np.random.default_rng(seed)
+    images = [dict(id=i + 1, width=640, height=480) for i in range(num_imgs)]
+    categories = [dict(id=3 * c + 1, name=str(c)) for c in range(num_cats)]
+    anns, dets = [], []
+
+    def detection(img_id, cat_id, box):
+        score = float(rng.integers(10)) / 10
+        det = dict(image_id=img_id, category_id=cat_id, score=score)
+        if segm:
+            x, y, w, h = box
+            polygon = [x, y, x + w, y, x + w, y + h * 0.9, x, y + h]
+            rle = mask_utils.frPyObjects([polygon], 480, 640)[0]
+            det["segmentation"] = dict(size=rle["size"], counts=rle["counts"].decode())
+        else:
+            det["bbox"] = box
+        return det
+
+    for img in images:
+        for _ in range(rng.integers(0, 12)):
+            x, y = rng.uniform(0, 500), rng.uniform(0, 380)
+            w, h = rng.uniform(2, 140), rng.uniform(2, 100)
+            cat_id = int(rng.choice([c["id"] for c in categories]))
+            for _ in range(1 + (rng.random() < 0.1)):  # some duplicated boxes
+                anns.append(dict(
+                    id=len(anns) + 1,
+                    image_id=img["id"],
+                    category_id=cat_id,
+                    bbox=[x, y, w, h],
+                    area=w * h * rng.uniform(0.5, 1),
+                    iscrowd=int(rng.random() < crowd),
+                    segmentation=[[x, y, x + w, y, x + w * 0.7, y + h, x, y + h * 0.8]],
+                ))
+            for _ in range(rng.integers(0, 4)):
+                jitter = rng.normal(0, 0.15, 4) * [w, h, w, h]
+                box = [
+                    x + jitter[0],
+                    y + jitter[1],
+                    max(1, w + jitter[2]),
+                    max(1, h + jitter[3]),
+                ]
+                dets.append(detection(img["id"], cat_id, box))
+        for _ in range(rng.integers(0, 20)):
+            cat_id = int(rng.choice([c["id"] for c in categories]))
+            box = [*rng.uniform(0, 440, 2), rng.uniform(1, 200), rng.uniform(1, 150)]
+            dets.append(detection(img["id"], cat_id, box))
+    return dict(images=images, categories=categories, annotations=anns), dets
+
+
+def _evaluate(eval_cls, gt, dets, iou_type="bbox", **params):
+    coco_gt = coco_from_dict(copy.deepcopy(gt))
+    evaluator = eval_cls(coco_gt, coco_gt.loadRes(copy.deepcopy(dets)), iou_type)
+    for key, value in params.items():
+        setattr(evaluator.params, key, value)
+    evaluator.evaluate()
+    evaluator.accumulate()
+    evaluator.summarize()
+    return evaluator
+
+
+@pytest.mark.parametrize(
+    "case",
+    [
+        dict(),
+        dict(useCats=0, maxDets=[100, 300, 1000]),
+        dict(maxDets=[1, 3, 5], iouThrs=np.array([0.5, 0.75])),
+        dict(iou_type="segm"),
+        dict(chunked=True),
+    ],
+    ids=["bbox", "proposal", "few_dets", "segm", "chunked"],
+)
+def test_vectorized_cocoeval_matches_pycocotools(case, monkeypatch):
+    """Test that VectorizedCOCOeval gives bit-identical precision, recall and stats."""
+    case = dict(case)
+    iou_type = case.pop("iou_type", "bbox")
+    if case.pop("chunked", False):
+        monkeypatch.setattr(coco_eval, "_PAIRS_PER_CHUNK", 64)
+    segm = iou_type == "segm"
+    gt, dets = _synthetic_coco(segm=segm, num_imgs=40 if segm else 120)
+
+    expected = _evaluate(COCOeval, gt, dets, iou_type, **case)
+    actual = _evaluate(VectorizedCOCOeval, gt, dets, iou_type, **case)
+
+    for key in ("precision", "recall", "scores"):
+        assert np.array_equal(actual.eval[key], expected.eval[key]), key
+    assert np.array_equal(actual.stats, expected.stats)
+    assert expected.stats[1] > 0
+
+
+def test_vectorized_cocoeval_matches_pycocotools_on_coco_mini():
+    """Test parity on the coco_mini ground truth with jittered detections."""
+    gt = json.loads(COCO_MINI.read_text())
+    rng = np.random.default_rng(0)
+    dets = []
+    for ann in gt["annotations"]:
+        for _ in range(3):
+            x, y, w, h = np.asarray(ann["bbox"]) + rng.normal(0, 10, 4)
+            dets.append(dict(
+                image_id=ann["image_id"], category_id=ann["category_id"],
+                bbox=[x, y, max(1, w), max(1, h)], score=float(rng.random()),
+            ))
+
+    expected = _evaluate(COCOeval, gt, dets)
+    actual = _evaluate(VectorizedCOCOeval, gt, dets)
+
+    assert np.array_equal(actual.eval["precision"], expected.eval["precision"])
+    assert np.array_equal(actual.stats, expected.stats)
+
+
+def test_paired_box_ious_matches_pycocotools():
+    """Test that pairwise box IoUs equal pycocotools' bit for bit, crowds included."""
+    rng = np.random.default_rng(0)
+    dt = rng.uniform(0, 100, (500, 4))
+    gt = rng.uniform(0, 100, (500, 4))
+    iscrowd = rng.random(500) < 0.3
+
+    expected = [
+        mask_utils.iou([d.tolist()], [g.tolist()], [int(c)])[0, 0]
+        for d, g, c in zip(dt, gt, iscrowd)
+    ]
+    np.testing.assert_array_equal(coco_eval.paired_box_ious(dt, gt, iscrowd), expected)
@@ -1,8 +1,25 @@
 import pytest
+from pathlib import Path
 from unittest.mock import MagicMock
+from loguru import logger
 from mmengine.config import Config, ConfigDict
-from ez_mmdetection.core.handlers import DataloaderHandler, RuntimeHandler
-from ez_mmdetection.utils.toml_config import UserConfig, DataSection, TrainingSection, ModelSection
+from ez_mmdetection.core.config_loader import get_config_file
+from ez_mmdetection.core.handlers import (
+    DataloaderHandler,
+    DistributedHandler,
+    RuntimeHandler,
+    mixed_or_padded_after_augments,
+    scale_train_pipeline,
+)
+from ez_mmdetection.utils.pipeline_config import config_type
+from ez_mmdetection.utils.toml_config import (
+    DataSection,
+    ModelSection,
+    TrainingSection,
+    TrialSection,
+    UserConfig,
+)
+from ez_mmdetection.utils.val_subset import val_subset_path
 
 @pytest.fixture
 def mock_user_config():
@@ -94,4 +111,501 @@ def test_runtime_handler_missing_optim_wrapper(mock_user_config):
     handler = RuntimeHandler()
     handler.apply(cfg, mock_user_config) # Should not raise
     
-    assert cfg.work_dir == "./runs/train"
\ No newline at end of file
+    assert cfg.work_dir == "./runs/train"
+def test_dataloader_handler_reduced_decode_rewrites_pipelines(mock_user_config):
+    """Test that reduced decode swaps the loader and inserts ApplyDecodeScale."""
+    mock_user_config.training.reduced_decode = True
+    train_pipeline = [
+        dict(type="LoadImageFromFile", backend_args=None),
+        dict(type="LoadAnnotations", with_bbox=True),
+        dict(type="CachedMosaic", img_scale=(640, 640), pad_val=114.0),
+        dict(type="PackDetInputs"),
+    ]
+    stage2_pipeline = [
+        dict(type="LoadImageFromFile", backend_args=None),
+        dict(type="LoadAnnotations", with_bbox=True),
+        dict(type="RandomResize", scale=(640, 640), ratio_range=(0.1, 2.0)),
+        dict(type="PackDetInputs"),
+    ]
+    test_pipeline = [
+        dict(type="LoadImageFromFile", backend_args=None),
+        dict(type="Resize", scale=(640, 640), keep_ratio=True),
+        dict(type="Pad", size=(640, 640)),
+        dict(type="LoadAnnotations", with_bbox=True),
+        dict(type="PackDetInputs"),
+    ]
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(pipeline=train_pipeline)),
+        val_dataloader=dict(dataset=dict(pipeline=test_pipeline)),
+        custom_hooks=[dict(type="PipelineSwitchHook", switch_pipeline=stage2_pipeline)],
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    train = cfg.train_dataloader.dataset.pipeline
+    assert [t.type for t in train[:5]] == [
+        "LoadImageFromFileReduced",
+        "LoadAnnotations",
+        "ApplyDecodeScale",
+        "CachedMosaic",
+        "ApplyDecodeScale",
+    ]
+    assert tuple(train[0].target_scale) == (640, 640)
+    # Boxes are rescaled before the resize, `scale_factor` composed after it
+    assert train[2].scale_factor is False and train[4].annotations is False
+
+    stage2 = cfg.custom_hooks[0].switch_pipeline
+    assert [t.type for t in stage2[2:5]] == [
+        "ApplyDecodeScale",
+        "RandomResize",
+        "ApplyDecodeScale",
+    ]
+    assert tuple(stage2[0].target_scale) == (1280, 1280)
+
+    val = [t.type for t in cfg.val_dataloader.dataset.pipeline]
+    assert val[:3] == ["LoadImageFromFileReduced", "Resize", "ApplyDecodeScale"]
+
+def test_dataloader_handler_reduced_decode_disabled(mock_user_config):
+    """Test that pipelines are untouched when reduced decode is off."""
+    pipeline = [dict(type="LoadImageFromFile"), dict(type="Resize", scale=(640, 640))]
+    cfg = Config(dict(val_dataloader=dict(dataset=dict(pipeline=pipeline))))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    val = cfg.val_dataloader.dataset.pipeline
+    assert [t.type for t in val] == ["LoadImageFromFile", "Resize"]
+
+def test_dataloader_handler_uses_image_cache(mock_user_config, tmp_path, monkeypatch):
+    """Test that a current image cache replaces the loader before reduced decode."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(
+        "ez_mmdetection.core.handlers.find_image_cache",
+        lambda root, split, ann: cache_dir if split == "train" else None,
+    )
+    mock_user_config.training.reduced_decode = True
+    train_pipeline = [
+        dict(type="LoadImageFromFile", backend_args=None),
+        dict(type="LoadAnnotations", with_bbox=True),
+        dict(type="CachedMosaic", img_scale=(640, 640)),
+        dict(type="PackDetInputs"),
+    ]
+    test_pipeline = [
+        dict(type="LoadImageFromFile", backend_args=None),
+        dict(type="Resize", scale=(640, 640), keep_ratio=True),
+        dict(type="PackDetInputs"),
+    ]
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(pipeline=train_pipeline)),
+        val_dataloader=dict(dataset=dict(pipeline=test_pipeline)),
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    train = cfg.train_dataloader.dataset.pipeline
+    assert [t.type for t in train[:3]] == [
+        "LoadImageFromCache",
+        "LoadAnnotations",
+        "ApplyDecodeScale",
+    ]
+    assert train[0].cache_dir == str(cache_dir)
+    # No val cache, so val falls back to reduced decode
+    assert cfg.val_dataloader.dataset.pipeline[0].type == "LoadImageFromFileReduced"
+
+def test_dataloader_handler_switches_to_annotation_cache(mock_user_config):
+    """Test that detection datasets use the annotation cache but mask datasets don't."""
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(
+            type="CocoDataset", pipeline=[dict(type="LoadAnnotations", with_bbox=True)]
+        )),
+        val_dataloader=dict(dataset=dict(
+            type="CocoDataset",
+            pipeline=[dict(type="LoadAnnotations", with_bbox=True, with_mask=True)],
+        )),
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    assert cfg.train_dataloader.dataset.type == "CachedCocoDataset"
+    assert cfg.val_dataloader.dataset.type == "CocoDataset"
+
+    mock_user_config.training.cache_annotations = False
+    cfg.train_dataloader.dataset.type = "CocoDataset"
+    DataloaderHandler().apply(cfg, mock_user_config)
+    assert cfg.train_dataloader.dataset.type == "CocoDataset"
+
+def test_dataloader_handler_prefetch_factor(mock_user_config):
+    """Test that prefetch_factor is only set when workers are used."""
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict()),
+        val_dataloader=dict(dataset=dict(), prefetch_factor=8),
+    ))
+    mock_user_config.training.prefetch_factor = 4
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+    assert cfg.train_dataloader.prefetch_factor == 4
+
+    mock_user_config.training.num_workers = 0
+    DataloaderHandler().apply(cfg, mock_user_config)
+    assert "prefetch_factor" not in cfg.train_dataloader
+    assert cfg.train_dataloader.persistent_workers is False
+
+def test_dataloader_handler_batch_augment(mock_user_config):
+    """Test that HSV/flip move from the pipelines into the data preprocessor."""
+    mock_user_config.training.batch_augment = True
+    train_pipeline = [
+        dict(type="LoadImageFromFile"),
+        dict(type="YOLOXHSVRandomAug"),
+        dict(type="RandomFlip", prob=0.5),
+        dict(type="PackDetInputs"),
+    ]
+    stage2_pipeline = [
+        dict(type="LoadImageFromFile"),
+        dict(type="YOLOXHSVRandomAug"),
+        dict(type="RandomFlip", prob=0.5),
+    ]
+    cfg = Config(dict(
+        model=dict(data_preprocessor=dict(type="DetDataPreprocessor", mean=[0, 0, 0])),
+        train_dataloader=dict(dataset=dict(pipeline=train_pipeline)),
+        custom_hooks=[dict(type="PipelineSwitchHook", switch_pipeline=stage2_pipeline)],
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    train = cfg.train_dataloader.dataset.pipeline
+    assert [t.type for t in train] == ["LoadImageFromFile", "PackDetInputs"]
+    stage2 = cfg.custom_hooks[0].switch_pipeline
+    assert [t.type for t in stage2] == ["LoadImageFromFile"]
+    preprocessor = cfg.model.data_preprocessor
+    assert preprocessor.type == "EZDetDataPreprocessor"
+    assert preprocessor.pixel_augments[0].type == "BatchYOLOXHSVFlip"
+    assert preprocessor.pixel_augments[0].flip_prob == 0.5
+    assert preprocessor.mean == [0, 0, 0]
+
+def test_batch_augment_reorders_rtmdet_pipelines(mock_user_config):
+    """Test that RTMDet's HSV/flip run after Pad and CachedMixUp, with a warning."""
+    mock_user_config.training.batch_augment = True
+    cfg = Config.fromfile(get_config_file("rtmdet_tiny"))
+    train = cfg.train_dataloader.dataset.pipeline
+    stage2 = cfg.custom_hooks[1].switch_pipeline
+    assert mixed_or_padded_after_augments(train) == ["Pad", "CachedMixUp"]
+    assert mixed_or_padded_after_augments(stage2) == ["Pad"]
+
+    warnings = []
+    handler_id = logger.add(warnings.append, level="WARNING")
+    try:
+        DataloaderHandler().apply(cfg, mock_user_config)
+    finally:
+        logger.remove(handler_id)
+
+    assert [config_type(t) for t in train] == [
+        "LoadImageFromFile",
+        "LoadAnnotations",
+        "CachedMosaic",
+        "RandomResize",
+        "RandomCrop",
+        "Pad",
+        "CachedMixUp",
+        "PackDetInputs",
+    ]
+    assert "RandomFlip" not in [config_type(t) for t in stage2]
+    assert cfg.model.data_preprocessor.pixel_augments[0].type == "BatchYOLOXHSVFlip"
+    assert any("CachedMixUp, Pad" in str(message) for message in warnings)
+
+
+def test_dataloader_handler_shares_mix_caches(mock_user_config):
+    """Test that cached mosaic/mixup become shared caches splitting the budget."""
+    mock_user_config.training.shared_mix_cache_mb = 300
+    train_pipeline = [
+        dict(type="LoadImageFromFile"),
+        dict(type="CachedMosaic", img_scale=(640, 640), max_cached_images=20),
+        dict(type="mmdet.CachedMixUp", max_cached_images=10),
+        dict(type="PackDetInputs"),
+    ]
+    stage2_pipeline = [dict(type="LoadImageFromFile"), dict(type="PackDetInputs")]
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(pipeline=train_pipeline)),
+        custom_hooks=[dict(type="PipelineSwitchHook", switch_pipeline=stage2_pipeline)],
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    mosaic, mixup = cfg.train_dataloader.dataset.pipeline[1:3]
+    assert mosaic.type == "SharedCachedMosaic"
+    assert (mosaic.max_cached_images, mosaic.img_scale) == (40, (640, 640))
+    assert (mixup.type, mixup.max_cached_images) == ("SharedCachedMixUp", 20)
+    assert mosaic.cache_bytes == 200 * 2**20
+    assert mixup.cache_bytes == 100 * 2**20
+    stage2 = cfg.custom_hooks[0].switch_pipeline
+    assert [t.type for t in stage2] == ["LoadImageFromFile", "PackDetInputs"]
+
+def test_scale_train_pipeline_scales_mosaic_crop_and_pad():
+    """Test that mosaic, crop and pad sizes follow the target size."""
+    pipeline = [
+        dict(type="LoadImageFromFile"),
+        dict(type="SharedCachedMosaic", img_scale=(640, 640)),
+        dict(type="RandomResize", scale=(1280, 1280), ratio_range=(0.5, 2.0)),
+        dict(type="RandomCrop", crop_size=(640, 640)),
+        dict(type="Pad", size=(640, 640), pad_val=dict(img=(114, 114, 114))),
+        dict(type="CachedMixUp", img_scale=(640, 640)),
+        dict(type="PackDetInputs"),
+    ]
+
+    scaled = scale_train_pipeline(pipeline, 320)
+
+    assert scaled[1].type == "SharedCachedMosaic"
+    assert scaled[1].img_scale == (320, 320)
+    assert scaled[2].scale == (640, 640) and scaled[2].ratio_range == (0.5, 2.0)
+    assert scaled[3].crop_size == (320, 320)
+    assert scaled[4].size == (320, 320)
+    assert scaled[4].pad_val == dict(img=(114, 114, 114))
+    assert scaled[5].img_scale == (320, 320)
+    assert pipeline[1]["img_scale"] == (640, 640)  # the original is untouched
+    relative = [dict(type="RandomCrop", crop_size=(0.5, 0.5), crop_type="relative")]
+    scaled = scale_train_pipeline(relative + pipeline[4:5], 320)
+    assert scaled[0].crop_size == (0.5, 0.5)
+
+def test_dataloader_handler_adds_progressive_resize(mock_user_config):
+    """Test that the smaller sizes share the first half of the mosaic stage."""
+    mock_user_config.training.progressive_sizes = [480, 320]
+    train_pipeline = [
+        dict(type="CachedMosaic", img_scale=(640, 640)),
+        dict(type="Pad", size=(640, 640)),
+    ]
+    stage2_pipeline = [dict(type="Pad", size=(640, 640))]
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(pipeline=train_pipeline)),
+        custom_hooks=[
+            dict(
+                type="PipelineSwitchHook",
+                switch_epoch=8,
+                switch_pipeline=stage2_pipeline,
+            )
+        ],
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    hook = cfg.custom_hooks[1]
+    assert hook.type == "ProgressiveResizeHook"
+    assert [(s.epoch, s.size) for s in hook.stages] == [(0, 320), (2, 480), (4, 640)]
+    assert hook.stages[0].pipeline[0].img_scale == (320, 320)
+    assert hook.stages[1].pipeline[1].size == (480, 480)
+    assert hook.stages[2].pipeline == cfg.train_dataloader.dataset.pipeline
+
+def test_dataloader_handler_uses_size_index(mock_user_config, tmp_path):
+    """Test that cached COCO datasets read sizes from a current check-data index."""
+    from ez_mmdetection.utils.data_check import size_index_path, write_size_index
+
+    (tmp_path / "annotations").mkdir()
+    ann_path = tmp_path / "annotations" / "train.json"
+    ann_path.write_text("{}")
+    write_size_index({"a.jpg": (10, 20)}, ann_path, size_index_path(tmp_path, "train"))
+    mock_user_config.data.root = str(tmp_path)
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(type="CocoDataset", pipeline=[])),
+        val_dataloader=dict(dataset=dict(type="CocoDataset", pipeline=[])),
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+
+    index_path = size_index_path(tmp_path, "train")
+    assert cfg.train_dataloader.dataset.size_index == str(index_path)
+    assert "size_index" not in cfg.val_dataloader.dataset
+
+def test_handlers_configure_yolo_splits(mock_user_config):
+    """Test that YOLO splits use YoloDataset and evaluate without a COCO file."""
+    mock_user_config.data.train_format = "yolo"
+    mock_user_config.data.val_format = "yolo"
+    mock_user_config.data.val_ann = "labels/val"
+    cfg = Config(dict(
+        train_dataloader=dict(dataset=dict(
+            type="CocoDataset", pipeline=[dict(type="PackDetInputs")]
+        )),
+        val_dataloader=dict(dataset=dict(type="CocoDataset", pipeline=[
+            dict(type="PackDetInputs", meta_keys=(
+                "img_id", "img_path", "ori_shape", "img_shape", "scale_factor"
+            )),
+        ])),
+        val_evaluator=dict(type="CocoMetric"),
+        train_cfg=dict(max_epochs=1),
+    ))
+
+    DataloaderHandler().apply(cfg, mock_user_config)
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert cfg.train_dataloader.dataset.type == "YoloDataset"
+    assert "meta_keys" not in cfg.train_dataloader.dataset.pipeline[0]
+    assert cfg.val_dataloader.dataset.type == "YoloDataset"
+    assert cfg.val_dataloader.dataset.ann_file.endswith("labels/val")
+    assert cfg.val_dataloader.dataset.pipeline[0].meta_keys[-1] == "instances"
+    assert cfg.val_evaluator.ann_file is None
+
+def test_distributed_handler_configures_cpu_ddp(mock_user_config):
+    """Test that the 'ddp' launcher sets up gloo, plain BN and LR scaling on the CPU."""
+    mock_user_config.training.launcher = "ddp"
+    mock_user_config.training.device = "cpu"
+    cfg = Config(dict(
+        model=dict(
+            backbone=dict(norm_cfg=dict(type="SyncBN")),
+            bbox_head=dict(norm_cfg=dict(type="SyncBN"), share_conv=True),
+        ),
+        env_cfg=dict(dist_cfg=dict(backend="nccl")),
+    ))
+
+    DistributedHandler().apply(cfg, mock_user_config)
+
+    assert cfg.launcher == "pytorch"
+    assert cfg.env_cfg.dist_cfg.backend == "gloo"
+    assert cfg.model_wrapper_cfg.type == "CPUDistributedDataParallel"
+    assert cfg.model.backbone.norm_cfg.type == "BN"
+    assert cfg.model.bbox_head.norm_cfg.type == "BN"
+    assert cfg.auto_scale_lr == dict(enable=True, base_batch_size=4)
+
+def test_distributed_handler_ignores_single_process(mock_user_config):
+    """Test that the default launcher leaves the config untouched."""
+    cfg = Config(dict(model=dict(norm_cfg=dict(type="SyncBN"))))
+
+    DistributedHandler().apply(cfg, mock_user_config)
+
+    assert "launcher" not in cfg
+    assert cfg.model.norm_cfg.type == "SyncBN"
+
+def test_runtime_handler_accumulates_gradients(mock_user_config):
+    """Test that accumulation is set and iteration-based schedules are stretched."""
+    mock_user_config.training.accumulative_counts = 4
+    cfg = Config(dict(
+        train_cfg=dict(max_epochs=1),
+        optim_wrapper=dict(type="OptimWrapper", optimizer=dict(type="AdamW", lr=0.004)),
+        param_scheduler=[
+            dict(type="LinearLR", by_epoch=False, begin=0, end=1000),
+            dict(type="CosineAnnealingLR", by_epoch=True, begin=150, end=300),
+        ],
+    ))
+
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert cfg.optim_wrapper.accumulative_counts == 4
+    assert cfg.param_scheduler[0].end == 4000
+    assert cfg.param_scheduler[1].begin == 150
+    assert cfg.param_scheduler[1].end == 300
+
+def test_runtime_handler_auto_resume(mock_user_config, tmp_path):
+    """Test that resume='auto' resumes the latest checkpoint, if there is one."""
+    mock_user_config.training.work_dir = str(tmp_path)
+    mock_user_config.training.resume = "auto"
+    mock_user_config.model.load_from = "pretrained.pth"
+    mock_user_config.training.async_checkpoint = True
+
+    def build():
+        cfg = Config(dict(
+            train_cfg=dict(max_epochs=1),
+            default_hooks=dict(checkpoint=dict(type="CheckpointHook", interval=10)),
+        ))
+        RuntimeHandler().apply(cfg, mock_user_config)
+        return cfg
+
+    cfg = build()
+    assert cfg.load_from == "pretrained.pth"
+    assert not cfg.get("resume", False)
+    assert cfg.default_hooks.checkpoint.type == "AsyncCheckpointHook"
+    assert cfg.default_hooks.checkpoint.interval == 10
+
+    (tmp_path / "epoch_10.pth").touch()
+    cfg = build()
+    assert cfg.resume is True
+    assert cfg.load_from == str(tmp_path / "epoch_10.pth")
+
+def test_runtime_handler_evaluates_coco_in_memory(mock_user_config):
+    """Test that CocoMetric evaluators become InMemoryCocoMetric with the backend."""
+    def build():
+        cfg = Config(dict(
+            train_cfg=dict(max_epochs=1),
+            val_evaluator=dict(type="CocoMetric", metric="bbox"),
+            test_evaluator=dict(type="mmdet.CocoMetric"),
+        ))
+        RuntimeHandler().apply(cfg, mock_user_config)
+        return cfg
+
+    cfg = build()
+    assert cfg.val_evaluator.type == "InMemoryCocoMetric"
+    assert cfg.val_evaluator.metric == "bbox"
+    assert cfg.test_evaluator.type == "InMemoryCocoMetric"
+    assert cfg.val_evaluator.eval_backend == "pycocotools"
+
+    mock_user_config.training.coco_eval_backend = "vectorized"
+    assert build().val_evaluator.eval_backend == "vectorized"
+    mock_user_config.training.coco_eval_backend = "pycocotools"
+
+    mock_user_config.training.in_memory_eval = False
+    assert build().val_evaluator.type == "CocoMetric"
+
+def test_runtime_handler_validates_on_subset(mock_user_config, tmp_path, monkeypatch):
+    """Test that val_subset_size swaps in SubsetValLoop with a per-split cache file."""
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(tmp_path))
+    mock_user_config.training.val_subset_size = 50
+    mock_user_config.training.full_val_epochs = [5]
+    cfg = Config(dict(train_cfg=dict(max_epochs=10), val_cfg=dict(type="ValLoop")))
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert cfg.val_cfg.type == "SubsetValLoop"
+    assert cfg.val_cfg.subset_size == 50
+    assert cfg.val_cfg.full_val_epochs == [5]
+    # In the cache directory, so read-only datasets can be validated on subsets
+    assert Path(cfg.val_cfg.cache_file).parent == tmp_path / "val_subset"
+    assert cfg.val_cfg.cache_file == str(
+        val_subset_path(Path("data/coco/annotations/val.json"))
+    )
+
+def test_runtime_handler_adds_early_stopping(mock_user_config):
+    """Test that early stopping replaces any other and keeps the best checkpoint."""
+    mock_user_config.training.early_stopping_patience = 3
+    mock_user_config.training.early_stopping_min_epochs = 20
+    cfg = Config(dict(
+        train_cfg=dict(max_epochs=100),
+        default_hooks=dict(checkpoint=dict(type="CheckpointHook", interval=10)),
+        custom_hooks=[
+            dict(type="EMAHook"), dict(type="EarlyStoppingHook", monitor="loss")
+        ],
+    ))
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert cfg.default_hooks.checkpoint.save_best == "coco/bbox_mAP"
+    assert [h.type for h in cfg.custom_hooks] == ["EMAHook", "PlateauStoppingHook"]
+    stopping = cfg.custom_hooks[-1]
+    assert stopping.monitor == "coco/bbox_mAP"
+    assert stopping.patience == 3 and stopping.min_epochs == 20
+    assert stopping.min_delta == 0.001
+
+def test_runtime_handler_reports_sweep_trials(mock_user_config):
+    """Test that a sweep trial gets a TrialPruningHook with its settings."""
+    mock_user_config.trial = TrialSection(sweep_dir="runs/sweep", warmup_epochs=5)
+    cfg = Config(
+        dict(train_cfg=dict(max_epochs=10), custom_hooks=[dict(type="EMAHook")])
+    )
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert [h.type for h in cfg.custom_hooks] == ["EMAHook", "TrialPruningHook"]
+    hook = cfg.custom_hooks[-1]
+    assert hook.sweep_dir == "runs/sweep" and hook.monitor == "coco/bbox_mAP"
+    assert hook.warmup_epochs == 5 and hook.prune
+
+def test_runtime_handler_adds_telemetry(mock_user_config):
+    """Test that telemetry adds a TelemetryHook with the configured port."""
+    mock_user_config.training.telemetry = True
+    mock_user_config.training.telemetry_port = 9100
+    cfg = Config(dict(train_cfg=dict(max_epochs=1)))
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert cfg.custom_hooks == [
+        dict(type="TelemetryHook", interval=50, file_format="jsonl", port=9100)
+    ]
+
+
+def test_runtime_handler_adds_compile_hook(mock_user_config):
+    """Test that compile adds a CompileHook with the configured mode."""
+    mock_user_config.training.compile = True
+    mock_user_config.training.compile_mode = "max-autotune"
+    cfg = Config(dict(train_cfg=dict(max_epochs=1)))
+    RuntimeHandler().apply(cfg, mock_user_config)
+
+    assert cfg.custom_hooks == [dict(type="CompileHook", mode="max-autotune")]
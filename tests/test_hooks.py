@@ -0,0 +1,294 @@
+import csv
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import torch
+from mmengine.hooks import Hook
+from mmengine.model import BaseModel
+from mmengine.runner import Runner
+from torch.utils.data import Dataset
+
+from ez_mmdetection.engine import (
+    AsyncCheckpointHook,
+    CompileHook,
+    PlateauStoppingHook,
+    ProgressiveResizeHook,
+    TelemetryHook,
+    TrialPruningHook,
+)
+from ez_mmdetection.utils.checkpoint import find_resume_checkpoint
+from ez_mmdetection.utils.compile import INDUCTOR_CACHE_ENV_VAR
+from ez_mmdetection.utils.sweep import (
+    TRIAL_REPORT,
+    append_trial_report,
+    read_trial_report,
+)
+from ez_mmdetection.utils.telemetry import PHASES
+
+
+class ToyModel(BaseModel):
+    """A linear model whose loss is its squared output."""
+
+    def __init__(self):
+        """Builds the single linear layer."""
+        super().__init__()
+        self.linear = torch.nn.Linear(2, 1)
+
+    def forward(self, inputs, labels=None, mode="tensor"):
+        """Returns the loss in every mode."""
+        inputs = torch.stack(inputs) if isinstance(inputs, list) else inputs
+        return {"loss": self.linear(inputs).pow(2).mean()}
+
+
+class ToyDataset(Dataset):
+    """Eight constant two-element inputs."""
+
+    metainfo = {"classes": ("toy",)}
+
+    def __len__(self):
+        """Returns the number of samples."""
+        return 8
+
+    def __getitem__(self, idx):
+        """Returns an input filled with its index."""
+        return dict(inputs=torch.full((2,), float(idx)))
+
+
+def _runner(work_dir, max_epochs, resume=False, load_from=None):
+    return Runner(
+        model=ToyModel(),
+        work_dir=str(work_dir),
+        train_dataloader=dict(
+            dataset=ToyDataset(),
+            sampler=dict(type="DefaultSampler", shuffle=False),
+            batch_size=4,
+            num_workers=0,
+        ),
+        optim_wrapper=dict(optimizer=dict(type="SGD", lr=0.01, momentum=0.9)),
+        param_scheduler=dict(type="MultiStepLR", milestones=[2], by_epoch=True),
+        train_cfg=dict(by_epoch=True, max_epochs=max_epochs),
+        default_hooks=dict(
+            checkpoint=AsyncCheckpointHook(interval=1, max_keep_ckpts=2)
+        ),
+        resume=resume,
+        load_from=load_from,
+        default_scope="mmengine",
+        experiment_name=f"exp_{max_epochs}",
+    )
+
+
+def test_async_checkpoint_hook_writes_and_resumes(tmp_path):
+    """Test that async checkpoints are complete, rotated and resumable."""
+    runner = _runner(tmp_path, max_epochs=3)
+    runner.train()
+
+    names = sorted(p.name for p in tmp_path.glob("*.pth*"))
+    assert names == ["epoch_2.pth", "epoch_3.pth"]
+    checkpoint = torch.load(tmp_path / "epoch_3.pth", weights_only=False)
+    assert checkpoint["meta"]["epoch"] == 3
+    assert "optimizer" in checkpoint and "param_schedulers" in checkpoint
+    assert torch.equal(
+        checkpoint["state_dict"]["linear.weight"], runner.model.linear.weight.detach()
+    )
+
+    latest = find_resume_checkpoint(tmp_path)
+    assert latest == tmp_path / "epoch_3.pth"
+    resumed = _runner(tmp_path, max_epochs=4, resume=True, load_from=str(latest))
+    resumed.train()
+    assert resumed.epoch == 4
+    assert resumed.optim_wrapper.get_lr()["lr"] == [0.001]
+    assert (tmp_path / "epoch_4.pth").exists()
+
+
+class _Loop:
+    stop_training = False
+
+
+class _Runner:
+    def __init__(self, work_dir):
+        self.work_dir = str(work_dir)
+        self.train_loop = _Loop()
+        self.epoch = 0
+        self.logger = MagicMock()
+
+
+def _validate(hook, runner, scores):
+    for score in scores:
+        runner.epoch += 1
+        hook.after_val_epoch(runner, {"coco/bbox_mAP": score})
+        if runner.train_loop.stop_training:
+            break
+
+
+def test_plateau_stopping_hook_stops_and_records_reason(tmp_path):
+    """Test that equal rounded scores count as a plateau and the stop is recorded."""
+    hook = PlateauStoppingHook(monitor="coco/bbox_mAP", patience=2, min_delta=0.001)
+    runner = _Runner(tmp_path)
+    _validate(hook, runner, [0.1, 0.3, 0.3, 0.3005, 0.5])
+
+    assert runner.train_loop.stop_training and runner.epoch == 4
+    record = json.loads((tmp_path / "early_stopping.json").read_text())
+    assert record["epoch"] == 4
+    assert record["best_score"] == 0.3 and record["best_epoch"] == 2
+    assert record["monitor"] == "coco/bbox_mAP"
+    assert "did not improve" in record["reason"]
+
+
+def test_plateau_stopping_hook_waits_for_min_epochs(tmp_path):
+    """Test that a plateau only stops training after min_epochs."""
+    hook = PlateauStoppingHook(monitor="coco/bbox_mAP", patience=1, min_epochs=4)
+    runner = _Runner(tmp_path)
+    _validate(hook, runner, [0.3, 0.2, 0.2, 0.2, 0.2])
+
+    assert runner.train_loop.stop_training and runner.epoch == 4
+
+    runner = _Runner(tmp_path)
+    _validate(hook, runner, [float("nan")])
+    assert runner.train_loop.stop_training and runner.epoch == 1
+
+
+def test_trial_pruning_hook_reports_and_prunes_below_median(tmp_path):
+    """Test that a trial below the other trials' median at its epoch is stopped."""
+    for name, scores in [("trial_000", [0.3, 0.5]), ("trial_001", [0.2, 0.4])]:
+        (tmp_path / name).mkdir()
+        for epoch, score in enumerate(scores, 1):
+            append_trial_report(
+                tmp_path / name / TRIAL_REPORT, dict(epoch=epoch, score=score)
+            )
+    (tmp_path / "trial_002").mkdir()
+    hook = TrialPruningHook(
+        monitor="coco/bbox_mAP", sweep_dir=str(tmp_path), warmup_epochs=2
+    )
+    runner = _Runner(tmp_path / "trial_002")
+    _validate(hook, runner, [0.1, 0.3, 0.6])
+
+    assert runner.train_loop.stop_training and runner.epoch == 2
+    records = read_trial_report(tmp_path / "trial_002" / TRIAL_REPORT)
+    assert records == [
+        dict(epoch=1, score=0.1),
+        dict(epoch=2, score=0.3),
+        dict(epoch=2, pruned=True),
+    ]
+
+
+@pytest.mark.parametrize("file_format", ["jsonl", "csv"])
+def test_telemetry_hook_records_every_iteration(tmp_path, file_format):
+    """Test that each iteration's phases are recorded and add up to its total."""
+    runner = _runner(tmp_path, max_epochs=2)
+    runner.register_hook(TelemetryHook(interval=3, file_format=file_format))
+    runner.train()
+
+    path = Path(runner.log_dir) / f"telemetry.{file_format}"
+    if file_format == "csv":
+        with open(path) as f:
+            rows = csv.DictReader(f)
+            records = [{k: float(v) for k, v in row.items()} for row in rows]
+    else:
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["iter"] for r in records] == [1, 2, 3, 4]
+    assert all(r["batch_size"] == 4 for r in records)
+    for record in records:
+        phases = sum(record[phase] for phase in PHASES)
+        assert phases == pytest.approx(record["total"], abs=0.01)
+        assert record["forward"] > 0 and record["backward"] > 0 and record["step"] > 0
+        assert record["hooks"] > 0
+    # The timing wrappers are removed after training
+    assert "backward" not in vars(runner.optim_wrapper)
+    assert "_run_forward" not in vars(runner.model)
+
+
+def test_telemetry_hook_restores_methods_when_training_raises(tmp_path):
+    """Test that the timing wrappers are removed when training fails."""
+    class FailingHook(Hook):
+        def after_train_iter(self, runner, batch_idx, data_batch=None, outputs=None):
+            if runner.iter == 2:
+                raise RuntimeError("CUDA out of memory")
+
+    runner = _runner(tmp_path, max_epochs=2)
+    telemetry = TelemetryHook(interval=3)
+    failing = FailingHook()
+    runner.register_hook(telemetry)
+    runner.register_hook(failing)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        runner.train()
+
+    assert "backward" not in vars(runner.optim_wrapper)
+    assert "_run_forward" not in vars(runner.model)
+    assert "after_train_iter" not in vars(failing)
+    assert "run" not in vars(runner.train_loop)
+    assert telemetry._file is None
+
+
+def test_compile_hook_compiles_parts_with_a_work_dir_cache(tmp_path, monkeypatch):
+    """Test that the unwrapped model's parts are compiled and cached in work_dir."""
+    monkeypatch.setenv(INDUCTOR_CACHE_ENV_VAR, "x")
+    monkeypatch.delenv(INDUCTOR_CACHE_ENV_VAR)
+    model = torch.nn.Module()
+    model.backbone = torch.nn.Linear(2, 2)
+    model.bbox_head = torch.nn.Linear(2, 1)
+    runner = MagicMock(model=model, work_dir=str(tmp_path))
+
+    CompileHook(mode="reduce-overhead").before_train(runner)
+
+    assert "forward" in vars(model.backbone) and "forward" in vars(model.bbox_head)
+    assert (tmp_path / "compile_cache").is_dir()
+    assert INDUCTOR_CACHE_ENV_VAR not in os.environ
+
+    # An explicit cache wins over one set in the environment
+    monkeypatch.setenv(INDUCTOR_CACHE_ENV_VAR, str(tmp_path / "env"))
+    runner.model = torch.nn.Module()
+    CompileHook(cache_dir=str(tmp_path / "explicit")).before_train(runner)
+    assert (tmp_path / "explicit").is_dir()
+    assert not (tmp_path / "env").exists()
+    with pytest.raises(ValueError, match="mode"):
+        CompileHook(mode="fast")
+
+
+class _Size:
+    def __init__(self, size):
+        self.size = size
+
+    def __call__(self, results):
+        return dict(results, size=self.size)
+
+
+def _resize_stages():
+    return [
+        dict(epoch=0, size=320, pipeline=[_Size(320)]),
+        dict(epoch=2, size=480, pipeline=[_Size(480)]),
+        dict(epoch=4, size=640, pipeline=[_Size(640)]),
+    ]
+
+
+def _train_size(runner):
+    return runner.train_dataloader.dataset.pipeline({})["size"]
+
+
+def test_progressive_resize_hook_switches_pipelines_at_epoch_boundaries():
+    """Test that each stage's pipeline applies from its epoch and restarts workers."""
+    hook = ProgressiveResizeHook(_resize_stages())
+    runner = MagicMock()
+    runner.train_dataloader.persistent_workers = True
+    sizes = []
+    for epoch in range(6):
+        runner.epoch = epoch
+        hook.before_train_epoch(runner)
+        sizes.append(_train_size(runner))
+        if epoch == 2:
+            assert runner.train_dataloader._iterator is None
+    assert sizes == [320, 320, 480, 480, 640, 640]
+    assert runner.train_dataloader._DataLoader__initialized is True
+
+    # Resumed past the curriculum, the configured pipeline (e.g. stage 2) stays
+    runner = MagicMock()
+    runner.epoch = 7
+    pipeline = runner.train_dataloader.dataset.pipeline
+    ProgressiveResizeHook(_resize_stages()).before_train_epoch(runner)
+    assert runner.train_dataloader.dataset.pipeline is pipeline
+
+    runner.epoch = 3
+    ProgressiveResizeHook(_resize_stages()).before_train_epoch(runner)
+    assert _train_size(runner) == 480
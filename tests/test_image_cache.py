@@ -0,0 +1,93 @@
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from ez_mmdetection.schemas.dataset import DatasetConfig, SplitConfig
+from ez_mmdetection.utils.image_cache import (
+    ImageCacheReader,
+    build_image_cache,
+    cache_dataset,
+    find_image_cache,
+    image_cache_dir,
+)
+
+
+@pytest.fixture
+def dataset_root(tmp_path):
+    """Creates a tiny COCO-style split with one large and one small image."""
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    large = np.zeros((1200, 1600, 3), dtype=np.uint8)
+    large[:, :800] = (255, 0, 0)
+    cv2.imwrite(str(img_dir / "large.png"), large)
+    cv2.imwrite(str(img_dir / "small.png"), np.full((100, 200, 3), 7, np.uint8))
+
+    ann_dir = tmp_path / "annotations"
+    ann_dir.mkdir()
+    images = [
+        {"id": 1, "file_name": "large.png", "width": 1600, "height": 1200},
+        {"id": 2, "file_name": "small.png", "width": 200, "height": 100},
+    ]
+    (ann_dir / "train.json").write_text(
+        json.dumps({"images": images, "annotations": [], "categories": []})
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def split():
+    """A split with COCO annotations and an image directory."""
+    return SplitConfig(ann_file="annotations/train.json", img_dir="images")
+
+
+def test_build_and_read_image_cache(dataset_root, split):
+    """Test that images are downscaled to max_side and keep their original shape."""
+    cache_dir = build_image_cache(
+        split, dataset_root, image_cache_dir(dataset_root, "train"), max_side=800
+    )
+    reader = ImageCacheReader(cache_dir)
+
+    img, ori_shape = reader.read(str(dataset_root / "images" / "large.png"))
+    assert img.shape == (600, 800, 3)
+    assert ori_shape == (1200, 1600)
+    np.testing.assert_array_equal(img[300, 100], (255, 0, 0))
+
+    img, ori_shape = reader.read(str(dataset_root / "images" / "small.png"))
+    assert img.shape == (100, 200, 3)
+    assert ori_shape == (100, 200)
+    assert str(dataset_root / "images" / "missing.png") not in reader
+
+
+def test_cached_image_writes_do_not_touch_the_store(dataset_root, split):
+    """Test that in-place augmentations only modify a private copy."""
+    cache_dir = build_image_cache(
+        split, dataset_root, image_cache_dir(dataset_root, "train")
+    )
+    path = str(dataset_root / "images" / "small.png")
+
+    img, _ = ImageCacheReader(cache_dir).read(path)
+    img[:] = 0
+
+    img, _ = ImageCacheReader(cache_dir).read(path)
+    assert img.max() == 7
+
+
+def test_find_image_cache_detects_stale_annotations(dataset_root, split):
+    """Test that a cache is ignored once the annotation file changes."""
+    assert find_image_cache(dataset_root, "train", split.ann_file) is None
+
+    cache_dataset(
+        DatasetConfig(data_root=dataset_root, train=split, val=split),
+        splits=("train",),
+    )
+    assert find_image_cache(dataset_root, "train", split.ann_file) == image_cache_dir(
+        dataset_root, "train"
+    )
+
+    ann_path = dataset_root / split.ann_file
+    ann_path.write_text(ann_path.read_text() + "\n")
+    os.utime(ann_path, ns=(0, 0))
+    assert find_image_cache(dataset_root, "train", split.ann_file) is None
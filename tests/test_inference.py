@@ -70,3 +70,35 @@ def test_predict_with_out_dir_creates_directory(tmp_path):
         # Verify inferencer was called with the out_dir
         mock_inferencer_instance.assert_called_once_with(str(image_path), out_dir=str(out_dir), show=False)
 
+
+
+def test_predict_rebuilds_inferencer_when_reduced_decode_changes():
+    """Test that predict() reuses the inferencer until reduced_decode changes."""
+    with patch("ez_mmdetection.core.base.DetInferencer") as mock_inferencer_cls, patch(
+        "ez_mmdetection.core.base.enable_reduced_decode"
+    ) as mock_enable:
+        mock_inferencer_cls.return_value.return_value = {"predictions": []}
+
+        detector = RTMDet(model_name="rtmdet_tiny")
+        detector.predict(image_path="demo.jpg")
+        detector.predict(image_path="demo.jpg")
+        assert mock_inferencer_cls.call_count == 1
+
+        detector.predict(image_path="demo.jpg", reduced_decode=True)
+        assert mock_inferencer_cls.call_count == 2
+        mock_enable.assert_called_once()
+
+
+def test_predict_rebuilds_inferencer_when_compile_changes():
+    """Test that predict(compile=True) compiles a fresh inferencer's model."""
+    with patch("ez_mmdetection.core.base.DetInferencer") as mock_inferencer_cls, patch(
+        "ez_mmdetection.core.base.compile_detector"
+    ) as mock_compile:
+        mock_inferencer_cls.return_value.return_value = {"predictions": []}
+
+        detector = RTMDet(model_name="rtmdet_tiny")
+        detector.predict(image_path="demo.jpg")
+        detector.predict(image_path="demo.jpg", compile=True)
+
+        assert mock_inferencer_cls.call_count == 2
+        mock_compile.assert_called_once()
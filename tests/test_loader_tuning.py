@@ -0,0 +1,54 @@
+import time
+
+import torch
+from torch.utils.data import Dataset
+
+from ez_mmdetection.utils.loader_tuning import (
+    choose_loader_settings,
+    measure_loader_throughput,
+    worker_candidates,
+)
+
+
+class SlowDataset(Dataset):
+    """A dataset whose items take a fixed time to produce."""
+
+    def __len__(self):
+        """Returns the number of items."""
+        return 4
+
+    def __getitem__(self, idx):
+        """Returns a zero tensor after a short sleep."""
+        time.sleep(0.005)
+        return torch.zeros(3)
+
+
+def test_worker_candidates():
+    """Test that powers of two up to the limit are probed, plus the limit."""
+    assert worker_candidates(6) == [1, 2, 4, 6]
+    assert worker_candidates(8) == [1, 2, 4, 8]
+
+
+def test_choose_loader_settings_smallest_sufficient():
+    """Test that the fewest workers with enough headroom are chosen."""
+    throughputs = {1: 40.0, 2: 90.0, 4: 170.0}
+
+    assert choose_loader_settings(throughputs, required=50.0) == (2, 2)
+    # Thin margin over the model: prefetch deeper to absorb jitter
+    assert choose_loader_settings(throughputs, required=70.0) == (2, 4)
+
+
+def test_choose_loader_settings_bottleneck():
+    """Test that the fastest candidate is chosen when none keeps up."""
+    throughputs = {1: 40.0, 2: 60.0, 4: 60.0}
+
+    assert choose_loader_settings(throughputs, required=100.0) == (2, 4)
+
+
+def test_measure_loader_throughput_small_dataset():
+    """Test that datasets smaller than the probe are sampled with replacement."""
+    throughput = measure_loader_throughput(
+        SlowDataset(), batch_size=2, num_workers=0, collate_fn=None, num_batches=5
+    )
+
+    assert 0 < throughput < 2 / 0.01
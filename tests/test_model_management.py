@@ -60,13 +60,25 @@ def test_ensure_model_checkpoint_existing(mock_download, tmp_path):
         mock_download.assert_not_called()
 
 @patch("ez_mmdetection.utils.download.download_checkpoint")
-def test_ensure_model_checkpoint_download_trigger(mock_download, tmp_path):
-    """Test that ensure_model_checkpoint triggers download if file is missing."""
+def test_ensure_model_checkpoint_download_trigger(mock_download, tmp_path, monkeypatch):
+    """Test that ensure_model_checkpoint downloads into the cache and links it."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(cache_dir))
+
+    def fake_download(url, dest):
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        Path(dest).write_bytes(b"weights")
+
+    mock_download.side_effect = fake_download
+
     with patch("pathlib.Path.cwd", return_value=tmp_path):
         path = ensure_model_checkpoint("rtmdet_tiny")
         expected_path = tmp_path / "checkpoints" / "rtmdet_tiny.pth"
         assert path == expected_path
-        mock_download.assert_called_once_with(MODEL_URLS["rtmdet_tiny"], expected_path)
+        assert path.read_bytes() == b"weights"
+        mock_download.assert_called_once()
+        assert mock_download.call_args[0][0] == MODEL_URLS["rtmdet_tiny"]
+        assert cache_dir in Path(mock_download.call_args[0][1]).parents
 
 def test_ensure_model_checkpoint_missing_url(tmp_path):
     """Test ensure_model_checkpoint when model has no URL and path is missing."""
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+
+from ez_mmdetection.utils.pipeline_bench import benchmark_pipeline, save_report
+
+
+class Load:
+    """Loads a 64x64 black image."""
+
+    def __call__(self, results):
+        """Adds the image to the results."""
+        results["img"] = np.zeros((64, 64, 3), dtype=np.uint8)
+        return results
+
+
+class Upscale:
+    """Doubles the image height."""
+
+    def __call__(self, results):
+        """Repeats the image rows."""
+        results["img"] = np.repeat(results["img"], 2, axis=0)
+        return results
+
+
+class DropOdd:
+    """Drops samples with an odd index."""
+
+    def __call__(self, results):
+        """Returns None for odd samples."""
+        return None if results["idx"] % 2 else results
+
+
+class FakePipeline:
+    """A pipeline of the three transforms above."""
+
+    transforms = [Load(), Upscale(), DropOdd()]
+
+
+class FakeDataset:
+    """A three-sample dataset with the fake pipeline."""
+
+    pipeline = FakePipeline()
+
+    def __len__(self):
+        """Returns the number of samples."""
+        return 3
+
+    def get_data_info(self, idx):
+        """Returns the sample's raw data info."""
+        return {"idx": idx}
+
+
+def test_benchmark_pipeline_reports_each_transform(tmp_path):
+    """Test that every transform gets timing, size and allocation stats."""
+    report = benchmark_pipeline(FakeDataset(), num_samples=6, worker_counts=(0, 2))
+
+    assert report["transforms"] == ["Load", "Upscale", "DropOdd"]
+    assert [run["num_workers"] for run in report["runs"]] == [0, 2]
+    single = report["runs"][0]
+    assert [t["calls"] for t in single["transforms"]] == [6, 6, 6]
+    assert single["transforms"][0]["out_kb"] == 12.0
+    assert single["transforms"][1]["out_kb"] == 24.0
+    # Indices wrap around the 3-item dataset; both idx=1 samples are dropped
+    assert single["dropped"] == 2
+    assert single["transforms"][2]["out_kb"] == 16.0
+    assert report["alloc_kb"][1] >= 24.0
+
+    save_report(report, tmp_path / "bench.json")
+    assert json.loads((tmp_path / "bench.json").read_text()) == report
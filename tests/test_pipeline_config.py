@@ -0,0 +1,25 @@
+from ez_mmdetection.utils.pipeline_config import config_type, train_input_size
+
+
+def test_config_type_drops_the_registry_scope():
+    """Test that scoped, plain and class types give the bare type name."""
+    class EMAHook:
+        pass
+
+    assert config_type(dict(type="mmdet.Resize")) == "Resize"
+    assert config_type(dict(type="CocoMetric")) == "CocoMetric"
+    assert config_type(dict(type=EMAHook)) == "EMAHook"
+    assert config_type(dict()) == ""
+
+
+def test_train_input_size_from_pipeline():
+    """Test that the final padded or cropped size is used."""
+    pipeline = [
+        dict(type="CachedMosaic", img_scale=(640, 640)),
+        dict(type="RandomCrop", crop_size=(480, 640)),
+        dict(type="mmdet.Pad", size=(512, 384)),
+    ]
+    assert train_input_size(pipeline) == (512, 384)
+    assert train_input_size(pipeline[:2]) == (640, 480)
+    assert train_input_size(pipeline[:1]) == (640, 640)
+    assert train_input_size([]) == (640, 640)
@@ -72,3 +72,18 @@ def test_model_name_enum():
     assert "rtmdet_tiny" in [m.value for m in ModelName]
     with pytest.raises(ValueError):
         ModelName("invalid_model")
+
+def test_dataset_config_yolo_splits_require_classes():
+    """Test that YOLO-format splits are accepted only with class names."""
+    splits = dict(
+        train=SplitConfig(
+            ann_file="labels/train", img_dir="images/train", format="yolo"
+        ),
+        val=SplitConfig(ann_file="labels/val", img_dir="images/val", format="yolo"),
+    )
+    cfg = DatasetConfig(data_root=Path("data"), classes=["cat"], **splits)
+    assert cfg.train.format == "yolo"
+    assert SplitConfig(ann_file="a.json", img_dir="imgs").format == "coco"
+
+    with pytest.raises(ValidationError, match="classes"):
+        DatasetConfig(data_root=Path("data"), **splits)
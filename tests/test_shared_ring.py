@@ -0,0 +1,97 @@
+import multiprocessing as mp
+import pickle
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from ez_mmdetection.utils import shared_ring
+from ez_mmdetection.utils.shared_ring import SharedRingBuffer
+
+
+def _sample(key, nbytes=1000):
+    return {"key": key, "img": np.full(nbytes, key % 256, dtype=np.uint8)}
+
+
+def _append_sample(ring, key):
+    ring.append(_sample(key))
+
+
+def test_append_and_read():
+    """Test that entries round-trip and reads return independent copies."""
+    ring = SharedRingBuffer(capacity_bytes=100_000, max_entries=4)
+    assert len(ring) == 0
+    with pytest.raises(IndexError):
+        ring[0]
+
+    ring.append(_sample(1))
+    ring.append(_sample(2))
+    assert len(ring) == 2
+    assert {ring[0]["key"], ring[1]["key"]} == {1, 2}
+
+    entry = ring[0]
+    entry["img"][:] = 0
+    assert ring[0]["img"].any()
+
+
+def test_evicts_by_count_and_bytes():
+    """Test that the oldest entries go once slots or bytes run out."""
+    ring = SharedRingBuffer(capacity_bytes=100_000, max_entries=3)
+    for key in range(5):
+        ring.append(_sample(key))
+    assert sorted(ring[i]["key"] for i in range(len(ring))) == [2, 3, 4]
+
+    # Each entry takes a bit over 3 KB, so only two fit in 8 KB
+    ring = SharedRingBuffer(capacity_bytes=8_000, max_entries=10)
+    for key in range(5):
+        ring.append(_sample(key, nbytes=3000))
+    assert sorted(ring[i]["key"] for i in range(len(ring))) == [3, 4]
+
+
+def test_rejects_oversized_entries():
+    """Test that an entry larger than the buffer is not stored."""
+    ring = SharedRingBuffer(capacity_bytes=1_000, max_entries=4)
+    assert ring.append(_sample(1, nbytes=5000)) is False
+    assert len(ring) == 0
+
+
+def test_entries_are_shared_across_processes():
+    """Test that entries written by worker processes are read by all."""
+    ring = SharedRingBuffer(capacity_bytes=100_000, max_entries=8)
+    ring.append(_sample(0))
+
+    ctx = mp.get_context("fork")
+    workers = [ctx.Process(target=_append_sample, args=(ring, k)) for k in (1, 2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(ring[i]["key"] for i in range(len(ring))) == [0, 1, 2]
+
+
+def test_pickled_ring_attaches_to_the_same_memory():
+    """Test that a pickled ring (as sent to spawned workers) shares entries."""
+    ring = SharedRingBuffer(capacity_bytes=100_000, max_entries=4)
+    # Spawned workers receive the ring while the process is being started
+    with pytest.raises(RuntimeError):
+        pickle.dumps(ring)
+
+    state = ring.__getstate__()
+    copy = SharedRingBuffer.__new__(SharedRingBuffer)
+    copy.__setstate__(state)
+    copy.append(_sample(7))
+    assert ring[0]["key"] == 7
+
+
+def test_attach_unregisters_from_the_tracker_only_on_posix(monkeypatch):
+    """Test that attaching on Windows does not touch the resource tracker."""
+    ring = SharedRingBuffer(capacity_bytes=1000, max_entries=2)
+    tracker = MagicMock()
+    monkeypatch.setattr(shared_ring, "resource_tracker", tracker)
+    monkeypatch.setattr(shared_ring.os, "name", "nt")
+
+    attached = shared_ring._attach(ring._shm.name)
+    attached.close()
+
+    tracker.unregister.assert_not_called()
@@ -0,0 +1,191 @@
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from ez_mmdetection.schemas.sweep import SweepConfig
+from ez_mmdetection.utils.sweep import (
+    TRIAL_REPORT,
+    append_trial_report,
+    best_score,
+    expand_trials,
+    rank_trials,
+    read_trial_report,
+    run_sweep,
+    should_prune,
+    split_cpus,
+)
+
+
+def _config(**kwargs):
+    kwargs.setdefault("dataset", "dataset.toml")
+    kwargs.setdefault(
+        "search",
+        {
+            "training.learning_rate": [0.001, 0.01],
+            "model.name": ["rtmdet_tiny", "rtmdet_s"],
+        },
+    )
+    return SweepConfig(**kwargs)
+
+
+def test_grid_search_expands_every_combination():
+    """Test that a grid search yields every combination, in order."""
+    trials = expand_trials(_config())
+    assert trials == [
+        {"training.learning_rate": 0.001, "model.name": "rtmdet_tiny"},
+        {"training.learning_rate": 0.001, "model.name": "rtmdet_s"},
+        {"training.learning_rate": 0.01, "model.name": "rtmdet_tiny"},
+        {"training.learning_rate": 0.01, "model.name": "rtmdet_s"},
+    ]
+
+
+def test_random_search_samples_ranges_and_choices():
+    """Test that a random search samples within ranges, reproducibly."""
+    config = _config(
+        method="random",
+        num_trials=50,
+        search={
+            "training.learning_rate": {"low": 1e-4, "high": 1e-2, "log": True},
+            "training.epochs": {"low": 10, "high": 20},
+            "training.batch_size": [4, 8],
+        },
+    )
+    trials = expand_trials(config)
+
+    assert len(trials) == 50
+    assert all(1e-4 <= t["training.learning_rate"] <= 1e-2 for t in trials)
+    assert all(isinstance(t["training.epochs"], int) for t in trials)
+    assert {t["training.batch_size"] for t in trials} == {4, 8}
+    assert expand_trials(config) == trials
+
+
+@pytest.mark.parametrize(
+    "kwargs, match",
+    [
+        (dict(search={"training.bogus": [1]}), "Cannot search"),
+        (dict(search={"data.root": ["a"]}), "Cannot search"),
+        (
+            dict(search={"training.learning_rate": {"low": 0.1, "high": 1}}),
+            "list of values",
+        ),
+        (dict(method="random"), "num_trials"),
+        (dict(training={"launcher": "ddp"}), "launcher"),
+        (dict(training={"bogus": 1}), "Unknown training fields"),
+        (dict(search={"model.name": ["resnet"]}), "resnet"),
+    ],
+)
+def test_sweep_config_rejects_invalid_searches(kwargs, match):
+    """Test that invalid searches and training overrides are rejected."""
+    with pytest.raises(ValidationError, match=match):
+        _config(**kwargs)
+
+
+def test_split_cpus_gives_disjoint_near_equal_sets():
+    """Test that CPUs are split into disjoint sets of near-equal size."""
+    sets = split_cpus(list(range(10)), 3)
+    assert [len(s) for s in sets] == [3, 4, 3]
+    assert sorted(c for s in sets for c in s) == list(range(10))
+    with pytest.raises(ValueError):
+        split_cpus([0, 1], 3)
+
+
+def test_median_pruning_compares_best_scores_at_an_epoch(tmp_path):
+    """Test that pruning compares best scores up to the same epoch."""
+    report = tmp_path / TRIAL_REPORT
+    for epoch, score in [(1, 0.2), (2, 0.4), (3, 0.3)]:
+        append_trial_report(report, dict(epoch=epoch, score=score))
+    records = read_trial_report(report)
+
+    assert best_score(records, 1) == 0.2
+    assert best_score(records, 3) == 0.4
+    assert best_score(records, 3, rule="less") == 0.2
+    assert best_score(records, 4) is None  # not validated that far yet
+
+    assert should_prune(0.3, [0.35, 0.4, 0.1])
+    assert not should_prune(0.3, [0.35, 0.2, 0.1])
+    assert not should_prune(0.1, [0.5], min_peers=2)
+    assert should_prune(0.5, [0.2, 0.3], rule="less")
+
+
+def test_rank_trials_puts_unscored_trials_last():
+    """Test that trials rank by score, with unscored trials last."""
+    results = [
+        dict(trial="trial_000", score=0.3),
+        dict(trial="trial_001", score=None),
+        dict(trial="trial_002", score=0.5),
+    ]
+    ranked = [r["trial"] for r in rank_trials(results)]
+    assert ranked == ["trial_002", "trial_000", "trial_001"]
+    assert [r["trial"] for r in rank_trials(results, "less")][0] == "trial_000"
+
+
+class FakeDetector:
+    """Records its CPU affinity and threads, and reports its learning rate."""
+
+    def __init__(self, model_name):
+        """Builds the detector; the model is never loaded."""
+        self.model_name = model_name
+
+    def train_trial(self, dataset_config_path, training, trial):
+        """Writes what the trial process saw and reports a fake score."""
+        if training.learning_rate > 0.05:
+            raise RuntimeError("diverged")
+        work_dir = training.work_dir
+        with open(os.path.join(work_dir, "cpus.json"), "w") as f:
+            json.dump(sorted(os.sched_getaffinity(0)), f)
+        with open(os.path.join(work_dir, "omp_threads.txt"), "w") as f:
+            f.write(os.environ.get("OMP_NUM_THREADS", ""))
+        report = os.path.join(work_dir, TRIAL_REPORT)
+        append_trial_report(report, dict(epoch=1, score=training.learning_rate * 10))
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_getaffinity"), reason="needs CPU affinity")
+def test_run_sweep_pins_trials_and_ranks_them(tmp_path):
+    """Test that trials run on disjoint CPU sets and failures are ranked last."""
+    config = _config(
+        work_dir=str(tmp_path),
+        max_parallel=2,
+        training={"device": "cpu", "epochs": 1},
+        search={"training.learning_rate": [0.01, 0.03, 0.1]},
+    )
+
+    omp_threads = os.environ.get("OMP_NUM_THREADS")
+    leaderboard = run_sweep(config, FakeDetector, poll_interval=0.1)
+
+    assert [r["trial"] for r in leaderboard] == ["trial_001", "trial_000", "trial_002"]
+    assert [r["status"] for r in leaderboard] == ["finished", "finished", "failed"]
+    assert leaderboard[0]["score"] == pytest.approx(0.3)
+    assert leaderboard[0]["params"] == {"training.learning_rate": 0.03}
+    assert json.loads((tmp_path / "leaderboard.json").read_text()) == leaderboard
+    assert "diverged" in (tmp_path / "trial_002" / "trial.log").read_text()
+
+    cpus = [
+        set(json.loads((tmp_path / trial / "cpus.json").read_text()))
+        for trial in ("trial_000", "trial_001")
+    ]
+    all_cpus = set(os.sched_getaffinity(0))
+    assert all(c and c <= all_cpus for c in cpus)
+    for trial, trial_cpus in zip(("trial_000", "trial_001"), cpus):
+        threads = (tmp_path / trial / "omp_threads.txt").read_text()
+        assert threads == str(len(trial_cpus))
+    assert os.environ.get("OMP_NUM_THREADS") == omp_threads
+    if len(all_cpus) >= 2:
+        # Trials 0 and 1 start together on the two halves of the CPUs
+        assert not cpus[0] & cpus[1]
+
+
+def test_sweep_config_resolves_dataset_next_to_the_sweep_toml(tmp_path, monkeypatch):
+    """Test that a relative dataset path is resolved next to the sweep TOML."""
+    (tmp_path / "configs").mkdir()
+    path = tmp_path / "configs" / "sweep.toml"
+    path.write_text(
+        'dataset = "data/dataset.toml"\n'
+        '[search]\n"training.learning_rate" = [0.001, 0.01]\n'
+    )
+    monkeypatch.chdir(tmp_path)
+
+    config = SweepConfig.from_toml(path)
+
+    assert config.dataset == tmp_path / "configs" / "data" / "dataset.toml"
@@ -0,0 +1,49 @@
+import urllib.request
+
+import pytest
+
+from ez_mmdetection.utils.telemetry import (
+    PHASES,
+    MetricsServer,
+    prometheus_text,
+    summarize_iterations,
+)
+
+
+def _records():
+    records = []
+    for i in range(20):
+        record = dict.fromkeys(PHASES, 1.0)
+        record.update(data=60.0 if i < 19 else 600.0, batch_size=8)
+        record["total"] = sum(record[phase] for phase in PHASES)
+        records.append(record)
+    return records
+
+
+def test_summarize_iterations_reports_percentiles_and_throughput():
+    """Test that the summary has phase percentiles and the image throughput."""
+    summary = summarize_iterations(_records())
+
+    assert summary["iters"] == 20
+    assert summary["phases"]["data"]["p50"] == 60.0
+    assert summary["phases"]["data"]["p95"] > 60.0
+    assert summary["phases"]["forward"] == dict(p50=1.0, p95=1.0)
+    total_s = (19 * 68 + 608) / 1000
+    assert summary["images_per_s"] == pytest.approx(160 / total_s)
+    assert summary["data_fraction"] == pytest.approx((19 * 60 + 600) / (19 * 68 + 608))
+
+
+def test_metrics_server_serves_prometheus_text():
+    """Test that the metrics endpoint serves the Prometheus text format."""
+    text = prometheus_text(summarize_iterations(_records()))
+    assert 'ez_mmdet_train_phase_seconds{phase="data",quantile="0.5"} 0.06' in text
+    assert "# TYPE ez_mmdet_train_images_per_s gauge" in text
+
+    server = MetricsServer(0)
+    try:
+        server.text = text
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.read().decode() == text
+    finally:
+        server.close()
@@ -120,3 +120,49 @@ def test_incorrect_type_raises_error(tmp_path: Path):
 
     with pytest.raises(ValidationError):
         load_user_config(config_path)
+
+
+def test_node_rank_must_be_below_nnodes():
+    """Tests that a node rank outside the node count is rejected."""
+    with pytest.raises(ValidationError, match="node_rank"):
+        TrainingSection(launcher="ddp", nnodes=2, node_rank=2)
+
+
+def test_batch_size_auto_and_effective_batch_size():
+    """Tests 'auto' batch sizes and that an effective batch size requires one."""
+    training = TrainingSection(batch_size="auto", effective_batch_size=64)
+    assert training.batch_size == "auto"
+    with pytest.raises(ValidationError):
+        TrainingSection(batch_size="large")
+    with pytest.raises(ValidationError, match="effective_batch_size"):
+        TrainingSection(batch_size=8, effective_batch_size=64)
+
+
+def test_vectorized_coco_eval_requires_in_memory_eval():
+    """Test that the vectorized COCO backend requires in-memory evaluation."""
+    training = TrainingSection(coco_eval_backend="vectorized")
+    assert training.coco_eval_backend == "vectorized"
+    with pytest.raises(ValidationError, match="in_memory_eval"):
+        TrainingSection(coco_eval_backend="vectorized", in_memory_eval=False)
+
+
+def test_full_val_epochs_requires_val_subset_size():
+    """Test that full validation epochs are only accepted with a validation subset."""
+    training = TrainingSection(val_subset_size=100, full_val_epochs=[10, 20])
+    assert training.full_val_epochs == [10, 20]
+    with pytest.raises(ValidationError, match="val_subset_size"):
+        TrainingSection(full_val_epochs=[10])
+
+
+def test_telemetry_port_requires_telemetry():
+    """Test that a telemetry port is only accepted with telemetry."""
+    assert TrainingSection(telemetry=True, telemetry_port=9100).telemetry_port == 9100
+    with pytest.raises(ValidationError, match="requires telemetry"):
+        TrainingSection(telemetry_port=9100)
+
+
+def test_progressive_sizes_must_be_multiples_of_32():
+    """Test that progressive sizes must be multiples of 32."""
+    assert TrainingSection(progressive_sizes=[320, 480]).progressive_sizes == [320, 480]
+    with pytest.raises(ValidationError, match="multiples of 32"):
+        TrainingSection(progressive_sizes=[300])
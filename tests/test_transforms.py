@@ -0,0 +1,129 @@
+import cv2
+import numpy as np
+import pytest
+from mmdet.structures.bbox import HorizontalBoxes
+
+from ez_mmdetection.datasets.transforms import (
+    ApplyDecodeScale,
+    LoadImageFromFileReduced,
+    choose_jpeg_reduction,
+)
+
+
+@pytest.fixture
+def large_jpeg(tmp_path):
+    """Writes a 2560x1920 JPEG with a bright square at a known location."""
+    img = np.zeros((1920, 2560, 3), dtype=np.uint8)
+    img[800:1200, 1000:1400] = 255
+    path = tmp_path / "large.jpg"
+    cv2.imwrite(str(path), img)
+    return path
+
+
+def test_choose_jpeg_reduction():
+    """Test that the largest reduction not undershooting the target is used."""
+    assert choose_jpeg_reduction((4000, 3000), (640, 640)) == 4
+    assert choose_jpeg_reduction((5120, 3840), (640, 640)) == 8
+    assert choose_jpeg_reduction((5120, 3840), (640, 640), max_reduction=2) == 2
+    assert choose_jpeg_reduction((640, 480), (640, 640)) == 1
+
+
+def test_load_image_reduced_sets_shapes(large_jpeg):
+    """Test that the JPEG is decoded at 1/4 while ori_shape stays full size."""
+    loader = LoadImageFromFileReduced(target_scale=(640, 640))
+    results = loader(dict(img_path=str(large_jpeg)))
+
+    assert results["img"].shape == (480, 640, 3)
+    assert results["img_shape"] == (480, 640)
+    assert results["ori_shape"] == (1920, 2560)
+    assert results["decode_scale"] == (0.25, 0.25)
+
+
+def test_load_image_reduced_png_full_resolution(tmp_path):
+    """Test that non-JPEG images fall back to a full-resolution decode."""
+    path = tmp_path / "image.png"
+    cv2.imwrite(str(path), np.zeros((1920, 2560, 3), dtype=np.uint8))
+
+    results = LoadImageFromFileReduced(target_scale=(640, 640))(
+        dict(img_path=str(path))
+    )
+
+    assert results["img"].shape == (1920, 2560, 3)
+    assert results["decode_scale"] == (1.0, 1.0)
+
+
+def test_apply_decode_scale_rescales_annotations(large_jpeg):
+    """Test that training boxes in original coordinates follow the decode."""
+    results = LoadImageFromFileReduced(target_scale=(640, 640))(
+        dict(img_path=str(large_jpeg))
+    )
+    results["gt_bboxes"] = HorizontalBoxes(
+        np.array([[1000, 800, 1400, 1200]], dtype=np.float32)
+    )
+
+    results = ApplyDecodeScale()(results)
+
+    np.testing.assert_allclose(
+        results["gt_bboxes"].numpy(), [[250, 200, 350, 300]]
+    )
+    assert "decode_scale" not in results
+
+
+def test_apply_decode_scale_composes_scale_factor(large_jpeg):
+    """Test that predictions can be mapped back to the original image."""
+    results = LoadImageFromFileReduced(target_scale=(640, 640))(
+        dict(img_path=str(large_jpeg))
+    )
+    # What a Resize to 640 on the (already 640-wide) decoded image records
+    results["scale_factor"] = (1.0, 1.0)
+
+    results = ApplyDecodeScale()(results)
+
+    assert results["scale_factor"] == (0.25, 0.25)
+    assert results["ori_shape"] == (1920, 2560)
+
+
+def test_apply_decode_scale_around_resize(large_jpeg):
+    """Test that a Resize between the two steps keeps the decode scale."""
+    results = LoadImageFromFileReduced(target_scale=(640, 640))(
+        dict(img_path=str(large_jpeg))
+    )
+    results["gt_bboxes"] = HorizontalBoxes(
+        np.array([[1000, 800, 1400, 1200]], dtype=np.float32)
+    )
+
+    results = ApplyDecodeScale(scale_factor=False)(results)
+    np.testing.assert_allclose(results["gt_bboxes"].numpy(), [[250, 200, 350, 300]])
+    assert "scale_factor" not in results
+    # What a Resize to half of the decoded image records, overwriting any
+    results["scale_factor"] = (0.5, 0.5)
+    results = ApplyDecodeScale(annotations=False)(results)
+
+    assert results["scale_factor"] == (0.125, 0.125)
+    np.testing.assert_allclose(results["gt_bboxes"].numpy(), [[250, 200, 350, 300]])
+    assert "decode_scale" not in results
+
+
+def test_load_image_from_cache(tmp_path, large_jpeg):
+    """Test that cached images carry the decode scale and others fall back."""
+    from ez_mmdetection.datasets.transforms import LoadImageFromCache
+    from ez_mmdetection.schemas.dataset import SplitConfig
+    from ez_mmdetection.utils.image_cache import build_image_cache
+
+    ann_dir = tmp_path / "annotations"
+    ann_dir.mkdir()
+    (ann_dir / "train.json").write_text('{"images": [{"file_name": "large.jpg"}]}')
+    split = SplitConfig(ann_file="annotations/train.json", img_dir=".")
+    cache_dir = build_image_cache(split, tmp_path, tmp_path / "cache", max_side=1280)
+
+    loader = LoadImageFromCache(cache_dir=str(cache_dir))
+    results = loader(dict(img_path=str(large_jpeg)))
+    assert results["img"].shape == (960, 1280, 3)
+    assert results["ori_shape"] == (1920, 2560)
+    assert results["decode_scale"] == (0.5, 0.5)
+
+    other = tmp_path / "other.png"
+    cv2.imwrite(str(other), np.zeros((10, 20, 3), dtype=np.uint8))
+    results = loader(dict(img_path=str(other)))
+    assert results["img"].shape == (10, 20, 3)
+    assert results["decode_scale"] == (1.0, 1.0)
@@ -0,0 +1,234 @@
+import json
+from collections import Counter
+
+import pytest
+import torch
+from mmengine.dataset import BaseDataset
+from mmengine.evaluator import BaseMetric
+from mmengine.hooks import Hook
+from mmengine.model import BaseModel
+from mmengine.runner import Runner
+
+import ez_mmdetection.engine.loops as loops
+from ez_mmdetection.engine import SubsetValLoop
+from ez_mmdetection.utils.val_subset import (
+    labels_fingerprint,
+    load_val_subset,
+    stratified_subset,
+    write_val_subset,
+)
+
+
+def _image_labels(num_imgs=1000, seed=0):
+    """Returns (img id, labels) with a common, a medium and two rare classes."""
+    rng = torch.Generator().manual_seed(seed)
+    image_labels = []
+    for i in range(num_imgs):
+        labels = [0] * int(torch.randint(0, 4, (1,), generator=rng))
+        if i % 10 == 0:
+            labels.append(1)
+        if i in (17, 503):
+            labels.append(2)
+        if i == 999:
+            labels.append(3)
+        image_labels.append((i + 100, labels))
+    return image_labels
+
+
+def test_stratified_subset_keeps_class_shares():
+    """Test that each class keeps its share of images, rare classes at least one."""
+    image_labels = _image_labels()
+    img_ids = stratified_subset(image_labels, 100, seed=0)
+
+    assert len(img_ids) == len(set(img_ids)) == 100
+    assert img_ids == sorted(img_ids)
+    labels_of = dict(image_labels)
+    images_with = Counter(c for i in img_ids for c in set(labels_of[i]))
+    assert images_with[1] == 10
+    assert images_with[2] >= 1 and images_with[3] == 1
+    assert stratified_subset(image_labels, 100, seed=0) == img_ids
+    assert stratified_subset(image_labels, 100, seed=1) != img_ids
+
+
+def test_stratified_subset_larger_than_split_keeps_all():
+    """Test that a subset at least as large as the split keeps every image."""
+    image_labels = _image_labels(num_imgs=20)
+    assert stratified_subset(image_labels, 50) == [i for i, _ in image_labels]
+
+
+def test_val_subset_cache_tracks_labels(tmp_path):
+    """Test that the cache is only used for the same labels, size and seed."""
+    image_labels = _image_labels(num_imgs=20)
+    fingerprint = labels_fingerprint(image_labels)
+    cache_file = tmp_path / "cache" / "val.json"
+
+    assert load_val_subset(cache_file, fingerprint, 2, 0) is None
+    write_val_subset(cache_file, fingerprint, 2, 0, [3, 8])
+    assert load_val_subset(cache_file, fingerprint, 2, 0) == [3, 8]
+    assert load_val_subset(cache_file, fingerprint, 3, 0) is None
+    assert load_val_subset(cache_file, fingerprint, 2, 1) is None
+    image_labels[0] = (image_labels[0][0], [3])
+    assert load_val_subset(cache_file, labels_fingerprint(image_labels), 2, 0) is None
+
+
+class ToyModel(BaseModel):
+    """A linear model predicting only the image ids."""
+
+    def __init__(self):
+        """Builds the single linear layer."""
+        super().__init__()
+        self.linear = torch.nn.Linear(1, 1)
+
+    def forward(self, inputs, img_id=None, mode="tensor"):
+        """Returns the loss, or one prediction per image id."""
+        inputs = torch.stack(inputs) if isinstance(inputs, list) else inputs
+        if mode == "loss":
+            return {"loss": self.linear(inputs).pow(2).mean()}
+        return [dict(img_id=i) for i in img_id]
+
+
+class ToyDetDataset(BaseDataset):
+    """Forty images, one in ten of them with the rare class."""
+
+    METAINFO = {"classes": ("common", "rare")}
+
+    def load_data_list(self):
+        """Returns one single-instance data info per image."""
+        return [
+            dict(
+                img_id=i,
+                instances=[dict(bbox_label=int(i % 10 == 0), ignore_flag=0)],
+            )
+            for i in range(40)
+        ]
+
+    def __getitem__(self, idx):
+        """Returns a constant input with the image id."""
+        info = self.get_data_info(idx)
+        return dict(inputs=torch.ones(1), img_id=info["img_id"])
+
+
+class ImageIdMetric(BaseMetric):
+    """Records the image ids of each evaluation."""
+
+    evaluated = []
+
+    def __init__(self):
+        """Builds the metric without an image id filter."""
+        super().__init__()
+        self.img_ids = None
+
+    def process(self, data_batch, data_samples):
+        """Collects the image ids of a batch."""
+        self.results.extend(sample["img_id"] for sample in data_samples)
+
+    def compute_metrics(self, results):
+        """Records the evaluated image ids and returns their count."""
+        ImageIdMetric.evaluated.append((sorted(results), self.img_ids))
+        return dict(images=len(results))
+
+
+class MetricsRecorder(Hook):
+    """Records the metrics of each validation."""
+
+    def __init__(self):
+        """Starts with no recorded metrics."""
+        self.metrics = []
+
+    def after_val_epoch(self, runner, metrics=None):
+        """Records the metrics of a validation."""
+        self.metrics.append(dict(metrics))
+
+
+def _runner(work_dir, ann_file, cache_file, recorder=None):
+    loader = dict(
+        dataset=ToyDetDataset(ann_file=str(ann_file)),
+        sampler=dict(type="DefaultSampler", shuffle=False),
+        batch_size=8,
+        num_workers=0,
+    )
+    return Runner(
+        model=ToyModel(),
+        work_dir=str(work_dir),
+        train_dataloader=loader,
+        val_dataloader=loader,
+        val_evaluator=dict(type=ImageIdMetric),
+        optim_wrapper=dict(optimizer=dict(type="SGD", lr=0.01)),
+        train_cfg=dict(by_epoch=True, max_epochs=4, val_interval=1),
+        val_cfg=dict(
+            type=SubsetValLoop,
+            subset_size=10,
+            full_val_epochs=[2],
+            cache_file=str(cache_file),
+        ),
+        default_hooks=dict(
+            checkpoint=dict(type="CheckpointHook", save_best="images", rule="greater")
+        ),
+        custom_hooks=[recorder] if recorder else None,
+        default_scope="mmengine",
+    )
+
+
+def test_subset_val_loop_validates_subset_between_full_runs(tmp_path, monkeypatch):
+    """Test the subset/full schedule, the metric names and ids, and the cache."""
+    # A directory, like the label dirs of YOLO datasets
+    ann_file = tmp_path / "labels"
+    ann_file.mkdir()
+    cache_file = tmp_path / "cache" / "val.json"
+    ImageIdMetric.evaluated.clear()
+    recorder = MetricsRecorder()
+
+    _runner(tmp_path, ann_file, cache_file, recorder).train()
+
+    sizes = [len(ids) for ids, _ in ImageIdMetric.evaluated]
+    assert sizes == [10, 40, 10, 40]
+    assert [list(m) for m in recorder.metrics] == [
+        ["subset/images"],
+        ["images"],
+        ["subset/images"],
+        ["images"],
+    ]
+    # Only full validations compete for the best checkpoint
+    assert (tmp_path / "best_images_epoch_2.pth").exists()
+    subset, preset_ids = ImageIdMetric.evaluated[0]
+    assert preset_ids == subset
+    assert sum(img_id % 10 == 0 for img_id in subset) == 1
+    assert ImageIdMetric.evaluated[2][0] == subset
+    assert json.loads(cache_file.read_text())["img_ids"] == subset
+
+    def reselect(*args, **kwargs):
+        raise AssertionError("the cached subset should be reused")
+
+    monkeypatch.setattr(loops, "stratified_subset", reselect)
+    runner = _runner(tmp_path / "again", ann_file, cache_file)
+    assert runner.val_loop.subset_evaluator.metrics[0].img_ids == subset
+
+
+@pytest.mark.parametrize("subset_size", [None, 40])
+def test_subset_val_loop_without_subset_validates_full_split(tmp_path, subset_size):
+    """Test that the loop validates the full split when no subset applies."""
+    ann_file = tmp_path / "val.json"
+    ann_file.write_text("{}")
+    runner = _runner(tmp_path, ann_file, tmp_path / "cache.json")
+    loop = SubsetValLoop(
+        runner, runner.val_loop.dataloader, dict(type=ImageIdMetric), subset_size
+    )
+    assert loop.subset_dataloader is None
+
+
+def test_subset_val_loop_keeps_subset_when_cache_is_not_writable(
+    tmp_path, monkeypatch
+):
+    """Test that a failed cache write (read-only mount) keeps the subset in memory."""
+    ann_file = tmp_path / "labels"
+    ann_file.mkdir()
+    cache_file = tmp_path / "cache" / "val.json"
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("Read-only file system")
+
+    monkeypatch.setattr(loops, "write_val_subset", read_only)
+    runner = _runner(tmp_path, ann_file, cache_file)
+
+    assert len(runner.val_loop.subset_evaluator.metrics[0].img_ids) == 10
+    assert not cache_file.exists()
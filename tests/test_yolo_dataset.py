@@ -0,0 +1,114 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from ez_mmdetection.utils.converters import (
+    list_images,
+    yolo_image_sizes,
+    yolo_size_index_path,
+)
+
+
+@pytest.fixture
+def yolo_split(tmp_path):
+    """Creates a YOLO split with a box, a polygon, an empty and an unlabeled image."""
+    images, labels = tmp_path / "images", tmp_path / "labels"
+    images.mkdir()
+    labels.mkdir()
+    img = np.zeros((100, 200, 3), np.uint8)
+    for name in ("a.jpg", "b.jpg", "empty.jpg", "unlabeled.jpg"):
+        cv2.imwrite(str(images / name), img)
+    cv2.imwrite(str(images / "small.jpg"), img[:10, :10])
+    (labels / "a.txt").write_text("0 0.5 0.5 0.5 0.2\n1 0.5 0.5 0.1 0.1\n")
+    (labels / "b.txt").write_text("1 0 0 1 0 1 1\n")
+    (labels / "empty.txt").write_text("")
+    (labels / "small.txt").write_text("0 0.5 0.5 0.5 0.5\n")
+    return images, labels
+
+
+def test_yolo_image_sizes_are_persisted(yolo_split, tmp_path, monkeypatch):
+    """Test that headers are read once and the sizes reused afterwards."""
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(tmp_path / "cache"))
+    images, labels = yolo_split
+    rel_paths = list_images(images)
+    sizes = yolo_image_sizes(images, labels, rel_paths)
+
+    assert sizes["small.jpg"] == (10, 10)
+    index_path = yolo_size_index_path(labels)
+    assert index_path.parent == tmp_path / "cache" / "yolo_sizes"
+    assert json.loads(index_path.read_text())["a.jpg"] == [200, 100]
+    # The dataset directory is left untouched
+    assert sorted(p.name for p in labels.iterdir()) == [
+        "a.txt", "b.txt", "empty.txt", "small.txt"
+    ]
+
+    monkeypatch.setattr(
+        "ez_mmdetection.utils.converters.read_decoded_size",
+        lambda path: pytest.fail("sizes should come from the index"),
+    )
+    assert yolo_image_sizes(images, labels, rel_paths) == sizes
+
+
+def test_yolo_image_sizes_fall_back_to_memory(yolo_split, tmp_path, monkeypatch):
+    """Test that an unwritable cache keeps the sizes in memory instead."""
+    read_only = tmp_path / "read_only"
+    read_only.write_text("")  # a file, so the index directory cannot be created
+    monkeypatch.setenv("EZ_MMDET_CACHE_DIR", str(read_only))
+    images, labels = yolo_split
+    rel_paths = list_images(images)
+    sizes = yolo_image_sizes(images, labels, rel_paths)
+
+    assert sizes["a.jpg"] == (200, 100)
+    monkeypatch.setattr(
+        "ez_mmdetection.utils.converters.read_decoded_size",
+        lambda path: pytest.fail("sizes should come from memory"),
+    )
+    assert yolo_image_sizes(images, labels, rel_paths) == sizes
+
+
+def test_yolo_dataset_parses_labels_lazily(yolo_split):
+    """Test that data infos carry absolute xyxy boxes and polygon masks."""
+    from ez_mmdetection.datasets import YoloDataset
+
+    images, labels = yolo_split
+    dataset = YoloDataset(
+        ann_file=str(labels),
+        data_prefix=dict(img=str(images)),
+        metainfo=dict(classes=("cat", "dog")),
+        pipeline=[],
+    )
+    assert len(dataset) == 5
+    infos = {
+        info["img_path"].split("/")[-1]: info
+        for info in map(dataset.get_data_info, range(5))
+    }
+
+    a = infos["a.jpg"]
+    assert (a["width"], a["height"]) == (200, 100)
+    assert [i["bbox"] for i in a["instances"]] == [
+        [50.0, 40.0, 150.0, 60.0],
+        [90.0, 45.0, 110.0, 55.0],
+    ]
+    assert [i["bbox_label"] for i in a["instances"]] == [0, 1]
+    mask = infos["b.jpg"]["instances"][0]["mask"]
+    assert mask == [[0.0, 0.0, 200.0, 0.0, 200.0, 100.0]]
+    assert infos["unlabeled.jpg"]["instances"] == []
+
+
+def test_yolo_dataset_filters_without_parsing(yolo_split):
+    """Test that filter_cfg drops empty and small images."""
+    from ez_mmdetection.datasets import YoloDataset
+
+    images, labels = yolo_split
+    dataset = YoloDataset(
+        ann_file=str(labels),
+        data_prefix=dict(img=str(images)),
+        metainfo=dict(classes=("cat", "dog")),
+        filter_cfg=dict(filter_empty_gt=True, min_size=32),
+        pipeline=[],
+    )
+    paths = [dataset.get_data_info(i)["img_path"] for i in range(len(dataset))]
+    names = sorted(path.split("/")[-1] for path in paths)
+    assert names == ["a.jpg", "b.jpg"]